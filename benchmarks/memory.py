@@ -0,0 +1,101 @@
+import sys
+import os
+sys.path.append( os.path.dirname( os.path.dirname( os.path.abspath(__file__) ) ) )
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import tempfile
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from pmx_scripting import core
+from pmx_scripting import pmx_parser
+from synthetic import TIERS, make_model
+
+helptext = '''> memory:
+Measure how much memory a model takes once it is read, in each of the ways read_pmx() can read it, using synthetic
+models of several sizes (see synthetic.py). "model" is what is still allocated after reading, "peak" is the most that
+was allocated at any point during the read. Measured with tracemalloc, so only memory allocated by Python is counted.
+Results can be saved as JSON.
+
+Example:  python benchmarks/memory.py -t 100k -t 500k -o mem.json
+'''
+
+
+def measure(func: Callable) -> Tuple[int, int]:
+	"""
+	Run a function and measure the memory it allocates. Anything it prints is thrown away.
+
+	:param func: the thing to measure, whatever it returns is kept alive until the measurement is done
+	:return: (bytes still allocated when it returns, most bytes allocated at once while it ran)
+	"""
+	gc.collect()
+	tracemalloc.start()
+	try:
+		with contextlib.redirect_stdout(io.StringIO()):
+			keep = func()
+		current, peak = tracemalloc.get_traced_memory()
+	finally:
+		tracemalloc.stop()
+	del keep
+	return current, peak
+
+
+def _read_lazy_all(path: str):
+	pmx = pmx_parser.read_pmx(path, lazy=True, progress=None)
+	pmx.load_all()
+	return pmx
+
+
+def run_tier(tier: str, workdir: str) -> Dict[str, dict]:
+	"""
+	Measure every way of reading one size of synthetic model.
+
+	:param tier: key of TIERS
+	:param workdir: directory for the temporary model file
+	:return: dict of read mode -> {"model": bytes, "peak": bytes}
+	"""
+	core.MY_PRINT_FUNC("Generating the '%s' model..." % tier)
+	path = os.path.join(workdir, "mem_%s.pmx" % tier)
+	with contextlib.redirect_stdout(io.StringIO()):
+		pmx_parser.write_pmx(path, make_model(TIERS[tier]), validate="off", progress=None)
+	modes = [
+		("read_pmx",          lambda: pmx_parser.read_pmx(path, progress=None)),
+		("read_pmx_lazy_all", lambda: _read_lazy_all(path)),
+		("read_pmx_columnar", lambda: pmx_parser.read_pmx(path, columnar=True, progress=None)),
+	]
+	results = {}
+	for name, func in modes:
+		current, peak = measure(func)
+		results[name] = {"model": current, "peak": peak}
+		core.MY_PRINT_FUNC("  %-24s model %9.1f MB   peak %9.1f MB" % (name, current / 2**20, peak / 2**20))
+	return results
+
+
+def main(argv: List[str] = None) -> int:
+	parser = argparse.ArgumentParser(description=helptext, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("-t", "--tier", dest="tiers", action="append", choices=list(TIERS),
+						help="model size to run, can be given more than once (default: 100k)")
+	parser.add_argument("-o", "--output", help="save the results to this JSON file")
+	args = parser.parse_args(argv)
+
+	results = {}
+	with tempfile.TemporaryDirectory() as workdir:
+		for tier in args.tiers or ["100k"]:
+			core.MY_PRINT_FUNC("")
+			core.MY_PRINT_FUNC("===== %s =====" % tier)
+			for name, res in run_tier(tier, workdir).items():
+				results["%s/%s" % (tier, name)] = res
+	if args.output:
+		with open(args.output, "w", encoding="utf-8") as f:
+			json.dump({"python": sys.version.split()[0], "results": results}, f, indent=1)
+		core.MY_PRINT_FUNC("")
+		core.MY_PRINT_FUNC("Saved results to '%s'" % args.output)
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,222 @@
+import sys
+import os
+sys.path.append( os.path.dirname( os.path.dirname( os.path.abspath(__file__) ) ) )
+sys.path.append( os.path.join( os.path.dirname( os.path.dirname( os.path.abspath(__file__) ) ), "tools" ) )
+
+import argparse
+import contextlib
+import datetime
+import importlib
+import io
+import json
+import platform
+import statistics
+import tempfile
+import time
+import traceback
+from typing import Callable, Dict, List
+
+from pmx_scripting import core
+from pmx_scripting import pmx_parser
+from pmx_scripting.pmx_validate import validate_pmx
+from batch import BATCH_TOOLS
+from synthetic import TIERS, make_model
+
+helptext = '''> run_benchmarks:
+Time reading, writing, validating, and the batch-able tool scripts on synthetic models of several sizes, without any
+prompts and without needing any real model files. See synthetic.py for what the models look like.
+Results can be saved as JSON and compared against an earlier run. If anything got slower than the threshold allows,
+the exit code is 1, so this can be used to catch regressions automatically.
+
+Example:  python benchmarks/run_benchmarks.py -t 10k -t 100k -o new.json --compare baseline.json --threshold 0.2
+'''
+
+
+# a benchmark this much slower than the baseline, in seconds, is never a regression no matter the ratio.
+# the small ones are mostly noise
+DEFAULT_MIN_DELTA = 0.005
+
+
+def time_runs(func: Callable, repeat: int, setup: Callable = None) -> List[float]:
+	"""
+	Time several runs of a function. Anything it prints is thrown away.
+
+	:param func: the thing to time, gets whatever setup() returns as its arguments
+	:param repeat: how many times to run it
+	:param setup: untimed function run before each run, returns a tuple of args for func, or None for no args
+	:return: list of seconds for each run
+	"""
+	times = []
+	for i in range(repeat):
+		with contextlib.redirect_stdout(io.StringIO()):
+			args = setup() if setup is not None else ()
+			start = time.perf_counter()
+			func(*args)
+			times.append(time.perf_counter() - start)
+	return times
+
+
+def _summarize(times: List[float]) -> dict:
+	return {"min": min(times), "median": statistics.median(times), "runs": times}
+
+
+def run_tier(tier: str, tools: List[str], repeat: int, workdir: str) -> Dict[str, dict]:
+	"""
+	Run every benchmark on one size of synthetic model.
+
+	:param tier: key of TIERS
+	:param tools: names of the tool scripts to time, keys of BATCH_TOOLS
+	:param repeat: how many runs of each
+	:param workdir: directory for the temporary model file
+	:return: dict of benchmark name -> summary of the times, or {"error": traceback} if it failed
+	"""
+	core.MY_PRINT_FUNC("Generating the '%s' model..." % tier)
+	start = time.perf_counter()
+	pmx = make_model(TIERS[tier])
+	core.MY_PRINT_FUNC("...done in %.2fs" % (time.perf_counter() - start))
+	path = os.path.join(workdir, "bench_%s.pmx" % tier)
+
+	def fresh_copy():
+		# tools change the model, so each run gets its own copy read from the file
+		return (pmx_parser.read_pmx(path, use_numpy=pmx_parser.np is not None, progress=None),)
+
+	benches = [
+		("write_pmx",       lambda: pmx_parser.write_pmx(path, pmx, validate="off", progress=None), None),
+		("read_pmx",        lambda: pmx_parser.read_pmx(path, progress=None), None),
+		("read_pmx_lazy",   lambda: pmx_parser.read_pmx(path, lazy=True, progress=None), None),
+		("validate_full",   lambda: validate_pmx(pmx, "full"), None),
+		("validate_fast",   lambda: validate_pmx(pmx, "fast"), None),
+	]
+	if pmx_parser.np is not None:
+		benches.insert(2, ("read_pmx_numpy", lambda: pmx_parser.read_pmx(path, use_numpy=True, progress=None), None))
+	for name in tools:
+		funcname, _ = BATCH_TOOLS[name]
+		func = getattr(importlib.import_module(name), funcname)
+		benches.append(("tool_" + name, func, fresh_copy))
+
+	results = {}
+	for name, func, setup in benches:
+		try:
+			times = time_runs(func, repeat, setup)
+		except Exception:
+			results[name] = {"error": traceback.format_exc()}
+			core.MY_PRINT_FUNC("  %-32s FAILED" % name)
+			continue
+		results[name] = _summarize(times)
+		core.MY_PRINT_FUNC("  %-32s min %9.4fs   median %9.4fs" % (name, min(times), results[name]["median"]))
+	return results
+
+
+def run_benchmarks(tiers: List[str], tools: List[str] = None, repeat=3) -> dict:
+	"""
+	:param tiers: keys of TIERS, smallest first is nicest
+	:param tools: names of the tool scripts to time, default is every one in BATCH_TOOLS
+	:param repeat: how many runs of each
+	:return: dict with "meta" (machine info) and "results" ("tier/benchmark" -> summary), ready for json.dump()
+	"""
+	if tools is None:
+		tools = list(BATCH_TOOLS)
+	for tier in tiers:
+		if tier not in TIERS:
+			raise RuntimeError("unknown tier '%s', choose from: %s" % (tier, ", ".join(TIERS)))
+	for name in tools:
+		if name not in BATCH_TOOLS:
+			raise RuntimeError("unknown or interactive tool '%s', choose from: %s" % (name, ", ".join(BATCH_TOOLS)))
+	results = {}
+	with tempfile.TemporaryDirectory() as workdir:
+		for tier in tiers:
+			core.MY_PRINT_FUNC("")
+			core.MY_PRINT_FUNC("===== %s =====" % tier)
+			for name, summary in run_tier(tier, tools, repeat, workdir).items():
+				results["%s/%s" % (tier, name)] = summary
+	meta = {
+		"date": datetime.datetime.now().isoformat(timespec="seconds"),
+		"python": platform.python_version(),
+		"platform": platform.platform(),
+		"numpy": None if pmx_parser.np is None else pmx_parser.np.__version__,
+		"repeat": repeat,
+		"tiers": {tier: TIERS[tier]._asdict() for tier in tiers},
+	}
+	# WeightMode keys can't go in JSON as-is
+	for spec in meta["tiers"].values():
+		spec["weight_mix"] = {mode.name: f for mode, f in spec["weight_mix"].items()}
+	return {"meta": meta, "results": results}
+
+
+def compare_results(new: dict, old: dict, threshold: float, min_delta=DEFAULT_MIN_DELTA) -> List[str]:
+	"""
+	Compare the fastest run of each benchmark against a baseline and print a table of the changes.
+
+	:param new: from run_benchmarks()
+	:param old: from run_benchmarks(), loaded from an earlier run
+	:param threshold: allowed slowdown as a fraction, 0.2 means 20% slower is still ok
+	:param min_delta: a slowdown smaller than this many seconds is always ok
+	:return: list of the benchmark names that regressed
+	"""
+	core.MY_PRINT_FUNC("")
+	core.MY_PRINT_FUNC("Compared to the baseline from %s:" % old.get("meta", {}).get("date", "?"))
+	regressed = []
+	for name, res in new["results"].items():
+		base = old["results"].get(name)
+		if base is None or "error" in res or "error" in base:
+			continue
+		ratio = res["min"] / base["min"] if base["min"] > 0 else 1.0
+		slower = res["min"] > base["min"] * (1 + threshold) and res["min"] - base["min"] > min_delta
+		if slower:
+			regressed.append(name)
+		core.MY_PRINT_FUNC("  %-40s %9.4fs -> %9.4fs  %6.2fx  %s" % (name, base["min"], res["min"], ratio,
+																   "REGRESSION" if slower else ""))
+	missing = [name for name in old["results"] if name not in new["results"]]
+	if missing:
+		core.MY_PRINT_FUNC("  (not run this time: %s)" % ", ".join(missing))
+	return regressed
+
+
+def main(argv: List[str] = None) -> int:
+	parser = argparse.ArgumentParser(description=helptext, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("-t", "--tier", dest="tiers", action="append", choices=list(TIERS),
+						help="model size to run, can be given more than once (default: 10k)")
+	parser.add_argument("--tool", dest="tools", action="append", choices=list(BATCH_TOOLS),
+						help="tool to time, can be given more than once (default: all of them)")
+	parser.add_argument("--no-tools", action="store_true", help="only time reading, writing, & validating")
+	parser.add_argument("-r", "--repeat", type=int, default=3, help="runs of each benchmark, the fastest is used (default: 3)")
+	parser.add_argument("-o", "--output", help="save the results to this JSON file")
+	parser.add_argument("--compare", help="JSON file from an earlier run to compare against")
+	parser.add_argument("--threshold", type=float, default=0.2,
+						help="allowed slowdown compared to the baseline, as a fraction (default: 0.2)")
+	parser.add_argument("--min-delta", type=float, default=DEFAULT_MIN_DELTA,
+						help="slowdowns smaller than this many seconds are ignored (default: %g)" % DEFAULT_MIN_DELTA)
+	args = parser.parse_args(argv)
+
+	baseline = None
+	if args.compare:
+		# load it first so a bad path fails before spending minutes on benchmarks
+		with open(args.compare, "r", encoding="utf-8") as f:
+			baseline = json.load(f)
+	tools = [] if args.no_tools else args.tools
+	results = run_benchmarks(args.tiers or ["10k"], tools, max(1, args.repeat))
+	if args.output:
+		with open(args.output, "w", encoding="utf-8") as f:
+			json.dump(results, f, indent=1)
+		core.MY_PRINT_FUNC("")
+		core.MY_PRINT_FUNC("Saved results to '%s'" % args.output)
+
+	failed = [name for name, res in results["results"].items() if "error" in res]
+	for name in failed:
+		core.MY_PRINT_FUNC("")
+		core.MY_PRINT_FUNC("%s FAILED:" % name)
+		core.MY_PRINT_FUNC(results["results"][name]["error"].rstrip())
+	regressed = []
+	if baseline is not None:
+		regressed = compare_results(results, baseline, args.threshold, args.min_delta)
+		core.MY_PRINT_FUNC("")
+		if regressed:
+			core.MY_PRINT_FUNC("%d benchmark(s) got more than %d%% slower: %s" % (len(regressed), 100 * args.threshold,
+																				  ", ".join(regressed)))
+		else:
+			core.MY_PRINT_FUNC("No regressions beyond %d%%" % (100 * args.threshold))
+	return 1 if (regressed or failed) else 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
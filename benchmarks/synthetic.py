@@ -0,0 +1,264 @@
+"""
+Generate synthetic PMX models for benchmarking. The models are nonsense to look at, but they are structurally valid
+(they pass Pmx.validate() and can be written & read back) and every kind of thing in them can be scaled up or down.
+The same ModelSpec and seed always make exactly the same model.
+
+	from synthetic import ModelSpec, make_model, TIERS
+	pmx = make_model(TIERS["100k"])
+	pmx = make_model(ModelSpec(verts=5000, faces=8000, morphs_per_type=10))
+"""
+
+import sys
+import os
+sys.path.append( os.path.dirname( os.path.dirname( os.path.abspath(__file__) ) ) )
+
+import math
+import random
+from typing import Dict, List, NamedTuple
+
+from pmx_scripting import pmx_struct as pmxstruct
+
+
+__all__ = ['ModelSpec', 'TIERS', 'make_model']
+
+
+# what fraction of the vertices use each weight mode, by default roughly like a typical character model
+DEFAULT_WEIGHT_MIX = {
+	pmxstruct.WeightMode.BDEF1: 0.30,
+	pmxstruct.WeightMode.BDEF2: 0.40,
+	pmxstruct.WeightMode.BDEF4: 0.25,
+	pmxstruct.WeightMode.SDEF:  0.05,
+}
+
+
+class ModelSpec(NamedTuple):
+	verts: int = 10000
+	faces: int = 18000
+	# WeightMode -> fraction of the vertices, doesn't need to add up to 1. QDEF is only allowed if ver=2.1
+	weight_mix: Dict[pmxstruct.WeightMode, float] = DEFAULT_WEIGHT_MIX
+	addl_vec4s: int = 0
+	materials: int = 20
+	bones: int = 300
+	# every Nth bone is an IK bone with up to 3 links, 0 for no IK at all
+	ik_every: int = 25
+	# how many morphs of each MorphType, FLIP & IMPULSE are only included if ver=2.1
+	morphs_per_type: int = 20
+	# how many items in each vertex & UV morph, the other types get a fraction of this
+	morph_items: int = 1000
+	frames: int = 10
+	rigidbodies: int = 100
+	joints: int = 90
+	ver: float = 2.0
+	seed: int = 0
+
+
+# standard sizes, the faces/bones/etc scale along with the vertices roughly like real models do
+TIERS = {
+	"10k":  ModelSpec(verts=10000,   faces=18000,   materials=10,  bones=200,  morphs_per_type=10, morph_items=500),
+	"100k": ModelSpec(verts=100000,  faces=180000,  materials=40,  bones=600,  morphs_per_type=30, morph_items=3000),
+	"500k": ModelSpec(verts=500000,  faces=900000,  materials=80,  bones=1000, morphs_per_type=50, morph_items=10000,
+					  rigidbodies=300, joints=280),
+	"2m":   ModelSpec(verts=2000000, faces=3600000, materials=150, bones=2000, morphs_per_type=80, morph_items=30000,
+					  rigidbodies=600, joints=580),
+}
+
+
+def _weight_modes(spec: ModelSpec, r: random.Random) -> List[pmxstruct.WeightMode]:
+	# exactly the right number of each mode, shuffled so they aren't in long runs
+	mix = {m: f for m, f in spec.weight_mix.items() if f > 0}
+	if not mix:
+		raise RuntimeError("weight_mix must have at least one mode with a fraction above 0")
+	if pmxstruct.WeightMode.QDEF in mix and spec.ver != 2.1:
+		raise RuntimeError("QDEF weights are only allowed in PMX v2.1")
+	total = sum(mix.values())
+	modes = []
+	for m, f in mix.items():
+		modes += [m] * int(spec.verts * f / total)
+	first = next(iter(mix))
+	modes += [first] * (spec.verts - len(modes))
+	r.shuffle(modes)
+	return modes
+
+
+def _make_verts(spec: ModelSpec, r: random.Random) -> List[pmxstruct.PmxVertex]:
+	nb = spec.bones
+	verts = []
+	for wtype in _weight_modes(spec, r):
+		pos = [r.uniform(-10, 10), r.uniform(0, 20), r.uniform(-5, 5)]
+		n = [r.uniform(-1, 1), r.uniform(-1, 1), r.uniform(-1, 1)]
+		length = math.sqrt(n[0]**2 + n[1]**2 + n[2]**2) or 1.0
+		norm = [n[0] / length, n[1] / length, n[2] / length]
+		uv = [r.random(), r.random()]
+		sdef = []
+		if wtype == pmxstruct.WeightMode.BDEF1:
+			weight = [[r.randrange(nb), 1.0]]
+		elif wtype in (pmxstruct.WeightMode.BDEF2, pmxstruct.WeightMode.SDEF):
+			w = r.random()
+			weight = [[r.randrange(nb), w], [r.randrange(nb), 1.0 - w]]
+			if wtype == pmxstruct.WeightMode.SDEF:
+				sdef = [pos[:], [pos[0], pos[1] + 0.5, pos[2]], [pos[0], pos[1] - 0.5, pos[2]]]
+		else:
+			ws = [r.random() for _ in range(4)]
+			s = sum(ws)
+			weight = [[r.randrange(nb), w / s] for w in ws]
+		addl = [[r.random() for _ in range(4)] for _ in range(spec.addl_vec4s)]
+		verts.append(pmxstruct.PmxVertex(pos=pos, norm=norm, uv=uv, edgescale=1.0, weighttype=wtype, weight=weight,
+										 weight_sdef=sdef, addl_vec4s=addl))
+	return verts
+
+
+def _make_faces(spec: ModelSpec, r: random.Random) -> List[List[int]]:
+	# mostly strips of neighboring vertices like a real mesh, so every vertex gets used
+	nv = spec.verts
+	faces = []
+	for d in range(spec.faces):
+		a = (d * nv // max(spec.faces, 1)) % nv
+		faces.append([a, (a + 1 + r.randrange(2)) % nv, (a + 3 + r.randrange(4)) % nv])
+	return faces
+
+
+def _make_materials(spec: ModelSpec, r: random.Random) -> List[pmxstruct.PmxMaterial]:
+	mats = []
+	flags = pmxstruct.MaterialFlags.CAST_SHADOW | pmxstruct.MaterialFlags.RECEIVE_SHADOW | pmxstruct.MaterialFlags.USE_EDGING
+	per = spec.faces // spec.materials
+	for d in range(spec.materials):
+		faces_ct = per if d < spec.materials - 1 else spec.faces - per * (spec.materials - 1)
+		if d % 3 == 0:   toon = "toon%02d.bmp" % (d % 10 + 1)
+		elif d % 3 == 1: toon = "toon/toon_%d.png" % (d % 4)
+		else:            toon = ""
+		mats.append(pmxstruct.PmxMaterial(
+			name_jp="材質%d" % d, name_en="material%d" % d, diffRGB=[r.random(), r.random(), r.random()],
+			specRGB=[0.1, 0.1, 0.1], ambRGB=[0.5, 0.5, 0.5], alpha=1.0, specpower=5.0, edgeRGB=[0.0, 0.0, 0.0],
+			edgealpha=1.0, edgesize=1.0, tex_path="tex/body_%d.png" % (d % 8), toon_path=toon,
+			sph_path="sph/metal.spa" if d % 4 == 0 else "",
+			sph_mode=pmxstruct.SphMode.MULTIPLY if d % 4 == 0 else pmxstruct.SphMode.DISABLE, comment="",
+			faces_ct=faces_ct, matflags=flags))
+	return mats
+
+
+def _make_bones(spec: ModelSpec, r: random.Random) -> List[pmxstruct.PmxBone]:
+	bones = []
+	for d in range(spec.bones):
+		# a tree where each bone hangs off one of the few bones just before it
+		parent = -1 if d == 0 else r.randrange(max(0, d - 8), d)
+		ik = spec.ik_every > 0 and d > 0 and d % spec.ik_every == 0
+		links = None
+		if ik:
+			# IK bone that drives the chain of bones just before it
+			links = []
+			for z in range(1, min(4, d)):
+				if z == 1:
+					links.append(pmxstruct.PmxBoneIkLink(idx=d - z, limit_min=[-180.0, 0.0, 0.0], limit_max=[-0.5, 0.0, 0.0]))
+				else:
+					links.append(pmxstruct.PmxBoneIkLink(idx=d - z))
+		use_link = d % 2 == 0 and d + 1 < spec.bones
+		inherit = d % 15 == 7
+		bones.append(pmxstruct.PmxBone(
+			name_jp="ボーン%d" % d, name_en="bone%d" % d, pos=[r.uniform(-5, 5), r.uniform(0, 20), r.uniform(-2, 2)],
+			parent_idx=parent, deform_layer=0, deform_after_phys=False,
+			has_rotate=True, has_translate=d == 0 or ik, has_visible=True, has_enabled=True,
+			tail_usebonelink=use_link, tail=d + 1 if use_link else [0.0, 1.0, 0.0],
+			inherit_rot=inherit, inherit_trans=False,
+			inherit_parent_idx=parent if inherit else None, inherit_ratio=0.5 if inherit else None,
+			has_fixedaxis=False, has_localaxis=d % 20 == 3,
+			localaxis_x=[1.0, 0.0, 0.0] if d % 20 == 3 else None, localaxis_z=[0.0, 0.0, 1.0] if d % 20 == 3 else None,
+			has_externalparent=False,
+			has_ik=ik, ik_target_idx=d - 1 if ik else None, ik_numloops=40 if ik else None,
+			ik_angle=114.5916 if ik else None, ik_links=links))
+	return bones
+
+
+def _make_morphs(spec: ModelSpec, r: random.Random) -> List[pmxstruct.PmxMorph]:
+	types = [pmxstruct.MorphType.VERTEX, pmxstruct.MorphType.UV, pmxstruct.MorphType.UV_EXT1,
+			 pmxstruct.MorphType.BONE, pmxstruct.MorphType.MATERIAL, pmxstruct.MorphType.GROUP]
+	if spec.ver == 2.1:
+		types += [pmxstruct.MorphType.FLIP, pmxstruct.MorphType.IMPULSE]
+	nv = spec.verts
+	total = spec.morphs_per_type * len(types)
+	morphs = []
+	for t in types:
+		for d in range(spec.morphs_per_type):
+			if t == pmxstruct.MorphType.VERTEX:
+				start = r.randrange(nv)
+				items = [pmxstruct.PmxMorphItemVertex(vert_idx=(start + z) % nv, move=[r.uniform(-0.1, 0.1), r.uniform(-0.1, 0.1), 0.0])
+						 for z in range(min(spec.morph_items, nv))]
+			elif t in (pmxstruct.MorphType.UV, pmxstruct.MorphType.UV_EXT1):
+				start = r.randrange(nv)
+				items = [pmxstruct.PmxMorphItemUV(vert_idx=(start + z) % nv, move=[r.uniform(-0.1, 0.1), 0.0, 0.0, 0.0])
+						 for z in range(min(spec.morph_items, nv))]
+			elif t == pmxstruct.MorphType.BONE:
+				items = [pmxstruct.PmxMorphItemBone(bone_idx=r.randrange(spec.bones), move=[0.0, 0.1, 0.0], rot=[10.0, 0.0, -5.0])
+						 for z in range(min(max(spec.morph_items // 100, 1), spec.bones))]
+			elif t == pmxstruct.MorphType.MATERIAL:
+				items = [pmxstruct.PmxMorphItemMaterial(
+					mat_idx=r.randrange(-1, spec.materials), is_add=z % 2, alpha=0.0, specpower=0.0,
+					diffRGB=[0.0] * 3, specRGB=[0.0] * 3, ambRGB=[0.0] * 3, edgeRGB=[0.0] * 3, edgealpha=0.0, edgesize=0.0,
+					texRGBA=[1.0] * 4, sphRGBA=[1.0] * 4, toonRGBA=[1.0] * 4) for z in range(3)]
+			elif t in (pmxstruct.MorphType.GROUP, pmxstruct.MorphType.FLIP):
+				cls = pmxstruct.PmxMorphItemGroup if t == pmxstruct.MorphType.GROUP else pmxstruct.PmxMorphItemFlip
+				# each group points at vertex, UV, or bone morphs, all of the same type, like a real group morph does
+				first = (d % 4) * spec.morphs_per_type
+				items = [cls(morph_idx=first + r.randrange(spec.morphs_per_type), value=0.5) for z in range(5)]
+			else:
+				items = [pmxstruct.PmxMorphItemImpulse(rb_idx=r.randrange(max(spec.rigidbodies, 1)), is_local=0,
+													   move=[0.0, 1.0, 0.0], rot=[0.0, 0.0, 0.0]) for z in range(2)]
+			idx = len(morphs)
+			morphs.append(pmxstruct.PmxMorph(name_jp="モーフ%d" % idx, name_en="morph%d" % idx,
+											 panel=pmxstruct.MorphPanel(1 + idx % 4), morphtype=t, items=items))
+	assert len(morphs) == total
+	return morphs
+
+
+def _make_frames(spec: ModelSpec, nmorphs: int) -> List[pmxstruct.PmxFrame]:
+	frames = [pmxstruct.PmxFrame(name_jp="Root", name_en="Root", is_special=True,
+								 items=[pmxstruct.PmxFrameItem(is_morph=False, idx=0)]),
+			  pmxstruct.PmxFrame(name_jp="表情", name_en="Exp", is_special=True,
+								 items=[pmxstruct.PmxFrameItem(is_morph=True, idx=d) for d in range(nmorphs)])]
+	# split the rest of the bones evenly across the other frames
+	nframes = max(spec.frames - 2, 1)
+	for f in range(nframes):
+		items = [pmxstruct.PmxFrameItem(is_morph=False, idx=d) for d in range(1 + f, spec.bones, nframes)]
+		frames.append(pmxstruct.PmxFrame(name_jp="枠%d" % f, name_en="frame%d" % f, is_special=False, items=items))
+	return frames
+
+
+def _make_physics(spec: ModelSpec, r: random.Random):
+	bodies = []
+	for d in range(spec.rigidbodies):
+		bodies.append(pmxstruct.PmxRigidBody(
+			name_jp="剛体%d" % d, name_en="body%d" % d, bone_idx=d % spec.bones,
+			pos=[r.uniform(-5, 5), r.uniform(0, 20), r.uniform(-2, 2)], rot=[0.0, 0.0, r.uniform(-90, 90)],
+			size=[0.5, 1.0, 0.5], shape=pmxstruct.RigidBodyShape(d % 3), group=d % 16 + 1,
+			nocollide_set={d % 16 + 1, (d + 1) % 16 + 1}, phys_mode=pmxstruct.RigidBodyPhysMode(0 if d % 5 == 0 else 1),
+			phys_mass=1.0, phys_move_damp=0.5, phys_rot_damp=0.5, phys_repel=0.0, phys_friction=0.5))
+	joints = []
+	for d in range(min(spec.joints, max(spec.rigidbodies - 1, 0))):
+		joints.append(pmxstruct.PmxJoint(
+			name_jp="ジョイント%d" % d, name_en="joint%d" % d, jointtype=pmxstruct.JointType.SPRING_SIXDOF,
+			rb1_idx=d, rb2_idx=d + 1, pos=[0.0, 1.0, 0.0], rot=[0.0, 0.0, 0.0],
+			movemin=[0.0] * 3, movemax=[0.0] * 3, movespring=[0.0] * 3,
+			rotmin=[-30.0, -10.0, -10.0], rotmax=[30.0, 10.0, 10.0], rotspring=[0.0] * 3))
+	return bodies, joints
+
+
+def make_model(spec: ModelSpec = ModelSpec()) -> pmxstruct.Pmx:
+	"""
+	Build a synthetic but valid model.
+
+	:param spec: how big to make each part, see ModelSpec and TIERS
+	:return: Pmx object
+	"""
+	if spec.verts < 8 or spec.bones < 1 or spec.materials < 1 or spec.faces < spec.materials:
+		raise RuntimeError("ModelSpec is too small, needs at least 8 verts, 1 bone, and 1 material with 1 face")
+	r = random.Random(spec.seed)
+	header = pmxstruct.PmxHeader(ver=spec.ver, name_jp="ベンチマーク", name_en="benchmark",
+								 comment_jp="合成モデル", comment_en="synthetic model")
+	verts = _make_verts(spec, r)
+	faces = _make_faces(spec, r)
+	mats = _make_materials(spec, r)
+	bones = _make_bones(spec, r)
+	morphs = _make_morphs(spec, r)
+	frames = _make_frames(spec, len(morphs))
+	bodies, joints = _make_physics(spec, r)
+	return pmxstruct.Pmx(header=header, verts=verts, faces=faces, mats=mats, bones=bones, morphs=morphs,
+						 frames=frames, rbodies=bodies, joints=joints, sbodies=[] if spec.ver == 2.1 else None)
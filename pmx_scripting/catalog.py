@@ -0,0 +1,402 @@
+"""
+Searchable index of the contents of a whole library of PMX models, kept in a local SQLite database.
+
+    with Catalog("models.db") as cat:
+        cat.update("D:/MMD/models", workers=8)        # only files that are new or changed get read
+        cat.models_with_bone("左足ＩＫ")
+        cat.missing_textures()
+
+There is one row per model, and one per bone, morph, material, and texture referenced by a material in each model.
+Answering a question like "which models have a bone named X" is then a single indexed query, instead of reading
+thousands of files with read_pmx(). For anything the helper methods don't cover, query() runs any SQL on the tables
+described in _SCHEMA.
+
+Updating is incremental: a file whose size & modification time haven't changed since it was indexed is skipped
+without being opened. If they did change, the file is hashed, and only read again if its contents are really
+different. Reading is done by a pool of worker processes, which only decode the header, materials, and bones, plus
+the names & types of the morphs without any of their items. Everything is written to the database by the calling
+process.
+"""
+
+from . import core
+from . import pmx_parser
+from .pmx_cache import file_digest
+
+import concurrent.futures
+import contextlib
+import io
+import os
+import sqlite3
+import traceback
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+
+__all__ = ['Catalog', 'CatalogUpdate']
+
+
+# bump this whenever the tables change, older databases are then rebuilt from scratch on the next update()
+_SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE models (
+	id INTEGER PRIMARY KEY,
+	path TEXT NOT NULL UNIQUE,
+	size INTEGER NOT NULL,
+	mtime_ns INTEGER NOT NULL,
+	digest TEXT,
+	ver REAL,
+	name_jp TEXT,
+	name_en TEXT,
+	num_verts INTEGER,
+	num_faces INTEGER,
+	num_materials INTEGER,
+	num_bones INTEGER,
+	num_morphs INTEGER,
+	num_frames INTEGER,
+	num_rigidbodies INTEGER,
+	num_joints INTEGER,
+	num_softbodies INTEGER,
+	-- why the file couldn't be read, NULL if it could. it isn't tried again until the file changes
+	error TEXT
+);
+CREATE TABLE bones (
+	model_id INTEGER NOT NULL,
+	idx INTEGER NOT NULL,
+	name_jp TEXT,
+	name_en TEXT,
+	parent_idx INTEGER,
+	has_ik INTEGER
+);
+CREATE TABLE morphs (
+	model_id INTEGER NOT NULL,
+	idx INTEGER NOT NULL,
+	name_jp TEXT,
+	name_en TEXT,
+	-- MorphType & MorphPanel names, like 'VERTEX' & 'EYE'
+	morphtype TEXT,
+	panel TEXT,
+	num_items INTEGER
+);
+CREATE TABLE materials (
+	model_id INTEGER NOT NULL,
+	idx INTEGER NOT NULL,
+	name_jp TEXT,
+	name_en TEXT,
+	faces_ct INTEGER,
+	tex_path TEXT,
+	sph_path TEXT,
+	toon_path TEXT
+);
+CREATE TABLE textures (
+	model_id INTEGER NOT NULL,
+	-- exactly as written in the model
+	path TEXT NOT NULL,
+	-- lowercase with forward slashes, for searching
+	norm_path TEXT NOT NULL,
+	-- 1 if the file existed next to the model when it was indexed
+	found INTEGER NOT NULL
+);
+CREATE INDEX bones_model ON bones(model_id);
+CREATE INDEX bones_name_jp ON bones(name_jp);
+CREATE INDEX bones_name_en ON bones(name_en);
+CREATE INDEX morphs_model ON morphs(model_id);
+CREATE INDEX morphs_name_jp ON morphs(name_jp);
+CREATE INDEX morphs_name_en ON morphs(name_en);
+CREATE INDEX materials_model ON materials(model_id);
+CREATE INDEX materials_name_jp ON materials(name_jp);
+CREATE INDEX materials_name_en ON materials(name_en);
+CREATE INDEX textures_model ON textures(model_id);
+CREATE INDEX textures_norm_path ON textures(norm_path);
+CREATE INDEX textures_found ON textures(found);
+"""
+
+_TABLES = ("models", "bones", "morphs", "materials", "textures")
+
+# how many files to write to the database between commits
+_COMMIT_EVERY = 200
+
+
+class CatalogUpdate(NamedTuple):
+	added: int      # files that weren't in the catalog before
+	updated: int    # files whose contents changed
+	unchanged: int  # files skipped because nothing changed, including ones only touched
+	removed: int    # files in the catalog that don't exist anymore
+	failed: int     # files that couldn't be read, they are still listed in "models" with the error
+
+
+class _Indexed(NamedTuple):
+	# everything a worker found out about one file, ready to insert
+	path: str
+	size: int
+	mtime_ns: int
+	digest: Optional[str]
+	# true if the digest matched the one already in the catalog, then nothing else is filled in
+	same_contents: bool
+	model: Optional[tuple]
+	bones: List[tuple]
+	morphs: List[tuple]
+	materials: List[tuple]
+	textures: List[tuple]
+	error: Optional[str]
+
+
+def _normalize_texture(path: str) -> str:
+	return path.replace("\\", "/").lower()
+
+
+def _index_file(path: str, size: int, mtime_ns: int, known_digest: Optional[str]) -> _Indexed:
+	"""
+	Runs in the worker processes. Hash the file, and if it really changed, read the parts that go in the catalog.
+	Never raises, a file that can't be read is returned with the error instead.
+	"""
+	digest = None
+	try:
+		digest = file_digest(path)
+		if digest == known_digest:
+			return _Indexed(path, size, mtime_ns, digest, True, None, [], [], [], [], None)
+		# nobody would see anything the reader prints
+		with contextlib.redirect_stdout(io.StringIO()):
+			pmx = pmx_parser.read_pmx(path, lazy=True, sanitize="off", progress=None)
+			materials = pmx.materials
+			bones = pmx.bones
+			morphs = pmx.morph_heads()
+		counts = [pmx.count(name) for name in ("verts", "faces", "materials", "bones", "morphs", "frames",
+												 "rigidbodies", "joints", "softbodies")]
+		model = (pmx.header.ver, pmx.header.name_jp, pmx.header.name_en, *counts)
+		bone_rows = [(d, b.name_jp, b.name_en, b.parent_idx, int(b.has_ik)) for d, b in enumerate(bones)]
+		morph_rows = [(d, m.name_jp, m.name_en, m.morphtype.name, m.panel.name, m.item_count)
+					  for d, m in enumerate(morphs)]
+		mat_rows = [(d, m.name_jp, m.name_en, m.faces_ct, m.tex_path, m.sph_path, m.toon_path)
+					for d, m in enumerate(materials)]
+		# every texture file the materials use, once each. the builtin toons aren't files
+		folder = os.path.dirname(path)
+		tex_rows = []
+		seen = set()
+		for m in materials:
+			for tex in (m.tex_path, m.sph_path, m.toon_path):
+				if not tex or tex in pmx_parser.BUILTIN_TOON_DICT or tex in seen:
+					continue
+				seen.add(tex)
+				found = os.path.isfile(os.path.join(folder, tex.replace("\\", os.sep)))
+				tex_rows.append((tex, _normalize_texture(tex), int(found)))
+		return _Indexed(path, size, mtime_ns, digest, False, model, bone_rows, morph_rows, mat_rows, tex_rows, None)
+	except Exception:
+		return _Indexed(path, size, mtime_ns, digest, False, None, [], [], [], [], traceback.format_exc())
+
+
+class Catalog:
+	"""
+	A SQLite database listing what is inside every PMX file in one or more folders, see the top of this file.
+	Can be used as a context manager, which closes it at the end.
+	"""
+
+	def __init__(self, db_path: str):
+		"""
+		:param db_path: database file, created if it doesn't exist. ":memory:" works too
+		"""
+		self.db_path = db_path
+		self.conn = sqlite3.connect(db_path)
+		self.conn.execute("PRAGMA journal_mode=WAL")
+		self.conn.execute("PRAGMA synchronous=NORMAL")
+		(version,) = self.conn.execute("PRAGMA user_version").fetchone()
+		if version != _SCHEMA_VERSION:
+			# it's only a copy of what is in the files, so just start over
+			with self.conn:
+				for table in _TABLES:
+					self.conn.execute("DROP TABLE IF EXISTS %s" % table)
+				self.conn.executescript(_SCHEMA)
+				self.conn.execute("PRAGMA user_version=%d" % _SCHEMA_VERSION)
+
+	def close(self) -> None:
+		self.conn.close()
+
+	def __enter__(self) -> 'Catalog':
+		return self
+
+	def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+		self.close()
+
+	# ----- updating -----
+
+	def update(self, directory: str, recursive=True, workers: Optional[int] = None) -> CatalogUpdate:
+		"""
+		Bring the catalog up to date with every PMX file in a folder: add new files, read changed ones again, and
+		remove ones that don't exist anymore. Files elsewhere in the catalog are left alone.
+
+		:param directory: folder to look in
+		:param recursive: if true, also look in every subfolder
+		:param workers: number of worker processes, default is one per CPU. if 1, read everything in this process
+		:return: CatalogUpdate with how many files were in each situation
+		"""
+		if not os.path.isdir(directory):
+			raise RuntimeError("ERROR: attempt to catalog folder '%s', but it does not exist! (or exists but is not a folder)" % directory)
+		directory = os.path.abspath(directory)
+		on_disk = {}
+		for root, dirs, files in os.walk(directory):
+			for f in files:
+				if f.lower().endswith(".pmx"):
+					path = os.path.join(root, f)
+					try:
+						st = os.stat(path)
+					except OSError:
+						continue
+					on_disk[path] = (st.st_size, st.st_mtime_ns)
+			if not recursive:
+				break
+
+		# everything the catalog already has from this folder
+		known = {}
+		prefix = os.path.join(directory, "")
+		for model_id, path, size, mtime_ns, digest in self.conn.execute(
+				"SELECT id, path, size, mtime_ns, digest FROM models"):
+			if path.startswith(prefix) and (recursive or os.path.dirname(path) == directory):
+				known[path] = (model_id, size, mtime_ns, digest)
+
+		removed = [path for path in known if path not in on_disk]
+		todo = []
+		unchanged = 0
+		for path, (size, mtime_ns) in sorted(on_disk.items()):
+			k = known.get(path)
+			if k is not None and k[1] == size and k[2] == mtime_ns:
+				unchanged += 1
+			else:
+				todo.append((path, size, mtime_ns, k[3] if k is not None else None))
+
+		with self.conn:
+			for path in removed:
+				self._delete_model(known[path][0])
+		core.MY_PRINT_FUNC("Cataloging '%s': %d files to read, %d unchanged, %d removed" % (
+			directory, len(todo), unchanged, len(removed)))
+
+		added = updated = failed = 0
+		for done, res in enumerate(self._run_indexing(todo, workers), start=1):
+			k = known.get(res.path)
+			if res.same_contents:
+				# only touched, remember the new mtime so it isn't hashed again next time
+				self.conn.execute("UPDATE models SET size=?, mtime_ns=? WHERE id=?", (res.size, res.mtime_ns, k[0]))
+				unchanged += 1
+			else:
+				if k is not None:
+					self._delete_model(k[0])
+					updated += 1
+				else:
+					added += 1
+				if res.error is not None:
+					core.MY_PRINT_FUNC("Warning: failed to read '%s': %s" % (res.path, res.error.strip().splitlines()[-1]))
+					failed += 1
+				self._insert_model(res)
+			if done % _COMMIT_EVERY == 0:
+				self.conn.commit()
+		self.conn.commit()
+		return CatalogUpdate(added, updated, unchanged, len(removed), failed)
+
+	@staticmethod
+	def _run_indexing(todo: List[Tuple[str, int, int, Optional[str]]], workers: Optional[int]) -> Iterable[_Indexed]:
+		# read the files in a pool of processes, handing back the results as they finish
+		if not todo:
+			return
+		if workers is None:
+			workers = os.cpu_count() or 1
+		workers = max(1, min(workers, len(todo)))
+		if workers == 1:
+			for args in todo:
+				yield _index_file(*args)
+			return
+		with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as ex:
+			futures = {ex.submit(_index_file, *args): args for args in todo}
+			for fut in concurrent.futures.as_completed(futures):
+				try:
+					yield fut.result()
+				except Exception:
+					# the worker itself died, or the result couldn't be sent back
+					path, size, mtime_ns, digest = futures[fut]
+					yield _Indexed(path, size, mtime_ns, None, False, None, [], [], [], [], traceback.format_exc())
+
+	def _insert_model(self, res: _Indexed) -> None:
+		model = res.model if res.model is not None else (None,) * 12
+		cur = self.conn.execute(
+			"INSERT INTO models (path, size, mtime_ns, digest, ver, name_jp, name_en, num_verts, num_faces, "
+			"num_materials, num_bones, num_morphs, num_frames, num_rigidbodies, num_joints, num_softbodies, error) "
+			"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+			(res.path, res.size, res.mtime_ns, res.digest, *model, res.error))
+		model_id = cur.lastrowid
+		self.conn.executemany("INSERT INTO bones VALUES (?, ?, ?, ?, ?, ?)",
+							  ((model_id, *row) for row in res.bones))
+		self.conn.executemany("INSERT INTO morphs VALUES (?, ?, ?, ?, ?, ?, ?)",
+							  ((model_id, *row) for row in res.morphs))
+		self.conn.executemany("INSERT INTO materials VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+							  ((model_id, *row) for row in res.materials))
+		self.conn.executemany("INSERT INTO textures VALUES (?, ?, ?, ?)",
+							  ((model_id, *row) for row in res.textures))
+
+	def _delete_model(self, model_id: int) -> None:
+		for table in _TABLES[1:]:
+			self.conn.execute("DELETE FROM %s WHERE model_id=?" % table, (model_id,))
+		self.conn.execute("DELETE FROM models WHERE id=?", (model_id,))
+
+	# ----- searching -----
+
+	def query(self, sql: str, params: Sequence = ()) -> List[tuple]:
+		"""
+		Run any SQL on the catalog tables, see _SCHEMA for what they hold.
+
+		:param sql: SQL statement, with ? placeholders
+		:param params: values for the placeholders
+		:return: list of result rows
+		"""
+		return self.conn.execute(sql, params).fetchall()
+
+	def _models_with_name(self, table: str, name: str) -> List[str]:
+		rows = self.conn.execute(
+			"SELECT DISTINCT models.path FROM %s JOIN models ON models.id = %s.model_id "
+			"WHERE %s.name_jp = ? OR %s.name_en = ? ORDER BY models.path" % (table, table, table, table), (name, name))
+		return [path for (path,) in rows]
+
+	def models_with_bone(self, name: str) -> List[str]:
+		"""
+		:param name: exact JP or EN bone name
+		:return: sorted paths of every model with a bone by that name
+		"""
+		return self._models_with_name("bones", name)
+
+	def models_with_morph(self, name: str) -> List[str]:
+		"""
+		:param name: exact JP or EN morph name
+		:return: sorted paths of every model with a morph by that name
+		"""
+		return self._models_with_name("morphs", name)
+
+	def models_with_material(self, name: str) -> List[str]:
+		"""
+		:param name: exact JP or EN material name
+		:return: sorted paths of every model with a material by that name
+		"""
+		return self._models_with_name("materials", name)
+
+	def models_using_texture(self, texture: str) -> List[str]:
+		"""
+		:param texture: texture path as written in the models, matched ignoring case and the direction of slashes
+		:return: sorted paths of every model with a material that uses it
+		"""
+		rows = self.conn.execute(
+			"SELECT DISTINCT models.path FROM textures JOIN models ON models.id = textures.model_id "
+			"WHERE textures.norm_path = ? ORDER BY models.path", (_normalize_texture(texture),))
+		return [path for (path,) in rows]
+
+	def missing_textures(self) -> Dict[str, List[str]]:
+		"""
+		:return: dict of model path -> list of the textures it uses that weren't found next to it, as of the last update
+		"""
+		retme = {}
+		rows = self.conn.execute(
+			"SELECT models.path, textures.path FROM textures JOIN models ON models.id = textures.model_id "
+			"WHERE textures.found = 0 ORDER BY models.path, textures.path")
+		for model_path, tex in rows:
+			retme.setdefault(model_path, []).append(tex)
+		return retme
+
+	def failed_models(self) -> Dict[str, str]:
+		"""
+		:return: dict of model path -> error, for every file that couldn't be read in the last update that touched it
+		"""
+		return dict(self.conn.execute("SELECT path, error FROM models WHERE error IS NOT NULL ORDER BY path"))
@@ -1,8 +1,10 @@
 from typing import Tuple, Sequence, Callable, Iterable, TypeVar, Union, List, Any
 from bisect import bisect_left
 from os import path, listdir
+import contextlib
 import traceback
 import sys
+import gc
 
 # Declare Type Hint so "output type matches whatever input type is" can be possible
 THING = TypeVar('THING')
@@ -155,6 +157,13 @@ def recursively_compare(A,B):
 	return None
 
 
+def _member_names(obj) -> List[str]:
+	# the struct classes use __slots__ instead of a __dict__, so "vars()" doesn't work on them
+	if hasattr(obj, "__dict__"):
+		return [name for name in vars(obj) if not name.startswith("_")]
+	return [name for cls in type(obj).__mro__ for name in getattr(cls, "__slots__", ()) if not name.startswith("_")]
+
+
 def new_recursive_compare(L, R):
 	diffcount = 0
 	maxdiff = 0
@@ -170,11 +179,11 @@ def new_recursive_compare(L, R):
 			maxdiff = max(maxdiff, thismax)
 
 	elif hasattr(L,"validate") and hasattr(R,"validate"):
-		# for my custom classes, look over the members with "vars" because its fancy
-		Lvars = sorted(list(vars(L).items()))
-		Rvars = sorted(list(vars(R).items()))
-		for (nameL, LL), (nameR, RR) in zip(Lvars, Rvars):
-			thisdiff, thismax = new_recursive_compare(LL, RR)
+		# for my custom classes, look over the members by name
+		Lvars = sorted(_member_names(L))
+		Rvars = sorted(_member_names(R))
+		for nameL, nameR in zip(Lvars, Rvars):
+			thisdiff, thismax = new_recursive_compare(getattr(L, nameL), getattr(R, nameR))
 			diffcount += thisdiff
 			maxdiff = max(maxdiff, thismax)
 
@@ -483,6 +492,21 @@ def filepath_get_unused_name(initial_name: str, checkdisk=True, namelist=None) -
 	raise RuntimeError("ERROR: unable to find unused variation of '%s' for file-write" % initial_name)
 
 
+@contextlib.contextmanager
+def gc_paused():
+	"""
+	Pause the cyclic garbage collector while building huge numbers of small lists that can never form reference cycles.
+	Otherwise it keeps rescanning them over and over, and that can cost more than building them in the first place.
+	"""
+	gc_was_enabled = gc.isenabled()
+	gc.disable()
+	try:
+		yield
+	finally:
+		if gc_was_enabled:
+			gc.enable()
+
+
 def RUN_WITH_TRACEBACK(func: Callable, *args) -> None:
 	"""
 	Used to execute the "main" function of a script in direct-run mode.
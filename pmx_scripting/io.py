@@ -1,10 +1,21 @@
 from .core import MY_PRINT_FUNC
 
-from typing import Any, List
+from typing import Any, BinaryIO, List, Iterable, Optional, Tuple, Union
 from os import path
 import stat
+import mmap
 import csv
+import shutil
 import os
+import bz2
+import gzip
+import lzma
+import tempfile
+import zipfile
+try:
+	from compression import zstd  # python 3.14+
+except ImportError:
+	zstd = None
 
 
 # ===== Functions for CSV and Binary-File read/write =====
@@ -150,6 +161,70 @@ def write_bytes_to_binfile(dest_path:str, content:bytearray, quiet=False) -> Non
 	:param quiet: by default, print the absolute path being written to. if this=True, don't do this.
 	"""
 
+	dest_path = _prepare_binfile_dest(dest_path, quiet)
+
+	try:
+		with open(dest_path, "wb") as my_file:  # w = write, b = binary
+			my_file.write(content)  # plain old no-frills write
+	except IOError as e:
+		MY_PRINT_FUNC(e.__class__.__name__, e)
+		MY_PRINT_FUNC("ERROR: unable to write binary file '%s', maybe its a permissions issue?" % dest_path)
+		raise
+
+	return None
+
+
+def write_chunks_to_binfile(dest_path:str, chunks:Iterable[bytes], quiet=False) -> int:
+	"""
+	WRITE a BINARY file to disk one piece at a time, so the whole file never needs to exist in memory at once.
+	Each chunk is written as soon as it is produced, and is free to be thrown away after that. The chunks go into a
+	temporary file next to the destination, which only replaces the destination once every chunk is written; if
+	producing any chunk fails, the existing file is left untouched.
+
+	:param dest_path: destination file path, as a string, relative from CWD or absolute
+	:param chunks: iterable (probably a generator) of bytearray objs or bytes objs
+	:param quiet: by default, print the absolute path being written to. if this=True, don't do this.
+	:return: total number of bytes written
+	"""
+
+	dest_path = _prepare_binfile_dest(dest_path, quiet)
+	# a unique temp file, so two writers to the same destination or an unrelated "<name>.tmp" can't collide with it
+	fd, temp_path = tempfile.mkstemp(suffix=".tmp", prefix=path.basename(dest_path) + ".", dir=path.dirname(dest_path))
+	os.close(fd)
+	total = 0
+
+	try:
+		with open(temp_path, "wb") as my_file:  # w = write, b = binary
+			total = _write_chunks(my_file, chunks)
+		# keep the permissions of the file being replaced, same as if it had been overwritten in-place
+		if path.exists(dest_path):
+			shutil.copymode(dest_path, temp_path)
+		os.replace(temp_path, dest_path)
+	except IOError as e:
+		MY_PRINT_FUNC(e.__class__.__name__, e)
+		MY_PRINT_FUNC("ERROR: unable to write binary file '%s', maybe its a permissions issue?" % dest_path)
+		if path.exists(temp_path): os.remove(temp_path)
+		raise
+	except BaseException:
+		# something went wrong while producing the chunks, don't leave a half-written temp file lying around
+		if path.exists(temp_path): os.remove(temp_path)
+		raise
+
+	return total
+
+
+def _write_chunks(stream: BinaryIO, chunks: Iterable[bytes]) -> int:
+	total = 0
+	for chunk in chunks:
+		stream.write(chunk)
+		total += len(chunk)
+		# let go of this chunk before the next one is produced
+		del chunk
+	return total
+
+
+def _prepare_binfile_dest(dest_path:str, quiet=False) -> str:
+	# make the path absolute, then check that it is okay to write a binary file there & return the absolute path
 	dest_path = path.abspath(path.normpath(dest_path))
 	# unless disabled, print the absolute path to the file being written
 	if not quiet: MY_PRINT_FUNC(dest_path)
@@ -167,16 +242,7 @@ def write_bytes_to_binfile(dest_path:str, content:bytearray, quiet=False) -> Non
 			if not quiet: MY_PRINT_FUNC("WARNING: binary file '%s' already exists, I am going to overwrite it!" % dest_path)
 			# the file exists already and is about to be overwritten, check whether it is set to read-only?
 			check_and_fix_readonly(dest_path)
-
-	try:
-		with open(dest_path, "wb") as my_file:  # w = write, b = binary
-			my_file.write(content)  # plain old no-frills write
-	except IOError as e:
-		MY_PRINT_FUNC(e.__class__.__name__, e)
-		MY_PRINT_FUNC("ERROR: unable to write binary file '%s', maybe its a permissions issue?" % dest_path)
-		raise
-
-	return None
+	return dest_path
 
 
 def read_binfile_to_bytes(src_path:str, quiet=False) -> bytearray:
@@ -208,6 +274,257 @@ def read_binfile_to_bytes(src_path:str, quiet=False) -> bytearray:
 	return bytearray(raw)
 
 
+def read_binfile_to_mmap(src_path:str, quiet=False) -> mmap.mmap:
+	"""
+	MAP a BINARY file into memory, without reading or copying it. Pages are only loaded from disk when they are touched.
+	The mapping is copy-on-write, so it can be modified in memory but the changes never go back to the file.
+	Can be used anywhere the bytearray from read_binfile_to_bytes() is used, only for reading.
+	Call .close() on it when done, unless something still holds a memoryview into it.
+
+	:param src_path: source file path, as a string, relative from CWD or absolute
+	:param quiet: by default, print the absolute path being read. if this=True, don't do this.
+	:return: mmap obj
+	"""
+
+	src_path = path.abspath(path.normpath(src_path))
+
+	# unless disabled, print the absolute path to the file being read
+	if not quiet: MY_PRINT_FUNC(src_path)
+
+	# assert that the given path exists and is a file, not a folder
+	if not path.isfile(src_path):
+		raise RuntimeError("ERROR: attempt to read binary file '%s', but it does not exist! (or exists but is not a file)" % src_path)
+	# empty files cannot be mapped
+	if path.getsize(src_path) == 0:
+		raise RuntimeError("ERROR: attempt to read binary file '%s', but it is empty!" % src_path)
+
+	try:
+		with open(src_path, mode='rb') as file:  # r=read, b=binary
+			# the mapping stays valid after the file handle is closed
+			raw = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+	except (IOError, ValueError) as e:
+		MY_PRINT_FUNC(e.__class__.__name__, e)
+		MY_PRINT_FUNC("ERROR: error wile reading binary file '%s', maybe you typed it wrong?" % src_path)
+		raise
+
+	return raw
+
+
+# ===== Binary sources: archives, compressed files, & file objects =====
+# read_binsource_to_bytes() and write_chunks_to_binsource() work like the plain file functions above, but also take:
+#   an open binary file object, like io.BytesIO or a socket file, which is read from or written to as-is
+#   "zip://archive.zip!/folder/model.pmx", a file inside a zip archive
+#   "model.pmx.xz", a compressed file, also .gz, .bz2, .lzma, and .zst if python has zstd (3.14+)
+# these can be combined, "zip://archive.zip!/model.pmx.xz" is a compressed file inside an archive.
+# compressed data is decompressed/compressed as it streams, nothing is ever extracted to a temporary file.
+
+BinSource = Union[str, BinaryIO]
+
+ZIP_PREFIX = "zip://"
+
+# extension -> function that opens a compressed file, given either a path or a file object
+_COMPRESSION_OPENERS = {
+	".gz": gzip.open,
+	".xz": lzma.open,
+	".lzma": lzma.open,
+	".bz2": bz2.open,
+	".zst": zstd.open if zstd is not None else None,
+}
+
+
+def split_archive_path(src_path: str) -> Optional[Tuple[str, str]]:
+	"""
+	:param src_path: any path
+	:return: (archive path, path of the file inside it) if this is a "zip://archive.zip!/inner/path" path, otherwise None
+	"""
+	if not src_path.lower().startswith(ZIP_PREFIX):
+		return None
+	archive, bang, inner = src_path[len(ZIP_PREFIX):].partition("!")
+	inner = inner.replace("\\", "/").lstrip("/")
+	if not bang or not archive or not inner:
+		raise RuntimeError("ERROR: '%s' is not a valid archive path, it should look like 'zip://archive.zip!/folder/file.pmx'" % src_path)
+	return archive, inner
+
+
+def _compression_opener(name: str):
+	# the function that opens this kind of compressed file, or None if it isn't compressed
+	ext = path.splitext(name)[1].lower()
+	if ext not in _COMPRESSION_OPENERS:
+		return None
+	if _COMPRESSION_OPENERS[ext] is None:
+		raise RuntimeError("ERROR: unable to open '%s', this version of python can't handle '%s' files" % (name, ext))
+	return _COMPRESSION_OPENERS[ext]
+
+
+def is_plain_binfile(src: BinSource) -> bool:
+	"""
+	:param src: anything read_binsource_to_bytes() accepts
+	:return: True if it is a normal uncompressed file on disk, the only kind read_binfile_to_mmap() can handle
+	"""
+	return isinstance(src, str) and split_archive_path(src) is None and _compression_opener(src) is None
+
+
+def binsource_name(src: BinSource) -> str:
+	"""
+	:param src: anything read_binsource_to_bytes() accepts
+	:return: the name of the file, without any folders, for printing
+	"""
+	if not isinstance(src, str):
+		return path.basename(str(getattr(src, "name", "<stream>")))
+	archive = split_archive_path(src)
+	if archive is not None:
+		return archive[1].rpartition("/")[2]
+	return path.basename(src)
+
+
+def binsource_insert_suffix(src_path: str, suffix: str) -> str:
+	"""
+	Pick an unused name for a modified copy of a file, next to it: the suffix goes before the real extension, so
+	"model.pmx.xz" becomes "model_suffix.pmx.xz". Writing into an archive means rewriting all of it, which isn't safe
+	while something else might be reading or writing it too, so the copy of a file inside an archive goes next to the
+	archive instead, as a normal file.
+
+	:param src_path: path of the original, any kind read_binsource_to_bytes() accepts except file objects
+	:param suffix: string to insert
+	:return: unused path to write the copy to
+	"""
+	archive = split_archive_path(src_path)
+	if archive is not None:
+		src_path = path.join(path.dirname(archive[0]), archive[1].rpartition("/")[2])
+	compressed_ext = ""
+	if _compression_opener(src_path) is not None:
+		src_path, compressed_ext = path.splitext(src_path)
+	base, ext = path.splitext(src_path)
+	base += suffix
+	# same as core.filepath_get_unused_name(), but the numbers go before both extensions
+	test_name = base + ext + compressed_ext
+	for append_num in range(1, 1000):
+		if not path.exists(test_name):
+			return test_name
+		test_name = "%s (%d)%s%s" % (base, append_num, ext, compressed_ext)
+	raise RuntimeError("ERROR: unable to find unused variation of '%s' for file-write" % (base + ext + compressed_ext))
+
+
+def read_binsource_to_bytes(src: BinSource, quiet=False) -> bytearray:
+	"""
+	READ a BINARY file into memory, from any of the places described above: a normal file, a file inside a zip
+	archive, a compressed file, or an open file object.
+
+	:param src: file path, archive path, or binary file object
+	:param quiet: by default, print the path being read. if this=True, don't do this.
+	:return: bytearray obj
+	"""
+	if not isinstance(src, str):
+		if not quiet: MY_PRINT_FUNC(getattr(src, "name", "<stream>"))
+		return bytearray(src.read())
+	if is_plain_binfile(src):
+		return read_binfile_to_bytes(src, quiet)
+
+	archive = split_archive_path(src)
+	try:
+		if archive is not None:
+			archive_path, inner = archive
+			archive_path = path.abspath(path.normpath(archive_path))
+			if not quiet: MY_PRINT_FUNC("%s%s!/%s" % (ZIP_PREFIX, archive_path, inner))
+			if not path.isfile(archive_path):
+				raise RuntimeError("ERROR: attempt to read from archive '%s', but it does not exist! (or exists but is not a file)" % archive_path)
+			with zipfile.ZipFile(archive_path, "r") as zf:
+				try:
+					info = zf.getinfo(inner)
+				except KeyError:
+					raise RuntimeError("ERROR: attempt to read '%s' from archive '%s', but it is not in there!" % (inner, archive_path)) from None
+				with zf.open(info, "r") as member:
+					return _read_maybe_compressed(member, inner)
+		else:
+			src_path = path.abspath(path.normpath(src))
+			if not quiet: MY_PRINT_FUNC(src_path)
+			if not path.isfile(src_path):
+				raise RuntimeError("ERROR: attempt to read binary file '%s', but it does not exist! (or exists but is not a file)" % src_path)
+			with open(src_path, "rb") as file:
+				return _read_maybe_compressed(file, src_path)
+	except (IOError, EOFError, zipfile.BadZipFile, lzma.LZMAError) as e:
+		MY_PRINT_FUNC(e.__class__.__name__, e)
+		MY_PRINT_FUNC("ERROR: error wile reading binary file '%s', maybe it is damaged?" % src)
+		raise
+
+
+def _read_maybe_compressed(stream: BinaryIO, name: str) -> bytearray:
+	opener = _compression_opener(name)
+	if opener is None:
+		return bytearray(stream.read())
+	with opener(stream, "rb") as decompressed:
+		return bytearray(decompressed.read())
+
+
+def write_chunks_to_binsource(dest: BinSource, chunks: Iterable[bytes], quiet=False) -> int:
+	"""
+	WRITE a BINARY file one piece at a time, to any of the places described above: a normal file, a file inside a zip
+	archive, a compressed file, or an open file object. Compressed files are compressed as the chunks arrive.
+	Same as write_chunks_to_binfile(), if producing any chunk fails then any existing file is left untouched, except
+	for a file object, which gets whatever was written so far.
+	Writing into an archive creates it if it doesn't exist yet, and replaces the file inside it if it does. This
+	rewrites the whole archive into a temporary file, so only one process should write to the same archive at a time.
+
+	:param dest: file path, archive path, or binary file object. file objects are not closed afterward
+	:param chunks: iterable (probably a generator) of bytearray objs or bytes objs
+	:param quiet: by default, print the path being written to. if this=True, don't do this.
+	:return: total number of bytes written, before compression
+	"""
+	if not isinstance(dest, str):
+		if not quiet: MY_PRINT_FUNC(getattr(dest, "name", "<stream>"))
+		return _write_chunks(dest, chunks)
+	if is_plain_binfile(dest):
+		return write_chunks_to_binfile(dest, chunks, quiet)
+
+	archive = split_archive_path(dest)
+	if archive is not None:
+		archive_path, inner = archive
+		dest_path = _prepare_binfile_dest(archive_path, quiet=True)
+		if not quiet: MY_PRINT_FUNC("%s%s!/%s" % (ZIP_PREFIX, dest_path, inner))
+	else:
+		dest_path = _prepare_binfile_dest(dest, quiet)
+	fd, temp_path = tempfile.mkstemp(suffix=".tmp", prefix=path.basename(dest_path) + ".", dir=path.dirname(dest_path))
+	os.close(fd)
+	try:
+		if archive is not None:
+			total = _write_archive_member(dest_path, temp_path, inner, chunks)
+		else:
+			with _compression_opener(dest_path)(temp_path, "wb") as my_file:
+				total = _write_chunks(my_file, chunks)
+		if path.exists(dest_path):
+			shutil.copymode(dest_path, temp_path)
+		os.replace(temp_path, dest_path)
+	except IOError as e:
+		MY_PRINT_FUNC(e.__class__.__name__, e)
+		MY_PRINT_FUNC("ERROR: unable to write binary file '%s', maybe its a permissions issue?" % dest)
+		if path.exists(temp_path): os.remove(temp_path)
+		raise
+	except BaseException:
+		# something went wrong while producing the chunks, don't leave a half-written temp file lying around
+		if path.exists(temp_path): os.remove(temp_path)
+		raise
+	return total
+
+
+def _write_archive_member(archive_path: str, temp_path: str, inner: str, chunks: Iterable[bytes]) -> int:
+	# build the new archive in temp_path: everything from the old one except "inner", then the new "inner"
+	with zipfile.ZipFile(temp_path, "w", compression=zipfile.ZIP_DEFLATED) as new_zf:
+		if path.exists(archive_path):
+			with zipfile.ZipFile(archive_path, "r") as old_zf:
+				for info in old_zf.infolist():
+					if info.filename == inner:
+						continue
+					with old_zf.open(info, "r") as src, new_zf.open(info, "w") as dst:
+						shutil.copyfileobj(src, dst, 1 << 20)
+		# the size isn't known ahead of time, so always allow it to be bigger than 4GB
+		with new_zf.open(inner, "w", force_zip64=True) as member:
+			opener = _compression_opener(inner)
+			if opener is None:
+				return _write_chunks(member, chunks)
+			with opener(member, "wb") as my_file:
+				return _write_chunks(my_file, chunks)
+
+
 def write_str_to_txtfile(dest_path: str, content: str, use_jis_encoding=False, quiet=False) -> None:
 	"""
 	WRITE a string from memory to a TEXT file.
@@ -4,36 +4,86 @@ from collections import defaultdict
 from typing import Any
 import struct
 import math
+import threading
+import contextlib
 
 # ===== Functions for Binary-File packing & unpacking =====
 
-# variable to keep track of where to start reading from next within the raw-file
-UNPACKER_READFROM_BYTE = 0
 # this should be hardcoded and never changed, something weird that nobody would ever use in a name
 _UNPACKER_ESCAPE_CHAR = "‡"
-# encoding to use when packing/unpackign strings
-_UNPACKER_ENCODING = "utf8"
-# dict to store all strings that failed to translate, plus counts
-_UNPACKER_FAILED_TRANSLATE_DICT = defaultdict(lambda: 0)
-# flag to indicate whether the last decoding needed escaping or not, cuz returning as a tuple is ugly
-_UNPACKER_FAILED_TRANSLATE_FLAG = False
+
+
+class UnpackerState:
+	"""
+	Everything the packing & unpacking functions need to remember between calls.
+	Each thread has its own current state, so different threads can walk different files at the same time without
+	interfering with each other. Something that walks a file (like PmxReader) can also keep its own state object and
+	make it current with "use_state()" while it works.
+	"""
+	def __init__(self):
+		# variable to keep track of where to start reading from next within the raw-file
+		self.readfrom_byte = 0
+		# encoding to use when packing/unpackign strings
+		self.encoding = "utf8"
+		# dict to store all strings that failed to translate, plus counts
+		self.failed_translate_dict = defaultdict(lambda: 0)
+		# flag to indicate whether the last decoding needed escaping or not, cuz returning as a tuple is ugly
+		self.failed_translate_flag = False
+		# raw bytes -> decoded string, for every auto-length string decoded from the current file so far
+		# names & texture paths repeat a lot, so this skips decoding them again and makes equal strings share one object
+		self.string_cache = {}
+		# what my_unpack() & my_unpack_struct() do when they unpack a NaN or INF float:
+		# "replace" it with a real number & print a warning, just "flag" it by setting found_nan_inf, or "off" to not check
+		# PmxReader uses "flag" to know which sections need to go through pmx_sanitize afterward
+		self.check_nan_inf = "replace"
+		self.found_nan_inf = False
+
+
+# holds the current UnpackerState for each thread
+_UNPACKER_LOCAL = threading.local()
+
+
+def state() -> UnpackerState:
+	"""
+	Get the UnpackerState currently in use by this thread, creating a fresh one if there isn't one yet.
+	"""
+	try:
+		return _UNPACKER_LOCAL.state
+	except AttributeError:
+		_UNPACKER_LOCAL.state = UnpackerState()
+		return _UNPACKER_LOCAL.state
+
+
+@contextlib.contextmanager
+def use_state(newstate: UnpackerState):
+	"""
+	Context manager: make the given UnpackerState current for this thread, then put back whatever was current before.
+	"""
+	prev = getattr(_UNPACKER_LOCAL, "state", None)
+	_UNPACKER_LOCAL.state = newstate
+	try:
+		yield newstate
+	finally:
+		_UNPACKER_LOCAL.state = prev if prev is not None else UnpackerState()
 
 
 def reset_unpack():
-	global UNPACKER_READFROM_BYTE
-	UNPACKER_READFROM_BYTE = 0
-	_UNPACKER_FAILED_TRANSLATE_DICT.clear()
+	st = state()
+	st.readfrom_byte = 0
+	st.failed_translate_dict.clear()
+	st.string_cache.clear()
+	st.found_nan_inf = False
 
 def set_encoding(newencoding: str):
-	global _UNPACKER_ENCODING
-	_UNPACKER_ENCODING = newencoding
+	state().encoding = newencoding
 
 def print_failed_decodes():
-	if len(_UNPACKER_FAILED_TRANSLATE_DICT) != 0:
+	failed = state().failed_translate_dict
+	if len(failed) != 0:
 		MY_PRINT_FUNC("List of all strings that failed to decode, plus their occurance rate:")
-		keys = ["'" + k + "':" for k in _UNPACKER_FAILED_TRANSLATE_DICT.keys()]
+		keys = ["'" + k + "':" for k in failed.keys()]
 		keys_justified = MY_JUSTIFY_STRINGLIST(keys)
-		for k,v in zip(keys_justified, _UNPACKER_FAILED_TRANSLATE_DICT.values()):
+		for k,v in zip(keys_justified, failed.values()):
 			MY_PRINT_FUNC("    %s  %d" % (k,v))
 
 
@@ -45,28 +95,30 @@ def decode_bytes_with_escape(r: bytearray) -> str:
 	the truncated char is converted to UNPACKER_ESCAPE_CHAR followed by hex digits that represent the remaining
 	byte. It's not useful to humans, but it is better than simply losing the data.
 	TODO: get example?
-	All cases I tested require at most 1 escape char, but just to be safe it recursively calls as much as needed.
+	All cases I tested require at most 1 escape char, but just to be safe it escapes as many as needed.
 
 	:param r: bytearray object which represents a string through encoding UNPACKER_ENCODING
 	:return: decoded string, possibly ending with escape char and hex digits
 	"""
 
-	global _UNPACKER_FAILED_TRANSLATE_FLAG
-
-	if len(r) == 0:
-		# this is needed to prevent infinite recursion if something goes really really wrong
-		return ""
-
+	ustate = state()
 	try:
-		s = r.decode(_UNPACKER_ENCODING)				# try to decode the whole string
-		return s
-
+		return r.decode(ustate.encoding)			# try to decode the whole string
 	except UnicodeDecodeError:
-		_UNPACKER_FAILED_TRANSLATE_FLAG = True
-		s = decode_bytes_with_escape(r[:-1])		# if it cant, decode everything but the last byte
-		extra = r[-1]  								# this is the last byte that couldn't be decoded
-		s = "%s%s%x" % (s, _UNPACKER_ESCAPE_CHAR, extra)
-		return s
+		pass
+
+	# if it cant, drop bytes off the end one at a time until the rest can be decoded
+	ustate.failed_translate_flag = True
+	end = len(r) - 1
+	s = ""
+	while end > 0:
+		try:
+			s = r[:end].decode(ustate.encoding)
+			break
+		except UnicodeDecodeError:
+			end -= 1
+	# then every byte that couldn't be decoded is tacked onto the end as an escape char + hex digits
+	return s + "".join("%s%x" % (_UNPACKER_ESCAPE_CHAR, extra) for extra in r[end:])
 
 
 def encode_string_with_escape(a: str) -> bytearray:
@@ -93,7 +145,7 @@ def encode_string_with_escape(a: str) -> bytearray:
 				n = encode_string_with_escape(a[0:-3])	# convert str before escape from str to bytearray
 				n += bytearray.fromhex(a[-2:])			# convert hex after escape char to single byte and append
 				return n
-		return bytearray(a, _UNPACKER_ENCODING)			# no escape char: convert from str to bytearray the standard way
+		return bytearray(a, state().encoding)			# no escape char: convert from str to bytearray the standard way
 
 	except UnicodeEncodeError:
 		# if the decode fails, I hope it is because the input string contains a fullwidth tilde, that's the only error i know how to handle
@@ -101,7 +153,7 @@ def encode_string_with_escape(a: str) -> bytearray:
 		new_a = a.replace(u"\uFF5E", u"\u301c")			# replace "fullwidth tilde" with "wave dash", same as MMD does
 
 		try:
-			return bytearray(new_a, _UNPACKER_ENCODING)	# no escape char: convert from str to bytearray the standard way
+			return bytearray(new_a, state().encoding)	# no escape char: convert from str to bytearray the standard way
 
 		except UnicodeEncodeError as e:
 			# overwrite the 'reason' field with the original string it was trying to encode
@@ -185,51 +237,206 @@ def my_unpack(fmt:str, data:bytearray) -> Any:
 	Parses the bytearray object into some number of friendly Python objects (ints, floats, bools, etc) according to
 	the data sizes/types specified in the format string.
 	If exactly 1 variable would be unpacked, it is automatically de-listed and returned naked.
-	This also removes any NaN or INF values it finds and replaces them with real numbers instead.
-	Uses global var UNPACKER_READFROM_BYTE to know where to start unpacking next (internally tracked, reset by
-	"reset_unpack()" function).
+	This also removes any NaN or INF values it finds and replaces them with real numbers instead, or only flags them,
+	depending on "check_nan_inf" of the current UnpackerState.
+	Uses the "readfrom_byte" of the current UnpackerState to know where to start unpacking next (internally tracked,
+	reset by "reset_unpack()" function).
 
 	:param fmt: string-type format for python "struct" lib
 	:param data: bytearray being walked & unpacked
 	:return: one variable or a list of variables, depending on the contents of the format string
 	"""
-	global UNPACKER_READFROM_BYTE
+	st = state()
 
 	try:
 		afmt = "<" + fmt
-		r = struct.unpack_from(afmt, data, UNPACKER_READFROM_BYTE)
-		UNPACKER_READFROM_BYTE += struct.calcsize(afmt)	# increment the global read-from tracker
+		r = struct.unpack_from(afmt, data, st.readfrom_byte)
+		st.readfrom_byte += struct.calcsize(afmt)	# increment the read-from tracker
 
 	except Exception as e:
 		MY_PRINT_FUNC("error in my_unpack(fmt, data)")
-		MY_PRINT_FUNC("fmt=",fmt,"data=","really big!","bytepos=", UNPACKER_READFROM_BYTE)
+		MY_PRINT_FUNC("fmt=",fmt,"data=","really big!","bytepos=", st.readfrom_byte)
 		MY_PRINT_FUNC(e.__class__.__name__, e)
 		raise
 
 	# r is guaranteed to be a tuple... convert from tuple to list so i can always return list objects
 	retme = list(r)
 
-	# new: check for NaN and replace with 0
+	# new: check for NaN and replace with 0, but only if there can be any floats at all
+	if st.check_nan_inf != "off" and any(c in fmt for c in "efd"):
+		_check_nan_inf(st, retme)
+
+	# retme is guaranteed to be a list
+	# if it is only a single item, de-listify it here
+	if len(retme) == 1:
+		return retme[0]
+	else:
+		return retme
+
+
+def _check_nan_inf(st: UnpackerState, retme: list) -> None:
+	# replace or flag any NaN or INF, depending on the state's "check_nan_inf"
+	if st.check_nan_inf == "replace":
+		_replace_nan_inf(retme)
+	elif not all(math.isfinite(foo) for foo in retme if isinstance(foo, float)):
+		st.found_nan_inf = True
+
+
+def _replace_nan_inf(retme: list) -> None:
+	"""
+	Walk the list of freshly unpacked values and replace any NaN or INF floats with real numbers instead, in-place.
+	NaN becomes 0.0 and INF becomes +/- 999999.0, and a warning is printed for each one.
+
+	:param retme: list of unpacked values, modified in-place
+	"""
+
 	for i in range(len(retme)):
 		foo = retme[i]
 		if isinstance(foo, float):
 			if math.isnan(foo):
 				retme[i] = 0.0
-				MY_PRINT_FUNC("Warning: found NaN in place of float shortly before bytepos %d, replaced with 0.0" % UNPACKER_READFROM_BYTE)
+				MY_PRINT_FUNC("Warning: found NaN in place of float shortly before bytepos %d, replaced with 0.0" % state().readfrom_byte)
 			if math.isinf(foo):
 				if foo > 0: retme[i] =  999999.0
 				else:       retme[i] = -999999.0
-				MY_PRINT_FUNC("Warning: found INF in place of float shortly before bytepos %d, replaced with +/- 999999.0" % UNPACKER_READFROM_BYTE)
+				MY_PRINT_FUNC("Warning: found INF in place of float shortly before bytepos %d, replaced with +/- 999999.0" % state().readfrom_byte)
+
+
+class MyStruct(struct.Struct):
+	"""
+	A precompiled version of a format string, for formats that are used over and over again.
+	Use with "my_unpack_struct()" to get exactly the same results as "my_unpack(fmt, data)", but without re-parsing
+	the format string every time. Also remembers whether the format contains any floats at all, so the NaN/INF check
+	can be skipped entirely when it doesn't.
+	This always adds byte-alignment specifier "<" to the format string.
+	"""
+
+	def __init__(self, fmt: str):
+		super().__init__("<" + fmt)
+		self.fmt = fmt
+		self.has_float = any(c in fmt for c in "efd")
+
+
+def my_unpack_struct(st: MyStruct, data: bytearray) -> Any:
+	"""
+	Same as "my_unpack()", but uses a precompiled MyStruct object instead of a format string.
+	If exactly 1 variable would be unpacked, it is automatically de-listed and returned naked.
+
+	:param st: MyStruct object made from the format string
+	:param data: bytearray being walked & unpacked
+	:return: one variable or a list of variables, depending on the contents of the format string
+	"""
+	ustate = state()
+
+	try:
+		r = st.unpack_from(data, ustate.readfrom_byte)
+		ustate.readfrom_byte += st.size	# increment the read-from tracker
+
+	except Exception as e:
+		MY_PRINT_FUNC("error in my_unpack_struct(st, data)")
+		MY_PRINT_FUNC("fmt=",st.fmt,"data=","really big!","bytepos=", ustate.readfrom_byte)
+		MY_PRINT_FUNC(e.__class__.__name__, e)
+		raise
+
+	retme = list(r)
+
+	# only pay for the full NaN/INF check when there is something to find
+	# any NaN or INF makes the sum non-finite, and float32 values are far too small to overflow a double when summed
+	if st.has_float and ustate.check_nan_inf != "off" and not math.isfinite(sum(r)):
+		_check_nan_inf(ustate, retme)
 
-	# retme is guaranteed to be a list
-	# if it is only a single item, de-listify it here
 	if len(retme) == 1:
 		return retme[0]
 	else:
 		return retme
 
 
-def my_string_unpack(data: bytearray, L=None) -> str:
+def my_pack_struct(st: MyStruct, args_in: Any) -> bytes:
+	"""
+	Same as "my_pack()", but uses a precompiled MyStruct object instead of a format string.
+	Returns the bytes object straight from struct, without copying it into a new bytearray; it is meant to be
+	appended onto a bytearray with +=.
+
+	:param st: MyStruct object made from the format string
+	:param args_in: list of variables to pack, or a single variable not inside a list
+	:return: bytes representation of these args
+	"""
+
+	try:
+		if isinstance(args_in, (list, tuple)):
+			return st.pack(*args_in)
+		else:
+			return st.pack(args_in)
+
+	except Exception as e:
+		MY_PRINT_FUNC("error in my_pack_struct(st, args_in)")
+		MY_PRINT_FUNC("fmt=", st.fmt, "args_in=", args_in)
+		MY_PRINT_FUNC(e.__class__.__name__, e)
+		raise
+
+
+def my_pack_into(st: MyStruct, buf: bytearray, offset: int, args_in: list) -> int:
+	"""
+	Pack the args directly into a preallocated buffer at the given offset, according to a precompiled MyStruct.
+	Nothing is allocated, so this is the fastest way to fill a big section where the total size is known ahead of time.
+
+	:param st: MyStruct object made from the format string
+	:param buf: bytearray with enough room to hold the packed args at the given offset
+	:param offset: position within buf to start writing at
+	:param args_in: list of variables to pack
+	:return: offset of the byte just after the packed args, where the next thing should be written
+	"""
+
+	try:
+		st.pack_into(buf, offset, *args_in)
+
+	except Exception as e:
+		MY_PRINT_FUNC("error in my_pack_into(st, buf, offset, args_in)")
+		MY_PRINT_FUNC("fmt=", st.fmt, "args_in=", args_in, "offset=", offset)
+		MY_PRINT_FUNC(e.__class__.__name__, e)
+		raise
+
+	return offset + st.size
+
+
+# precompiled format of the length before each auto-length string
+_STRING_LENGTH = struct.Struct("<i")
+
+
+def _auto_string_unpack(data: bytearray) -> Any:
+	"""
+	Fast path of "my_string_unpack()" for auto-length strings: read the length, then decode the bytes right after it.
+	Strings that were already seen in this file are looked up instead of decoded again, and share the same object.
+	Leaves the read position alone and returns None if the length is bad or the data ends too soon, so the caller can
+	take the slow path that prints all the error details.
+
+	:param data: bytearray being walked & unpacked
+	:return: decoded string, or None
+	"""
+	ustate = state()
+	start = ustate.readfrom_byte + 4
+	try:
+		(length,) = _STRING_LENGTH.unpack_from(data, ustate.readfrom_byte)
+	except struct.error:
+		return None
+	end = start + length
+	if length < 0 or end > len(data):
+		return None
+	# bytes, not bytearray, so it can be a dict key
+	b = bytes(data[start:end])
+	s = ustate.string_cache.get(b)
+	if s is None:
+		s = decode_bytes_with_escape(b)
+		if ustate.failed_translate_flag:
+			# counted & reported by the caller, don't cache it so it is counted every time it is seen
+			ustate.readfrom_byte = end
+			return s
+		ustate.string_cache[b] = s
+	ustate.readfrom_byte = end
+	return s
+
+
+def my_string_unpack(data: bytearray, L=None, fast=True) -> str:
 	"""
 	Unpacker function exclusively for unpacking strings.
 	Uses the encoding that was last set with a "set_encoding()" function call.
@@ -242,10 +449,19 @@ def my_string_unpack(data: bytearray, L=None) -> str:
 
 	:param data: bytearray being walked & unpacked
 	:param L: optional integer length, number of bytes in the resulting bytearray
+	:param fast: if false, decode auto-length strings the old slower way, only exists for timing comparisons
 	:return: decoded string
 	"""
 
-	global _UNPACKER_FAILED_TRANSLATE_FLAG
+	if L is None and fast:
+		s = _auto_string_unpack(data)
+		if s is not None:
+			ustate = state()
+			if ustate.failed_translate_flag:
+				ustate.failed_translate_flag = False
+				ustate.failed_translate_dict[s] += 1
+			return s
+		# something is wrong with this string, go the slow way to print everything about it
 
 	try:
 		if L is None:
@@ -277,9 +493,10 @@ def my_string_unpack(data: bytearray, L=None) -> str:
 
 	# translated string is now in s (maybe with the escape char tacked on)
 	# did it need escaping? add it to the dict for reporting later!
-	if _UNPACKER_FAILED_TRANSLATE_FLAG:
-		_UNPACKER_FAILED_TRANSLATE_FLAG = False
-		_UNPACKER_FAILED_TRANSLATE_DICT[s] += 1
+	ustate = state()
+	if ustate.failed_translate_flag:
+		ustate.failed_translate_flag = False
+		ustate.failed_translate_dict[s] += 1
 
 	return s
 
@@ -0,0 +1,166 @@
+"""
+Run several "(pmx) -> (pmx, is_changed)" functions, like the ones in the tools/ scripts, one after another on the same
+model while it stays in memory. The file is parsed once at the start, and validated & written once at the end, instead
+of a full read_pmx()/write_pmx() round trip for every step.
+
+    from pmx_scripting import pipeline
+    result = pipeline.run("model.pmx", [(weight_cleanup, "_weightfix"), (prune_unused_bones, "_boneprune"), morph_winnow])
+
+A stage saying it changed something isn't always true, some tools report a change whenever they had something to look
+at. When the pipeline read the file itself, it checks which sections really differ from the file before writing, see
+PmxLazy.changed_sections(), and doesn't write a model that ended up exactly the same as the file.
+"""
+
+import time
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from . import pmx_struct as pmxstruct
+from .core import MY_PRINT_FUNC
+from .io import binsource_insert_suffix, binsource_name
+from .pmx_parser import PmxLazy, read_pmx, write_pmx
+from .progress import PRINT_PROGRESS
+
+
+# ===== Pipeline =====
+
+STAGE = Callable[[pmxstruct.Pmx], Tuple[pmxstruct.Pmx, bool]]
+
+
+class StageResult(NamedTuple):
+	name: str
+	changed: bool
+	seconds: float
+
+
+class PipelineResult(NamedTuple):
+	pmx: pmxstruct.Pmx
+	output_path: Optional[str]  # None if nothing was written
+	stages: List[StageResult]
+	read_time: float
+	write_time: float           # includes validation
+	# sections that really differ from the file, None if that wasn't checked
+	sections_changed: Optional[List[str]] = None
+	check_time: float = 0.0
+
+	@property
+	def changed(self) -> bool:
+		if self.sections_changed is not None:
+			return bool(self.sections_changed)
+		return any(s.changed for s in self.stages)
+
+	@property
+	def changed_by(self) -> List[str]:
+		return [s.name for s in self.stages if s.changed]
+
+	@property
+	def total_time(self) -> float:
+		return self.read_time + sum(s.seconds for s in self.stages) + self.check_time + self.write_time
+
+
+def _stage_name(func: Callable) -> str:
+	return getattr(func, "__name__", None) or repr(func)
+
+
+def run(source: Union[str, pmxstruct.Pmx], stages: Sequence[Union[STAGE, Tuple[STAGE, str]]], output_path: str = None,
+		suffix: str = None, write=True, force_write=False, check_changes=True, validate="fast", report=True,
+		moreinfo=False, progress=PRINT_PROGRESS) -> PipelineResult:
+	"""
+	Apply each stage to the model in order, each one getting the result of the previous one, then write it once.
+
+	:param source: PMX file path, or an already-loaded Pmx object. the path can also be a file inside a zip archive or a
+	compressed file, see read_pmx()
+	:param stages: list of "(pmx) -> (pmx, is_changed)" functions, or (function, suffix) tuples
+	:param output_path: where to write the result. if not given, and source is a path, the result goes next to the
+	source with the suffix added, using an unused name so nothing gets overwritten. a compressed source gets a
+	compressed result, and the result for a file inside an archive goes next to the archive, see io.binsource_insert_suffix()
+	:param suffix: suffix for the automatic output name. if not given, the suffixes of every stage that changed
+	something are joined together, the same name as running those tools one at a time would give.
+	:param write: if false, never write anything, just return the resulting Pmx
+	:param force_write: if true, write even when no stage changed anything
+	:param check_changes: if true, and the source is a path, and some stage says it changed something, check which
+	sections really differ from the file and don't write if none do. costs about as much as writing the sections the
+	stages touched
+	:param validate: how to check the result before writing it, "full", "fast", or "off", see pmx_validate
+	:param report: if true, print the time taken by each stage when done
+	:param moreinfo: passed to read_pmx()/write_pmx()
+	:param progress: passed to read_pmx()/write_pmx(), None to not report progress at all
+	:return: PipelineResult with the final Pmx, where it was written, and the timings
+	"""
+	# normalize the stage list first so a bad entry fails before spending time reading the file
+	stagelist = []
+	for s in stages:
+		if isinstance(s, tuple):
+			func, stagesuffix = s
+		else:
+			func, stagesuffix = s, ""
+		if not callable(func):
+			raise RuntimeError("pipeline stage '%s' is not callable" % repr(func))
+		stagelist.append((func, stagesuffix))
+
+	start = time.perf_counter()
+	if isinstance(source, str):
+		input_path = source
+		pmx = read_pmx(source, moreinfo=moreinfo, lazy=True, progress=progress)
+	else:
+		input_path = None
+		pmx = source
+	read_time = time.perf_counter() - start
+
+	results = []
+	auto_suffix = ""
+	for func, stagesuffix in stagelist:
+		start = time.perf_counter()
+		pmx, is_changed = func(pmx)
+		results.append(StageResult(_stage_name(func), bool(is_changed), time.perf_counter() - start))
+		if is_changed:
+			auto_suffix += stagesuffix
+
+	sections_changed = None
+	check_time = 0.0
+	if check_changes and isinstance(pmx, PmxLazy) and input_path is not None and any(r.changed for r in results):
+		# only possible when the stages kept working on the model that was read, not on some new one they made
+		start = time.perf_counter()
+		sections_changed = pmx.changed_sections()
+		check_time = time.perf_counter() - start
+
+	written = None
+	write_time = 0.0
+	really_changed = any(r.changed for r in results) and (sections_changed is None or bool(sections_changed))
+	if write and (force_write or really_changed):
+		if output_path is None:
+			if input_path is None:
+				raise RuntimeError("pipeline.run() needs an output_path when the source is not a file path")
+			output_path = binsource_insert_suffix(input_path, auto_suffix if suffix is None else suffix)
+		start = time.perf_counter()
+		# write_pmx() validates the model first, this is the only time it happens
+		write_pmx(output_path, pmx, moreinfo=moreinfo, validate=validate, progress=progress)
+		write_time = time.perf_counter() - start
+		written = output_path
+
+	retme = PipelineResult(pmx, written, results, read_time, write_time, sections_changed, check_time)
+	if report:
+		print_report(retme, input_path)
+	return retme
+
+
+def print_report(result: PipelineResult, name: str = None) -> None:
+	"""
+	Print how long each part of a pipeline run took.
+
+	:param result: from run()
+	:param name: optional file name for the header line
+	"""
+	MY_PRINT_FUNC("")
+	if name is not None:
+		MY_PRINT_FUNC("Pipeline timing for '%s':" % binsource_name(name))
+	else:
+		MY_PRINT_FUNC("Pipeline timing:")
+	rows = [("read", result.read_time, "")]
+	rows += [(s.name, s.seconds, "changed" if s.changed else "") for s in result.stages]
+	if result.sections_changed is not None:
+		rows.append(("check changes", result.check_time, ", ".join(result.sections_changed) or "nothing really changed"))
+	rows.append(("validate + write", result.write_time, "" if result.output_path is None else binsource_name(result.output_path)))
+	width = max(len(r[0]) for r in rows)
+	for label, seconds, note in rows:
+		MY_PRINT_FUNC("  %s  %8.3fs  %s" % (label.ljust(width), seconds, note))
+	MY_PRINT_FUNC("  %s  %8.3fs" % ("total".ljust(width), result.total_time))
@@ -0,0 +1,317 @@
+"""
+On-disk cache of parsed PMX models, so that reading the same file again and again only pays the full parsing cost once.
+
+    pmx = read_pmx("model.pmx", cache=True)                              # the default cache, see default_cache_dir()
+    pmx = read_pmx("model.pmx", cache=PmxCache("D:/cache", max_bytes=10 << 30))
+
+Each entry is the model as a ColumnarPmx, pickled. The big sections are a few flat buffers in that form, so loading an
+entry is mostly just reading the file; a normal Pmx is rebuilt from it with ColumnarPmx.to_pmx(). Whatever the
+sanitizer found while reading is stored too.
+
+An entry is found by the size, modification time, and content hash of the PMX file, plus the sanitize mode. If the
+file changes in any way it simply gets a new entry. Every entry also belongs to one version of this library: the
+source of the reader and of every module of the library it uses is hashed, and entries made by any other version
+are never used, they just get evicted eventually.
+When the cache gets bigger than its limit, the entries that were used least recently are deleted. Several processes
+can share one cache directory, entries are written under a temporary name and then renamed into place.
+"""
+
+from . import core
+from . import pmx_columnar as pmxcolumnar
+from .pmx_sanitize import SanitizeReport
+
+import hashlib
+import importlib
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import types
+from typing import List, Optional, Tuple
+
+
+__all__ = ['PmxCache', 'default_cache_dir', 'get_default_cache', 'file_digest']
+
+
+# change this whenever the layout of an entry changes
+_CACHE_FORMAT = 1
+
+# the default size limit, least recently used entries are deleted past this
+DEFAULT_MAX_BYTES = 2 << 30
+
+# file extension of the cache entries
+_ENTRY_EXT = ".pmxcache"
+
+# the module that reads PMX files, it and every module of this library it uses decide what a parsed model looks like.
+# if any of their source changes the old entries are useless
+_READER_MODULE = "pmx_parser"
+
+
+def default_cache_dir() -> str:
+	"""
+	The environment variable PMX_SCRIPTING_CACHE if it is set, otherwise "pmx_scripting" in the user's cache folder:
+	%LOCALAPPDATA% on Windows, $XDG_CACHE_HOME or ~/.cache everywhere else.
+	"""
+	override = os.environ.get("PMX_SCRIPTING_CACHE")
+	if override:
+		return override
+	if sys.platform == "win32" and os.environ.get("LOCALAPPDATA"):
+		base = os.environ["LOCALAPPDATA"]
+	else:
+		base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+	return os.path.join(base, "pmx_scripting")
+
+
+# absolute path -> (stat stamp, digest) of the files file_digest() already hashed in this process
+_DIGEST_MEMO = {}
+_DIGEST_MEMO_MAX = 4096
+_DIGEST_MEMO_LOCK = threading.Lock()
+
+
+def _stat_stamp(st: os.stat_result) -> tuple:
+	# any write to the file changes at least one of these
+	return st.st_size, st.st_mtime_ns, st.st_ctime_ns, st.st_ino
+
+
+def file_digest(path: str) -> str:
+	"""
+	Hash a file. The result is remembered for as long as the file's size, modification & change times, and inode stay
+	the same, so asking again about an unchanged file only costs a stat().
+
+	:param path: file path
+	:return: hex BLAKE2b hash of the contents of the file
+	"""
+	memo_key = os.path.abspath(path)
+	# stat before reading, if the file is written while it is being hashed the next call sees a new stamp
+	stamp = _stat_stamp(os.stat(path))
+	hit = _DIGEST_MEMO.get(memo_key)
+	if hit is not None and hit[0] == stamp:
+		return hit[1]
+	h = hashlib.blake2b(digest_size=20)
+	with open(path, "rb") as f:
+		for block in iter(lambda: f.read(1 << 20), b""):
+			h.update(block)
+	digest = h.hexdigest()
+	with _DIGEST_MEMO_LOCK:
+		_DIGEST_MEMO.pop(memo_key, None)
+		if len(_DIGEST_MEMO) >= _DIGEST_MEMO_MAX:
+			# forget the one that was hashed longest ago
+			del _DIGEST_MEMO[next(iter(_DIGEST_MEMO))]
+		_DIGEST_MEMO[memo_key] = (stamp, digest)
+	return digest
+
+
+_FINGERPRINT = None
+
+
+def _reader_modules() -> List[types.ModuleType]:
+	"""
+	Find every module of this library that the reader uses, directly or through other modules, by following what each
+	one imports: modules, and the functions & classes imported from them. Nothing has to be listed by hand, so a new
+	helper module the reader starts using is covered automatically.
+
+	:return: list of modules, sorted by name
+	"""
+	prefix = __package__ + "."
+	# imported here, the reader imports this module so it can't be imported at the top
+	todo = [importlib.import_module(prefix + _READER_MODULE)]
+	found = {}
+	while todo:
+		mod = todo.pop()
+		if mod.__name__ in found:
+			continue
+		found[mod.__name__] = mod
+		for value in vars(mod).values():
+			name = value.__name__ if isinstance(value, types.ModuleType) else getattr(value, "__module__", None)
+			if isinstance(name, str) and name.startswith(prefix) and name not in found and name in sys.modules:
+				todo.append(sys.modules[name])
+	return [found[name] for name in sorted(found)]
+
+
+def _library_fingerprint() -> str:
+	# hash of the source of this library & the python version, calculated once per process
+	global _FINGERPRINT
+	if _FINGERPRINT is None:
+		h = hashlib.blake2b(digest_size=8)
+		h.update(("%d %d.%d" % (_CACHE_FORMAT, sys.version_info[0], sys.version_info[1])).encode())
+		for mod in _reader_modules():
+			h.update(mod.__name__.encode())
+			with open(mod.__file__, "rb") as f:
+				h.update(f.read())
+		_FINGERPRINT = h.hexdigest()
+	return _FINGERPRINT
+
+
+class PmxCache:
+	"""
+	A directory of parsed models, see the top of this file. Safe to share between threads & processes.
+	"""
+
+	def __init__(self, directory: str = None, max_bytes=DEFAULT_MAX_BYTES):
+		"""
+		:param directory: where to keep the entries, default is default_cache_dir(). created when first needed
+		:param max_bytes: total size of all entries to stay under, least recently used ones are deleted past this
+		"""
+		self.directory = os.path.abspath(directory or default_cache_dir())
+		self.max_bytes = max_bytes
+		self._lock = threading.Lock()
+
+	def key(self, pmx_filename: str, sanitize: str) -> str:
+		"""
+		Find the name of the entry for a file. The first time this is asked about a file it reads the whole file to hash
+		it, after that only while the file keeps changing, see file_digest().
+
+		:param pmx_filename: PMX file path
+		:param sanitize: sanitize mode the file is read with, see PmxReader
+		:return: key to give to load() and store()
+		"""
+		st = os.stat(pmx_filename)
+		h = hashlib.blake2b(digest_size=20)
+		h.update(("%s %d %d %s" % (file_digest(pmx_filename), st.st_size, st.st_mtime_ns, sanitize)).encode())
+		return h.hexdigest()
+
+	def _entry_path(self, key: str) -> str:
+		return os.path.join(self.directory, _library_fingerprint(), key + _ENTRY_EXT)
+
+	def load(self, key: str) -> Optional[Tuple[pmxcolumnar.ColumnarPmx, SanitizeReport]]:
+		"""
+		:param key: from key()
+		:return: (ColumnarPmx, SanitizeReport) if the entry exists, otherwise None
+		"""
+		path = self._entry_path(key)
+		try:
+			with open(path, "rb") as f:
+				entry = pickle.load(f)
+			if entry.get("format") != _CACHE_FORMAT or entry.get("key") != key:
+				raise RuntimeError("entry doesn't match its name")
+		except FileNotFoundError:
+			return None
+		except Exception as e:
+			# half-written by a process that crashed, or damaged somehow. get rid of it & read the file normally
+			core.MY_PRINT_FUNC("Warning: ignoring broken cache entry '%s': %s" % (path, e))
+			self._remove(path)
+			return None
+		try:
+			# mark it as recently used
+			os.utime(path)
+		except OSError:
+			pass
+		return entry["pmx"], entry["sanitize_report"]
+
+	def store(self, key: str, pmx: pmxcolumnar.ColumnarPmx, report: SanitizeReport) -> None:
+		"""
+		Save a parsed model, then delete the least recently used entries if the cache is too big.
+		Failing to write the entry is only a warning, since the cache is never required.
+
+		:param key: from key()
+		:param pmx: the model, as read with columnar=True
+		:param report: what the sanitizer found while reading it
+		"""
+		path = self._entry_path(key)
+		entry = {"format": _CACHE_FORMAT, "key": key, "pmx": pmx, "sanitize_report": report}
+		try:
+			os.makedirs(os.path.dirname(path), exist_ok=True)
+			# write it under a temporary name first, so other processes never see a half-written entry
+			fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(path))
+			try:
+				with os.fdopen(fd, "wb") as f:
+					pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+				os.replace(tmp_path, path)
+			except BaseException:
+				self._remove(tmp_path)
+				raise
+		except OSError as e:
+			core.MY_PRINT_FUNC("Warning: failed to write cache entry '%s': %s" % (path, e))
+			return
+		self.evict()
+
+	def _entries(self) -> List[Tuple[float, int, str]]:
+		# (last used time, size, path) of every entry, of every library version
+		retme = []
+		try:
+			subdirs = [d.path for d in os.scandir(self.directory) if d.is_dir()]
+		except FileNotFoundError:
+			return retme
+		for subdir in subdirs:
+			try:
+				for f in os.scandir(subdir):
+					if f.name.endswith(_ENTRY_EXT):
+						st = f.stat()
+						retme.append((st.st_mtime, st.st_size, f.path))
+			except FileNotFoundError:
+				# another process just removed it
+				pass
+		return retme
+
+	def size(self) -> int:
+		"""
+		:return: total bytes used by all entries
+		"""
+		return sum(e[1] for e in self._entries())
+
+	def evict(self, max_bytes: int = None) -> int:
+		"""
+		Delete the least recently used entries until the total size is under the limit.
+		Entries made by other versions of this library are deleted first.
+
+		:param max_bytes: the limit to use instead of the usual one, 0 deletes everything
+		:return: how many entries were deleted
+		"""
+		if max_bytes is None:
+			max_bytes = self.max_bytes
+		with self._lock:
+			entries = self._entries()
+			total = sum(e[1] for e in entries)
+			current = os.path.join(self.directory, _library_fingerprint())
+			# oldest first, and anything from another version goes before everything else
+			entries.sort(key=lambda e: (os.path.dirname(e[2]) == current, e[0]))
+			deleted = 0
+			for mtime, size, path in entries:
+				if total <= max_bytes:
+					break
+				self._remove(path)
+				total -= size
+				deleted += 1
+			self._remove_empty_dirs()
+		return deleted
+
+	def clear(self) -> int:
+		"""
+		Delete every entry.
+
+		:return: how many entries were deleted
+		"""
+		return self.evict(0)
+
+	def _remove_empty_dirs(self) -> None:
+		try:
+			for d in os.scandir(self.directory):
+				if d.is_dir():
+					try:
+						os.rmdir(d.path)
+					except OSError:
+						# not empty, or already gone
+						pass
+		except FileNotFoundError:
+			pass
+
+	@staticmethod
+	def _remove(path: str) -> None:
+		try:
+			os.remove(path)
+		except OSError:
+			pass
+
+
+_DEFAULT_CACHE = None
+
+
+def get_default_cache() -> PmxCache:
+	"""
+	:return: the PmxCache used by read_pmx(cache=True), in default_cache_dir() with the default size limit
+	"""
+	global _DEFAULT_CACHE
+	if _DEFAULT_CACHE is None or _DEFAULT_CACHE.directory != os.path.abspath(default_cache_dir()):
+		_DEFAULT_CACHE = PmxCache()
+	return _DEFAULT_CACHE
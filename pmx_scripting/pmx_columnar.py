@@ -0,0 +1,786 @@
+"""
+Columnar (struct-of-arrays) versions of the biggest PMX sections: vertices, faces, and vertex/UV morph items.
+
+Instead of one Python object per record, each table keeps its data in a few contiguous "array.array" buffers, stored
+the same way the PMX file stores them (float32 for floats, int32 for indices). This is many times smaller than a list
+of PmxVertex objects, and numpy can look at the buffers directly with np.frombuffer() without copying anything.
+When read_pmx() builds the tables itself, a column can also be a numpy array or a memoryview straight into the file
+mapping; those are quietly turned into normal arrays the first time something needs to resize or rewrite them.
+
+Indexing a table gives a lazy "view" object that behaves like the normal struct (a PmxVertexView is-a PmxVertex) so
+existing code keeps working. Nothing is decoded until an attribute is touched; after that the decoded record is kept
+by the table so that in-place edits like "vert.weight.pop()" stick, and flush() writes them back into the buffers.
+Faces are simple enough that FaceView reads & writes the buffer directly.
+
+ColumnarPmx is a Pmx that uses these tables, use ColumnarPmx.from_pmx() and ColumnarPmx.to_pmx() to convert.
+write_pmx() accepts either form.
+"""
+
+from .core import flatten
+from . import pmx_struct as pmxstruct
+
+from typing import List, Dict, Iterator, Union
+from array import array
+import collections.abc
+import copy
+
+
+__all__ = ['ColumnarPmx', 'FaceTable', 'FaceView', 'MorphItemTable', 'VertexTable', 'RecordTable', 'clone_morph']
+
+
+# morph types that are stored in a MorphItemTable by ColumnarPmx, and how many floats their "move" has
+MORPH_ITEM_TABLE_TYPES = {
+	pmxstruct.MorphType.VERTEX: 3,
+	pmxstruct.MorphType.UV: 4,
+	pmxstruct.MorphType.UV_EXT1: 4,
+	pmxstruct.MorphType.UV_EXT2: 4,
+	pmxstruct.MorphType.UV_EXT3: 4,
+	pmxstruct.MorphType.UV_EXT4: 4,
+}
+
+
+# ===== Base classes =====
+
+class _LazyRecordView:
+	"""
+	Stand-in for one record of a RecordTable. Every attribute get/set is forwarded to the decoded record, which the
+	table decodes on first use and then keeps until the next flush().
+	Always mixed in front of the matching pmx_struct class, so isinstance(), list(), validate() all work as usual.
+	Copying or pickling a view gives a normal standalone struct object.
+
+	The pmx_struct classes have __slots__, and two bases that both have slots can't be mixed, so this declares none and
+	each concrete view declares "_table" & "_idx" itself. The struct's own slots are never set on a view, reading one
+	fails the normal lookup and ends up in __getattr__ like it should.
+	"""
+	__slots__ = ()
+
+	def __init__(self, table: 'RecordTable', idx: int):
+		object.__setattr__(self, "_table", table)
+		object.__setattr__(self, "_idx", idx)
+
+	def _materialize(self):
+		return self._table._get_record(self._idx)
+
+	def __getattr__(self, name):
+		# only called when normal lookup fails, i.e. for every field of the struct
+		return getattr(self._materialize(), name)
+
+	def __setattr__(self, name, value):
+		setattr(self._materialize(), name, value)
+
+	def __eq__(self, other) -> bool:
+		if isinstance(other, _LazyRecordView):
+			other = other._materialize()
+		return self._materialize() == other
+
+	__hash__ = None
+
+	def __deepcopy__(self, memo):
+		return copy.deepcopy(self._materialize(), memo)
+
+	def __reduce_ex__(self, protocol):
+		return self._materialize().__reduce_ex__(protocol)
+
+
+class RecordTable(collections.abc.MutableSequence):
+	"""
+	Base class for a list-like table of fixed-size records stored as columns of "array.array" buffers.
+	Each record is stored as one row: "width" consecutive values in each column. The columns can also be read as
+	attributes of the table, like "table.pos".
+
+	Subclasses call __init__ with the name, typecode, and width of each column, and implement _pack_record() and
+	_unpack_record() to convert between a struct object and the list of values that goes into each column.
+	"""
+
+	# the class that is handed out when the table is indexed, every subclass sets its own
+	_view_class = _LazyRecordView
+
+	def __init__(self, names: List[str], typecodes: List[str], widths: List[int]):
+		self._names = names
+		self._typecodes = typecodes
+		self._widths = widths
+		self._columns = [array(tc) for tc in typecodes]
+		# idx -> decoded record, for any record whose view has been touched since the last flush()
+		self._records: Dict[int, object] = {}
+
+	def __getattr__(self, name):
+		# only called when normal lookup fails, so this is only for the column names
+		if name.startswith("_"):
+			raise AttributeError(name)
+		try:
+			return self._columns[self._names.index(name)]
+		except ValueError:
+			raise AttributeError("'%s' object has no attribute '%s'" % (self.__class__.__name__, name)) from None
+
+	def set_columns(self, columns: List) -> None:
+		"""
+		Replace all the column buffers at once. Each one can be an "array.array" or anything else that supports len(),
+		slicing, .tolist(), .tobytes(), and item assignment (like a numpy array or memoryview) as long as it holds the
+		same kind of values as the typecode of that column.
+
+		:param columns: one flat buffer per column, in the same order the table defines them
+		"""
+		if len(columns) != len(self._columns):
+			raise RuntimeError("%s expected %d columns but got %d" % (self.__class__.__name__, len(self._columns), len(columns)))
+		lengths = set(len(col) // w for col, w in zip(columns, self._widths) if w)
+		if len(lengths) > 1:
+			raise RuntimeError("%s got columns with different numbers of records: %s" % (self.__class__.__name__, lengths))
+		self._columns = list(columns)
+		self._records.clear()
+
+	def _own_columns(self) -> None:
+		# turn any column that isn't an "array.array" into one, must be done before resizing or rewriting rows
+		for d, (col, tc) in enumerate(zip(self._columns, self._typecodes)):
+			if not isinstance(col, array):
+				self._columns[d] = array(tc, col.tobytes())
+
+	def __getstate__(self):
+		# memoryviews can't be pickled, so send normal arrays instead
+		state = dict(self.__dict__)
+		state["_columns"] = [col if isinstance(col, array) else array(tc, col.tobytes())
+							 for col, tc in zip(self._columns, self._typecodes)]
+		return state
+
+	# ----- subclass interface -----
+
+	def _pack_record(self, obj) -> List[list]:
+		""" Convert one struct object into a list of values for each column. """
+		raise NotImplementedError()
+
+	def _unpack_record(self, values: List[list]):
+		""" Convert one row of column values back into a struct object. """
+		raise NotImplementedError()
+
+	# ----- row access -----
+
+	def _norm_index(self, idx: int) -> int:
+		n = len(self)
+		if idx < 0:
+			idx += n
+		if not 0 <= idx < n:
+			raise IndexError("%s index out of range" % self.__class__.__name__)
+		return idx
+
+	def _get_row(self, idx: int) -> List[list]:
+		return [col[idx * w:(idx + 1) * w].tolist() for col, w in zip(self._columns, self._widths)]
+
+	def _check_row(self, values: List[list]) -> None:
+		for v, w in zip(values, self._widths):
+			if len(v) != w:
+				raise RuntimeError("%s expected %d values in a column but got %d: %s" % (self.__class__.__name__, w, len(v), v))
+
+	def _set_row(self, idx: int, values: List[list]) -> None:
+		self._check_row(values)
+		self._own_columns()
+		for col, w, v in zip(self._columns, self._widths, values):
+			col[idx * w:(idx + 1) * w] = array(col.typecode, v)
+
+	def _append_row(self, values: List[list]) -> None:
+		self._check_row(values)
+		self._own_columns()
+		for col, v in zip(self._columns, values):
+			col.fromlist(v)
+
+	def _get_record(self, idx: int):
+		""" Get the decoded record for a view, decoding it now if this is the first time it is touched. """
+		obj = self._records.get(idx)
+		if obj is None:
+			obj = self._unpack_record(self._get_row(idx))
+			self._records[idx] = obj
+		return obj
+
+	@staticmethod
+	def _unwrap(obj):
+		# if given a view, use the struct object behind it
+		if isinstance(obj, _LazyRecordView):
+			return obj._materialize()
+		return obj
+
+	# ----- public -----
+
+	def flush(self) -> None:
+		"""
+		Write every record that was touched through a view back into the column buffers, then forget about them.
+		After this, any views will decode fresh from the buffers when next used. Lists that were taken out of a view
+		before the flush (like "w = vert.weight") are no longer connected to the table!
+		"""
+		for idx, obj in self._records.items():
+			self._set_row(idx, self._pack_record(obj))
+		self._records.clear()
+
+	def iter_records(self) -> Iterator:
+		"""
+		Iterate over every record as a struct object, without keeping them around afterward.
+		Records touched through a view are yielded as-is, so don't modify anything yielded by this.
+		This is what write_pmx() uses.
+		"""
+		records = self._records
+		for idx in range(len(self)):
+			obj = records.get(idx)
+			if obj is None:
+				obj = self._unpack_record(self._get_row(idx))
+			yield obj
+
+	def to_list(self) -> list:
+		"""
+		Return a normal list of brand-new struct objects, completely separate from this table.
+		"""
+		self.flush()
+		# convert each whole column at once, slicing python lists is much faster than slicing the buffers row by row
+		cols = [(col.tolist(), w) for col, w in zip(self._columns, self._widths)]
+		unpack = self._unpack_record
+		return [unpack([c[idx * w:(idx + 1) * w] for c, w in cols]) for idx in range(len(self))]
+
+	def extend(self, values) -> None:
+		"""
+		Same as list.extend(). If given another table of the same kind, its buffers are copied over all at once.
+		"""
+		if type(values) is not type(self) or values._widths != self._widths:
+			super().extend(values)
+			return
+		values.flush()
+		self._own_columns()
+		for col, other in zip(self._columns, values._columns):
+			col.frombytes(other.tobytes())
+
+	def sub_table(self, start: int, stop: int) -> 'RecordTable':
+		"""
+		Return a new table of the same kind holding a copy of records start:stop, like slicing a list.
+		Also like slicing a list, any record that was touched through a view is the same object in both tables.
+		This table is not changed, not even flushed.
+		"""
+		start, stop, _ = slice(start, stop).indices(len(self))
+		stop = max(start, stop)
+		# not copy.copy(), that would go through __getstate__ and copy every column in full
+		retme = object.__new__(type(self))
+		retme.__dict__.update(self.__dict__)
+		retme._columns = [col[start * w:stop * w] if isinstance(col, array) else array(tc, col[start * w:stop * w].tobytes())
+						  for col, tc, w in zip(self._columns, self._typecodes, self._widths)]
+		retme._records = {idx - start: obj for idx, obj in self._records.items() if start <= idx < stop}
+		return retme
+
+	def clone(self) -> 'RecordTable':
+		"""
+		Return a separate copy of the table. The buffers are copied whole, and every record that was touched through a
+		view is cloned, so nothing is shared with this table. This table is not changed, not even flushed.
+		"""
+		retme = self.sub_table(0, len(self))
+		retme._records = {idx: obj.clone() if isinstance(obj, pmxstruct._BasePmx) else obj[:]
+						  for idx, obj in self._records.items()}
+		return retme
+
+	def sort(self, key=None, reverse=False) -> None:
+		""" Same as list.sort(), the key function gets normal struct objects. """
+		records = self.to_list()
+		records.sort(key=key, reverse=reverse)
+		for idx, obj in enumerate(records):
+			self._set_row(idx, self._pack_record(obj))
+
+	def pop(self, idx: int = -1):
+		""" Same as list.pop(), returns a normal standalone struct object. """
+		idx = self._norm_index(idx)
+		obj = self._get_record(idx)
+		del self[idx]
+		return obj
+
+	def _validate_records(self) -> bool:
+		""" Validate every record that was touched through a view, the rest of the data can't have the wrong type. """
+		for idx, obj in self._records.items():
+			assert obj.validate()
+		return True
+
+	# ----- MutableSequence interface -----
+
+	def __len__(self) -> int:
+		return len(self._columns[0]) // self._widths[0]
+
+	def __getitem__(self, idx: Union[int, slice]):
+		if isinstance(idx, slice):
+			return [self[i] for i in range(*idx.indices(len(self)))]
+		return self._view_class(self, self._norm_index(idx))
+
+	def __setitem__(self, idx: Union[int, slice], obj) -> None:
+		if isinstance(idx, slice):
+			indices = range(*idx.indices(len(self)))
+			objs = list(obj)
+			if len(objs) != len(indices):
+				raise RuntimeError("%s only supports slice assignment that keeps the same length" % self.__class__.__name__)
+			for i, o in zip(indices, objs):
+				self[i] = o
+			return
+		idx = self._norm_index(idx)
+		values = self._pack_record(self._unwrap(obj))
+		self._set_row(idx, values)
+		self._records.pop(idx, None)
+
+	def __delitem__(self, idx: Union[int, slice]) -> None:
+		if isinstance(idx, slice):
+			for i in sorted(range(*idx.indices(len(self))), reverse=True):
+				del self[i]
+			return
+		idx = self._norm_index(idx)
+		# everything after this shifts down by one, so the touched records must be written back first
+		self.flush()
+		self._own_columns()
+		for col, w in zip(self._columns, self._widths):
+			del col[idx * w:(idx + 1) * w]
+
+	def insert(self, idx: int, obj) -> None:
+		n = len(self)
+		if idx < 0:
+			idx = max(0, idx + n)
+		values = self._pack_record(self._unwrap(obj))
+		if idx >= n:
+			# appending doesn't shift anything, so no need to flush
+			self._append_row(values)
+			return
+		self._check_row(values)
+		self.flush()
+		self._own_columns()
+		for col, w, v in zip(self._columns, self._widths, values):
+			col[idx * w:idx * w] = array(col.typecode, v)
+
+	def __eq__(self, other) -> bool:
+		if self is other: return True
+		if isinstance(other, RecordTable):
+			if len(self) != len(other): return False
+			if type(other) is type(self) and other._widths == self._widths and not self._records and not other._records:
+				# nothing was touched through a view on either side, so identical buffers mean identical records.
+				# different buffers can still decode to equal records (like unused padding), so that isn't the answer
+				if all(self._as_array(a, tc) == self._as_array(b, tc)
+					   for a, b, tc in zip(self._columns, other._columns, self._typecodes)):
+					return True
+			other = other.iter_records()
+		return list(self.iter_records()) == list(other)
+
+	@staticmethod
+	def _as_array(col, typecode: str) -> array:
+		# a column that came straight from numpy or a memoryview, as an array that == compares item by item
+		return col if isinstance(col, array) else array(typecode, col.tobytes())
+
+	__hash__ = None
+
+	def __repr__(self) -> str:
+		return "%s(%d records)" % (self.__class__.__name__, len(self))
+
+
+# ===== Vertices =====
+
+class PmxVertexView(_LazyRecordView, pmxstruct.PmxVertex):
+	""" A PmxVertex that lives in a VertexTable. """
+	__slots__ = ("_table", "_idx")
+
+
+class VertexTable(RecordTable):
+	"""
+	All vertices of a model, stored in columns:
+	pos (3f), norm (3f), uv (2f), edgescale (f), weighttype (b), bones (4i), weights (4f), sdef (9f), addl vec4s (4f each)
+
+	Weights are stored the same way the PMX file stores them: BDEF2 and SDEF only store the weight for the 1st bone,
+	the 2nd bone gets 1.0 minus that, and any unused slots are zero.
+	"""
+	_view_class = PmxVertexView
+
+	def __init__(self, addl_vec4_ct: int = 0):
+		"""
+		:param addl_vec4_ct: how many additional vec4s each vertex has, same as the header flag in the PMX file
+		"""
+		self.addl_vec4_ct = addl_vec4_ct
+		super().__init__(["pos", "norm", "uv", "edgescale", "weighttype", "bones", "weights", "sdef", "addl_vec4s"],
+						 ["f",   "f",    "f",  "f",         "b",          "i",     "f",       "f",    "f"],
+						 [3,     3,      2,    1,           1,            4,       4,         9,      4 * addl_vec4_ct])
+
+	@classmethod
+	def from_list(cls, verts: List[pmxstruct.PmxVertex]) -> 'VertexTable':
+		"""
+		Build a table from a list of PmxVertex objects.
+
+		:param verts: list of PmxVertex
+		:return: new VertexTable
+		"""
+		addl_vec4_ct = max((len(v.addl_vec4s) for v in verts), default=0)
+		retme = cls(addl_vec4_ct)
+		for v in verts:
+			retme._append_row(retme._pack_record(v))
+		return retme
+
+	def weighttypes(self) -> List[pmxstruct.WeightMode]:
+		"""
+		Get the weighttype of every vertex without decoding them, including any changes made through views that
+		haven't been flushed yet.
+
+		:return: list of WeightMode, one per vertex
+		"""
+		modes = {m.value: m for m in pmxstruct.WeightMode}
+		retme = [modes[w] for w in self._columns[4].tolist()]
+		for idx, obj in self._records.items():
+			retme[idx] = obj.weighttype
+		return retme
+
+	def _pack_record(self, vert: pmxstruct.PmxVertex) -> List[list]:
+		wtype = vert.weighttype
+		# pad with [0,0] till there are enough pairs, same as encode_pmx_vertices() but without modifying the vertex
+		w = list(vert.weight) + [[0, 0]] * 4
+		if wtype == pmxstruct.WeightMode.BDEF1:
+			bones = [w[0][0], 0, 0, 0]
+			weights = [0.0, 0.0, 0.0, 0.0]
+		elif wtype in (pmxstruct.WeightMode.BDEF2, pmxstruct.WeightMode.SDEF):
+			bones = [w[0][0], w[1][0], 0, 0]
+			weights = [w[0][1], 0.0, 0.0, 0.0]
+		elif wtype in (pmxstruct.WeightMode.BDEF4, pmxstruct.WeightMode.QDEF):
+			bones = [w[0][0], w[1][0], w[2][0], w[3][0]]
+			weights = [w[0][1], w[1][1], w[2][1], w[3][1]]
+		else:
+			raise ValueError("error: weighttype is not supported", wtype)
+		if wtype == pmxstruct.WeightMode.SDEF:
+			sdef = flatten(vert.weight_sdef)
+		else:
+			sdef = [0.0] * 9
+		addl = []
+		for z in range(self.addl_vec4_ct):
+			try:				addl += vert.addl_vec4s[z]
+			except IndexError:	addl += [0.0, 0.0, 0.0, 0.0]
+		return [list(vert.pos), list(vert.norm), list(vert.uv), [vert.edgescale], [wtype.value],
+				bones, weights, sdef, addl]
+
+	def _unpack_record(self, values: List[list]) -> pmxstruct.PmxVertex:
+		(pos, norm, uv, (edgescale,), (wtype,), bones, weights, sdef, addl) = values
+		wtype = pmxstruct.WeightMode(wtype)
+		weight_sdef = []
+		if wtype == pmxstruct.WeightMode.BDEF1:
+			weight = [[bones[0], 1.0]]
+		elif wtype in (pmxstruct.WeightMode.BDEF2, pmxstruct.WeightMode.SDEF):
+			weight = [[bones[0], weights[0]],
+					  [bones[1], 1.0 - weights[0]]]
+			if wtype == pmxstruct.WeightMode.SDEF:
+				weight_sdef = [sdef[0:3], sdef[3:6], sdef[6:9]]
+		else:
+			weight = [[b, v] for b, v in zip(bones, weights)]
+		addl_vec4s = [addl[4 * z:4 * z + 4] for z in range(self.addl_vec4_ct)]
+		return pmxstruct.PmxVertex(pos=pos, norm=norm, uv=uv, edgescale=edgescale, weighttype=wtype,
+								   weight=weight, weight_sdef=weight_sdef, addl_vec4s=addl_vec4s)
+
+	def to_list(self) -> List[pmxstruct.PmxVertex]:
+		# same result as RecordTable.to_list() and _unpack_record(), but this is the biggest table by far so it gets
+		# its own loop that splits each column into rows all at once
+		self.flush()
+		n = len(self)
+		def rows(col, w: int) -> List[list]:
+			flat = col.tolist()
+			return [flat[i:i + w] for i in range(0, n * w, w)]
+		modes = {m.value: m for m in pmxstruct.WeightMode}
+		BDEF1, BDEF2, SDEF = pmxstruct.WeightMode.BDEF1, pmxstruct.WeightMode.BDEF2, pmxstruct.WeightMode.SDEF
+		(pos, norm, uv, edgescale, wtype, bones, weights, sdef, addl) = self._columns
+		if self.addl_vec4_ct:
+			addl_l = [[row[4 * z:4 * z + 4] for z in range(self.addl_vec4_ct)] for row in rows(addl, 4 * self.addl_vec4_ct)]
+		else:
+			addl_l = [[] for _ in range(n)]
+		retme = []
+		for p, nm, u, e, wt, b, w, s, a in zip(rows(pos, 3), rows(norm, 3), rows(uv, 2), edgescale.tolist(),
+											 wtype.tolist(), rows(bones, 4), rows(weights, 4), rows(sdef, 9), addl_l):
+			wt = modes[wt]
+			weight_sdef = []
+			if wt is BDEF1:
+				weight = [[b[0], 1.0]]
+			elif wt is BDEF2 or wt is SDEF:
+				weight = [[b[0], w[0]],
+						  [b[1], 1.0 - w[0]]]
+				if wt is SDEF:
+					weight_sdef = [s[0:3], s[3:6], s[6:9]]
+			else:
+				weight = [[x, y] for x, y in zip(b, w)]
+			retme.append(pmxstruct.PmxVertex(pos=p, norm=nm, uv=u, edgescale=e, weighttype=wt,
+											 weight=weight, weight_sdef=weight_sdef, addl_vec4s=a))
+		return retme
+
+
+# ===== Faces =====
+
+class FaceView(collections.abc.Sequence):
+	"""
+	One face of a FaceTable, acts like a list of 3 vertex indices.
+	Reads and writes go straight to the table's buffer, so "face[0] = 5" works without needing a flush().
+	"""
+	__slots__ = ("_table", "_idx")
+
+	def __init__(self, table: 'FaceTable', idx: int):
+		self._table = table
+		self._idx = idx
+
+	def __len__(self) -> int:
+		return 3
+
+	def __getitem__(self, k):
+		if isinstance(k, slice):
+			return self.list()[k]
+		if not -3 <= k < 3:
+			raise IndexError("face index out of range")
+		return self._table._columns[0][3 * self._idx + (k % 3)]
+
+	def __setitem__(self, k: int, value: int) -> None:
+		if not -3 <= k < 3:
+			raise IndexError("face index out of range")
+		self._table._columns[0][3 * self._idx + (k % 3)] = value
+
+	def list(self) -> List[int]:
+		return self._table._columns[0][3 * self._idx:3 * self._idx + 3].tolist()
+
+	def __eq__(self, other) -> bool:
+		if isinstance(other, (FaceView, list, tuple)):
+			return self.list() == list(other)
+		return NotImplemented
+
+	__hash__ = None
+
+	def __repr__(self) -> str:
+		return repr(self.list())
+
+	def __deepcopy__(self, memo):
+		return self.list()
+
+	def __reduce_ex__(self, protocol):
+		return list, (self.list(),)
+
+
+class FaceTable(RecordTable):
+	"""
+	All faces of a model, stored as one column of 3 vertex indices (i) per face.
+	"""
+	_view_class = FaceView
+
+	def __init__(self):
+		super().__init__(["verts"], ["i"], [3])
+
+	@classmethod
+	def from_list(cls, faces: List[List[int]]) -> 'FaceTable':
+		"""
+		Build a table from a list of faces.
+
+		:param faces: list of lists of 3 ints
+		:return: new FaceTable
+		"""
+		retme = cls()
+		for f in faces:
+			retme._append_row(retme._pack_record(f))
+		return retme
+
+	def _pack_record(self, face) -> List[list]:
+		if isinstance(face, FaceView):
+			return [face.list()]
+		return [list(face)]
+
+	def _unpack_record(self, values: List[list]) -> List[int]:
+		return values[0]
+
+
+# ===== Morph items =====
+
+class PmxMorphItemVertexView(_LazyRecordView, pmxstruct.PmxMorphItemVertex):
+	""" A PmxMorphItemVertex that lives in a MorphItemTable. """
+	__slots__ = ("_table", "_idx")
+
+
+class PmxMorphItemUVView(_LazyRecordView, pmxstruct.PmxMorphItemUV):
+	""" A PmxMorphItemUV that lives in a MorphItemTable. """
+	__slots__ = ("_table", "_idx")
+
+
+class MorphItemTable(RecordTable):
+	"""
+	The items of one vertex morph or UV morph, stored in columns: vert_idx (i), move (3f for vertex, 4f for UV)
+	"""
+
+	def __init__(self, morphtype: pmxstruct.MorphType):
+		"""
+		:param morphtype: MorphType of the morph these items belong to, must be VERTEX or one of the UV types
+		"""
+		if morphtype not in MORPH_ITEM_TABLE_TYPES:
+			raise RuntimeError("MorphItemTable only supports vertex & UV morphs, not '%s'" % morphtype)
+		self.morphtype = morphtype
+		if morphtype == pmxstruct.MorphType.VERTEX:
+			self._item_class = pmxstruct.PmxMorphItemVertex
+			self._view_class = PmxMorphItemVertexView
+		else:
+			self._item_class = pmxstruct.PmxMorphItemUV
+			self._view_class = PmxMorphItemUVView
+		super().__init__(["vert_idx", "move"], ["i", "f"], [1, MORPH_ITEM_TABLE_TYPES[morphtype]])
+
+	@classmethod
+	def from_list(cls, morphtype: pmxstruct.MorphType, items: list) -> 'MorphItemTable':
+		"""
+		Build a table from a list of morph items.
+
+		:param morphtype: MorphType of the morph these items belong to, must be VERTEX or one of the UV types
+		:param items: list of PmxMorphItemVertex or PmxMorphItemUV
+		:return: new MorphItemTable
+		"""
+		retme = cls(morphtype)
+		for item in items:
+			retme._append_row(retme._pack_record(item))
+		return retme
+
+	def _pack_record(self, item) -> List[list]:
+		return [[item.vert_idx], list(item.move)]
+
+	def _unpack_record(self, values: List[list]):
+		return self._item_class(vert_idx=values[0][0], move=values[1])
+
+	def to_list(self) -> list:
+		# same result as RecordTable.to_list(), but there's only one column that needs splitting into rows
+		self.flush()
+		w = self._widths[1]
+		flat = self._columns[1].tolist()
+		item_class = self._item_class
+		return [item_class(vert_idx=v, move=flat[k * w:(k + 1) * w]) for k, v in enumerate(self._columns[0].tolist())]
+
+
+# ===== Whole model =====
+
+class ColumnarPmx(pmxstruct.Pmx):
+	"""
+	A Pmx where the vertices, faces, and the items of vertex/UV morphs are stored in tables instead of lists of objects.
+	Everything else is the same as a normal Pmx, and it can be used anywhere a normal Pmx can.
+	"""
+
+	@classmethod
+	def from_pmx(cls, pmx: pmxstruct.Pmx) -> 'ColumnarPmx':
+		"""
+		Convert a normal Pmx into a ColumnarPmx. The small sections (header, materials, bones, etc) are shared with
+		the input object, not copied.
+
+		:param pmx: Pmx object
+		:return: new ColumnarPmx
+		"""
+		return cls(header=pmx.header,
+				   verts=VertexTable.from_list(pmx.verts),
+				   faces=FaceTable.from_list(pmx.faces),
+				   mats=pmx.materials,
+				   bones=pmx.bones,
+				   morphs=morphs_to_columnar(pmx.morphs),
+				   frames=pmx.frames,
+				   rbodies=pmx.rigidbodies,
+				   joints=pmx.joints,
+				   sbodies=pmx.softbodies)
+
+	def to_pmx(self) -> pmxstruct.Pmx:
+		"""
+		Convert back into a normal Pmx. The vertices, faces, and morph items are brand-new objects, the small sections
+		(header, materials, bones, etc) are shared with this object, not copied.
+
+		:return: new Pmx
+		"""
+		morphs = []
+		for m in self.morphs:
+			if isinstance(m.items, MorphItemTable):
+				m = pmxstruct.PmxMorph(name_jp=m.name_jp, name_en=m.name_en, panel=m.panel, morphtype=m.morphtype,
+									   items=m.items.to_list())
+			morphs.append(m)
+		return pmxstruct.Pmx(header=self.header,
+							 verts=_to_list(self.verts),
+							 faces=_to_list(self.faces),
+							 mats=self.materials,
+							 bones=self.bones,
+							 morphs=morphs,
+							 frames=self.frames,
+							 rbodies=self.rigidbodies,
+							 joints=self.joints,
+							 sbodies=self.softbodies)
+
+	def clone(self) -> 'ColumnarPmx':
+		""" Same as Pmx.clone(), but the copy is a ColumnarPmx too, and its tables are copies of these tables. """
+		verts = self.verts.clone() if isinstance(self.verts, RecordTable) else pmxstruct.clone_list(self.verts)
+		faces = self.faces.clone() if isinstance(self.faces, RecordTable) else pmxstruct.clone_faces(self.faces)
+		return ColumnarPmx(header=self.header.clone(),
+						   verts=verts,
+						   faces=faces,
+						   mats=pmxstruct.clone_list(self.materials),
+						   bones=pmxstruct.clone_list(self.bones),
+						   morphs=[clone_morph(m) for m in self.morphs],
+						   frames=pmxstruct.clone_list(self.frames),
+						   rbodies=pmxstruct.clone_list(self.rigidbodies),
+						   joints=pmxstruct.clone_list(self.joints),
+						   sbodies=pmxstruct.clone_list(self.softbodies))
+
+	def flush(self) -> None:
+		""" Write every record that was touched through a view back into the tables. """
+		for table in self._tables():
+			table.flush()
+
+	def _tables(self) -> List[RecordTable]:
+		tables = [self.verts, self.faces] + [m.items for m in self.morphs]
+		return [t for t in tables if isinstance(t, RecordTable)]
+
+	def list(self) -> list:
+		# same as Pmx.list(), but read the tables without creating any views
+		def records(things): return things.iter_records() if isinstance(things, RecordTable) else things
+		morphs = []
+		for m in self.morphs:
+			morphs.append([m.name_jp, m.name_en, m.panel, m.morphtype, [i.list() for i in records(m.items)]])
+		return [self.header.list(),
+				[i.list() for i in records(self.verts)],
+				[list(f) for f in records(self.faces)],
+				[i.list() for i in self.materials],
+				[i.list() for i in self.bones],
+				morphs,
+				[i.list() for i in self.frames],
+				[i.list() for i in self.rigidbodies],
+				[i.list() for i in self.joints],
+				[i.list() for i in self.softbodies],
+				]
+
+	def _validate(self, parentlist=None):
+		# tables can't hold the wrong datatypes, so only the records that were touched through views need checking
+		# anything that isn't a table is checked exactly like Pmx does
+		tables = self._tables()
+		for table in tables:
+			assert table._validate_records()
+		verts, faces, morphs = self.verts, self.faces, self.morphs
+		try:
+			# temporarily swap the tables for empty lists and let Pmx/PmxMorph check everything else
+			if isinstance(verts, RecordTable): self.verts = []
+			if isinstance(faces, RecordTable): self.faces = []
+			self.morphs = [copy.copy(m) for m in morphs]
+			for m in self.morphs:
+				if isinstance(m.items, RecordTable):
+					assert m.items.morphtype == m.morphtype
+					m.items = []
+			super()._validate(parentlist)
+		finally:
+			self.verts, self.faces, self.morphs = verts, faces, morphs
+		pass
+
+
+def morphs_to_columnar(morphs: List[pmxstruct.PmxMorph]) -> List[pmxstruct.PmxMorph]:
+	"""
+	Return a new list of morphs where every vertex & UV morph has its items stored in a MorphItemTable.
+	Any other morphs are shared with the input list, not copied.
+
+	:param morphs: list of PmxMorph
+	:return: list of PmxMorph
+	"""
+	retme = []
+	for m in morphs:
+		if m.morphtype in MORPH_ITEM_TABLE_TYPES and not isinstance(m.items, MorphItemTable):
+			m = pmxstruct.PmxMorph(name_jp=m.name_jp, name_en=m.name_en, panel=m.panel, morphtype=m.morphtype,
+								   items=MorphItemTable.from_list(m.morphtype, m.items))
+		retme.append(m)
+	return retme
+
+
+def clone_morph(morph: pmxstruct.PmxMorph) -> pmxstruct.PmxMorph:
+	"""
+	Same as morph.clone(), except that if the items are in a MorphItemTable the clone gets a copy of that table instead
+	of a list of objects.
+
+	:param morph: PmxMorph
+	:return: new PmxMorph
+	"""
+	if isinstance(morph.items, MorphItemTable):
+		return pmxstruct.PmxMorph(morph.name_jp, morph.name_en, morph.panel, morph.morphtype, morph.items.clone())
+	return morph.clone()
+
+
+def _to_list(things) -> list:
+	if isinstance(things, RecordTable):
+		return things.to_list()
+	return things
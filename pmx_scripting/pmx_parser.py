@@ -5,37 +5,141 @@ This file fully parses a PMX file and returns all of the data it contained as a
 	https://gist.github.com/felixjones/f8a06bd48f9da9a4539f
 """
 
-from .core import pause_and_quit, print_progress_oneline, flatten, prettyprint_file_size, filepath_splitdir, recursively_compare
+from .core import pause_and_quit, prettyprint_file_size, recursively_compare, gc_paused
 from .core import MY_FILEPROMPT_FUNC, MY_PRINT_FUNC, MAXDIFFERENCE
 from .maths import quaternion_to_euler, euler_to_quaternion
-from .io import read_binfile_to_bytes, write_bytes_to_binfile
+from .io import read_binfile_to_bytes, read_binfile_to_mmap, read_binsource_to_bytes, write_chunks_to_binsource
+from .io import BinSource, binsource_name, is_plain_binfile
 
 from . import pmx_struct as pmxstruct
+from . import pmx_columnar as pmxcolumnar
 from . import packer as pack
-
-from typing import List, Tuple
+from .pmx_validate import validate_pmx, VALIDATE_MODES
+from .pmx_sanitize import sanitize_section, SanitizeReport, SANITIZE_MODES
+from .progress import ProgressCallback, ProgressTracker, PRINT_PROGRESS
+from .profiler import SectionProfiler
+from .pmx_cache import PmxCache, get_default_cache
+
+from typing import List, Tuple, Dict, Callable, Iterator, Optional, NamedTuple
+import functools
+import hashlib
+import itertools
+import struct
+import array
+import os
 import time
+import sys
+import contextlib
 import math
+import threading
+import copy
+import concurrent.futures
+import multiprocessing
+import mmap as mmap_module
+
+# numpy is optional, it is only needed for the bulk vertex/face decoders
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+
+# ===== Reader / Writer state =====
+
+class _PmxCodec:
+	"""
+	Everything that needs to be remembered while reading or writing one PMX file: the settings, the index sizes from the
+	header, the record formats compiled from those sizes, and the packer state (read position, string encoding).
+	The parse_pmx_* and encode_pmx_* functions get this from _ctx(), which is whichever PmxReader or PmxWriter is
+	active in the current thread. Since nothing is shared between threads, different threads can read or write
+	different files at the same time. A single reader/writer should only be used by one thread at a time though.
+	"""
+	def __init__(self, moreinfo=False):
+		# flag to indicate whether more info is desired or not
+		self.moreinfo = moreinfo
+
+		# how many extra vec4s each vertex has with it
+		self.addl_vertex_vec4 = 0
+		# type used to store an index for each thing, these are concatenated to dynamically make format strings
+		self.idx_vert = "x"
+		self.idx_tex = "x"
+		self.idx_mat = "x"
+		self.idx_bone = "x"
+		self.idx_morph = "x"
+		self.idx_rb = "x"
+
+		# flag to indicate whether the record formats should be precompiled into "struct.Struct" objects or not
+		# only exists so the old way can still be timed against the new way, see test()
+		self.precompiled = True
+		# record name -> callable that unpacks one record at the current read position
+		# rebuilt for every file by parse_pmx_header(), because the formats depend on the index sizes
+		self.unpackers: Dict[str, Callable[[bytearray], object]] = {}
+		# record name -> precompiled MyStruct used by the encode_pmx_* functions
+		# rebuilt for every file by encode_pmx_header(), for the same reason
+		self.packers: Dict[str, pack.MyStruct] = {}
+
+		# flag to indicate whether the vertex & face sections should be decoded in bulk with numpy or not
+		# only has any effect if numpy is installed
+		self.use_numpy = False
+		# flag to indicate whether the file is being read through a memory mapping instead of a bytearray
+		# if so, the columnar tables are allowed to keep views into the mapping
+		self.mmap = False
+
+		# where to report progress to, or None to not report it at all, see progress.py
+		self.progress_callback: Optional[ProgressCallback] = None
+		# tracks the progress of the file currently being read/written, None if not reporting
+		self.progress: Optional[ProgressTracker] = None
+		# path of the file currently being read/written, only used for reporting progress
+		self.filename = ""
+
+		# the packer's read position, string encoding, etc, made current whenever this is active
+		self.unpacker = pack.UnpackerState()
+
+	@contextlib.contextmanager
+	def active(self):
+		"""
+		Context manager: make this the current reader/writer for this thread, and its UnpackerState the current
+		packer state, until the block ends. Can be nested, the previous one is put back afterward.
+		"""
+		prev = getattr(_PMX_LOCAL, "ctx", None)
+		_PMX_LOCAL.ctx = self
+		try:
+			with pack.use_state(self.unpacker):
+				yield self
+		finally:
+			_PMX_LOCAL.ctx = prev
+
+	def _start_progress(self, phase: str) -> None:
+		# make a fresh tracker for the next file or section, if reporting at all
+		if self.progress_callback is None:
+			self.progress = None
+		else:
+			self.progress = ProgressTracker(self.progress_callback, phase, self.filename)
+
+	def _snapshot(self) -> '_PmxCodec':
+		# a copy of the current settings and index sizes, with its own packer state, for decoding more of the same file later
+		retme = copy.copy(self)
+		retme.progress = None
+		retme.unpacker = pack.UnpackerState()
+		retme.unpacker.encoding = self.unpacker.encoding
+		retme.unpacker.check_nan_inf = self.unpacker.check_nan_inf
+		return retme
 
 
-# flag to indicate whether more info is desired or not
-PMX_MOREINFO = False
+# holds the active reader/writer for each thread
+_PMX_LOCAL = threading.local()
 
-# parsing progress printouts: depend on the actual number of bytes processed, very accurate & linear
-# encoding progress printouts: manually estimate how long stuff will take and then track my progress against that
-# DONT TOUCH THESE TWO
-ENCODE_PERCENTPOINT_WEIGHTS = {}
-ENCODE_PERCENTPOINT_SOFAR = 0
 
-# how many extra vec4s each vertex has with it
-ADDL_VERTEX_VEC4 = 0
-# type used to store an index for each thing, these are concatenated to dynamically make format strings
-IDX_VERT = "x"
-IDX_TEX = "x"
-IDX_MAT = "x"
-IDX_BONE = "x"
-IDX_MORPH = "x"
-IDX_RB = "x"
+def _ctx() -> _PmxCodec:
+	# the reader or writer that is active in this thread
+	# if there is none, fall back to a default one for this thread so the parse/encode functions still work standalone
+	ctx = getattr(_PMX_LOCAL, "ctx", None)
+	if ctx is None:
+		ctx = _PmxCodec()
+		ctx.unpacker = pack.state()
+		_PMX_LOCAL.ctx = ctx
+	return ctx
+
 
 # ===== More Info about "indexes" =====
 # vertex: if <=255, use ubyte = B = type 1
@@ -70,14 +174,61 @@ BUILTIN_TOON_DICT_REVERSE = {v: k for k, v in BUILTIN_TOON_DICT.items()}
 # if the data doesn't exist, it is an empty list, that way the indices of other return fields stay the same even when a field is missing
 
 
+# ===== Progress =====
+
+# the big loops only check whether it's time to report progress once every (_TICK_MASK + 1) things
+_TICK_MASK = 255
+
+
+def _read_progress(section: str, total: int) -> Optional[Callable[[int, int], None]]:
+	"""
+	Report that the active reader is starting a section.
+	Returns the function for the loop to report progress with, as tick(done, readfrom_byte), or None if not reporting.
+	"""
+	tracker = _ctx().progress
+	if tracker is None:
+		return None
+	tracker.begin(section, total, pack.state().readfrom_byte)
+	return tracker.tick
+
+
+def _read_progress_end() -> None:
+	tracker = _ctx().progress
+	if tracker is not None:
+		tracker.end(pack.state().readfrom_byte)
+
+
+def _write_progress(section: str, total: int, head_bytes=0) -> Optional[Callable[[int, int], None]]:
+	"""
+	Report that the active writer is starting a section.
+	Returns the function for the loop to report progress with, as tick(done, bytes_encoded_in_this_section), or None
+	if not reporting.
+	"head_bytes" is how much of the section is already encoded, the count at the front, so that like when reading
+	the section is measured from after the count.
+	"""
+	tracker = _ctx().progress
+	if tracker is None:
+		return None
+	tracker.begin(section, total, head_bytes)
+	return tracker.tick
+
+
+def _write_progress_end(nbytes: int) -> None:
+	tracker = _ctx().progress
+	if tracker is not None:
+		tracker.end(nbytes)
+
+
 # ===== Parsing =====
 
 def parse_pmx_header(raw: bytearray) -> pmxstruct.PmxHeader:
 	"""
 	HEADER INFO PARSING
-	collects some returnable data, mostly just sets globals
+	collects some returnable data, mostly just sets the index sizes on the active reader
 	return: ver, name_jp, name_en, comment_jp, comment_en
 	"""
+	ctx = _ctx()
+	_read_progress("header", 1)
 
 	expectedmagic = bytearray("PMX ", "utf-8")
 	fmt_magic = "4s f b"
@@ -105,22 +256,23 @@ def parse_pmx_header(raw: bytearray) -> pmxstruct.PmxHeader:
 	else:                     raise RuntimeError("unsupported encoding value '%d'" % globalflags[0])
 
 	# byte 1: additional vec4 per vertex
-	# store this in a global so it can be more easily passed to the vertex section
-	global ADDL_VERTEX_VEC4
-	ADDL_VERTEX_VEC4 = globalflags[1]
+	# store this on the reader so it can be more easily passed to the vertex section
+	ctx.addl_vertex_vec4 = globalflags[1]
 
 	# bytes 2-7: data size to use for index references
-	# store these in globals as well because passing them around as arguments would be annoying
+	# store these on the reader as well because passing them around as arguments would be annoying
 	# see comment around line 50 for more info
-	global IDX_VERT, IDX_TEX, IDX_MAT, IDX_BONE, IDX_MORPH, IDX_RB
 	vert_conv = {1:"B", 2:"H", 4:"i"}
-	IDX_VERT  = vert_conv[globalflags[2]]
+	ctx.idx_vert  = vert_conv[globalflags[2]]
 	conv =      {1:"b", 2:"h", 4:"i"}
-	IDX_TEX   = conv[globalflags[3]]
-	IDX_MAT   = conv[globalflags[4]]
-	IDX_BONE  = conv[globalflags[5]]
-	IDX_MORPH = conv[globalflags[6]]
-	IDX_RB    = conv[globalflags[7]]
+	ctx.idx_tex   = conv[globalflags[3]]
+	ctx.idx_mat   = conv[globalflags[4]]
+	ctx.idx_bone  = conv[globalflags[5]]
+	ctx.idx_morph = conv[globalflags[6]]
+	ctx.idx_rb    = conv[globalflags[7]]
+
+	# now that all the sizes are known, compile the formats for every kind of record
+	_build_record_unpackers()
 
 	# finally handle the model names & comments
 	# (name_jp, name_en, comment_jp, comment_en) = pack.my_unpack("t t t t", raw)
@@ -128,6 +280,7 @@ def parse_pmx_header(raw: bytearray) -> pmxstruct.PmxHeader:
 	name_en = pack.my_string_unpack(raw)
 	comment_jp = pack.my_string_unpack(raw)
 	comment_en = pack.my_string_unpack(raw)
+	_read_progress_end()
 
 	# assemble all the info into a struct for returning
 	return pmxstruct.PmxHeader(ver=ver,
@@ -136,16 +289,74 @@ def parse_pmx_header(raw: bytearray) -> pmxstruct.PmxHeader:
 	# return retme
 
 
+def _build_record_unpackers() -> None:
+	"""
+	Build the unpackers for every fixed-layout record used by the parse_pmx_* functions, once per file.
+	Must be called after the index sizes and addl_vertex_vec4 are set on the reader by parse_pmx_header().
+	If ctx.precompiled is True they use precompiled MyStruct objects, otherwise they are plain my_unpack() calls.
+	Either way they return exactly the same values.
+	"""
+	ctx = _ctx()
+
+	record_formats = {
+		"int":				"i",
+		"byte":				"b",
+		# vertex: pos, norm, uv, addl vec4s, weighttype
+		"vert_head":		"8f %df b" % (4 * ctx.addl_vertex_vec4),
+		# vertex: weights followed by the final edgescale float
+		"vert_bdef1":		"%s f" % ctx.idx_bone,
+		"vert_bdef2":		"2%s f f" % ctx.idx_bone,
+		"vert_bdef4":		"4%s 4f f" % ctx.idx_bone,
+		"vert_sdef":		"2%s 10f f" % ctx.idx_bone,
+		"face":				"3%s" % ctx.idx_vert,
+		"mat_body":			"4f 4f 3f B 5f 2%s b b" % ctx.idx_tex,
+		"tex_idx":			ctx.idx_tex,
+		"bone_body":		"3f %s i 2B" % ctx.idx_bone,
+		"bone_idx":			ctx.idx_bone,
+		"vec3":				"3f",
+		"vec3x2":			"3f 3f",
+		"bone_inherit":		"%s f" % ctx.idx_bone,
+		"bone_ik":			"%s i f i" % ctx.idx_bone,
+		"bone_iklink":		"%s b" % ctx.idx_bone,
+		"morph_head":		"b b i",
+		"morph_group":		"%s f" % ctx.idx_morph,
+		"morph_vert":		"%s 3f" % ctx.idx_vert,
+		"morph_bone":		"%s 3f 4f" % ctx.idx_bone,
+		"morph_uv":			"%s 4f" % ctx.idx_vert,
+		"morph_mat":		"%s b 4f 3f f 3f 4f f 4f 4f 4f" % ctx.idx_mat,
+		"morph_impulse":	"%s b 3f 3f" % ctx.idx_rb,
+		"frame_head":		"b i",
+		"frame_morph":		ctx.idx_morph,
+		"rbody":			"%s b H b 3f 3f 3f 5f b" % ctx.idx_bone,
+		"joint":			"b 2%s 3f 3f 3f 3f 3f 3f 3f 3f" % ctx.idx_rb,
+	}
+
+	# new dict instead of clearing it, lazy readers might share the old one
+	ctx.unpackers = {}
+	for name, fmt in record_formats.items():
+		if ctx.precompiled:
+			ctx.unpackers[name] = functools.partial(pack.my_unpack_struct, pack.MyStruct(fmt))
+		else:
+			ctx.unpackers[name] = functools.partial(pack.my_unpack, fmt)
+	return
+
+
 def parse_pmx_vertices(raw: bytearray) -> List[pmxstruct.PmxVertex]:
+	ctx = _ctx()
 	# first item is int, how many vertices
-	i = pack.my_unpack("i", raw)
-	if PMX_MOREINFO: MY_PRINT_FUNC("...# of verts            =", i)
+	i = ctx.unpackers["int"](raw)
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of verts            =", i)
 	retme = []
-	bdef1_fmt = IDX_BONE
-	bdef2_fmt = "2%s f" % IDX_BONE
-	bdef4_fmt = "4%s 4f" % IDX_BONE
-	sdef_fmt =  "2%s 10f" % IDX_BONE
-	qdef_fmt =  bdef4_fmt
+	# bind these to locals, this loop runs hundreds of thousands of times
+	unpack_head = ctx.unpackers["vert_head"]
+	unpack_bdef1 = ctx.unpackers["vert_bdef1"]
+	unpack_bdef2 = ctx.unpackers["vert_bdef2"]
+	unpack_bdef4 = ctx.unpackers["vert_bdef4"]
+	unpack_sdef = ctx.unpackers["vert_sdef"]
+	unpack_qdef = unpack_bdef4
+	addl_vec4_ct = ctx.addl_vertex_vec4
+	ustate = pack.state()
+	tick = _read_progress("verts", i)
 
 	def weightbinary_to_weightpairs(wtype: pmxstruct.WeightMode, w_i: List[float]) -> List[List[float]]:
 		# convert the list of weights as stored in binary file into a more reasonable list of bone-weight pairs
@@ -172,106 +383,375 @@ def parse_pmx_vertices(raw: bytearray) -> List[pmxstruct.PmxVertex]:
 		return w_o
 
 	for d in range(i):
-		# first, basic stuff
-		(posX, posY, posZ, normX, normY, normZ, u, v) = pack.my_unpack("8f", raw)
-		# then, some number of vec4s (probably none)
-		addl_vec4s = []
-		for z in range(ADDL_VERTEX_VEC4):
-			this_vec4 = pack.my_unpack("4f", raw) # already returns as a list of 4 floats, no need to unpack then repack
-			addl_vec4s.append(this_vec4)
-		weighttype_int = pack.my_unpack("b", raw)
-		weighttype = pmxstruct.WeightMode(weighttype_int)
+		# first, basic stuff, then some number of vec4s (probably none), then the weighttype
+		head = unpack_head(raw)
+		(posX, posY, posZ, normX, normY, normZ, u, v) = head[0:8]
+		addl_vec4s = [head[8 + 4*z : 12 + 4*z] for z in range(addl_vec4_ct)]
+		weighttype = pmxstruct.WeightMode(head[-1])
 		weights = []
 		weight_sdef = []
+		# then the weights, and then there is one final float after the weight crap
 		if weighttype == pmxstruct.WeightMode.BDEF1:
 			# BDEF1
-			b1 = pack.my_unpack(bdef1_fmt, raw)
+			(b1, edgescale) = unpack_bdef1(raw)
 			weights = [b1]
 		elif weighttype == pmxstruct.WeightMode.BDEF2:
 			# BDEF2
-			#(b1, b2, b1w) # already returns as a list of floats, no need to unpack then repack
-			weights = pack.my_unpack(bdef2_fmt, raw)
+			#(b1, b2, b1w)
+			weights = unpack_bdef2(raw)
+			edgescale = weights.pop()
 		elif weighttype == pmxstruct.WeightMode.BDEF4:
 			# BDEF4
-			#(b1, b2, b3, b4, b1w, b2w, b3w, b4w) # already returns as a list of floats, no need to unpack then repack
-			weights = pack.my_unpack(bdef4_fmt, raw)
+			#(b1, b2, b3, b4, b1w, b2w, b3w, b4w)
+			weights = unpack_bdef4(raw)
+			edgescale = weights.pop()
 		elif weighttype == pmxstruct.WeightMode.SDEF:
 			# SDEF
 			#(b1, b2, b1w, c1, c2, c3, r01, r02, r03, r11, r12, r13)
-			(b1, b2, b1w, c1, c2, c3, r01, r02, r03, r11, r12, r13) = pack.my_unpack(sdef_fmt, raw)
+			(b1, b2, b1w, c1, c2, c3, r01, r02, r03, r11, r12, r13, edgescale) = unpack_sdef(raw)
 			weights = [b1, b2, b1w]
 			weight_sdef = [[c1, c2, c3], [r01, r02, r03], [r11, r12, r13]]
 		elif weighttype == pmxstruct.WeightMode.QDEF:
 			# it must be using QDEF, a type only for PMX v2.1 which I dont need to support so idgaf
 			# (b1, b2, b3, b4, b1w, b2w, b3w, b4w)
-			weights = pack.my_unpack(qdef_fmt, raw)
-		# else:
-		# 	MY_PRINT_FUNC("invalid weight type for vertex", weighttype)
-		# then there is one final float after the weight crap
-		edgescale = pack.my_unpack("f", raw)
+			weights = unpack_qdef(raw)
+			edgescale = weights.pop()
 
 		weight_pairs = weightbinary_to_weightpairs(weighttype, weights)
 
 		# display progress printouts
-		print_progress_oneline(pack.UNPACKER_READFROM_BYTE / len(raw))
+		if tick is not None and not d & _TICK_MASK: tick(d, ustate.readfrom_byte)
 		# assemble all the info into a struct for returning
 		thisvert = pmxstruct.PmxVertex(pos=[posX, posY, posZ], norm=[normX, normY, normZ], uv=[u, v],
 									   weighttype=weighttype, weight=weight_pairs, weight_sdef=weight_sdef,
 									   edgescale=edgescale, addl_vec4s=addl_vec4s)
 
 		retme.append(thisvert)
+	_read_progress_end()
 	return retme
 
 
 def parse_pmx_surfaces(raw: bytearray) -> List[List[int]]:
+	ctx = _ctx()
 	# surfaces is just another name for faces
 	# first item is int, how many vertex indices there are, NOT the actual number of faces
 	# each face is 3 vertex indices, so "i" will always be a multiple of 3
-	i = pack.my_unpack("i", raw)
+	i = ctx.unpackers["int"](raw)
 	retme = []
 	i = int(i / 3)
-	if PMX_MOREINFO: MY_PRINT_FUNC("...# of faces            =", i)
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of faces            =", i)
+	unpack_face = ctx.unpackers["face"]
+	tick = _read_progress("faces", i)
+	if ctx.precompiled:
+		# faces are a flat block of fixed-size records with no floats, so unpack the whole block in one go
+		face_struct = pack.MyStruct("3" + ctx.idx_vert)
+		start = pack.state().readfrom_byte
+		end = start + (face_struct.size * i)
+		retme = [list(face) for face in face_struct.iter_unpack(memoryview(raw)[start:end])]
+		pack.state().readfrom_byte = end
+		_read_progress_end()
+		return retme
 	for d in range(i):
 		# each entry is a group of 3 vertex indeces that make a face
-		thisface = pack.my_unpack("3" + IDX_VERT, raw)
+		thisface = unpack_face(raw)
 		# display progress printouts
-		print_progress_oneline(pack.UNPACKER_READFROM_BYTE / len(raw))
+		if tick is not None and not d & _TICK_MASK: tick(d, pack.state().readfrom_byte)
 		retme.append(thisface)
+	_read_progress_end()
+	return retme
+
+
+# ===== Bulk parsing with numpy =====
+
+# numpy dtype equivalents of the struct index formats
+_NUMPY_IDX_DTYPES = {"B": "<u1", "H": "<u2", "b": "<i1", "h": "<i2", "i": "<i4"}
+
+
+def _numpy_all_finite(records) -> bool:
+	# True if every float field of every record is a real number, the same check the unpackers do for one record
+	return all(np.isfinite(records[name]).all() for name in records.dtype.names if records[name].dtype.kind == "f")
+
+
+def _numpy_decode_vertices(raw: bytearray, i: int) -> Tuple[int, list]:
+	"""
+	Decode "i" vertex records starting at the current read position, in bulk with numpy.
+	Vertex records are variable-length because of the weights, so this takes two passes: first walk the weighttype
+	bytes to find where each record begins, then gather all records of the same weighttype into one block and decode
+	that block with a single structured dtype. If every vertex uses the same weighttype then the records are evenly
+	spaced, and the block is a view straight into "raw" instead of a copy.
+	Any NaN or INF is only flagged in the UnpackerState, same as the unpackers do, see pmx_sanitize.
+
+	:param raw: the whole file
+	:param i: number of vertices
+	:return: (bytepos where the vertex section ends, list of (WeightMode, indices of those vertices, structured array))
+	"""
+	ctx = _ctx()
+	# build the record layout for each weighttype: pos, norm, uv, addl vec4s, weighttype, weights, edgescale
+	bone_dt = _NUMPY_IDX_DTYPES[ctx.idx_bone]
+	head_fields = [("pos", "<f4", (3,)), ("norm", "<f4", (3,)), ("uv", "<f4", (2,))]
+	if ctx.addl_vertex_vec4:
+		head_fields.append(("addl", "<f4", (ctx.addl_vertex_vec4, 4)))
+	head_fields.append(("wtype", "<i1"))
+	weight_fields = {
+		pmxstruct.WeightMode.BDEF1: [("b", bone_dt, (1,))],
+		pmxstruct.WeightMode.BDEF2: [("b", bone_dt, (2,)), ("w", "<f4", (1,))],
+		pmxstruct.WeightMode.BDEF4: [("b", bone_dt, (4,)), ("w", "<f4", (4,))],
+		pmxstruct.WeightMode.SDEF:  [("b", bone_dt, (2,)), ("w", "<f4", (1,)), ("sdef", "<f4", (3, 3))],
+		pmxstruct.WeightMode.QDEF:  [("b", bone_dt, (4,)), ("w", "<f4", (4,))],
+	}
+	record_dtypes = {mode: np.dtype(head_fields + fields + [("edge", "<f4")]) for mode, fields in weight_fields.items()}
+	wtype_offset = np.dtype(head_fields).itemsize - 1
+	record_sizes = [record_dtypes[pmxstruct.WeightMode(z)].itemsize for z in range(len(record_dtypes))]
+
+	# pass 1: find where each record begins, this cannot be vectorized because each offset depends on the previous record
+	ustate = pack.state()
+	start = ustate.readfrom_byte
+	offsets = [0] * i
+	pos = start
+	try:
+		for d in range(i):
+			offsets[d] = pos
+			pos += record_sizes[raw[pos + wtype_offset]]
+	except IndexError:
+		raise RuntimeError("vertex #%d has an invalid weighttype or the file ends too soon, at bytepos %d" % (d, pos))
+	offsets = np.array(offsets, dtype=np.int64)
+	u8 = np.frombuffer(raw, dtype=np.uint8)
+	wtypes = u8[offsets + wtype_offset]
+
+	# pass 2: decode each weighttype group all at once
+	groups = []
+	for mode, dt in record_dtypes.items():
+		which = np.flatnonzero(wtypes == mode.value)
+		if which.size == 0:
+			continue
+		if which.size == i and u8.flags.writeable:
+			# every record has the same size, so they can be used right where they are
+			records = np.frombuffer(raw, dtype=dt, count=i, offset=start)
+		else:
+			# copy every record of this type into one contiguous block, then reinterpret it as the structured dtype
+			windows = np.lib.stride_tricks.sliding_window_view(u8, dt.itemsize)
+			records = windows[offsets[which]].view(dt).reshape(-1)
+		if ustate.check_nan_inf != "off" and not _numpy_all_finite(records):
+			ustate.found_nan_inf = True
+		groups.append((mode, which, records))
+	return pos, groups
+
+
+def parse_pmx_vertices_numpy(raw: bytearray) -> List[pmxstruct.PmxVertex]:
+	"""
+	Same result as parse_pmx_vertices(), but the records are decoded in bulk with numpy.
+	"""
+	ctx = _ctx()
+	# first item is int, how many vertices
+	i = ctx.unpackers["int"](raw)
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of verts            =", i)
+	_read_progress("verts", i)
+	pos, groups = _numpy_decode_vertices(raw, i)
+
+	retme = [None] * i
+	with gc_paused():
+		for mode, which, records in groups:
+			# convert to python lists, these become exactly the same floats & ints that struct.unpack() would produce
+			pos_l = records["pos"].tolist()
+			norm_l = records["norm"].tolist()
+			uv_l = records["uv"].tolist()
+			edge_l = records["edge"].tolist()
+			if ctx.addl_vertex_vec4:
+				addl_l = records["addl"].tolist()
+			else:
+				addl_l = [[] for _ in range(which.size)]
+			if mode == pmxstruct.WeightMode.BDEF1:
+				weight_l = [[[b1, 1.0]] for b1 in records["b"][:, 0].tolist()]
+			elif mode in (pmxstruct.WeightMode.BDEF2, pmxstruct.WeightMode.SDEF):
+				# do the subtraction in float64 so it matches the python math in weightbinary_to_weightpairs()
+				b1w = records["w"][:, 0].astype(np.float64)
+				weight_l = [[[b1, w1], [b2, w2]] for (b1, b2), w1, w2 in zip(records["b"].tolist(), b1w.tolist(), (1.0 - b1w).tolist())]
+			else:
+				weight_l = [[list(pair) for pair in zip(bs, ws)] for bs, ws in zip(records["b"].tolist(), records["w"].tolist())]
+			if mode == pmxstruct.WeightMode.SDEF:
+				sdef_l = records["sdef"].tolist()
+			else:
+				sdef_l = [[] for _ in range(which.size)]
+
+			for d, p, n, uv, e, w, s, a in zip(which.tolist(), pos_l, norm_l, uv_l, edge_l, weight_l, sdef_l, addl_l):
+				retme[d] = pmxstruct.PmxVertex(pos=p, norm=n, uv=uv, weighttype=mode, weight=w, weight_sdef=s,
+											   edgescale=e, addl_vec4s=a)
+
+	pack.state().readfrom_byte = pos
+	_read_progress_end()
+	return retme
+
+
+def parse_pmx_surfaces_numpy(raw: bytearray) -> List[List[int]]:
+	"""
+	Same result as parse_pmx_surfaces(), but the whole face block is decoded with a single np.frombuffer() call.
+	"""
+	ctx = _ctx()
+	# first item is int, how many vertex indices there are, NOT the actual number of faces
+	i = ctx.unpackers["int"](raw)
+	i = int(i / 3)
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of faces            =", i)
+	_read_progress("faces", i)
+	start = pack.state().readfrom_byte
+	faces = np.frombuffer(raw, dtype=_NUMPY_IDX_DTYPES[ctx.idx_vert], count=3 * i, offset=start)
+	with gc_paused():
+		retme = faces.reshape(i, 3).tolist()
+	pack.state().readfrom_byte = start + faces.nbytes
+	_read_progress_end()
+	return retme
+
+
+# ===== Parsing straight into columnar tables =====
+
+def parse_pmx_vertices_columnar(raw: bytearray) -> pmxcolumnar.VertexTable:
+	"""
+	Same data as parse_pmx_vertices(), but stored in a VertexTable without ever creating PmxVertex objects.
+	If numpy is installed the columns are numpy arrays filled in bulk, otherwise they are filled one vertex at a time.
+	"""
+	ctx = _ctx()
+	# first item is int, how many vertices
+	i = ctx.unpackers["int"](raw)
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of verts            =", i)
+	tick = _read_progress("verts", i)
+	retme = _decode_vertices_columnar(raw, i, tick)
+	_read_progress_end()
+	return retme
+
+
+def _decode_vertices_columnar(raw: bytearray, i: int, tick: Optional[Callable[[int, int], None]]) -> pmxcolumnar.VertexTable:
+	# the body of parse_pmx_vertices_columnar(), decode "i" vertex records starting at the current read position
+	ctx = _ctx()
+	retme = pmxcolumnar.VertexTable(ctx.addl_vertex_vec4)
+	if np is not None:
+		pos, groups = _numpy_decode_vertices(raw, i)
+		col_pos = np.zeros((i, 3), dtype="<f4")
+		col_norm = np.zeros((i, 3), dtype="<f4")
+		col_uv = np.zeros((i, 2), dtype="<f4")
+		col_edge = np.zeros(i, dtype="<f4")
+		col_wtype = np.zeros(i, dtype="<i1")
+		col_bones = np.zeros((i, 4), dtype="<i4")
+		col_weights = np.zeros((i, 4), dtype="<f4")
+		col_sdef = np.zeros((i, 9), dtype="<f4")
+		col_addl = np.zeros((i, 4 * ctx.addl_vertex_vec4), dtype="<f4")
+		for mode, which, records in groups:
+			col_pos[which] = records["pos"]
+			col_norm[which] = records["norm"]
+			col_uv[which] = records["uv"]
+			col_edge[which] = records["edge"]
+			col_wtype[which] = mode.value
+			# BDEF1 has 1 bone & no weights, BDEF2/SDEF have 2 bones & 1 weight, BDEF4/QDEF have 4 of each
+			nbones = records["b"].shape[1]
+			col_bones[which, :nbones] = records["b"]
+			if mode != pmxstruct.WeightMode.BDEF1:
+				col_weights[which, :records["w"].shape[1]] = records["w"]
+			if mode == pmxstruct.WeightMode.SDEF:
+				col_sdef[which] = records["sdef"].reshape(-1, 9)
+			if ctx.addl_vertex_vec4:
+				col_addl[which] = records["addl"].reshape(-1, 4 * ctx.addl_vertex_vec4)
+		retme.set_columns([c.reshape(-1) for c in (col_pos, col_norm, col_uv, col_edge, col_wtype, col_bones,
+												   col_weights, col_sdef, col_addl)])
+		pack.state().readfrom_byte = pos
+		return retme
+
+	unpack_head = ctx.unpackers["vert_head"]
+	unpack_bdef1 = ctx.unpackers["vert_bdef1"]
+	unpack_bdef2 = ctx.unpackers["vert_bdef2"]
+	unpack_bdef4 = ctx.unpackers["vert_bdef4"]
+	unpack_sdef = ctx.unpackers["vert_sdef"]
+	no_sdef = [0.0] * 9
+	append_row = retme._append_row
+	ustate = pack.state()
+	for d in range(i):
+		head = unpack_head(raw)
+		weighttype = pmxstruct.WeightMode(head[-1])
+		sdef = no_sdef
+		if weighttype == pmxstruct.WeightMode.BDEF1:
+			(b1, edgescale) = unpack_bdef1(raw)
+			bones, weights = [b1, 0, 0, 0], [0.0, 0.0, 0.0, 0.0]
+		elif weighttype == pmxstruct.WeightMode.BDEF2:
+			(b1, b2, b1w, edgescale) = unpack_bdef2(raw)
+			bones, weights = [b1, b2, 0, 0], [b1w, 0.0, 0.0, 0.0]
+		elif weighttype == pmxstruct.WeightMode.SDEF:
+			r = unpack_sdef(raw)
+			bones, weights, sdef, edgescale = [r[0], r[1], 0, 0], [r[2], 0.0, 0.0, 0.0], r[3:12], r[12]
+		else:
+			# BDEF4 and QDEF
+			r = unpack_bdef4(raw)
+			bones, weights, edgescale = r[0:4], r[4:8], r[8]
+		append_row([head[0:3], head[3:6], head[6:8], [edgescale], [weighttype.value], bones, weights, sdef, head[8:-1]])
+		# display progress printouts
+		if tick is not None and not d & _TICK_MASK: tick(d, ustate.readfrom_byte)
+	return retme
+
+
+def parse_pmx_surfaces_columnar(raw: bytearray) -> pmxcolumnar.FaceTable:
+	"""
+	Same data as parse_pmx_surfaces(), but stored in a FaceTable.
+	When reading from a file mapping with 4-byte vertex indices, the table is a view straight into the mapping and
+	nothing is copied at all. Smaller indices need to be widened to 4 bytes, so those are copied.
+	"""
+	ctx = _ctx()
+	# first item is int, how many vertex indices there are, NOT the actual number of faces
+	i = ctx.unpackers["int"](raw)
+	i = int(i / 3)
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of faces            =", i)
+	retme = pmxcolumnar.FaceTable()
+	_read_progress("faces", i)
+	start = pack.state().readfrom_byte
+	end = start + (3 * i * struct.calcsize(ctx.idx_vert))
+	if sys.byteorder != "little":
+		# memoryview.cast() uses the native byte order, so it can't be used to read the file
+		retme.set_columns([array.array("i", pack.MyStruct(str(3 * i) + ctx.idx_vert).unpack_from(raw, start))])
+	else:
+		block = memoryview(raw)[start:end].cast(ctx.idx_vert)
+		if ctx.idx_vert == "i" and ctx.mmap:
+			retme.set_columns([block])
+		else:
+			retme.set_columns([array.array("i", block)])
+			block.release()
+	pack.state().readfrom_byte = end
+	_read_progress_end()
 	return retme
 
 
 def parse_pmx_textures(raw: bytearray) -> List[str]:
+	ctx = _ctx()
 	# first item is int, how many textures
-	i = pack.my_unpack("i", raw)
-	if PMX_MOREINFO: MY_PRINT_FUNC("...# of textures         =", i)
+	i = ctx.unpackers["int"](raw)
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of textures         =", i)
+	_read_progress("textures", i)
 	retme = []
 	for d in range(i):
 		filepath = pack.my_string_unpack(raw)
 		# print(filepath)
 		retme.append(filepath)
+	_read_progress_end()
 	return retme
 
 
 def parse_pmx_materials(raw: bytearray, textures: List[str]) -> List[pmxstruct.PmxMaterial]:
+	ctx = _ctx()
 	# first item is int, how many materials
-	i = pack.my_unpack("i", raw)
-	if PMX_MOREINFO: MY_PRINT_FUNC("...# of materials        =", i)
+	unpack_int = ctx.unpackers["int"]
+	i = unpack_int(raw)
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of materials        =", i)
+	_read_progress("materials", i)
 	retme = []
 	for d in range(i):
 		name_jp = pack.my_string_unpack(raw)
 		name_en = pack.my_string_unpack(raw)
 		# print(name_jp, name_en)
-		(diffR, diffG, diffB, diffA, specR, specG, specB, specpower) = pack.my_unpack("4f 4f", raw)
-		(ambR, ambG, ambB, flags, edgeR, edgeG, edgeB, edgeA, edgescale, tex_idx) = pack.my_unpack("3f B 5f" + IDX_TEX, raw)
-		(sph_idx, sph_mode_int, builtin_toon) = pack.my_unpack(IDX_TEX + "b b", raw)
+		(diffR, diffG, diffB, diffA, specR, specG, specB, specpower,
+		 ambR, ambG, ambB, flags, edgeR, edgeG, edgeB, edgeA, edgescale, tex_idx,
+		 sph_idx, sph_mode_int, builtin_toon) = ctx.unpackers["mat_body"](raw)
 		if builtin_toon == 0:
 			# toon is using a texture reference
-			toon_idx = pack.my_unpack(IDX_TEX, raw)
+			toon_idx = ctx.unpackers["tex_idx"](raw)
 		else:
 			# toon is using one of the builtin toons, toon01.bmp thru toon10.bmp (values 0-9)
-			toon_idx = pack.my_unpack("b", raw)
+			toon_idx = ctx.unpackers["byte"](raw)
 		comment = pack.my_string_unpack(raw)
-		surface_ct = pack.my_unpack("i", raw)
+		surface_ct = unpack_int(raw)
 		# note: i structure the faces list into groups of 3 vertex indices, this is divided by 3 to match
 		faces_ct = int(surface_ct / 3)
 		sph_mode = pmxstruct.SphMode(sph_mode_int)
@@ -298,18 +778,22 @@ def parse_pmx_materials(raw: bytearray, textures: List[str]) -> List[pmxstruct.P
 										sph_mode=sph_mode, comment=comment, faces_ct=faces_ct, matflags=matflags)
 
 		retme.append(thismat)
+	_read_progress_end()
 	return retme
 
 
 def parse_pmx_bones(raw: bytearray) -> List[pmxstruct.PmxBone]:
+	ctx = _ctx()
 	# first item is int, how many bones
-	i = pack.my_unpack("i", raw)
-	if PMX_MOREINFO: MY_PRINT_FUNC("...# of bones            =", i)
+	U = ctx.unpackers
+	i = U["int"](raw)
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of bones            =", i)
+	tick = _read_progress("bones", i)
 	retme = []
 	for d in range(i):
 		name_jp = pack.my_string_unpack(raw)
 		name_en = pack.my_string_unpack(raw)
-		(posX, posY, posZ, parent_idx, deform_layer, flags1, flags2) = pack.my_unpack("3f" + IDX_BONE + "i 2B", raw)
+		(posX, posY, posZ, parent_idx, deform_layer, flags1, flags2) = U["bone_body"](raw)
 		# print(name_jp, name_en)
 		tail_usebonelink =       bool(flags1 & (1<<0))
 		rotateable =             bool(flags1 & (1<<1))
@@ -330,29 +814,29 @@ def parse_pmx_bones(raw: bytearray) -> List[pmxstruct.PmxBone]:
 		local_axis_x_xyz = local_axis_z_xyz = None
 		ik_target = ik_loops = ik_anglelimit = ik_links = None
 		if tail_usebonelink:  # use index for bone its pointing at
-			tail = pack.my_unpack(IDX_BONE, raw)
+			tail = U["bone_idx"](raw)
 		else:  # use offset
-			tail = pack.my_unpack("3f", raw)
+			tail = U["vec3"](raw)
 		if inherit_rot or inherit_trans:
-			(inherit_parent, inherit_influence) = pack.my_unpack(IDX_BONE + "f", raw)
+			(inherit_parent, inherit_influence) = U["bone_inherit"](raw)
 		if has_fixedaxis:
 			# format is xyz obviously
-			fixedaxis = pack.my_unpack("3f", raw)
+			fixedaxis = U["vec3"](raw)
 		if has_localaxis:
-			(xx, xy, xz, zx, zy, zz) = pack.my_unpack("3f 3f", raw)
+			(xx, xy, xz, zx, zy, zz) = U["vec3x2"](raw)
 			local_axis_x_xyz = [xx, xy, xz]
 			local_axis_z_xyz = [zx, zy, zz]
 		if has_external_parent:
-			external_parent = pack.my_unpack("i", raw)
+			external_parent = U["int"](raw)
 		if ik:
-			(ik_target, ik_loops, ik_anglelimit, num_ik_links) = pack.my_unpack(IDX_BONE + "i f i", raw)
+			(ik_target, ik_loops, ik_anglelimit, num_ik_links) = U["bone_ik"](raw)
 			# note: ik angle comes in as radians, i want to represent it as degrees
 			ik_anglelimit = math.degrees(ik_anglelimit)
 			ik_links = []
 			for z in range(num_ik_links):
-				(ik_link_idx, use_link_limits) = pack.my_unpack(IDX_BONE + "b", raw)
+				(ik_link_idx, use_link_limits) = U["bone_iklink"](raw)
 				if use_link_limits:
-					(minX, minY, minZ, maxX, maxY, maxZ) = pack.my_unpack("3f 3f", raw)
+					(minX, minY, minZ, maxX, maxY, maxZ) = U["vec3x2"](raw)
 					# note: these vals come in as XYZXYZ radians! must convert to degrees
 					link = pmxstruct.PmxBoneIkLink(idx=ik_link_idx,
 												   limit_min=[math.degrees(minX), math.degrees(minY), math.degrees(minZ)],
@@ -380,18 +864,65 @@ def parse_pmx_bones(raw: bytearray) -> List[pmxstruct.PmxBone]:
 			has_externalparent=has_external_parent, externalparent=external_parent)
 
 		retme.append(thisbone)
+		if tick is not None and not d & _TICK_MASK: tick(d, pack.state().readfrom_byte)
+	_read_progress_end()
 	return retme
 
 
 def parse_pmx_morphs(raw: bytearray) -> List[pmxstruct.PmxMorph]:
+	ctx = _ctx()
 	# first item is int, how many morphs
-	i = pack.my_unpack("i", raw)
-	if PMX_MOREINFO: MY_PRINT_FUNC("...# of morphs           =", i)
+	U = ctx.unpackers
+	i = U["int"](raw)
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of morphs           =", i)
+	tick = _read_progress("morphs", i)
+	retme = _decode_morphs(raw, i, tick)
+	_read_progress_end()
+	return retme
+
+
+class PmxMorphHead(NamedTuple):
+	"""
+	Everything about one morph except its items, from parse_pmx_morph_heads().
+	"""
+	name_jp: str
+	name_en: str
+	panel: pmxstruct.MorphPanel
+	morphtype: pmxstruct.MorphType
+	item_count: int
+
+
+def parse_pmx_morph_heads(raw: bytearray) -> List[PmxMorphHead]:
+	"""
+	Like parse_pmx_morphs() but only decode the name, panel, type, and number of items of each morph, and jump over
+	the items themselves. Leaves the read position at the end of the morph section, same as parse_pmx_morphs().
+
+	:param raw: the whole file, with the read position at the start of the morph section
+	:return: list of PmxMorphHead, one per morph
+	"""
+	U = _ctx().unpackers
+	item_sizes = _morph_item_sizes()
+	i = U["int"](raw)
+	retme = []
+	for d in range(i):
+		name_jp = pack.my_string_unpack(raw)
+		name_en = pack.my_string_unpack(raw)
+		(panel_int, morphtype_int, itemcount) = U["morph_head"](raw)
+		if morphtype_int not in item_sizes:
+			raise RuntimeError("unsupported morph type value", morphtype_int)
+		pack.state().readfrom_byte += itemcount * item_sizes[morphtype_int]
+		retme.append(PmxMorphHead(name_jp, name_en, pmxstruct.MorphPanel(panel_int), pmxstruct.MorphType(morphtype_int), itemcount))
+	return retme
+
+
+def _decode_morphs(raw: bytearray, i: int, tick: Optional[Callable[[int, int], None]]) -> List[pmxstruct.PmxMorph]:
+	# the body of parse_pmx_morphs(), decode "i" morphs starting at the current read position
+	U = _ctx().unpackers
 	retme = []
 	for d in range(i):
 		name_jp = pack.my_string_unpack(raw)
 		name_en = pack.my_string_unpack(raw)
-		(panel_int, morphtype_int, itemcount) = pack.my_unpack("b b i", raw)
+		(panel_int, morphtype_int, itemcount) = U["morph_head"](raw)
 		morphtype = pmxstruct.MorphType(morphtype_int)
 		panel = pmxstruct.MorphPanel(panel_int)
 		# print(name_jp, name_en)
@@ -399,20 +930,23 @@ def parse_pmx_morphs(raw: bytearray) -> List[pmxstruct.PmxMorph]:
 		# what to unpack varies on morph type, 9 possibilities + some for v2.1
 		if morphtype == pmxstruct.MorphType.GROUP:
 			# group
+			unpack_item = U["morph_group"]
 			for z in range(itemcount):
-				(morph_idx, influence) = pack.my_unpack(IDX_MORPH + "f", raw)
+				(morph_idx, influence) = unpack_item(raw)
 				item = pmxstruct.PmxMorphItemGroup(morph_idx=morph_idx, value=influence)
 				these_items.append(item)
 		elif morphtype == pmxstruct.MorphType.VERTEX:
 			# vertex
+			unpack_item = U["morph_vert"]
 			for z in range(itemcount):
-				(vert_idx, transX, transY, transZ) = pack.my_unpack(IDX_VERT + "3f", raw)
+				(vert_idx, transX, transY, transZ) = unpack_item(raw)
 				item = pmxstruct.PmxMorphItemVertex(vert_idx=vert_idx, move=[transX, transY, transZ])
 				these_items.append(item)
 		elif morphtype == pmxstruct.MorphType.BONE:
 			# bone
+			unpack_item = U["morph_bone"]
 			for z in range(itemcount):
-				(bone_idx, transX, transY, transZ, rotqX, rotqY, rotqZ, rotqW) = pack.my_unpack(IDX_BONE + "3f 4f", raw)
+				(bone_idx, transX, transY, transZ, rotqX, rotqY, rotqZ, rotqW) = unpack_item(raw)
 				rotX, rotY, rotZ = quaternion_to_euler([rotqW, rotqX, rotqY, rotqZ])
 				item = pmxstruct.PmxMorphItemBone(bone_idx=bone_idx, move=[transX, transY, transZ], rot=[rotX, rotY, rotZ])
 				these_items.append(item)
@@ -424,17 +958,19 @@ def parse_pmx_morphs(raw: bytearray) -> List[pmxstruct.PmxMorph]:
 			# UV
 			# what these values do depends on the UV layer they are affecting, but the docs dont say what...
 			# oh well, i dont need to use them so i dont care :)
+			unpack_item = U["morph_uv"]
 			for z in range(itemcount):
-				(vert_idx, A, B, C, D) = pack.my_unpack(IDX_VERT + "4f", raw)
+				(vert_idx, A, B, C, D) = unpack_item(raw)
 				item = pmxstruct.PmxMorphItemUV(vert_idx=vert_idx, move=[A,B,C,D])
 				these_items.append(item)
 		elif morphtype == pmxstruct.MorphType.MATERIAL:
 			# material
-			# this_item = my_unpack(IDX_MAT + "b 4f 3f    f 3f 4f f    4f 4f 4f", raw)
+			# this_item = my_unpack(ctx.idx_mat + "b 4f 3f    f 3f 4f f    4f 4f 4f", raw)
+			unpack_item = U["morph_mat"]
 			for z in range(itemcount):
-				(mat_idx, is_add, diffR, diffG, diffB, diffA, specR, specG, specB) = pack.my_unpack(IDX_MAT + "b 4f 3f", raw)
-				(specpower, ambR, ambG, ambB, edgeR, edgeG, edgeB, edgeA, edgesize) = pack.my_unpack("f 3f 4f f", raw)
-				(texR, texG, texB, texA, sphR, sphG, sphB, sphA, toonR, toonG, toonB, toonA) = pack.my_unpack("4f 4f 4f", raw)
+				(mat_idx, is_add, diffR, diffG, diffB, diffA, specR, specG, specB,
+				 specpower, ambR, ambG, ambB, edgeR, edgeG, edgeB, edgeA, edgesize,
+				 texR, texG, texB, texA, sphR, sphG, sphB, sphA, toonR, toonG, toonB, toonA) = unpack_item(raw)
 				item = pmxstruct.PmxMorphItemMaterial(
 					mat_idx=mat_idx, is_add=is_add, alpha=diffA, specpower=specpower,
 					diffRGB=[diffR, diffG, diffB], specRGB=[specR, specG, specB], ambRGB=[ambR, ambG, ambB],
@@ -444,22 +980,24 @@ def parse_pmx_morphs(raw: bytearray) -> List[pmxstruct.PmxMorph]:
 				these_items.append(item)
 		elif morphtype == pmxstruct.MorphType.FLIP:
 			# (2.1 only) flip
+			unpack_item = U["morph_group"]
 			for z in range(itemcount):
-				(morph_idx, influence) = pack.my_unpack(IDX_MORPH + "f", raw)
+				(morph_idx, influence) = unpack_item(raw)
 				item = pmxstruct.PmxMorphItemFlip(morph_idx=morph_idx, value=influence)
 				these_items.append(item)
 		elif morphtype == pmxstruct.MorphType.IMPULSE:
 			# (2.1 only) impulse
+			unpack_item = U["morph_impulse"]
 			for z in range(itemcount):
-				(rb_idx, is_local, movX, movY, movZ, rotX, rotY, rotZ) = pack.my_unpack(IDX_RB + "b 3f 3f", raw)
+				(rb_idx, is_local, movX, movY, movZ, rotX, rotY, rotZ) = unpack_item(raw)
 				item = pmxstruct.PmxMorphItemImpulse(rb_idx=rb_idx, is_local=is_local,
 													 move=[movX, movY, movZ], rot=[rotX, rotY, rotZ])
 				these_items.append(item)
 		else:
 			raise RuntimeError("unsupported morph type value", morphtype)
 
-		# display progress printouts
-		print_progress_oneline(pack.UNPACKER_READFROM_BYTE / len(raw))
+		# display progress printouts, every morph because some of them are huge
+		if tick is not None: tick(d, pack.state().readfrom_byte)
 		# assemble the data into struct for returning
 		thismorph = pmxstruct.PmxMorph(name_jp=name_jp, name_en=name_en, panel=panel, morphtype=morphtype, items=these_items)
 		retme.append(thismorph)
@@ -467,42 +1005,49 @@ def parse_pmx_morphs(raw: bytearray) -> List[pmxstruct.PmxMorph]:
 
 
 def parse_pmx_dispframes(raw: bytearray) -> List[pmxstruct.PmxFrame]:
+	ctx = _ctx()
 	# first item is int, how many dispframes
-	i = pack.my_unpack("i", raw)
-	if PMX_MOREINFO: MY_PRINT_FUNC("...# of dispframes       =", i)
+	U = ctx.unpackers
+	i = U["int"](raw)
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of dispframes       =", i)
+	_read_progress("dispframes", i)
 	retme = []
 	for d in range(i):
 		name_jp = pack.my_string_unpack(raw)
 		name_en = pack.my_string_unpack(raw)
-		(is_special, itemcount) = pack.my_unpack("b i", raw)
+		(is_special, itemcount) = U["frame_head"](raw)
 		# print(name_jp, name_en)
 		these_items = []
 		for z in range(itemcount):
-			is_morph = pack.my_unpack("b", raw)
-			if is_morph: idx = pack.my_unpack(IDX_MORPH, raw)
-			else:        idx = pack.my_unpack(IDX_BONE, raw)
+			is_morph = U["byte"](raw)
+			if is_morph: idx = U["frame_morph"](raw)
+			else:        idx = U["bone_idx"](raw)
 			this_item = pmxstruct.PmxFrameItem(is_morph=is_morph, idx=idx)
 			these_items.append(this_item)
 		# assemble the data into struct for returning
 		thisframe = pmxstruct.PmxFrame(name_jp=name_jp, name_en=name_en, is_special=is_special, items=these_items)
 		retme.append(thisframe)
+	_read_progress_end()
 	return retme
 
 
 def parse_pmx_rigidbodies(raw: bytearray) -> List[pmxstruct.PmxRigidBody]:
+	ctx = _ctx()
 	# first item is int, how many rigidbodies
-	i = pack.my_unpack("i", raw)
-	if PMX_MOREINFO: MY_PRINT_FUNC("...# of rigidbodies      =", i)
+	i = ctx.unpackers["int"](raw)
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of rigidbodies      =", i)
+	tick = _read_progress("rigidbodies", i)
 	retme = []
+	unpack_body = ctx.unpackers["rbody"]
 	for d in range(i):
 		name_jp = pack.my_string_unpack(raw)
 		name_en = pack.my_string_unpack(raw)
-		(bone_idx, group, collide_mask, shape_int) = pack.my_unpack(IDX_BONE + "b H b", raw)
+		(bone_idx, group, collide_mask, shape_int,
+		 sizeX, sizeY, sizeZ, posX, posY, posZ, rotX, rotY, rotZ,
+		 mass, move_damp, rot_damp, repel, friction, physmode_int) = unpack_body(raw)
 		shape = pmxstruct.RigidBodyShape(shape_int)
 		# print(name_jp, name_en)
 		# shape: 0=sphere, 1=box, 2=capsule
-		(sizeX, sizeY, sizeZ, posX, posY, posZ, rotX, rotY, rotZ) = pack.my_unpack("3f 3f 3f", raw)
-		(mass, move_damp, rot_damp, repel, friction, physmode_int) = pack.my_unpack("5f b", raw)
 		physmode = pmxstruct.RigidBodyPhysMode(physmode_int)
 		# physmode: 0=follow bone, 1=physics, 2=physics rotate only (pivot on bone)
 
@@ -520,7 +1065,7 @@ def parse_pmx_rigidbodies(raw: bytearray) -> List[pmxstruct.PmxRigidBody]:
 				nocollide_set.add(a+1)
 
 		# display progress printouts
-		print_progress_oneline(pack.UNPACKER_READFROM_BYTE / len(raw))
+		if tick is not None and not d & _TICK_MASK: tick(d, pack.state().readfrom_byte)
 		# assemble the data into struct for returning
 		thisbody = pmxstruct.PmxRigidBody(name_jp=name_jp, name_en=name_en, bone_idx=bone_idx, pos=[posX, posY, posZ],
 										  rot=rot, size=[sizeX, sizeY, sizeZ], shape=shape, group=group,
@@ -528,24 +1073,28 @@ def parse_pmx_rigidbodies(raw: bytearray) -> List[pmxstruct.PmxRigidBody]:
 										  phys_move_damp=move_damp, phys_rot_damp=rot_damp, phys_repel=repel,
 										  phys_friction=friction)
 		retme.append(thisbody)
+	_read_progress_end()
 	return retme
 
 
 def parse_pmx_joints(raw: bytearray) -> List[pmxstruct.PmxJoint]:
+	ctx = _ctx()
 	# first item is int, how many joints
-	i = pack.my_unpack("i", raw)
-	if PMX_MOREINFO: MY_PRINT_FUNC("...# of joints           =", i)
+	i = ctx.unpackers["int"](raw)
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of joints           =", i)
+	tick = _read_progress("joints", i)
 	retme = []
+	unpack_joint = ctx.unpackers["joint"]
 	for d in range(i):
 		name_jp = pack.my_string_unpack(raw)
 		name_en = pack.my_string_unpack(raw)
-		(jointtype_int, rb1_idx, rb2_idx, posX, posY, posZ) = pack.my_unpack("b 2" + IDX_RB + "3f", raw)
+		(jointtype_int, rb1_idx, rb2_idx, posX, posY, posZ,
+		 rotX, rotY, rotZ, posminX, posminY, posminZ, posmaxX, posmaxY, posmaxZ,
+		 rotminX, rotminY, rotminZ, rotmaxX, rotmaxY, rotmaxZ,
+		 springposX, springposY, springposZ, springrotX, springrotY, springrotZ) = unpack_joint(raw)
 		# jointtype: 0=spring6DOF, all others are v2.1 only!!!! 1=6dof, 2=p2p, 3=conetwist, 4=slider, 5=hinge
 		jointtype = pmxstruct.JointType(jointtype_int)
 		# print(name_jp, name_en)
-		(rotX, rotY, rotZ, posminX, posminY, posminZ, posmaxX, posmaxY, posmaxZ) = pack.my_unpack("3f 3f 3f", raw)
-		(rotminX, rotminY, rotminZ, rotmaxX, rotmaxY, rotmaxZ) = pack.my_unpack("3f 3f", raw)
-		(springposX, springposY, springposZ, springrotX, springrotY, springrotZ) = pack.my_unpack("3f 3f", raw)
 
 		# note: rot/rotmin/rotmax all come in as XYZ radians, must convert to degrees for my struct
 		rot = [math.degrees(rotX), math.degrees(rotY), math.degrees(rotZ)]
@@ -553,7 +1102,7 @@ def parse_pmx_joints(raw: bytearray) -> List[pmxstruct.PmxJoint]:
 		rotmax = [math.degrees(rotmaxX), math.degrees(rotmaxY), math.degrees(rotmaxZ)]
 
 		# display progress printouts
-		print_progress_oneline(pack.UNPACKER_READFROM_BYTE / len(raw))
+		if tick is not None and not d & _TICK_MASK: tick(d, pack.state().readfrom_byte)
 		# assemble the data into list for returning
 		thisjoint = pmxstruct.PmxJoint(name_jp=name_jp, name_en=name_en, jointtype=jointtype,
 			rb1_idx=rb1_idx, rb2_idx=rb2_idx, pos=[posX, posY, posZ], rot=rot,
@@ -562,20 +1111,23 @@ def parse_pmx_joints(raw: bytearray) -> List[pmxstruct.PmxJoint]:
 			rotmax=rotmax, rotspring=[springrotX, springrotY, springrotZ]
 			)
 		retme.append(thisjoint)
+	_read_progress_end()
 	return retme
 
 
 def parse_pmx_softbodies(raw: bytearray) -> List[pmxstruct.PmxSoftBody]:
+	ctx = _ctx()
 	# i don't plan to support v2.1 so I'm not gonna try to hard to understand the meaning of these data fields
 	# this is mostly to consume the data so there are no bytes left over when done parsing a file to trigger warnings
 	# note: this is also untested because i dont care about it lol
 	i = pack.my_unpack("i", raw)
-	if PMX_MOREINFO: MY_PRINT_FUNC("...# of softbodies       =", i)
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of softbodies       =", i)
+	_read_progress("softbodies", i)
 	retme = []
 	for d in range(i):
 		name_jp = pack.my_string_unpack(raw)
 		name_en = pack.my_string_unpack(raw)
-		(shape, idx_mat, group, nocollide_mask, flags) = pack.my_unpack("b" + IDX_MAT + "b H b", raw)
+		(shape, idx_mat, group, nocollide_mask, flags) = pack.my_unpack("b" + ctx.idx_mat + "b H b", raw)
 		# i should upack the flags here but idgaf
 		(b_link_create_dist, num_clusters, total_mass, collision_marign, aerodynamics_model) = pack.my_unpack("iiffi", raw)
 		(vcf, dp, dg, lf, pr, vc, df, mt, rch, kch, sch, ah) = pack.my_unpack("12f", raw)
@@ -584,12 +1136,12 @@ def parse_pmx_softbodies(raw: bytearray) -> List[pmxstruct.PmxSoftBody]:
 		anchors_list = []
 		for z in range(num_anchors):
 			# (idx_rb, idx_vert, near_mode)
-			this_anchor = pack.my_unpack(IDX_RB + IDX_VERT + "b", raw)
+			this_anchor = pack.my_unpack(ctx.idx_rb + ctx.idx_vert + "b", raw)
 			anchors_list.append(this_anchor)
 		num_vertex_pin = pack.my_unpack("i", raw)
 		vertex_pin_list = []
 		for z in range(num_vertex_pin):
-			vertex_pin = pack.my_unpack(IDX_VERT, raw)
+			vertex_pin = pack.my_unpack(ctx.idx_vert, raw)
 			vertex_pin_list.append(vertex_pin)
 
 		# assemble the data into struct for returning
@@ -601,11 +1153,19 @@ def parse_pmx_softbodies(raw: bytearray) -> List[pmxstruct.PmxSoftBody]:
 			v_it, p_it, d_it, c_it, mat_lst, mat_ast, mat_vst, anchors_list, vertex_pin_list
 		)
 		retme.append(thissoft)
+	_read_progress_end()
 	return retme
 
 
 # ===== Building =====
 
+def _iter_records(nice):
+	# the columnar tables hand out views when iterated, but encoding only needs to read each record once
+	if isinstance(nice, pmxcolumnar.RecordTable):
+		return nice.iter_records()
+	return nice
+
+
 def build_texture_list(thispmx: pmxstruct.Pmx) -> List[str]:
 	"""
 	Build a list of every unique texture path string that is present in the model, in the order they are encountered.
@@ -636,7 +1196,10 @@ def encode_pmx_lookahead(thispmx: pmxstruct.Pmx) -> Tuple[List[int], List[str]]:
 	:return: ([addl_vec4s, num_verts, num_tex, num_mat, num_bone, num_morph, num_rb, num_joint], tex_list)
 	"""
 	# specifically i need to get the "addl vec4 per vertex" and count the # of each type of thing
-	addl_vec4s = max(len(v.addl_vec4s) for v in thispmx.verts)
+	if isinstance(thispmx.verts, pmxcolumnar.VertexTable):
+		addl_vec4s = thispmx.verts.addl_vec4_ct
+	else:
+		addl_vec4s = max(len(v.addl_vec4s) for v in thispmx.verts)
 	num_verts = len(thispmx.verts)
 	# built the ordered list of unique filepaths among all materials, excluding the builtin toons
 	tex_list = build_texture_list(thispmx)
@@ -651,6 +1214,8 @@ def encode_pmx_lookahead(thispmx: pmxstruct.Pmx) -> Tuple[List[int], List[str]]:
 
 
 def encode_pmx_header(nice: pmxstruct.PmxHeader, lookahead: List[int]) -> bytearray:
+	ctx = _ctx()
+	_write_progress("header", 1)
 	# in hindsight this is not the best code i've ever written, but it works
 	expectedmagic = bytearray("PMX ", "utf-8")
 	fmt_magic = "4s f b"
@@ -665,8 +1230,7 @@ def encode_pmx_header(nice: pmxstruct.PmxHeader, lookahead: List[int]) -> bytear
 	pack.set_encoding("utf_16_le")
 	globalflags[0] = 0
 	# byte 1: additional vec4 per vertex
-	global ADDL_VERTEX_VEC4
-	ADDL_VERTEX_VEC4 = lookahead[0]
+	ctx.addl_vertex_vec4 = lookahead[0]
 	globalflags[1] = lookahead[0]
 	# bytes 2-7: data size to use for index references
 	vertex_categorize = lambda x: 1 if x <= 255 else (2 if x <= 65535 else (4 if x <= 2147483647 else 0))
@@ -674,16 +1238,16 @@ def encode_pmx_header(nice: pmxstruct.PmxHeader, lookahead: List[int]) -> bytear
 	globalflags[2] = vertex_categorize(lookahead[1])
 	for i in range(3, 8):
 		globalflags[i] = other_categorize(lookahead[i - 1])
-	global IDX_VERT, IDX_TEX, IDX_MAT, IDX_BONE, IDX_MORPH, IDX_RB
 	vert_conv = {1: "B", 2: "H", 4: "i"}
 	conv = {1: "b", 2: "h", 4: "i"}
-	IDX_VERT =  vert_conv[globalflags[2]]
-	IDX_TEX =   conv[globalflags[3]]
-	IDX_MAT =   conv[globalflags[4]]
-	IDX_BONE =  conv[globalflags[5]]
-	IDX_MORPH = conv[globalflags[6]]
-	IDX_RB =    conv[globalflags[7]]
+	ctx.idx_vert =  vert_conv[globalflags[2]]
+	ctx.idx_tex =   conv[globalflags[3]]
+	ctx.idx_mat =   conv[globalflags[4]]
+	ctx.idx_bone =  conv[globalflags[5]]
+	ctx.idx_morph = conv[globalflags[6]]
+	ctx.idx_rb =    conv[globalflags[7]]
 	out += pack.my_pack(fmt_globals, globalflags)
+	_build_record_packers()
 	# finally handle the model names & comments
 	# (name_jp, name_en, comment_jp, comment_en)
 	# out += pack.my_pack("t t t t", [nice.name_jp, nice.name_en, nice.comment_jp, nice.comment_en])
@@ -691,24 +1255,85 @@ def encode_pmx_header(nice: pmxstruct.PmxHeader, lookahead: List[int]) -> bytear
 	out += pack.my_string_pack(nice.name_en)
 	out += pack.my_string_pack(nice.comment_jp)
 	out += pack.my_string_pack(nice.comment_en)
+	_write_progress_end(len(out))
 	return out
 
 
+def _build_record_packers() -> None:
+	"""
+	Build the precompiled packers for every fixed-layout record used by the encode_pmx_* functions, once per file.
+	Must be called after the index sizes and addl_vertex_vec4 are set on the writer by encode_pmx_header().
+	"""
+	ctx = _ctx()
+
+	# vertex: pos, norm, uv, addl vec4s, weighttype
+	vert_head = "8f %df b" % (4 * ctx.addl_vertex_vec4)
+	record_formats = {
+		"int":				"i",
+		# vertex: entire record, one for each weighttype, ending with the final edgescale float
+		"vert_bdef1":		"%s %s f" % (vert_head, ctx.idx_bone),
+		"vert_bdef2":		"%s 2%s f f" % (vert_head, ctx.idx_bone),
+		"vert_bdef4":		"%s 4%s 4f f" % (vert_head, ctx.idx_bone),
+		"vert_sdef":		"%s 2%s f 9f f" % (vert_head, ctx.idx_bone),
+		"face":				"3%s" % ctx.idx_vert,
+		"mat_texref":		"4f 4f 3f B 5f 2%s b b %s" % (ctx.idx_tex, ctx.idx_tex),
+		"mat_builtin":		"4f 4f 3f B 5f 2%s b b b" % ctx.idx_tex,
+		"bone_body":		"3f %s i 2B" % ctx.idx_bone,
+		"bone_idx":			ctx.idx_bone,
+		"vec3":				"3f",
+		"vec3x2":			"6f",
+		"bone_inherit":		"%s f" % ctx.idx_bone,
+		"bone_ik":			"%s i f i" % ctx.idx_bone,
+		"bone_iklinkA":		"%s b" % ctx.idx_bone,
+		"bone_iklinkB":		"%s b 6f" % ctx.idx_bone,
+		"morph_head":		"b b i",
+		"morph_group":		"%s f" % ctx.idx_morph,
+		"morph_vert":		"%s 3f" % ctx.idx_vert,
+		"morph_bone":		"%s 3f 4f" % ctx.idx_bone,
+		"morph_uv":			"%s 4f" % ctx.idx_vert,
+		"morph_mat":		"%s b 4f 3f f 3f 4f f 4f 4f 4f" % ctx.idx_mat,
+		"morph_impulse":	"%s b 3f 3f" % ctx.idx_rb,
+		"frame_head":		"b i",
+		"frame_morph":		"b %s" % ctx.idx_morph,
+		"frame_bone":		"b %s" % ctx.idx_bone,
+		"rbody":			"%s b H b 3f 3f 3f 5f b" % ctx.idx_bone,
+		"joint":			"b 2%s 3f 3f 3f 3f 3f 3f 3f 3f" % ctx.idx_rb,
+		"sbody":			"b %s b H b iiffi 12f 6f 7i" % ctx.idx_mat,
+		"sbody_anchor":		"%s %s b" % (ctx.idx_rb, ctx.idx_vert),
+		"sbody_pin":		ctx.idx_vert,
+	}
+
+	ctx.packers = {}
+	for name, fmt in record_formats.items():
+		ctx.packers[name] = pack.MyStruct(fmt)
+	return
+
+
 def encode_pmx_vertices(nice: List[pmxstruct.PmxVertex]) -> bytearray:
+	ctx = _ctx()
 	# first item is int, how many vertices
 	i = len(nice)
-	out = pack.my_pack("i", i)
-	if PMX_MOREINFO: MY_PRINT_FUNC("...# of verts            =", i)
-	# [posX, posY, posZ, normX, normY, normZ, u, v, addl_vec4s, weighttype, weights, edgescale]
-	bdef1_fmt = IDX_BONE
-	bdef2_fmt = "2%s f" % IDX_BONE
-	bdef4_fmt = "4%s 4f" % IDX_BONE
-	sdef_fmt1 =  "2%s f" % IDX_BONE
-	sdef_fmt2 =  "9f"
-	qdef_fmt =  bdef4_fmt
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of verts            =", i)
+	head = pack.my_pack("i", i)
+	tick = _write_progress("verts", i, len(head))
+	out = _encode_vertex_records(nice, head, tick)
+	_write_progress_end(len(out))
+	return out
 
-	global ENCODE_PERCENTPOINT_SOFAR
-	progress_increment = ENCODE_PERCENTPOINT_WEIGHTS["verts"]
+
+def _encode_vertex_records(nice: List[pmxstruct.PmxVertex], head: bytearray,
+						   tick: Optional[Callable[[int, int], None]]) -> bytearray:
+	# the body of encode_pmx_vertices(), pack every vertex into a new bytearray that starts with "head"
+	ctx = _ctx()
+	# [posX, posY, posZ, normX, normY, normZ, u, v, addl_vec4s, weighttype, weights, edgescale]
+	# each vertex is packed as one record, the layout of that record depends on the weighttype
+	vert_structs = {
+		pmxstruct.WeightMode.BDEF1: ctx.packers["vert_bdef1"],
+		pmxstruct.WeightMode.BDEF2: ctx.packers["vert_bdef2"],
+		pmxstruct.WeightMode.BDEF4: ctx.packers["vert_bdef4"],
+		pmxstruct.WeightMode.SDEF:  ctx.packers["vert_sdef"],
+		pmxstruct.WeightMode.QDEF:  ctx.packers["vert_bdef4"],
+	}
 
 	def weightpairs_to_weightbinary(wtype: pmxstruct.WeightMode, w: List[List[float]]) -> List[float]:
 		# convert the list of bone-weight pairs to the format/order used in the binary file
@@ -733,101 +1358,125 @@ def encode_pmx_vertices(nice: List[pmxstruct.PmxVertex]) -> bytearray:
 					w[0][1], w[1][1], w[2][1], w[3][1],]
 		raise ValueError("error: weighttype is not supported", wtype)
 
-	for d, vert in enumerate(nice):
+	# first pass: add up the exact size of the section so it can be allocated all at once
+	if isinstance(nice, pmxcolumnar.VertexTable):
+		weighttypes = nice.weighttypes()
+	else:
+		weighttypes = [vert.weighttype for vert in nice]
+	try:
+		total_size = len(head) + sum(vert_structs[wtype].size for wtype in weighttypes)
+	except KeyError as e:
+		raise ValueError("error: weighttype is not supported", e.args[0]) from None
+	out = bytearray(total_size)
+	out[0:len(head)] = head
+	offset = len(head)
+
+	# second pass: pack each vertex directly into its spot
+	for d, (vert, wtype) in enumerate(zip(_iter_records(nice), weighttypes)):
 		# first, basic stuff
-		packme = vert.pos + vert.norm + vert.uv  # concat these
-		out += pack.my_pack("8f", packme)
+		packme = [*vert.pos, *vert.norm, *vert.uv]
 		# then, some number of vec4s (probably none)
 		# structure it like this so even if a user modifies the vec4s incorrectly it will still write fine
-		for z in range(ADDL_VERTEX_VEC4):
-			try:				out += pack.my_pack("4f", vert.addl_vec4s[z])
-			except IndexError:	out += pack.my_pack("4f", [0, 0, 0, 0])
+		for z in range(ctx.addl_vertex_vec4):
+			try:				packme += vert.addl_vec4s[z]
+			except IndexError:	packme += [0, 0, 0, 0]
 
-		out += pack.my_pack("b", vert.weighttype.value)
+		packme.append(wtype.value)
 		# weights = vert[10]
 		# 0 = BDEF1 = [b1]
 		# 1 = BDEF2 = [b1, b2, b1w]
 		# 2 = BDEF4 = [b1, b2, b3, b4, b1w, b2w, b3w, b4w]
 		# 3 = sdef =  [b1, b2, b1w] + weight_sdef = [[c1, c2, c3], [r01, r02, r03], [r11, r12, r13]]
 		# 4 = qdef =  [b1, b2, b3, b4, b1w, b2w, b3w, b4w]  (only in pmx v2.1)
-
-		weightlist = weightpairs_to_weightbinary(vert.weighttype, vert.weight)
-
-		if vert.weighttype == pmxstruct.WeightMode.BDEF1:
-			# BDEF1
-			out += pack.my_pack(bdef1_fmt, weightlist)
-		elif vert.weighttype == pmxstruct.WeightMode.BDEF2:
-			# BDEF2
-			# (b1, b2, b1w)
-			out += pack.my_pack(bdef2_fmt, weightlist)
-		elif vert.weighttype == pmxstruct.WeightMode.BDEF4:
-			# BDEF4
-			# (b1, b2, b3, b4, b1w, b2w, b3w, b4w)
-			out += pack.my_pack(bdef4_fmt, weightlist)
-		elif vert.weighttype == pmxstruct.WeightMode.SDEF:
+		packme += weightpairs_to_weightbinary(wtype, vert.weight)
+		if wtype == pmxstruct.WeightMode.SDEF:
 			# SDEF
 			# ([b1, b2, b1w], [c1, c2, c3], [r01, r02, r03], [r11, r12, r13])
-			out += pack.my_pack(sdef_fmt1, weightlist)
-			out += pack.my_pack(sdef_fmt2, flatten(vert.weight_sdef))
-		elif vert.weighttype == pmxstruct.WeightMode.QDEF:
-			# it must be using QDEF, a type only for PMX v2.1 which I dont need to support so idgaf
-			# (b1, b2, b3, b4, b1w, b2w, b3w, b4w)
-			out += pack.my_pack(qdef_fmt, weightlist)
-		# else:
-		# 	MY_PRINT_FUNC("invalid weight type for vertex", vert.weighttype)
+			for v in vert.weight_sdef: packme += v
 
 		# then there is one final float after the weight crap
-		out += pack.my_pack("f", vert.edgescale)
+		packme.append(vert.edgescale)
+		offset = pack.my_pack_into(vert_structs[wtype], out, offset, packme)
 		# display progress printouts
-		ENCODE_PERCENTPOINT_SOFAR += progress_increment
-		print_progress_oneline(ENCODE_PERCENTPOINT_SOFAR)
+		if tick is not None and not d & _TICK_MASK: tick(d, offset)
 	return out
 
 
 def encode_pmx_surfaces(nice: List[List[int]]) -> bytearray:
+	ctx = _ctx()
 	# surfaces is just another name for faces
 	# first item is int, how many !vertex indices! there are, NOT the actual number of faces
 	# each face is 3 vertex indices
 	i = len(nice)
 	out = pack.my_pack("i", i * 3)
-	if PMX_MOREINFO: MY_PRINT_FUNC("...# of faces            =", i)
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of faces            =", i)
+
+	tick = _write_progress("faces", i, len(out))
+	out = _encode_face_records(nice, out, tick)
+	_write_progress_end(len(out))
+	return out
 
-	global ENCODE_PERCENTPOINT_SOFAR
-	progress_increment = ENCODE_PERCENTPOINT_WEIGHTS["faces"]
 
-	for d, face in enumerate(nice):
+def _encode_face_records(nice: List[List[int]], out: bytearray, tick: Optional[Callable[[int, int], None]]) -> bytearray:
+	# the body of encode_pmx_surfaces(), add every face onto the end of "out"
+	ctx = _ctx()
+	# the whole section is just a flat run of vertex indices, so it can be converted in one shot as an array
+	# of the right size instead of one face at a time
+	flat = None
+	if isinstance(nice, pmxcolumnar.FaceTable):
+		# faces in a table are already one flat buffer, in exactly the order the file wants them
+		flat = nice.verts
+	elif all(len(face) == 3 for face in nice):
+		flat = itertools.chain.from_iterable(nice)
+	if flat is not None:
+		try:
+			block = array.array(ctx.idx_vert, flat)
+		except (OverflowError, TypeError):
+			# something doesn't fit, do it the slow way below so the bad face gets reported properly
+			block = None
+		if block is not None and block.itemsize * 3 == ctx.packers["face"].size:
+			if sys.byteorder != "little":
+				block.byteswap()
+			out += block
+			return out
+
+	st = ctx.packers["face"]
+	for d, face in enumerate(_iter_records(nice)):
 		# each entry is a group of 3 vertex indeces that make a face
-		out += pack.my_pack("3" + IDX_VERT, face)
+		out += pack.my_pack_struct(st, face)
 		# display progress printouts
-		ENCODE_PERCENTPOINT_SOFAR += progress_increment
-		print_progress_oneline(ENCODE_PERCENTPOINT_SOFAR)
+		if tick is not None and not d & _TICK_MASK: tick(d, len(out))
 	return out
 
 
 def encode_pmx_textures(nice: List[str]) -> bytearray:
+	ctx = _ctx()
 	# first item is int, how many textures
-	# this section doesn't get any progress printouts cuz its relatively small i guess
+	# this section only reports when it starts & ends cuz its relatively small i guess
 	i = len(nice)
 	out = pack.my_pack("i", i)
-	if PMX_MOREINFO: MY_PRINT_FUNC("...# of textures         =", i)
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of textures         =", i)
+	_write_progress("textures", i, len(out))
 	for d, filepath in enumerate(nice):
 		out += pack.my_string_pack(filepath)
+	_write_progress_end(len(out))
 	return out
 
 
 def encode_pmx_materials(nice: List[pmxstruct.PmxMaterial], tex_list: List[str]) -> bytearray:
+	ctx = _ctx()
 	# first item is int, how many materials
 	i = len(nice)
 	out = pack.my_pack("i", i)
-	if PMX_MOREINFO: MY_PRINT_FUNC("...# of materials        =", i)
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of materials        =", i)
 
-	global ENCODE_PERCENTPOINT_SOFAR
-	progress_increment = ENCODE_PERCENTPOINT_WEIGHTS["materials"]
+	tick = _write_progress("materials", i, len(out))
 
 	# this fmt is when the toon is using a texture reference
-	mat_fmtA = "4f 4f 3f B 5f 2%s b b %s" % (IDX_TEX, IDX_TEX)
+	mat_stA = ctx.packers["mat_texref"]
 	# this fmt is when the toon is using a builtin toon, toon01.bmp thru toon10.bmp (values 0-9)
-	mat_fmtB = "4f 4f 3f B 5f 2%s b b b" % IDX_TEX
+	mat_stB = ctx.packers["mat_builtin"]
+	st_int = ctx.packers["int"]
 	for d, mat in enumerate(nice):
 		out += pack.my_string_pack(mat.name_jp)
 		out += pack.my_string_pack(mat.name_en)
@@ -855,37 +1504,41 @@ def encode_pmx_materials(nice: List[pmxstruct.PmxMaterial], tex_list: List[str])
 		# the size for packing of the "toon_idx" arg depends on the "builtin_toon" arg, but the number and order is the same
 		if builtin_toon:
 			# toon is using one of the builtin toons, toon01.bmp thru toon10.bmp (values 0-9)
-			out += pack.my_pack(mat_fmtB, packme)
+			out += pack.my_pack_struct(mat_stB, packme)
 		else:
 			# toon is using a texture reference
-			out += pack.my_pack(mat_fmtA, packme)
+			out += pack.my_pack_struct(mat_stA, packme)
 		# pack the comment
 		out += pack.my_string_pack(mat.comment)
 		# pack the number of faces in the material, times 3
 		# note: i structure the faces list into groups of 3 vertex indices, this is divided by 3 to match, so now i need to undivide
 		verts_ct = 3 * mat.faces_ct
-		out += pack.my_pack("i", verts_ct)
+		out += pack.my_pack_struct(st_int, verts_ct)
 		# display progress printouts
-		ENCODE_PERCENTPOINT_SOFAR += progress_increment
-		print_progress_oneline(ENCODE_PERCENTPOINT_SOFAR)
+		if tick is not None and not d & _TICK_MASK: tick(d, len(out))
 
+	_write_progress_end(len(out))
 	return out
 
 
 def encode_pmx_bones(nice: List[pmxstruct.PmxBone]) -> bytearray:
+	ctx = _ctx()
 	# first item is int, how many bones
 	i = len(nice)
 	out = pack.my_pack("i", i)
-	if PMX_MOREINFO: MY_PRINT_FUNC("...# of bones            =", i)
-
-	global ENCODE_PERCENTPOINT_SOFAR
-	progress_increment = ENCODE_PERCENTPOINT_WEIGHTS["bones"]
-
-	fmt_bone = "3f %s i 2B" % IDX_BONE
-	fmt_bone_inherit = "%s f" % IDX_BONE
-	fmt_bone_ik = "%s i f i" % IDX_BONE
-	fmt_bone_ik_linkA = "%s b" % IDX_BONE
-	fmt_bone_ik_linkB = "%s b 6f" % IDX_BONE
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of bones            =", i)
+
+	tick = _write_progress("bones", i, len(out))
+
+	st_bone = ctx.packers["bone_body"]
+	st_bone_idx = ctx.packers["bone_idx"]
+	st_vec3 = ctx.packers["vec3"]
+	st_vec3x2 = ctx.packers["vec3x2"]
+	st_int = ctx.packers["int"]
+	st_bone_inherit = ctx.packers["bone_inherit"]
+	st_bone_ik = ctx.packers["bone_ik"]
+	st_bone_ik_linkA = ctx.packers["bone_iklinkA"]
+	st_bone_ik_linkB = ctx.packers["bone_iklinkB"]
 	for d, bone in enumerate(nice):
 		# (name_jp, name_en, posX, posY, posZ, parent_idx, deform_layer)
 		out += pack.my_string_pack(bone.name_jp)
@@ -909,28 +1562,28 @@ def encode_pmx_bones(nice: List[pmxstruct.PmxBone]) -> bytearray:
 		flagsum2 += (1 << 4) if bool(bone.deform_after_phys) else 0
 		flagsum2 += (1 << 5) if bool(bone.has_externalparent) else 0
 		packme += [flagsum1, flagsum2]
-		out += pack.my_pack(fmt_bone, packme)
+		out += pack.my_pack_struct(st_bone, packme)
 
 		# tail will always exist but type will vary
 		if bone.tail_usebonelink:  # use index for bone its pointing at
-			out += pack.my_pack(IDX_BONE, bone.tail)
+			out += pack.my_pack_struct(st_bone_idx, bone.tail)
 		else:  # use offset
-			out += pack.my_pack("3f", bone.tail)
+			out += pack.my_pack_struct(st_vec3, bone.tail)
 
 		# then is all the "might or might not exist" stuff
 		if bone.inherit_rot or bone.inherit_trans:
-			out += pack.my_pack(fmt_bone_inherit, [bone.inherit_parent_idx, bone.inherit_ratio])
+			out += pack.my_pack_struct(st_bone_inherit, [bone.inherit_parent_idx, bone.inherit_ratio])
 		if bone.has_fixedaxis:
-			out += pack.my_pack("3f", bone.fixedaxis)  # format is xyz obviously
+			out += pack.my_pack_struct(st_vec3, bone.fixedaxis)  # format is xyz obviously
 		if bone.has_localaxis:
-			out += pack.my_pack("6f", [*bone.localaxis_x, *bone.localaxis_z])  # (xx, xy, xz, zx, zy, zz)
+			out += pack.my_pack_struct(st_vec3x2, [*bone.localaxis_x, *bone.localaxis_z])  # (xx, xy, xz, zx, zy, zz)
 		if bone.has_externalparent:
-			out += pack.my_pack("i", bone.externalparent)
+			out += pack.my_pack_struct(st_int, bone.externalparent)
 
 		if bone.has_ik:  # ik:
 			# (ik_target, ik_loops, ik_anglelimit, ik_numlinks)
 			# note: my struct holds ik_angle as degrees, file spec holds it as radians
-			out += pack.my_pack(fmt_bone_ik, [bone.ik_target_idx, bone.ik_numloops,
+			out += pack.my_pack_struct(st_bone_ik, [bone.ik_target_idx, bone.ik_numloops,
 											  math.radians(bone.ik_angle), len(bone.ik_links)])
 			for iklink in bone.ik_links:
 				# bool(list) means "is the list non-empty and also not None"
@@ -941,132 +1594,145 @@ def encode_pmx_bones(nice: List[pmxstruct.PmxBone]) -> bytearray:
 						limitminmax.append(math.radians(lim))
 					for lim in iklink.limit_max:
 						limitminmax.append(math.radians(lim))
-					out += pack.my_pack(fmt_bone_ik_linkB, [iklink.idx, True, *limitminmax])
+					out += pack.my_pack_struct(st_bone_ik_linkB, [iklink.idx, True, *limitminmax])
 				else:
-					out += pack.my_pack(fmt_bone_ik_linkA, [iklink.idx, False])
+					out += pack.my_pack_struct(st_bone_ik_linkA, [iklink.idx, False])
 		# display progress printouts
-		ENCODE_PERCENTPOINT_SOFAR += progress_increment
-		print_progress_oneline(ENCODE_PERCENTPOINT_SOFAR)
+		if tick is not None and not d & _TICK_MASK: tick(d, len(out))
 
+	_write_progress_end(len(out))
 	return out
 
 
 def encode_pmx_morphs(nice: List[pmxstruct.PmxMorph]) -> bytearray:
+	ctx = _ctx()
 	# first item is int, how many morphs
 	i = len(nice)
 	out = pack.my_pack("i", i)
-	if PMX_MOREINFO: MY_PRINT_FUNC("...# of morphs           =", i)
-
-	global ENCODE_PERCENTPOINT_SOFAR
-	progress_increment = ENCODE_PERCENTPOINT_WEIGHTS["morphitems"]
-
-	fmt_morph = "b b i"
-	fmt_morph_group = "%s f" % IDX_MORPH
-	fmt_morph_flip = fmt_morph_group
-	fmt_morph_vert = "%s 3f" % IDX_VERT
-	fmt_morph_bone = "%s 3f 4f" % IDX_BONE
-	fmt_morph_uv = "%s 4f" % IDX_VERT
-	fmt_morph_mat = "%s b 4f 3f    f 3f 4f f    4f 4f 4f" % IDX_MAT
-	fmt_morph_impulse = "%s b 3f 3f" % IDX_RB
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of morphs           =", i)
+
+	tick = _write_progress("morphs", i, len(out))
+	out = _encode_morph_records(nice, out, tick)
+	_write_progress_end(len(out))
+	return out
+
+
+def _encode_morph_records(nice: List[pmxstruct.PmxMorph], out: bytearray,
+						  tick: Optional[Callable[[int, int], None]]) -> bytearray:
+	# the body of encode_pmx_morphs(), add every morph onto the end of "out"
+	ctx = _ctx()
+	st_morph = ctx.packers["morph_head"]
+	st_morph_group = ctx.packers["morph_group"]
+	st_morph_flip = st_morph_group
+	st_morph_vert = ctx.packers["morph_vert"]
+	st_morph_bone = ctx.packers["morph_bone"]
+	st_morph_uv = ctx.packers["morph_uv"]
+	st_morph_mat = ctx.packers["morph_mat"]
+	st_morph_impulse = ctx.packers["morph_impulse"]
 	for d, morph in enumerate(nice):
 		# (name_jp, name_en, panel, morphtype, itemcount)
 		out += pack.my_string_pack(morph.name_jp)
 		out += pack.my_string_pack(morph.name_en)
 
-		out += pack.my_pack(fmt_morph,[morph.panel.value, morph.morphtype.value, len(morph.items)])
+		out += pack.my_pack_struct(st_morph, [morph.panel.value, morph.morphtype.value, len(morph.items)])
 
 		# for each morph in the group morph, or vertex in the vertex morph, or bone in the bone morph....
 		# what to unpack varies on morph type, 9 possibilities + some for v2.1
 		if morph.morphtype == pmxstruct.MorphType.GROUP:  # group
 			for z in morph.items:
 				z: pmxstruct.PmxMorphItemGroup
-				out += pack.my_pack(fmt_morph_group, [z.morph_idx, z.value])
+				out += pack.my_pack_struct(st_morph_group, [z.morph_idx, z.value])
 		elif morph.morphtype == pmxstruct.MorphType.VERTEX:  # vertex
-			for z in morph.items:
+			# these can number in the tens of thousands, so pack them all into one preallocated block
+			items_out = bytearray(st_morph_vert.size * len(morph.items))
+			offset = 0
+			for z in _iter_records(morph.items):
 				z: pmxstruct.PmxMorphItemVertex
-				out += pack.my_pack(fmt_morph_vert, [z.vert_idx, *z.move])
+				offset = pack.my_pack_into(st_morph_vert, items_out, offset, [z.vert_idx, *z.move])
+			out += items_out
 		elif morph.morphtype == pmxstruct.MorphType.BONE:  # bone
 			for z in morph.items:
 				z: pmxstruct.PmxMorphItemBone
 				(rotqW, rotqX, rotqY, rotqZ) = euler_to_quaternion(z.rot)
 				# (bone_idx, transX, transY, transZ, rotqX, rotqY, rotqZ, rotqW)
-				out += pack.my_pack(fmt_morph_bone, [z.bone_idx, *z.move, rotqX, rotqY, rotqZ, rotqW])
+				out += pack.my_pack_struct(st_morph_bone, [z.bone_idx, *z.move, rotqX, rotqY, rotqZ, rotqW])
 		elif morph.morphtype in (pmxstruct.MorphType.UV,
 								 pmxstruct.MorphType.UV_EXT1,
 								 pmxstruct.MorphType.UV_EXT2,
 								 pmxstruct.MorphType.UV_EXT3,
 								 pmxstruct.MorphType.UV_EXT4):
-			for z in morph.items:
+			items_out = bytearray(st_morph_uv.size * len(morph.items))
+			offset = 0
+			for z in _iter_records(morph.items):
 				z: pmxstruct.PmxMorphItemUV
 				# what these values do depends on the UV layer they are affecting, but the docs dont say what...
 				# oh well, i dont need to use them so i dont care :)
-				out += pack.my_pack(fmt_morph_uv, [z.vert_idx, *z.move])
+				offset = pack.my_pack_into(st_morph_uv, items_out, offset, [z.vert_idx, *z.move])
+			out += items_out
 		elif morph.morphtype == pmxstruct.MorphType.MATERIAL:  # material
 			for z in morph.items:
 				z: pmxstruct.PmxMorphItemMaterial
-				# (mat_idx, is_add, diffR, diffG, diffB, diffA, specR, specG, specB) = unpack(IDX_MAT+"b 4f 3f", raw)
+				# (mat_idx, is_add, diffR, diffG, diffB, diffA, specR, specG, specB) = unpack(ctx.idx_mat+"b 4f 3f", raw)
 				# (specpower, ambR, ambG, ambB, edgeR, edgeG, edgeB, edgeA, edgesize) = unpack("f 3f 4f f", raw)
 				# (texR, texG, texB, texA, sphR, sphG, sphB, sphA, toonR, toonG, toonB, toonA) = unpack("4f 4f 4f", raw)
 				packme = [z.mat_idx, z.is_add, *z.diffRGB, z.alpha, *z.specRGB, z.specpower, *z.ambRGB, *z.edgeRGB,
 						  z.edgealpha, z.edgesize, *z.texRGBA, *z.sphRGBA, *z.toonRGBA]
-				out += pack.my_pack(fmt_morph_mat, packme)
+				out += pack.my_pack_struct(st_morph_mat, packme)
 		elif morph.morphtype == pmxstruct.MorphType.FLIP:  # (2.1 only) flip
 			for z in morph.items:
 				z: pmxstruct.PmxMorphItemFlip
-				out += pack.my_pack(fmt_morph_flip, [z.morph_idx, z.value])
+				out += pack.my_pack_struct(st_morph_flip, [z.morph_idx, z.value])
 		elif morph.morphtype == pmxstruct.MorphType.IMPULSE:  # (2.1 only) impulse
 			for z in morph.items:
 				z: pmxstruct.PmxMorphItemImpulse
 				# (rb_idx, is_local, movX, movY, movZ, rotX, rotY, rotZ)
-				out += pack.my_pack(fmt_morph_impulse, [z.rb_idx, z.is_local, *z.move, *z.rot])
+				out += pack.my_pack_struct(st_morph_impulse, [z.rb_idx, z.is_local, *z.move, *z.rot])
 		else:
 			MY_PRINT_FUNC("unsupported morph type value", morph.morphtype)
 
-		# display progress printouts
-		ENCODE_PERCENTPOINT_SOFAR += progress_increment * len(morph.items)
-		print_progress_oneline(ENCODE_PERCENTPOINT_SOFAR)
-
+		# display progress printouts, every morph because some of them are huge
+		if tick is not None: tick(d, len(out))
 	return out
 
 
 def encode_pmx_dispframes(nice: List[pmxstruct.PmxFrame]) -> bytearray:
+	ctx = _ctx()
 	# first item is int, how many dispframes
 	i = len(nice)
 	out = pack.my_pack("i", i)
-	if PMX_MOREINFO: MY_PRINT_FUNC("...# of dispframes       =", i)
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of dispframes       =", i)
 
-	global ENCODE_PERCENTPOINT_SOFAR
-	progress_increment = ENCODE_PERCENTPOINT_WEIGHTS["frameitems"]
+	tick = _write_progress("dispframes", i, len(out))
 
-	fmt_frame = "b i"
-	fmt_frame_item_morph = "b %s" % IDX_MORPH
-	fmt_frame_item_bone =  "b %s" % IDX_BONE
+	st_frame = ctx.packers["frame_head"]
+	st_frame_item_morph = ctx.packers["frame_morph"]
+	st_frame_item_bone =  ctx.packers["frame_bone"]
 	for d, frame in enumerate(nice):
 		# (name_jp, name_en, is_special, itemcount)
 		out += pack.my_string_pack(frame.name_jp)
 		out += pack.my_string_pack(frame.name_en)
-		out += pack.my_pack(fmt_frame, [frame.is_special, len(frame.items)])
+		out += pack.my_pack_struct(st_frame, [frame.is_special, len(frame.items)])
 
 		for item in frame.items:
-			if item.is_morph: out += pack.my_pack(fmt_frame_item_morph, [item.is_morph, item.idx])
-			else:             out += pack.my_pack(fmt_frame_item_bone, [item.is_morph, item.idx])
+			if item.is_morph: out += pack.my_pack_struct(st_frame_item_morph, [item.is_morph, item.idx])
+			else:             out += pack.my_pack_struct(st_frame_item_bone, [item.is_morph, item.idx])
 		# display progress printouts
-		ENCODE_PERCENTPOINT_SOFAR += progress_increment * len(frame.items)
-		print_progress_oneline(ENCODE_PERCENTPOINT_SOFAR)
+		if tick is not None and not d & _TICK_MASK: tick(d, len(out))
 
+	_write_progress_end(len(out))
 	return out
 
 
 def encode_pmx_rigidbodies(nice: List[pmxstruct.PmxRigidBody]) -> bytearray:
+	ctx = _ctx()
 	# first item is int, how many rigidbodies
 	i = len(nice)
 	out = pack.my_pack("i", i)
-	if PMX_MOREINFO: MY_PRINT_FUNC("...# of rigidbodies      =", i)
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of rigidbodies      =", i)
 
-	global ENCODE_PERCENTPOINT_SOFAR
-	progress_increment = ENCODE_PERCENTPOINT_WEIGHTS["rigidbodies"]
+	tick = _write_progress("rigidbodies", i, len(out))
 
-	fmt_rbody = "%s b H b 3f 3f 3f 5f b" % IDX_BONE
+	st_rbody = ctx.packers["rbody"]
 	for d, b in enumerate(nice):
 		out += pack.my_string_pack(b.name_jp)
 		out += pack.my_string_pack(b.name_en)
@@ -1085,24 +1751,24 @@ def encode_pmx_rigidbodies(nice: List[pmxstruct.PmxRigidBody]) -> bytearray:
 
 		packme = [b.bone_idx, group, collide_mask, b.shape.value, *b.size, *b.pos, *rot,
 				  b.phys_mass, b.phys_move_damp, b.phys_rot_damp, b.phys_repel, b.phys_friction, b.phys_mode.value]
-		out += pack.my_pack(fmt_rbody, packme)
+		out += pack.my_pack_struct(st_rbody, packme)
 		# display progress printouts
-		ENCODE_PERCENTPOINT_SOFAR += progress_increment
-		print_progress_oneline(ENCODE_PERCENTPOINT_SOFAR)
+		if tick is not None and not d & _TICK_MASK: tick(d, len(out))
 
+	_write_progress_end(len(out))
 	return out
 
 
 def encode_pmx_joints(nice: List[pmxstruct.PmxJoint]) -> bytearray:
+	ctx = _ctx()
 	# first item is int, how many joints
 	i = len(nice)
 	out = pack.my_pack("i", i)
-	if PMX_MOREINFO: MY_PRINT_FUNC("...# of joints           =", i)
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of joints           =", i)
 
-	global ENCODE_PERCENTPOINT_SOFAR
-	progress_increment = ENCODE_PERCENTPOINT_WEIGHTS["joints"]
+	tick = _write_progress("joints", i, len(out))
 
-	fmt_joint = "b 2%s 3f 3f 3f 3f 3f 3f 3f 3f" % IDX_RB
+	st_joint = ctx.packers["joint"]
 	for d, j in enumerate(nice):
 		out += pack.my_string_pack(j.name_jp)
 		out += pack.my_string_pack(j.name_en)
@@ -1114,31 +1780,33 @@ def encode_pmx_joints(nice: List[pmxstruct.PmxJoint]) -> bytearray:
 
 		packme = [j.jointtype.value, j.rb1_idx, j.rb2_idx, *j.pos, *rot, *j.movemin,
 				  *j.movemax, *rotmin, *rotmax, *j.movespring, *j.rotspring]
-		out += pack.my_pack(fmt_joint, packme)
+		out += pack.my_pack_struct(st_joint, packme)
 		# display progress printouts
-		ENCODE_PERCENTPOINT_SOFAR += progress_increment
-		print_progress_oneline(ENCODE_PERCENTPOINT_SOFAR)
+		if tick is not None and not d & _TICK_MASK: tick(d, len(out))
 
+	_write_progress_end(len(out))
 	return out
 
 
 def encode_pmx_softbodies(nice: List[pmxstruct.PmxSoftBody]) -> bytearray:
+	ctx = _ctx()
 	# i don't plan to support v2.1 so I'm not gonna try to hard to understand the meaning of these data fields
 	# this is mostly to consume the data so there are no bytes left over when done parsing a file to trigger warnings
 	# note: this is also untested because i dont care about it lol
 	i = len(nice)
 	out = pack.my_pack("i", i)
-	if PMX_MOREINFO: MY_PRINT_FUNC("...# of softbodies       =", i)
+	if ctx.moreinfo: MY_PRINT_FUNC("...# of softbodies       =", i)
 
-	global ENCODE_PERCENTPOINT_SOFAR
-	progress_increment = ENCODE_PERCENTPOINT_WEIGHTS["softbodies"]
+	tick = _write_progress("softbodies", i, len(out))
 
-	fmt_sb = "b %s b H b iiffi 12f 6f 7i" % IDX_MAT
-	fmt_sb_anchor = "%s %s b" % (IDX_RB, IDX_VERT)
+	st_sb = ctx.packers["sbody"]
+	st_sb_anchor = ctx.packers["sbody_anchor"]
+	st_sb_pin = ctx.packers["sbody_pin"]
+	st_int = ctx.packers["int"]
 	for d, s in enumerate(nice):
 		out += pack.my_string_pack(s.name_jp)
 		out += pack.my_string_pack(s.name_en)
-		# (name_jp, name_en, shape, idx_mat, group, nocollide_mask, flags) = my_unpack("t t b" + IDX_MAT + "b H b", raw)
+		# (name_jp, name_en, shape, idx_mat, group, nocollide_mask, flags) = my_unpack("t t b" + ctx.idx_mat + "b H b", raw)
 		# (b_link_create_dist, num_clusters, total_mass, collision_marign, aerodynamics_model) = my_unpack("iiffi", raw)
 		# (vcf, dp, dg, lf, pr, vc, df, mt, rch, kch, sch, ah) = my_unpack("12f", raw)
 		# (srhr_cl, skhr_cl, sshr_cl, sr_splt_cl, sk_splt_cl, ss_splt_cl) = my_unpack("6f", raw)
@@ -1148,189 +1816,1256 @@ def encode_pmx_softbodies(nice: List[pmxstruct.PmxSoftBody]) -> bytearray:
 			s.b_link_create_dist, s.num_clusters, s.total_mass, s.collision_margin, s.aerodynamics_model,
 			s.vcf, s.dp, s.dg, s.lf, s.pr, s.vc, s.df, s.mt, s.rch, s.kch, s.sch, s.ah,
 			s.srhr_cl, s.skhr_cl, s.sshr_cl, s.sr_splt_cl, s.sk_splt_cl, s.ss_splt_cl,
-			s.v_it, s.p_it, s.d_it, s.c_it, s.mat_lst, s.mat_ast, s.mat_vst, s.anchors_list, s.vertex_pin_list
+			s.v_it, s.p_it, s.d_it, s.c_it, s.mat_lst, s.mat_ast, s.mat_vst
 		]
-		out += pack.my_pack(fmt_sb, packme)
+		out += pack.my_pack_struct(st_sb, packme)
 
 		# (num_anchors)
-		out += pack.my_pack("i", len(s.anchors_list))
+		out += pack.my_pack_struct(st_int, len(s.anchors_list))
 		for anchor in s.anchors_list:
 			# (idx_rb, idx_vert, near_mode)
-			out += pack.my_pack(fmt_sb_anchor, anchor)
+			out += pack.my_pack_struct(st_sb_anchor, anchor)
 
 		# (num_pins)
-		out += pack.my_pack("i", len(s.vertex_pin_list))
+		out += pack.my_pack_struct(st_int, len(s.vertex_pin_list))
 		for pin in s.vertex_pin_list:
-			out += pack.my_pack(IDX_VERT, pin)
+			out += pack.my_pack_struct(st_sb_pin, pin)
 		# display progress printouts
-		ENCODE_PERCENTPOINT_SOFAR += progress_increment
-		print_progress_oneline(ENCODE_PERCENTPOINT_SOFAR)
+		if tick is not None and not d & _TICK_MASK: tick(d, len(out))
 
+	_write_progress_end(len(out))
 	return out
 
 
-def _prepare_progress_printouts_for_write_pmx(pmx: pmxstruct.Pmx) -> None:
-	# since i know the total size of the VMD object, and how many of each thing is within it,
-	# if i measure how long it takes to encode some number of each thing then I should be able to estimate
-	# how long it takes to encode each section and/or the whole thing!
-	# this function is to set global variables and stuff to aid with that goal
-
-	# verts, faces, and morphs are the only significant time sinks
-	# verts/faces/morphitems number ~10,000 to ~300,000
-	# this totally dwarfs the other categories... ~100 mats, ~500 bones/rigidbodies/joints/dispframes
-	# buuuuuuuuuuut i guess there's no harm in assigning weights to the smaller categories anyway
-
-	relative_weights = {
-		# "header":		0,
-		"verts":		50,		# major
-		"faces":		8,		# major
-		# "textures":	0,
-		"materials":	100,
-		"bones":		80,
-		"morphitems":	8,		# major
-		"frameitems":	10,
-		"rigidbodies":	80,
-		"joints":		80,
-		"softbodies":	900,
+# ===== Lazy reading =====
+
+def _morph_item_sizes() -> Dict[int, int]:
+	# morph type value -> byte size of one of its items, every item in a morph is the same size
+	ctx = _ctx()
+	def size(fmt: str) -> int: return struct.calcsize("<" + fmt)
+	return {
+		pmxstruct.MorphType.GROUP.value:	size("%s f" % ctx.idx_morph),
+		pmxstruct.MorphType.VERTEX.value:	size("%s 3f" % ctx.idx_vert),
+		pmxstruct.MorphType.BONE.value:		size("%s 3f 4f" % ctx.idx_bone),
+		pmxstruct.MorphType.UV.value:		size("%s 4f" % ctx.idx_vert),
+		pmxstruct.MorphType.UV_EXT1.value:	size("%s 4f" % ctx.idx_vert),
+		pmxstruct.MorphType.UV_EXT2.value:	size("%s 4f" % ctx.idx_vert),
+		pmxstruct.MorphType.UV_EXT3.value:	size("%s 4f" % ctx.idx_vert),
+		pmxstruct.MorphType.UV_EXT4.value:	size("%s 4f" % ctx.idx_vert),
+		pmxstruct.MorphType.MATERIAL.value:	size("%s b 4f 3f f 3f 4f f 4f 4f 4f" % ctx.idx_mat),
+		pmxstruct.MorphType.FLIP.value:		size("%s f" % ctx.idx_morph),
+		pmxstruct.MorphType.IMPULSE.value:	size("%s b 3f 3f" % ctx.idx_rb),
 	}
-	total_relative_size = 0
-	total_relative_size += relative_weights["verts"] * len(pmx.verts)
-	total_relative_size += relative_weights["faces"] * len(pmx.faces)
-	total_relative_size += relative_weights["materials"] * len(pmx.materials)
-	total_relative_size += relative_weights["bones"] * len(pmx.bones)
-	total_relative_size += relative_weights["morphitems"] * sum(len(m.items) for m in pmx.morphs)
-	total_relative_size += relative_weights["frameitems"] * sum(len(m.items) for m in pmx.frames)
-	total_relative_size += relative_weights["rigidbodies"] * len(pmx.rigidbodies)
-	total_relative_size += relative_weights["joints"] * len(pmx.joints)
-	total_relative_size += relative_weights["softbodies"] * len(pmx.softbodies)
-	# deliberately skip textures cuz it would be messy, and header cuz it's just one atomic indivisible item
-
-	# now i have the total relative size... normalize to 100%=1 and all the relative weights get reduced by same amount
-	factor = 1 / total_relative_size
-	for category, relative_value in relative_weights.items():
-		ENCODE_PERCENTPOINT_WEIGHTS[category] = relative_value * factor
-
-	# print(ENCODE_PERCENTPOINT_WEIGHTS["verts"] * len(pmx.verts))
-	# print(ENCODE_PERCENTPOINT_WEIGHTS["faces"] * len(pmx.faces))
-	# print(ENCODE_PERCENTPOINT_WEIGHTS["materials"] * len(pmx.materials))
-	# print(ENCODE_PERCENTPOINT_WEIGHTS["bones"] * len(pmx.bones))
-	# print(ENCODE_PERCENTPOINT_WEIGHTS["morphitems"] * sum(len(m.items) for m in pmx.morphs))
-	# print(ENCODE_PERCENTPOINT_WEIGHTS["frameitems"] * sum(len(m.items) for m in pmx.frames))
-	# print(ENCODE_PERCENTPOINT_WEIGHTS["rigidbodies"] * len(pmx.rigidbodies))
-	# print(ENCODE_PERCENTPOINT_WEIGHTS["joints"] * len(pmx.joints))
-	# print(ENCODE_PERCENTPOINT_WEIGHTS["softbodies"] * len(pmx.softbodies))
-
-	global ENCODE_PERCENTPOINT_SOFAR
-	ENCODE_PERCENTPOINT_SOFAR = 0
 
-	return
 
+def _scan_pmx_sections(raw: bytearray, ver: float, vert_step=0, starts: Dict[str, List[int]] = None,
+					   weight_counts: List[int] = None) -> Dict[str, Tuple[int, int]]:
+	"""
+	Walk over every section after the header without decoding anything, and note where each one begins.
+	Only the counts, the string lengths, and the few flag bytes that decide how long a record is are ever read.
+	Must be called right after parse_pmx_header(), when the read position is at the start of the vertex section.
+
+	:param raw: the whole file
+	:param ver: PMX version from the header, softbodies only exist in v2.1
+	:param vert_step: if "starts" is given, note where every this-many-th vertex begins
+	:param starts: optional dict to fill in with "verts" -> list of bytepos of every "vert_step"-th vertex, and
+	"morphs" -> list of bytepos of every morph, so those sections can be cut into pieces and decoded separately
+	:param weight_counts: optional list with one int per WeightMode, each vertex adds 1 to the one for its weighttype
+	:return: dict of section name -> (bytepos where the section begins, number of things in it)
+	"""
+	ctx = _ctx()
+	def size(fmt: str) -> int: return struct.calcsize("<" + fmt)
+	read_int = struct.Struct("<i").unpack_from
+
+	def skip_strings(p: int, n: int) -> int:
+		for _ in range(n):
+			p += 4 + read_int(raw, p)[0]
+		return p
+
+	sections = {}
+	name = "verts"
+	pos = pack.state().readfrom_byte
+	try:
+		# vertices: the only thing that changes the length is the weights, which depend on the weighttype byte
+		(i,) = read_int(raw, pos)
+		sections[name] = (pos, i)
+		pos += 4
+		head_size = size("8f %df" % (4 * ctx.addl_vertex_vec4))
+		weight_sizes = [size("b %s f" % fmt) for fmt in (ctx.idx_bone, "2%s f" % ctx.idx_bone, "4%s 4f" % ctx.idx_bone,
+														 "2%s f 9f" % ctx.idx_bone, "4%s 4f" % ctx.idx_bone)]
+		if starts is not None:
+			vert_starts = starts["verts"] = []
+			for d in range(i):
+				if not d % vert_step:
+					vert_starts.append(pos)
+				pos += head_size + weight_sizes[raw[pos + head_size]]
+		elif weight_counts is not None:
+			for d in range(i):
+				weighttype = raw[pos + head_size]
+				weight_counts[weighttype] += 1
+				pos += head_size + weight_sizes[weighttype]
+		else:
+			for d in range(i):
+				pos += head_size + weight_sizes[raw[pos + head_size]]
+
+		# faces: count is the number of vertex indices, not faces
+		name = "faces"
+		(i,) = read_int(raw, pos)
+		sections[name] = (pos, i // 3)
+		pos += 4 + i * size(ctx.idx_vert)
+
+		name = "textures"
+		(i,) = read_int(raw, pos)
+		sections[name] = (pos, i)
+		pos = skip_strings(pos + 4, i)
+
+		# materials: the size of the toon index depends on the builtin_toon byte at the end of the body
+		name = "materials"
+		(i,) = read_int(raw, pos)
+		sections[name] = (pos, i)
+		pos += 4
+		body_size = size("4f 4f 3f B 5f 2%s b b" % ctx.idx_tex)
+		for d in range(i):
+			pos = skip_strings(pos, 2) + body_size
+			pos += size("b" if raw[pos - 1] else ctx.idx_tex)
+			pos = skip_strings(pos, 1) + 4
+
+		# bones: the flag bytes decide which optional parts follow the body
+		name = "bones"
+		(i,) = read_int(raw, pos)
+		sections[name] = (pos, i)
+		pos += 4
+		body_size = size("3f %s i 2B" % ctx.idx_bone)
+		ik_size = size("%s i f i" % ctx.idx_bone)
+		iklink_size = size("%s b" % ctx.idx_bone)
+		for d in range(i):
+			pos = skip_strings(pos, 2) + body_size
+			flags1, flags2 = raw[pos - 2], raw[pos - 1]
+			pos += size(ctx.idx_bone if flags1 & (1<<0) else "3f")
+			if flags2 & ((1<<0) | (1<<1)): pos += size("%s f" % ctx.idx_bone)
+			if flags2 & (1<<2):            pos += size("3f")
+			if flags2 & (1<<3):            pos += size("6f")
+			if flags2 & (1<<5):            pos += size("i")
+			if flags1 & (1<<5):
+				(num_ik_links,) = read_int(raw, pos + ik_size - 4)
+				pos += ik_size
+				for z in range(num_ik_links):
+					pos += iklink_size
+					if raw[pos - 1]: pos += size("6f")
+
+		# morphs: every item in a morph is the same size, which depends on the morph type
+		name = "morphs"
+		(i,) = read_int(raw, pos)
+		sections[name] = (pos, i)
+		pos += 4
+		item_sizes = _morph_item_sizes()
+		morph_starts = None
+		if starts is not None:
+			morph_starts = starts["morphs"] = []
+		for d in range(i):
+			if morph_starts is not None:
+				morph_starts.append(pos)
+			pos = skip_strings(pos, 2)
+			morphtype = raw[pos + 1]
+			(itemcount,) = read_int(raw, pos + 2)
+			if morphtype not in item_sizes:
+				raise RuntimeError("unsupported morph type value", morphtype)
+			pos += size("b b i") + itemcount * item_sizes[morphtype]
+
+		# frames: the size of each item's index depends on whether it points to a morph or a bone
+		name = "frames"
+		(i,) = read_int(raw, pos)
+		sections[name] = (pos, i)
+		pos += 4
+		item_size_morph = size("b %s" % ctx.idx_morph)
+		item_size_bone = size("b %s" % ctx.idx_bone)
+		for d in range(i):
+			pos = skip_strings(pos, 2)
+			(itemcount,) = read_int(raw, pos + 1)
+			pos += size("b i")
+			for z in range(itemcount):
+				pos += item_size_morph if raw[pos] else item_size_bone
+
+		name = "rigidbodies"
+		(i,) = read_int(raw, pos)
+		sections[name] = (pos, i)
+		pos += 4
+		body_size = size("%s b H b 3f 3f 3f 5f b" % ctx.idx_bone)
+		for d in range(i):
+			pos = skip_strings(pos, 2) + body_size
+
+		name = "joints"
+		(i,) = read_int(raw, pos)
+		sections[name] = (pos, i)
+		pos += 4
+		body_size = size("b 2%s 3f 3f 3f 3f 3f 3f 3f 3f" % ctx.idx_rb)
+		for d in range(i):
+			pos = skip_strings(pos, 2) + body_size
+
+		if ver == 2.1:
+			name = "softbodies"
+			(i,) = read_int(raw, pos)
+			sections[name] = (pos, i)
+			pos += 4
+			body_size = size("b %s b H b iiffi 12f 6f 7i" % ctx.idx_mat)
+			for d in range(i):
+				pos = skip_strings(pos, 2) + body_size
+				(num_anchors,) = read_int(raw, pos)
+				pos += 4 + num_anchors * size("%s %s b" % (ctx.idx_rb, ctx.idx_vert))
+				(num_vertex_pin,) = read_int(raw, pos)
+				pos += 4 + num_vertex_pin * size(ctx.idx_vert)
+		# make sure the last thing actually fits in the file
+		if pos > len(raw):
+			raise IndexError()
+	except (IndexError, struct.error):
+		raise RuntimeError("the %s section of the file is corrupt or the file ends too soon, at bytepos %d" % (name, pos))
+
+	bytes_remain = len(raw) - pos
+	if bytes_remain != 0:
+		MY_PRINT_FUNC("Warning: finished scanning but %d bytes are left over at the tail!" % bytes_remain)
+		MY_PRINT_FUNC("The file may be corrupt or maybe it contains unknown/unsupported data formats")
+	return sections
 
-# ===== Read / Write =====
 
-def read_pmx(pmx_filename: str, moreinfo=False) -> pmxstruct.Pmx:
-	global PMX_MOREINFO
-	PMX_MOREINFO = moreinfo
-	pmx_filename_clean = filepath_splitdir(pmx_filename)[1]
-	# assumes the calling function already verified correct file extension
-	MY_PRINT_FUNC("Begin reading PMX file '%s'" % pmx_filename_clean)
-	pmx_bytes = read_binfile_to_bytes(pmx_filename)
-	MY_PRINT_FUNC("...total size   = %s" % prettyprint_file_size(len(pmx_bytes)))
-	MY_PRINT_FUNC("Begin parsing PMX file '%s'" % pmx_filename_clean)
-	pack.reset_unpack()
-	print_progress_oneline(0)
-	A = parse_pmx_header(pmx_bytes)
-	if PMX_MOREINFO: MY_PRINT_FUNC("...PMX version  = v%s" % str(A.ver))
-	MY_PRINT_FUNC("...model name   = JP:'%s' / EN:'%s'" % (A.name_jp, A.name_en))
-	B = parse_pmx_vertices(pmx_bytes)
-	C = parse_pmx_surfaces(pmx_bytes)
-	tex_list = parse_pmx_textures(pmx_bytes)
-	E = parse_pmx_materials(pmx_bytes, tex_list)
-	F = parse_pmx_bones(pmx_bytes)
-	G = parse_pmx_morphs(pmx_bytes)
-	H = parse_pmx_dispframes(pmx_bytes)
-	I = parse_pmx_rigidbodies(pmx_bytes)
-	J = parse_pmx_joints(pmx_bytes)
-	if A.ver == 2.1:
-		# if version==2.1, parse soft bodies
-		K = parse_pmx_softbodies(pmx_bytes)
-	else:
-		# otherwise, dont
-		K = []
+# every section of a PmxLazy except the header, in file order
+_LAZY_SECTIONS = ("verts", "faces", "materials", "bones", "morphs", "frames", "rigidbodies", "joints", "softbodies")
 
-	bytes_remain = len(pmx_bytes) - pack.UNPACKER_READFROM_BYTE
-	if bytes_remain != 0:
-		MY_PRINT_FUNC("Warning: finished parsing but %d bytes are left over at the tail!" % bytes_remain)
-		MY_PRINT_FUNC("The file may be corrupt or maybe it contains unknown/unsupported data formats")
-		MY_PRINT_FUNC(pmx_bytes[pack.UNPACKER_READFROM_BYTE:])
-	MY_PRINT_FUNC("Done parsing PMX file '%s'" % pmx_filename_clean)
-	retme = pmxstruct.Pmx(header=A,
-						  verts=B,
-						  faces=C,
-						  # texes=D,
-						  mats=E,
-						  bones=F,
-						  morphs=G,
-						  frames=H,
-						  rbodies=I,
-						  joints=J,
-						  sbodies=K)
+
+class PmxLazy(pmxstruct.Pmx):
+	"""
+	A Pmx that doesn't decode any section until the first time it is used. Made by read_pmx(lazy=True).
+	Reading it only decodes the header, then skims the rest of the file once to find where each section begins. After
+	that, touching "pmx.bones" decodes just the bones, and so on. A tool that only looks at the bones never has to pay
+	for decoding all the vertices and faces.
+	Sections can also be replaced by assigning to them as usual, then the file data for that section is never decoded.
+	It works anywhere a normal Pmx does, write_pmx() or validate() or == simply decode whatever hasn't been yet, and
+	it is == to a normal Pmx of the same model.
+	Copying or pickling it decodes everything first.
+	Each section is sanitized as it is decoded, and whatever that finds is added to "sanitize_report".
+	It also remembers a hash of the file data of each section, so changed_sections() can tell which sections really
+	differ from the file, and == can skip comparing sections that neither model has decoded and that hold the same data.
+	"""
+
+	def __init__(self, header: pmxstruct.PmxHeader, raw: bytearray, sections: Dict[str, Tuple[int, int]], reader: '_PmxCodec'):
+		"""
+		:param header: the already-decoded header
+		:param raw: the whole file, kept until every section is decoded
+		:param sections: from _scan_pmx_sections()
+		:param reader: snapshot of the reader with the settings & index sizes of this file, from PmxReader._snapshot()
+		"""
+		self.header = header
+		self._raw = raw
+		self._sections = sections
+		self._reader = reader
+		# sections can be touched from different threads, but the reader can only decode one at a time
+		self._lock = threading.RLock()
+		self._loaded = {}
+		if "softbodies" not in sections:
+			self._loaded["softbodies"] = []
+		# NaN/INF found in the sections decoded so far
+		self.sanitize_report = SanitizeReport(reader.sanitize_mode)
+		# everything that decides how the file data decodes & encodes, and the header as it was in the file
+		self._file_settings = _worker_settings(reader)
+		self._file_header = header.clone()
+		# section name -> hash of its file data, filled in when first needed and for everything by load_all()
+		self._file_digests: Dict[str, bytes] = {}
+
+	def _section(name: str):
+		def getter(self):
+			try:
+				return self._loaded[name]
+			except KeyError:
+				return self._load(name)
+		def setter(self, value):
+			self._loaded[name] = value
+		return property(getter, setter)
+
+	verts = _section("verts")
+	faces = _section("faces")
+	materials = _section("materials")
+	bones = _section("bones")
+	morphs = _section("morphs")
+	frames = _section("frames")
+	rigidbodies = _section("rigidbodies")
+	joints = _section("joints")
+	softbodies = _section("softbodies")
+	del _section
+
+	def _load(self, name: str) -> list:
+		with self._lock, self._reader.active() as ctx:
+			if name not in self._loaded:
+				self._loaded[name] = self._decode(ctx, name)
+			return self._loaded[name]
+
+	def _decode(self, ctx: '_PmxCodec', name: str, report: SanitizeReport = None) -> list:
+		# decode just this one section, starting from where the scan found it
+		# what the sanitizer finds goes quietly into the given report if there is one, otherwise into sanitize_report
+		pack.reset_unpack()
+		ctx._start_progress("read")
+		if name == "materials":
+			pack.state().readfrom_byte = self._sections["textures"][0]
+			tex_list = parse_pmx_textures(self._raw)
+			retme = parse_pmx_materials(self._raw, tex_list)
+		else:
+			pack.state().readfrom_byte = self._sections[name][0]
+			if name == "verts":
+				retme = parse_pmx_vertices_numpy(self._raw) if ctx.use_numpy else parse_pmx_vertices(self._raw)
+			elif name == "faces":
+				retme = parse_pmx_surfaces_numpy(self._raw) if ctx.use_numpy else parse_pmx_surfaces(self._raw)
+			elif name == "bones":       retme = parse_pmx_bones(self._raw)
+			elif name == "morphs":      retme = parse_pmx_morphs(self._raw)
+			elif name == "frames":      retme = parse_pmx_dispframes(self._raw)
+			elif name == "rigidbodies": retme = parse_pmx_rigidbodies(self._raw)
+			elif name == "joints":      retme = parse_pmx_joints(self._raw)
+			else:                       retme = parse_pmx_softbodies(self._raw)
+		if pack.state().found_nan_inf:
+			if report is not None:
+				sanitize_section(name, retme, ctx.sanitize_mode, report)
+			else:
+				already_found = len(self.sanitize_report)
+				sanitize_section(name, retme, ctx.sanitize_mode, self.sanitize_report)
+				self.sanitize_report.print_summary(start=already_found)
+		return retme
+
+	def is_loaded(self, name: str) -> bool:
+		"""
+		:param name: section name, same as the attribute name: "verts", "faces", "bones", etc
+		:return: True if this section has been decoded (or assigned) already
+		"""
+		return name in self._loaded
+
+	def count(self, name: str) -> int:
+		"""
+		How many things are in a section, without decoding it.
+
+		:param name: section name, same as the attribute name: "verts", "faces", "bones", etc
+		:return: number of things in that section
+		"""
+		if name in self._loaded:
+			return len(self._loaded[name])
+		return self._sections[name][1]
+
+	def morph_heads(self) -> List[PmxMorphHead]:
+		"""
+		The name, panel, type, and number of items of each morph, without decoding any morph items.
+		If the morphs have already been decoded (or assigned) this just summarizes those instead.
+
+		:return: list of PmxMorphHead, one per morph
+		"""
+		with self._lock:
+			if "morphs" in self._loaded:
+				return [PmxMorphHead(m.name_jp, m.name_en, m.panel, m.morphtype, len(m.items)) for m in self._loaded["morphs"]]
+			with self._reader.active():
+				pack.reset_unpack()
+				pack.state().readfrom_byte = self._sections["morphs"][0]
+				return parse_pmx_morph_heads(self._raw)
+
+	def load_all(self) -> None:
+		"""
+		Decode every section that hasn't been decoded yet, then let go of the file data.
+		"""
+		with self._lock:
+			if self._raw is None:
+				return
+			for name in _LAZY_SECTIONS:
+				if name not in self._loaded:
+					self._load(name)
+				# hash it while the file data is still here, so changed_sections() keeps working afterward
+				self._file_digest(name)
+			if isinstance(self._raw, mmap_module.mmap):
+				self._raw.close()
+			self._raw = None
+			self._reader = None
+
+	def _file_digest(self, name: str) -> Optional[bytes]:
+		# hash of the file data of one section, from where it starts to where the next section starts.
+		# "materials" includes the textures before it, since the materials can't be decoded without them.
+		# None if the file has no such section, or if it has already let go of the file data without hashing it
+		digest = self._file_digests.get(name)
+		if digest is not None or self._raw is None or name not in self._sections:
+			return digest
+		start = self._sections["textures" if name == "materials" else name][0]
+		end = min((pos for pos, count in self._sections.values() if pos > self._sections[name][0]), default=len(self._raw))
+		digest = hashlib.blake2b(memoryview(self._raw)[start:end], digest_size=20).digest()
+		self._file_digests[name] = digest
+		return digest
+
+	def _encode_like_file(self, name: str) -> bytearray:
+		# encode one section the way the file stores it: same string encoding, same index sizes
+		ctx = _codec_from_settings(self._file_settings)
+		with ctx.active():
+			_build_record_packers()
+			things = self._loaded[name]
+			if name == "verts":         return encode_pmx_vertices(things)
+			elif name == "faces":       return encode_pmx_surfaces(things)
+			elif name == "materials":
+				tex_list = build_texture_list(self)
+				return encode_pmx_textures(tex_list) + encode_pmx_materials(things, tex_list)
+			elif name == "bones":       return encode_pmx_bones(things)
+			elif name == "morphs":      return encode_pmx_morphs(things)
+			elif name == "frames":      return encode_pmx_dispframes(things)
+			elif name == "rigidbodies": return encode_pmx_rigidbodies(things)
+			elif name == "joints":      return encode_pmx_joints(things)
+			else:                       return encode_pmx_softbodies(things)
+
+	def section_changed(self, name: str) -> bool:
+		"""
+		Find out if a section is any different from what reading the file gives. A section that was never decoded or
+		assigned can't have changed. Otherwise it is encoded the way the file stores it and the result is compared
+		against the file data by hash, so this costs about as much as writing that one section. Only if that doesn't
+		match is the section decoded from the file again to compare against, because a few values don't survive
+		decoding & encoding bit for bit, like the rotations of bone morphs.
+		After load_all() the file data is gone, so any section that doesn't encode to exactly the file data counts as
+		changed.
+
+		:param name: "header", or section name, same as the attribute name: "verts", "faces", "bones", etc
+		:return: True if the section differs from the file
+		"""
+		if name == "header":
+			return self.header != self._file_header
+		with self._lock:
+			if name not in self._loaded:
+				return False
+			if name not in self._sections:
+				# the softbodies of a v2.0 file, which the file doesn't have and write_pmx() wouldn't write
+				return False
+			digest = self._file_digest(name)
+			if digest is None or self.count(name) != self._sections[name][1]:
+				return True
+			try:
+				encoded = self._encode_like_file(name)
+			except Exception:
+				# something in it can't even be stored the way the file stores it, like an index too big for the index size
+				return True
+			if hashlib.blake2b(encoded, digest_size=20).digest() == digest:
+				return False
+			if self._raw is None:
+				return True
+			# decode it again with a copy of the reader, so nothing is printed or reported twice
+			reader = self._reader._snapshot()
+			reader.progress_callback = None
+			with reader.active() as ctx:
+				original = self._decode(ctx, name, SanitizeReport(ctx.sanitize_mode))
+			return self._loaded[name] != original
+
+	def changed_sections(self) -> List[str]:
+		"""
+		Find every section that is any different from what the file holds, see section_changed().
+
+		:return: list of "header" and section names, in file order. empty if the model is exactly what was read
+		"""
+		with self._lock:
+			return [name for name in ("header",) + _LAZY_SECTIONS if self.section_changed(name)]
+
+	def __eq__(self, other) -> bool:
+		if self is other: return True
+		if not isinstance(other, PmxLazy):
+			# a normal Pmx has no file data to compare against, so compare by content
+			return pmxstruct.Pmx.__eq__(self, other)
+		if self.header != other.header: return False
+		same_settings = self._file_settings == other._file_settings
+		for name in _LAZY_SECTIONS:
+			if same_settings and name not in self._loaded and name not in other._loaded:
+				digest = self._file_digest(name)
+				if digest is not None and digest == other._file_digest(name):
+					# the same file data decoded the same way, no need to decode either of them
+					continue
+			if getattr(self, name) != getattr(other, name): return False
+		return True
+
+	def __getstate__(self):
+		# the file data might be a memory mapping, which can't be copied or pickled, and neither can the lock
+		self.load_all()
+		state = dict(self.__dict__)
+		del state["_lock"]
+		return state
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self._lock = threading.RLock()
+
+
+# ===== Parallel reading & writing =====
+
+# never cut the vertices or faces into pieces smaller than this, starting a piece & sending it back has a cost too
+_MIN_PIECE_VERTS = 10000
+_MIN_PIECE_FACES = 50000
+
+# forked worker processes get a copy of everything for free, without pickling it, but that's not possible everywhere
+_CAN_FORK = "fork" in multiprocessing.get_all_start_methods()
+
+
+def _worker_settings(ctx: _PmxCodec) -> dict:
+	# everything a worker process needs to decode part of the file exactly the way this reader would
+	return {
+		"addl_vertex_vec4": ctx.addl_vertex_vec4,
+		"idx_vert": ctx.idx_vert, "idx_tex": ctx.idx_tex, "idx_mat": ctx.idx_mat,
+		"idx_bone": ctx.idx_bone, "idx_morph": ctx.idx_morph, "idx_rb": ctx.idx_rb,
+		"precompiled": ctx.precompiled,
+		"encoding": ctx.unpacker.encoding,
+		"check_nan_inf": ctx.unpacker.check_nan_inf,
+	}
+
+
+def _codec_from_settings(settings: dict) -> _PmxCodec:
+	# the other half of _worker_settings(), used inside the worker
+	ctx = _PmxCodec()
+	for key, value in settings.items():
+		if key in ("encoding", "check_nan_inf"):
+			setattr(ctx.unpacker, key, value)
+		else:
+			setattr(ctx, key, value)
+	return ctx
+
+
+def _decode_piece(pmx_filename: str, settings: dict, name: str, bytepos: int, count: int) -> Tuple[object, bool]:
+	"""
+	Decode one piece of the vertices, bones, or morphs of a PMX file. This runs in a worker process of a parallel
+	read, which maps the file by itself so the file data never has to be sent over.
+	The result is sent back by pickling it, and unpickling lots of little objects is about as slow as decoding them
+	in the first place. So vertices come back as a VertexTable and the items of vertex & UV morphs as MorphItemTables,
+	which are just a few flat buffers each.
+
+	:param pmx_filename: PMX file path
+	:param settings: from _worker_settings()
+	:param name: "verts", "bones", or "morphs"
+	:param bytepos: where the piece begins. for bones, this is the start of the section, which is always one piece
+	:param count: how many vertices or morphs are in the piece
+	:return: (VertexTable or list of things, True if there was any NaN or INF in it)
+	"""
+	ctx = _codec_from_settings(settings)
+	raw = read_binfile_to_mmap(pmx_filename, quiet=True)
+	try:
+		with ctx.active():
+			_build_record_unpackers()
+			pack.state().readfrom_byte = bytepos
+			if name == "verts":
+				retme = _decode_vertices_columnar(raw, count, None)
+			elif name == "morphs":
+				retme = pmxcolumnar.morphs_to_columnar(_decode_morphs(raw, count, None))
+			else:
+				retme = parse_pmx_bones(raw)
+			return retme, pack.state().found_nan_inf
+	finally:
+		try:
+			raw.close()
+		except BufferError:
+			# the vertex table might still be looking at the mapping, it will be closed once that is garbage collected
+			pass
+
+
+def _cut_pieces(starts: List[int], step: int, total: int, end: int) -> List[Tuple[int, int, int]]:
+	"""
+	:param starts: bytepos of the first thing of each piece
+	:param step: how many things are in each piece, except maybe the last
+	:param total: how many things there are
+	:param end: bytepos where the section ends
+	:return: list of (bytepos where the piece begins, how many things, bytepos where it ends)
+	"""
+	ends = starts[1:] + [end]
+	return [(p, min(step, total - k * step), e) for k, (p, e) in enumerate(zip(starts, ends))]
+
+
+def _cut_morph_pieces(starts: List[int], end: int, npieces: int) -> List[Tuple[int, int, int]]:
+	# morphs can be wildly different sizes, so cut them into pieces with about the same number of bytes instead
+	if not starts:
+		return []
+	target = (end - starts[0]) / npieces
+	ends = starts[1:] + [end]
+	retme = []
+	first = 0
+	for d, e in enumerate(ends):
+		if e - starts[first] >= target or d == len(ends) - 1:
+			retme.append((starts[first], d + 1 - first, e))
+			first = d + 1
+	return retme
+
+
+def _cut_ranges(total: int, step: int) -> List[Tuple[int, int]]:
+	# (start, stop) of each piece of "step" things, the last one may be shorter
+	return [(start, min(start + step, total)) for start in range(0, total, step)]
+
+
+def _cut_morph_ranges(morphs: List[pmxstruct.PmxMorph], npieces: int) -> List[Tuple[int, int]]:
+	# morphs can be wildly different sizes, so cut them into pieces with about the same number of items instead
+	target = sum(len(m.items) + 1 for m in morphs) / npieces
+	retme = []
+	first = 0
+	size = 0
+	for d, m in enumerate(morphs):
+		size += len(m.items) + 1
+		if size >= target or d == len(morphs) - 1:
+			retme.append((first, d + 1))
+			first = d + 1
+			size = 0
 	return retme
 
-def write_pmx(pmx_filename: str, pmx: pmxstruct.Pmx, moreinfo=False) -> None:
-	global PMX_MOREINFO
-	PMX_MOREINFO = moreinfo
-	pmx_filename_clean = filepath_splitdir(pmx_filename)[1]
-	# recives object 	(......)
-	# before writing, validate that the object is properly structured
-	# if it fails, it prints a bunch & raises a RuntimeError
-	pmx.validate()
-	# assumes the calling function already verified correct file extension
-	MY_PRINT_FUNC("Begin encoding PMX file '%s'" % pmx_filename_clean)
-
-	if PMX_MOREINFO: MY_PRINT_FUNC("...PMX version  = v%s" % str(pmx.header.ver))
-	MY_PRINT_FUNC("...model name   = JP:'%s' / EN:'%s'" % (pmx.header.name_jp, pmx.header.name_en))
-
-	# arg "pmx" is the same structure created by "read_pmx()"
-	# assume the object is perfect, no sanity-checking needed
-	output_bytes = bytearray()
-
-	# # stress-test code
-	# pmx.verts = pmx.verts * 10
-	# pmx.faces = pmx.faces * 10
-	# pmx.materials = pmx.materials * 1000
-	# pmx.bones = pmx.bones * 1000
-	# pmx.morphs = pmx.morphs * 10
-	# pmx.frames = pmx.frames * 10
-	# pmx.rigidbodies = pmx.rigidbodies * 1000
-	# pmx.joints = pmx.joints * 1000
-
-	_prepare_progress_printouts_for_write_pmx(pmx)
-
-	print_progress_oneline(0)
+
+def _slice_section(things, start: int, stop: int):
+	# one piece of a section to send to a worker, tables stay tables so they can be sent over cheaply
+	if isinstance(things, pmxcolumnar.RecordTable):
+		return things.sub_table(start, stop)
+	return things[start:stop]
+
+
+# the sections of the Pmx being written by a parallel write, only set inside the worker processes
+_WORKER_SECTIONS: Dict[str, list] = {}
+
+
+def _init_encode_worker(sections: Dict[str, list]) -> None:
+	# runs once in each forked worker process, which already has the whole Pmx in memory
+	global _WORKER_SECTIONS
+	_WORKER_SECTIONS = sections
+
+
+def _encode_piece(settings: dict, name: str, start: int, stop: int, piece: list = None) -> bytearray:
+	"""
+	Encode one piece of the vertices, faces, or morphs of a Pmx that is being written. This runs in a worker process
+	of a parallel write.
+	Sending the objects to the worker by pickling them would cost more than encoding them. So where possible, the
+	workers are forked from the writer's process after it has the Pmx, and they read the piece out of their own copy
+	of the whole section instead. Otherwise the piece itself is sent, which is cheap only for columnar tables.
+
+	:param settings: from _worker_settings(), after the header was encoded
+	:param name: "verts", "faces", or "morphs"
+	:param start: index of the first thing in the piece
+	:param stop: index after the last thing in the piece
+	:param piece: the things to encode, or None to take them from the forked copy
+	:return: the encoded piece, without the count that goes at the start of the section
+	"""
+	if piece is None:
+		piece = _slice_section(_WORKER_SECTIONS[name], start, stop)
+	ctx = _codec_from_settings(settings)
+	with ctx.active():
+		_build_record_packers()
+		if name == "verts":
+			return _encode_vertex_records(piece, bytearray(), None)
+		elif name == "faces":
+			return _encode_face_records(piece, bytearray(), None)
+		else:
+			return _encode_morph_records(piece, bytearray(), None)
+
+
+# ===== Read / Write =====
+
+class PmxReader(_PmxCodec):
+	"""
+	Reads PMX files. Each reader carries all of the parsing state for the file it is reading, so different readers can
+	be used in different threads at the same time, like from a ThreadPoolExecutor. A reader can be reused for more
+	files, but only reads one at a time.
+	"read_pmx()" is a shortcut for "PmxReader(...).read(path)".
+	"""
+	def __init__(self, moreinfo=False, precompiled=True, use_numpy=False, mmap=False, columnar=False, lazy=False,
+				 sanitize="fix", progress: Optional[ProgressCallback] = PRINT_PROGRESS, workers: Optional[int] = None,
+				 cache=False):
+		"""
+		:param moreinfo: if true, print more info about the contents
+		:param precompiled: if false, use the old slower way of unpacking records, only exists for timing comparisons
+		:param use_numpy: if true and numpy is installed, decode the vertices & faces in bulk with numpy
+		:param mmap: if true, parse straight from a memory mapping of the file instead of reading it into a bytearray first
+		:param columnar: if true, return a ColumnarPmx where the vertices, faces, & vertex/UV morph items are stored in
+		tables instead of lists of objects. combined with mmap=True, the faces might be a view into the mapping.
+		:param lazy: if true, return a PmxLazy that only decodes each section the first time it is used. the file data is
+		kept in memory until then. can't be combined with columnar=True.
+		:param sanitize: what to do about NaN & INF floats after decoding: "fix" to replace them with real numbers,
+		"report" to only list them, or "off" to not look for them at all, see pmx_sanitize. either way, whatever was
+		found is in "sanitize_report" afterward.
+		:param progress: ProgressCallback to report the progress of each section to, or None to not report it at all.
+		the default prints it, see progress.py
+		:param workers: if more than 1, decode the vertices, bones, and morphs in this many worker processes at the same
+		time, while this process decodes everything else. only worth it for big models, since starting the processes
+		takes a moment. it's fastest combined with columnar=True, otherwise this process still has to turn the vertices
+		and vertex/UV morph items that come back into objects. can't be combined with lazy=True. on Windows, the
+		script that reads the file must be protected by 'if __name__ == "__main__":' like every tool script is.
+		:param cache: True to keep parsed models in the default on-disk cache, or a PmxCache to use a specific one, see
+		pmx_cache. reading a file that is already in the cache skips parsing it entirely. can't be combined with
+		lazy=True.
+		"""
+		super().__init__(moreinfo)
+		self.progress_callback = progress
+		self.precompiled = precompiled
+		self.use_numpy = use_numpy
+		self.mmap = mmap
+		self.columnar = columnar
+		self.lazy = lazy
+		if self.use_numpy and np is None:
+			MY_PRINT_FUNC("Warning: numpy is not installed, falling back to the normal vertex & face parsing")
+			self.use_numpy = False
+		if lazy and columnar:
+			raise RuntimeError("PmxReader can't be both lazy and columnar")
+		self.workers = workers or 1
+		if self.workers > 1 and lazy:
+			raise RuntimeError("PmxReader can't be both lazy and use workers")
+		if cache is True:
+			cache = get_default_cache()
+		self.cache: Optional[PmxCache] = cache or None
+		if self.cache is not None and lazy:
+			raise RuntimeError("PmxReader can't be both lazy and cached")
+		if sanitize not in SANITIZE_MODES:
+			raise RuntimeError("unknown sanitize mode '%s', must be one of %s" % (sanitize, SANITIZE_MODES))
+		self.sanitize_mode = sanitize
+		# the unpackers only flag NaN/INF, then the sections that had any go through pmx_sanitize
+		self.unpacker.check_nan_inf = "off" if sanitize == "off" else "flag"
+		# NaN/INF found in the last file read, for a lazy read this is the same object as PmxLazy.sanitize_report
+		self.sanitize_report = SanitizeReport(sanitize)
+
+	def read(self, pmx_filename: BinSource) -> pmxstruct.Pmx:
+		"""
+		Read and parse a PMX file.
+		Besides a normal file, this can be an open binary file object, a file inside a zip archive like
+		"zip://archive.zip!/folder/model.pmx", or a compressed file like "model.pmx.xz", see io.read_binsource_to_bytes().
+		Those are always read into memory in one piece, so they are never memory mapped, cached, or decoded by workers.
+
+		:param pmx_filename: PMX file path, as a string, relative from CWD or absolute, or one of the above
+		:return: Pmx object, or ColumnarPmx object if columnar=True, or PmxLazy object if lazy=True
+		"""
+		with self.active():
+			if self.cache is not None and is_plain_binfile(pmx_filename):
+				return self._read_cached(pmx_filename)
+			return self._read(pmx_filename)
+
+	def _read_cached(self, pmx_filename: str) -> pmxstruct.Pmx:
+		# the cache always holds the columnar form, since that is by far the fastest to save & load
+		key = self.cache.key(pmx_filename, self.sanitize_mode)
+		hit = self.cache.load(key)
+		if hit is not None:
+			retme, self.sanitize_report = hit
+			self.filename = pmx_filename
+			MY_PRINT_FUNC("Loaded PMX file '%s' from the cache" % binsource_name(pmx_filename))
+			self.sanitize_report.print_summary()
+		else:
+			columnar = self.columnar
+			self.columnar = True
+			try:
+				retme = self._read(pmx_filename)
+			finally:
+				self.columnar = columnar
+			self.cache.store(key, retme, self.sanitize_report)
+		if self.columnar:
+			return retme
+		# turning the tables back into objects is much faster without the GC running, see gc_paused()
+		with gc_paused():
+			return retme.to_pmx()
+
+	def _read(self, pmx_filename: BinSource) -> pmxstruct.Pmx:
+		pmx_filename_clean = binsource_name(pmx_filename)
+		# assumes the calling function already verified correct file extension
+		MY_PRINT_FUNC("Begin reading PMX file '%s'" % pmx_filename_clean)
+		# only a normal file can be mapped, or opened again by the worker processes
+		plain = is_plain_binfile(pmx_filename)
+		mapped = self.mmap and plain
+		if mapped:
+			pmx_bytes = read_binfile_to_mmap(pmx_filename)
+		else:
+			pmx_bytes = read_binsource_to_bytes(pmx_filename)
+		MY_PRINT_FUNC("...total size   = %s" % prettyprint_file_size(len(pmx_bytes)))
+		MY_PRINT_FUNC("Begin parsing PMX file '%s'" % pmx_filename_clean)
+		try:
+			pack.reset_unpack()
+			self.sanitize_report = SanitizeReport(self.sanitize_mode)
+			self.filename = pmx_filename if isinstance(pmx_filename, str) else pmx_filename_clean
+			self._start_progress("read")
+			A = parse_pmx_header(pmx_bytes)
+			if self.moreinfo: MY_PRINT_FUNC("...PMX version  = v%s" % str(A.ver))
+			MY_PRINT_FUNC("...model name   = JP:'%s' / EN:'%s'" % (A.name_jp, A.name_en))
+			if self.lazy:
+				# find where each section starts, but don't decode anything else yet
+				sections = _scan_pmx_sections(pmx_bytes, A.ver)
+				MY_PRINT_FUNC("Done scanning PMX file '%s'" % pmx_filename_clean)
+				retme = PmxLazy(A, pmx_bytes, sections, self._snapshot())
+				self.sanitize_report = retme.sanitize_report
+				# the PmxLazy owns the file data now
+				pmx_bytes = None
+				return retme
+			if self.workers > 1 and plain:
+				(B, C, E, F, G, H, I, J, K) = self._read_parallel(pmx_filename, pmx_bytes, A)
+			else:
+				B = self._parse_vertices(pmx_bytes)
+				C = self._parse_surfaces(pmx_bytes)
+				self._sanitize_if_found("verts", B)
+				tex_list = parse_pmx_textures(pmx_bytes)
+				E = self._sanitize_if_found("materials", parse_pmx_materials(pmx_bytes, tex_list))
+				F = self._sanitize_if_found("bones", parse_pmx_bones(pmx_bytes))
+				G = self._sanitize_if_found("morphs", parse_pmx_morphs(pmx_bytes))
+				H = parse_pmx_dispframes(pmx_bytes)
+				I = self._sanitize_if_found("rigidbodies", parse_pmx_rigidbodies(pmx_bytes))
+				J = self._sanitize_if_found("joints", parse_pmx_joints(pmx_bytes))
+				if A.ver == 2.1:
+					# if version==2.1, parse soft bodies
+					K = self._sanitize_if_found("softbodies", parse_pmx_softbodies(pmx_bytes))
+				else:
+					# otherwise, dont
+					K = []
+
+				bytes_remain = len(pmx_bytes) - pack.state().readfrom_byte
+				if bytes_remain != 0:
+					MY_PRINT_FUNC("Warning: finished parsing but %d bytes are left over at the tail!" % bytes_remain)
+					MY_PRINT_FUNC("The file may be corrupt or maybe it contains unknown/unsupported data formats")
+					MY_PRINT_FUNC(pmx_bytes[pack.state().readfrom_byte:])
+		finally:
+			if mapped and pmx_bytes is not None:
+				try:
+					pmx_bytes.close()
+				except BufferError:
+					# a columnar table is still looking at the mapping, it will be closed once that is garbage collected
+					pass
+		MY_PRINT_FUNC("Done parsing PMX file '%s'" % pmx_filename_clean)
+		if self.columnar:
+			retme = pmxcolumnar.ColumnarPmx(header=A,
+											verts=B,
+											faces=C,
+											mats=E,
+											bones=F,
+											morphs=pmxcolumnar.morphs_to_columnar(G),
+											frames=H,
+											rbodies=I,
+											joints=J,
+											sbodies=K)
+		else:
+			retme = pmxstruct.Pmx(header=A,
+								  verts=B,
+								  faces=C,
+								  # texes=D,
+								  mats=E,
+								  bones=F,
+								  morphs=G,
+								  frames=H,
+								  rbodies=I,
+								  joints=J,
+								  sbodies=K)
+		self.sanitize_report.print_summary()
+		return retme
+
+	def _parse_vertices(self, raw: bytearray):
+		if self.columnar:		return parse_pmx_vertices_columnar(raw)
+		elif self.use_numpy:	return parse_pmx_vertices_numpy(raw)
+		else:					return parse_pmx_vertices(raw)
+
+	def _parse_surfaces(self, raw: bytearray):
+		if self.columnar:		return parse_pmx_surfaces_columnar(raw)
+		elif self.use_numpy:	return parse_pmx_surfaces_numpy(raw)
+		else:					return parse_pmx_surfaces(raw)
+
+	def _read_parallel(self, pmx_filename: str, raw: bytearray, header: pmxstruct.PmxHeader) -> list:
+		"""
+		Decode everything after the header, with the vertices, bones, and morphs done by worker processes.
+		First the whole file is skimmed to find where every section begins, like a lazy read does, and the vertices &
+		morphs are cut into a few pieces per worker so that all of them stay busy. While the workers are going, this
+		process decodes the faces and the small sections. Then the pieces are collected in order and put together.
+
+		:return: list of every section, in the same order as the arguments of Pmx()
+		"""
+		# cut the big sections into a few more pieces than there are workers, in case some pieces are slower
+		npieces = 2 * self.workers
+		ustate = pack.state()
+		(vert_ct,) = struct.unpack_from("<i", raw, ustate.readfrom_byte)
+		vert_step = max(_MIN_PIECE_VERTS, -(-vert_ct // npieces))
+		starts = {}
+		sections = _scan_pmx_sections(raw, header.ver, vert_step, starts)
+		vert_pieces = _cut_pieces(starts["verts"], vert_step, vert_ct, sections["faces"][0])
+		morph_pieces = _cut_morph_pieces(starts["morphs"], sections["frames"][0], npieces)
+		bone_pieces = [(sections["bones"][0], sections["bones"][1], sections["morphs"][0])]
+
+		settings = _worker_settings(self)
+		with concurrent.futures.ProcessPoolExecutor(max_workers=self.workers) as pool:
+			jobs = {}
+			for name, pieces in (("verts", vert_pieces), ("bones", bone_pieces), ("morphs", morph_pieces)):
+				jobs[name] = [(pool.submit(_decode_piece, pmx_filename, settings, name, start, count), count, end)
+							  for start, count, end in pieces]
+			try:
+				# the faces & small sections are fast, so do them here in the meantime
+				ustate.readfrom_byte = sections["faces"][0]
+				C = self._parse_surfaces(raw)
+				tex_list = parse_pmx_textures(raw)
+				E = self._sanitize_if_found("materials", parse_pmx_materials(raw, tex_list))
+				ustate.readfrom_byte = sections["frames"][0]
+				H = parse_pmx_dispframes(raw)
+				I = self._sanitize_if_found("rigidbodies", parse_pmx_rigidbodies(raw))
+				J = self._sanitize_if_found("joints", parse_pmx_joints(raw))
+				if header.ver == 2.1:
+					K = self._sanitize_if_found("softbodies", parse_pmx_softbodies(raw))
+				else:
+					K = []
+				# unless columnar, the pieces become huge numbers of objects here, see gc_paused()
+				with gc_paused():
+					B = self._sanitize_if_found("verts", self._collect_pieces("verts", sections["verts"], jobs["verts"]))
+					F = self._sanitize_if_found("bones", self._collect_pieces("bones", sections["bones"], jobs["bones"]))
+					G = self._sanitize_if_found("morphs", self._collect_pieces("morphs", sections["morphs"], jobs["morphs"]))
+			except BaseException:
+				# don't wait for pieces that nobody will ever look at
+				for futures in jobs.values():
+					for future, _, _ in futures:
+						future.cancel()
+				raise
+		return [B, C, E, F, G, H, I, J, K]
+
+	def _collect_pieces(self, name: str, section: Tuple[int, int], futures: list):
+		"""
+		Wait for the pieces of one section from the workers, in order, and put them together.
+
+		:param name: "verts", "bones", or "morphs"
+		:param section: (bytepos where the section begins, number of things in it) from _scan_pmx_sections()
+		:param futures: list of (future of _decode_piece(), how many things, bytepos where the piece ends)
+		:return: the whole section, same as what the normal parse functions for this reader's settings would return
+		"""
+		ustate = pack.state()
+		# start just after the count, same as the normal parse functions, so the section sizes reported are the same
+		ustate.readfrom_byte = section[0] + 4
+		if self.moreinfo: MY_PRINT_FUNC("...# of %-17s=" % name, section[1])
+		tick = _read_progress(name, section[1])
+		if name == "verts" and self.columnar:
+			retme = pmxcolumnar.VertexTable(self.addl_vertex_vec4)
+		else:
+			retme = []
+		done = 0
+		for future, count, end in futures:
+			piece, found_nan_inf = future.result()
+			if found_nan_inf:
+				ustate.found_nan_inf = True
+			if name == "verts" and not self.columnar:
+				piece = piece.to_list()
+			elif name == "morphs" and not self.columnar:
+				for m in piece:
+					if isinstance(m.items, pmxcolumnar.MorphItemTable):
+						m.items = m.items.to_list()
+			retme.extend(piece)
+			done += count
+			ustate.readfrom_byte = end
+			if tick is not None: tick(done, end)
+		_read_progress_end()
+		return retme
+
+	def _sanitize_if_found(self, name: str, things: list) -> list:
+		# if the unpackers flagged a NaN or INF while decoding this section, go find it & fix it
+		ustate = pack.state()
+		if ustate.found_nan_inf:
+			ustate.found_nan_inf = False
+			sanitize_section(name, things, self.sanitize_mode, self.sanitize_report)
+		return things
+
+
+class PmxWriter(_PmxCodec):
+	"""
+	Writes PMX files. Each writer carries all of the encoding state for the file it is writing, so different writers
+	can be used in different threads at the same time. A writer can be reused for more files, but only writes one at
+	a time.
+	"write_pmx()" is a shortcut for "PmxWriter(...).write(path, pmx)".
+	"""
+	def __init__(self, moreinfo=False, validate="full", progress: Optional[ProgressCallback] = PRINT_PROGRESS,
+				 workers: Optional[int] = None):
+		"""
+		:param moreinfo: if true, print more info about the contents
+		:param validate: how to check the object before writing it: "full" for Pmx.validate(), "fast" for the bulk
+		checks in pmx_validate, or "off" to not check it at all
+		:param progress: ProgressCallback to report the progress of each section to, or None to not report it at all
+		:param workers: if more than 1, encode the vertices, faces, and morphs in this many worker processes at the same
+		time. the file is exactly the same either way. only worth it for big models, and where processes can't be
+		forked (Windows) only for a ColumnarPmx, because otherwise every object has to be pickled to send it over.
+		"""
+		super().__init__(moreinfo)
+		self.progress_callback = progress
+		self.workers = workers or 1
+		if validate not in VALIDATE_MODES:
+			raise RuntimeError("unknown validate mode '%s', must be one of %s" % (validate, VALIDATE_MODES))
+		self.validate_mode = validate
+
+	def write(self, pmx_filename: BinSource, pmx: pmxstruct.Pmx) -> None:
+		"""
+		Encode a Pmx object and write it to disk.
+		Besides a normal file, this can be an open binary file object, a file inside a zip archive like
+		"zip://archive.zip!/folder/model.pmx", or a compressed file like "model.pmx.xz", see io.write_chunks_to_binsource().
+
+		:param pmx_filename: PMX file path, as a string, relative from CWD or absolute, or one of the above
+		:param pmx: Pmx object, or anything that acts like one (ColumnarPmx, PmxLazy)
+		"""
+		with self.active():
+			return self._write(pmx_filename, pmx)
+
+	def _write(self, pmx_filename: BinSource, pmx: pmxstruct.Pmx) -> None:
+		pmx_filename_clean = binsource_name(pmx_filename)
+		# recives object 	(......)
+		# before writing, validate that the object is properly structured
+		# if it fails, it prints a bunch & raises a RuntimeError
+		validate_pmx(pmx, self.validate_mode)
+		# assumes the calling function already verified correct file extension
+		MY_PRINT_FUNC("Begin encoding PMX file '%s'" % pmx_filename_clean)
+
+		if self.moreinfo: MY_PRINT_FUNC("...PMX version  = v%s" % str(pmx.header.ver))
+		MY_PRINT_FUNC("...model name   = JP:'%s' / EN:'%s'" % (pmx.header.name_jp, pmx.header.name_en))
+
+		# arg "pmx" is the same structure created by "read_pmx()"
+		# assume the object is perfect, no sanity-checking needed
+
+		# # stress-test code
+		# pmx.verts = pmx.verts * 10
+		# pmx.faces = pmx.faces * 10
+		# pmx.materials = pmx.materials * 1000
+		# pmx.bones = pmx.bones * 1000
+		# pmx.morphs = pmx.morphs * 10
+		# pmx.frames = pmx.frames * 10
+		# pmx.rigidbodies = pmx.rigidbodies * 1000
+		# pmx.joints = pmx.joints * 1000
+
+		self.filename = pmx_filename if isinstance(pmx_filename, str) else pmx_filename_clean
+		self._start_progress("write")
+		# each section is encoded only when the file writer asks for it, and can be thrown away as soon as it is written,
+		# so only one section needs to exist in memory at a time instead of the entire file
+		MY_PRINT_FUNC("Begin writing PMX file '%s'" % pmx_filename_clean)
+		if self.workers > 1:
+			chunks = self._encode_parallel(pmx)
+		else:
+			chunks = _encode_pmx_sections(pmx)
+		total_size = write_chunks_to_binsource(pmx_filename, chunks)
+		MY_PRINT_FUNC("...total size   = %s" % prettyprint_file_size(total_size))
+		MY_PRINT_FUNC("Done writing PMX file '%s'" % pmx_filename_clean)
+		# done with everything!
+		return None
+
+	def _encode_parallel(self, pmx: pmxstruct.Pmx) -> Iterator[bytearray]:
+		"""
+		Same as _encode_pmx_sections(), but the vertices, faces, and morphs are cut into pieces and encoded by worker
+		processes. Once the header is encoded the index sizes are known, and after that each piece only depends on its
+		own contents, so the pieces just need to be put back together in order. Meanwhile this process encodes the
+		small sections.
+		"""
+		lookahead, tex_list = encode_pmx_lookahead(pmx)
+		header = encode_pmx_header(pmx.header, lookahead)
+		settings = _worker_settings(self)
+		# cut the big sections into a few more pieces than there are workers, in case some pieces are slower
+		npieces = 2 * self.workers
+		sections = {"verts": pmx.verts, "faces": pmx.faces, "morphs": pmx.morphs}
+		cuts = {
+			"verts": _cut_ranges(len(pmx.verts), max(_MIN_PIECE_VERTS, -(-len(pmx.verts) // npieces))),
+			"faces": _cut_ranges(len(pmx.faces), max(_MIN_PIECE_FACES, -(-len(pmx.faces) // npieces))),
+			"morphs": _cut_morph_ranges(pmx.morphs, npieces),
+		}
+		if _CAN_FORK:
+			pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers,
+														  mp_context=multiprocessing.get_context("fork"),
+														  initializer=_init_encode_worker, initargs=(sections,))
+		else:
+			pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+		jobs = {}
+		try:
+			for name, ranges in cuts.items():
+				if _CAN_FORK:
+					jobs[name] = [(pool.submit(_encode_piece, settings, name, start, stop), stop - start)
+								  for start, stop in ranges]
+				else:
+					jobs[name] = [(pool.submit(_encode_piece, settings, name, start, stop,
+											   _slice_section(sections[name], start, stop)), stop - start)
+								  for start, stop in ranges]
+			# the small sections are fast, so do them here in the meantime
+			middle = [encode_pmx_textures(tex_list),
+					  encode_pmx_materials(pmx.materials, tex_list),
+					  encode_pmx_bones(pmx.bones)]
+			tail = [encode_pmx_dispframes(pmx.frames),
+					encode_pmx_rigidbodies(pmx.rigidbodies),
+					encode_pmx_joints(pmx.joints)]
+			if pmx.header.ver == 2.1:
+				tail.append(encode_pmx_softbodies(pmx.softbodies))
+			yield header
+			yield from self._collect_encoded("verts", len(pmx.verts), pack.my_pack("i", len(pmx.verts)), jobs["verts"])
+			yield from self._collect_encoded("faces", len(pmx.faces), pack.my_pack("i", 3 * len(pmx.faces)), jobs["faces"])
+			yield from middle
+			yield from self._collect_encoded("morphs", len(pmx.morphs), pack.my_pack("i", len(pmx.morphs)), jobs["morphs"])
+			yield from tail
+		finally:
+			# if anything went wrong, don't wait for pieces that nobody will ever look at
+			for futures in jobs.values():
+				for future, _ in futures:
+					future.cancel()
+			pool.shutdown()
+
+	def _collect_encoded(self, name: str, count: int, head: bytearray, futures: list) -> Iterator[bytearray]:
+		"""
+		Wait for the pieces of one section from the workers, in order, and pass them on.
+
+		:param name: "verts", "faces", or "morphs"
+		:param count: how many things are in the section
+		:param head: the count that goes at the start of the section, already encoded
+		:param futures: list of (future of _encode_piece(), how many things are in the piece)
+		"""
+		if self.moreinfo: MY_PRINT_FUNC("...# of %-17s=" % name, count)
+		tick = _write_progress(name, count, len(head))
+		yield head
+		nbytes = len(head)
+		done = 0
+		for future, piece_count in futures:
+			piece = future.result()
+			nbytes += len(piece)
+			done += piece_count
+			if tick is not None: tick(done, nbytes)
+			yield piece
+		_write_progress_end(nbytes)
+
+
+def read_pmx(pmx_filename: BinSource, moreinfo=False, precompiled=True, use_numpy=False, mmap=False, columnar=False,
+			 lazy=False, sanitize="fix", progress: Optional[ProgressCallback] = PRINT_PROGRESS,
+			 workers: Optional[int] = None, cache=False) -> pmxstruct.Pmx:
+	"""
+	Read and parse a PMX file from disk. See PmxReader for what each option does.
+
+	:param pmx_filename: PMX file path, as a string, relative from CWD or absolute, or anything else PmxReader.read() takes
+	:return: Pmx object, or ColumnarPmx object if columnar=True, or PmxLazy object if lazy=True
+	"""
+	reader = PmxReader(moreinfo=moreinfo, precompiled=precompiled, use_numpy=use_numpy, mmap=mmap,
+					   columnar=columnar, lazy=lazy, sanitize=sanitize, progress=progress, workers=workers,
+					   cache=cache)
+	return reader.read(pmx_filename)
+
+
+def write_pmx(pmx_filename: BinSource, pmx: pmxstruct.Pmx, moreinfo=False, validate="full",
+			  progress: Optional[ProgressCallback] = PRINT_PROGRESS, workers: Optional[int] = None) -> None:
+	"""
+	Encode a Pmx object and write it to disk. See PmxWriter.
+
+	:param pmx_filename: PMX file path, as a string, relative from CWD or absolute, or anything else PmxWriter.write() takes
+	:param pmx: Pmx object, or anything that acts like one (ColumnarPmx, PmxLazy)
+	:param moreinfo: if true, print more info about the contents
+	:param validate: "full", "fast", or "off", see pmx_validate
+	:param progress: ProgressCallback to report progress to, or None to not report it, see progress.py
+	:param workers: if more than 1, encode the biggest sections in this many worker processes, see PmxWriter
+	"""
+	PmxWriter(moreinfo=moreinfo, validate=validate, progress=progress, workers=workers).write(pmx_filename, pmx)
+
+
+def _encode_pmx_sections(pmx: pmxstruct.Pmx) -> Iterator[bytearray]:
+	# encode the sections one at a time, in file order
 	lookahead, tex_list = encode_pmx_lookahead(pmx)
-	output_bytes += encode_pmx_header(pmx.header, lookahead)
-	output_bytes += encode_pmx_vertices(pmx.verts)
-	output_bytes += encode_pmx_surfaces(pmx.faces)
-	output_bytes += encode_pmx_textures(tex_list)
-	output_bytes += encode_pmx_materials(pmx.materials, tex_list)
-	output_bytes += encode_pmx_bones(pmx.bones)
-	output_bytes += encode_pmx_morphs(pmx.morphs)
-	output_bytes += encode_pmx_dispframes(pmx.frames)
-	output_bytes += encode_pmx_rigidbodies(pmx.rigidbodies)
-	output_bytes += encode_pmx_joints(pmx.joints)
+	yield encode_pmx_header(pmx.header, lookahead)
+	yield encode_pmx_vertices(pmx.verts)
+	yield encode_pmx_surfaces(pmx.faces)
+	yield encode_pmx_textures(tex_list)
+	yield encode_pmx_materials(pmx.materials, tex_list)
+	yield encode_pmx_bones(pmx.bones)
+	yield encode_pmx_morphs(pmx.morphs)
+	yield encode_pmx_dispframes(pmx.frames)
+	yield encode_pmx_rigidbodies(pmx.rigidbodies)
+	yield encode_pmx_joints(pmx.joints)
 	if pmx.header.ver == 2.1:
 		# if version==2.1, parse soft bodies
-		output_bytes += encode_pmx_softbodies(pmx.softbodies)
-
+		yield encode_pmx_softbodies(pmx.softbodies)
 	# done encoding!!
 
-	MY_PRINT_FUNC("Begin writing PMX file '%s'" % pmx_filename_clean)
-	MY_PRINT_FUNC("...total size   = %s" % prettyprint_file_size(len(output_bytes)))
-	write_bytes_to_binfile(pmx_filename, output_bytes)
-	MY_PRINT_FUNC("Done writing PMX file '%s'" % pmx_filename_clean)
-	# done with everything!
-	return None
+
+# ===== Quick scanning =====
+
+class PmxSummary(NamedTuple):
+	"""
+	What is in a PMX file, as found by scan_pmx() without decoding the whole thing.
+	"""
+	path: str
+	file_size: int
+	ver: float
+	name_jp: str
+	name_en: str
+	# "utf_16_le" or "utf_8"
+	encoding: str
+	addl_vertex_vec4: int
+	# "vert", "tex", "mat", "bone", "morph", "rb" -> how many bytes each index of that kind takes
+	index_sizes: Dict[str, int]
+	# section name -> number of things in it, for "faces" that is triangles
+	counts: Dict[str, int]
+	# "header" or section name -> how many bytes of the file it takes
+	section_bytes: Dict[str, int]
+	textures: List[str]
+	# WeightMode -> number of vertices that use it
+	weight_modes: Dict[pmxstruct.WeightMode, int]
+
+
+def scan_pmx(pmx_filename: str) -> PmxSummary:
+	"""
+	Find out the basics of a PMX file without parsing it: the header, how many of each thing it has, how big each
+	section is, the texture list, and which weight modes the vertices use. Only the header & texture names are
+	actually decoded, everything else is skimmed over the same way a lazy read does, so this is much faster than
+	read_pmx(). Prints nothing unless the file looks wrong.
+
+	:param pmx_filename: PMX file path, as a string, relative from CWD or absolute
+	:return: PmxSummary
+	"""
+	codec = _PmxCodec()
+	codec.unpacker.check_nan_inf = "off"
+	raw = read_binfile_to_mmap(pmx_filename, quiet=True)
+	try:
+		with codec.active():
+			pack.reset_unpack()
+			header = parse_pmx_header(raw)
+			weight_counts = [0] * len(pmxstruct.WeightMode)
+			sections = _scan_pmx_sections(raw, header.ver, weight_counts=weight_counts)
+			pack.state().readfrom_byte = sections["textures"][0]
+			textures = parse_pmx_textures(raw)
+			encoding = pack.state().encoding
+		# each section runs until the next one begins, anything left over at the tail counts as part of the last one
+		names = list(sections)
+		ends = [sections[name][0] for name in names[1:]] + [len(raw)]
+		section_bytes = {"header": sections[names[0]][0]}
+		section_bytes.update((name, end - sections[name][0]) for name, end in zip(names, ends))
+		file_size = len(raw)
+	finally:
+		raw.close()
+	idx = {"vert": codec.idx_vert, "tex": codec.idx_tex, "mat": codec.idx_mat, "bone": codec.idx_bone,
+		   "morph": codec.idx_morph, "rb": codec.idx_rb}
+	return PmxSummary(path=pmx_filename,
+					  file_size=file_size,
+					  ver=header.ver,
+					  name_jp=header.name_jp,
+					  name_en=header.name_en,
+					  encoding=encoding,
+					  addl_vertex_vec4=codec.addl_vertex_vec4,
+					  index_sizes={k: struct.calcsize(v) for k, v in idx.items()},
+					  counts={name: count for name, (pos, count) in sections.items()},
+					  section_bytes=section_bytes,
+					  textures=textures,
+					  weight_modes={mode: weight_counts[mode.value] for mode in pmxstruct.WeightMode})
+
+
+def _scan_pmx_or_error(pmx_filename: str) -> Tuple[str, Optional[PmxSummary], Optional[str]]:
+	# run in the worker processes of scan_pmx_dir(), a broken file shouldn't stop the rest from being scanned
+	try:
+		return pmx_filename, scan_pmx(pmx_filename), None
+	except Exception as e:
+		return pmx_filename, None, "%s: %s" % (type(e).__name__, e)
+
+
+def scan_pmx_dir(directory: str, recursive=True, workers: Optional[int] = None) -> Dict[str, Optional[PmxSummary]]:
+	"""
+	scan_pmx() every PMX file in a folder, spread over several processes. Files that can't be scanned get a warning
+	printed and None in the result, instead of stopping the whole thing.
+
+	:param directory: folder to look in
+	:param recursive: if true, also look in every subfolder
+	:param workers: number of worker processes, default is one per CPU. if 1, scan everything in this process instead.
+	:return: dict of absolute file path -> PmxSummary or None, sorted by path
+	"""
+	if not os.path.isdir(directory):
+		raise RuntimeError("ERROR: attempt to scan folder '%s', but it does not exist! (or exists but is not a folder)" % directory)
+	paths = []
+	for root, dirs, files in os.walk(os.path.abspath(directory)):
+		paths.extend(os.path.join(root, f) for f in files if f.lower().endswith(".pmx"))
+		if not recursive:
+			break
+	paths.sort()
+	if workers is None:
+		workers = os.cpu_count() or 1
+	workers = max(1, min(workers, len(paths)))
+	if workers == 1:
+		retme = _collect_scans(map(_scan_pmx_or_error, paths))
+	else:
+		# each file only takes a few milliseconds, so hand them out in batches to keep the overhead down
+		chunksize = max(1, min(64, len(paths) // (workers * 4)))
+		with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as ex:
+			retme = _collect_scans(ex.map(_scan_pmx_or_error, paths, chunksize=chunksize))
+	return retme
+
+
+def _collect_scans(results: Iterator[Tuple[str, Optional[PmxSummary], Optional[str]]]) -> Dict[str, Optional[PmxSummary]]:
+	retme = {}
+	for path, summary, error in results:
+		if error is not None:
+			MY_PRINT_FUNC("Warning: failed to scan '%s': %s" % (path, error))
+		retme[path] = summary
+	return retme
 
 
 # ===== Testing Function =====
@@ -1351,6 +3086,8 @@ def test():
 	MY_PRINT_FUNC("TIMING TEST:")
 
 	readtime = []
+	readtime_old = []
+	readtime_np = []
 	writetime = []
 
 	for i in range(10):
@@ -1360,6 +3097,21 @@ def test():
 		end = time.time()
 		readtime.append(end - start)
 
+	for i in range(10):
+		MY_PRINT_FUNC(i)
+		start = time.time()
+		_ = read_pmx(input_filename, precompiled=False)
+		end = time.time()
+		readtime_old.append(end - start)
+
+	if np is not None:
+		for i in range(10):
+			MY_PRINT_FUNC(i)
+			start = time.time()
+			_ = read_pmx(input_filename, use_numpy=True)
+			end = time.time()
+			readtime_np.append(end - start)
+
 	for i in range(10):
 		MY_PRINT_FUNC(i)
 		start = time.time()
@@ -1367,11 +3119,48 @@ def test():
 		end = time.time()
 		writetime.append(end - start)
 
+	# where does the time go: each section, read & write, profiled a few times
+	prof = SectionProfiler()
+	for i in range(3):
+		_ = read_pmx(input_filename, progress=prof)
+		write_pmx(TEMPNAME, Z, progress=prof)
+
+	# decode every name & path in the model over and over, the old way vs the fast way with the string cache
+	names = [Z.header.name_jp, Z.header.name_en, Z.header.comment_jp, Z.header.comment_en]
+	names += [m.tex_path for m in Z.materials] + [m.toon_path for m in Z.materials] + [m.sph_path for m in Z.materials]
+	for things in (Z.materials, Z.bones, Z.morphs, Z.frames, Z.rigidbodies, Z.joints, Z.softbodies):
+		for thing in things:
+			names += [thing.name_jp, thing.name_en]
+	pack.set_encoding("utf_16_le")
+	namebytes = b"".join(bytes(pack.my_string_pack(s)) for s in names) * 10
+	stringtime = []
+	stringtime_old = []
+	for fast, times in ((True, stringtime), (False, stringtime_old)):
+		for i in range(10):
+			pack.reset_unpack()
+			start = time.time()
+			while pack.state().readfrom_byte < len(namebytes):
+				pack.my_string_unpack(namebytes, fast=fast)
+			end = time.time()
+			times.append(end - start)
+
 	MY_PRINT_FUNC("TIMING TEST RESULTS:", input_filename)
 	MY_PRINT_FUNC("READ")
 	MY_PRINT_FUNC("Avg = %f, min = %f, max = %f" % (sum(readtime)/len(readtime), min(readtime), max(readtime)))
+	MY_PRINT_FUNC("READ (not precompiled)")
+	MY_PRINT_FUNC("Avg = %f, min = %f, max = %f" % (sum(readtime_old)/len(readtime_old), min(readtime_old), max(readtime_old)))
+	MY_PRINT_FUNC("Speedup from precompiling = %.2fx" % (sum(readtime_old) / sum(readtime)))
+	if readtime_np:
+		MY_PRINT_FUNC("READ (numpy)")
+		MY_PRINT_FUNC("Avg = %f, min = %f, max = %f" % (sum(readtime_np)/len(readtime_np), min(readtime_np), max(readtime_np)))
+		MY_PRINT_FUNC("Speedup from numpy = %.2fx" % (sum(readtime) / sum(readtime_np)))
+	MY_PRINT_FUNC("STRINGS (%d names & paths, x10)" % len(names))
+	MY_PRINT_FUNC("Avg = %f, min = %f, max = %f" % (sum(stringtime)/len(stringtime), min(stringtime), max(stringtime)))
+	MY_PRINT_FUNC("Speedup from the string cache = %.2fx" % (sum(stringtime_old) / sum(stringtime)))
 	MY_PRINT_FUNC("WRITE")
 	MY_PRINT_FUNC("Avg = %f, min = %f, max = %f" % (sum(writetime)/len(writetime), min(writetime), max(writetime)))
+	MY_PRINT_FUNC("Throughput = %s/sec" % prettyprint_file_size(int(len(bb2) * len(writetime) / sum(writetime))))
+	prof.print_summary()
 	MY_PRINT_FUNC("")
 	MY_PRINT_FUNC("Is the binary EXACTLY identical to original?", bb == bb2)
 
@@ -0,0 +1,376 @@
+"""
+Find NaN and INF floats in a PMX model and replace them with real numbers, used by read_pmx(sanitize=...).
+
+This used to happen inside every packer.my_unpack() call, one value at a time, with a warning printed for each one.
+Now it is a separate pass over a whole section at a time: every float field of the section is gathered and summed in
+one go with builtins that run in C (any NaN or INF makes the sum non-finite), so a clean section costs a few sum()
+calls. Only when a sum comes out non-finite are those values walked one at a time to find exactly where the bad ones
+are. The columns of a columnar table are checked with numpy.isfinite() if numpy is installed.
+read_pmx() doesn't even need that much: while decoding, the unpackers only flag that they saw a NaN or INF (the numpy
+decoders check the whole array at once), and only the sections that were flagged get the pass.
+Everything found is collected into a SanitizeReport instead of being printed in the middle of the parsing.
+Since the pass runs on the decoded model, values that the parser converts (angles that are stored as radians, bone
+morph rotations that are stored as quaternions) are checked after the conversion.
+
+"fix" replaces NaN with 0.0 and INF with +/- 999999.0, same as before, and reports what it replaced.
+"report" only reports them and leaves the values alone.
+"off" skips the pass entirely, for trusted inputs.
+"""
+
+from .core import MY_PRINT_FUNC
+from . import pmx_struct as pmxstruct
+from .pmx_columnar import RecordTable
+
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Sequence, Tuple
+from operator import attrgetter
+from itertools import chain
+import math
+
+# numpy is optional, it only makes the checks on the columnar tables faster
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+
+__all__ = ['SANITIZE_MODES', 'SanitizeIssue', 'SanitizeReport', 'sanitize_pmx', 'sanitize_section']
+
+SANITIZE_MODES = ("fix", "report", "off")
+
+# for each kind of object, which fields can hold floats, and how deeply the floats are nested in that field:
+# 0 = a float, 1 = a list of floats, 2 = a list of lists of floats, None = anything else (walked one at a time)
+_FloatFields = Tuple[Tuple[str, int], ...]
+
+_SECTION_FLOAT_FIELDS: Dict[str, _FloatFields] = {
+	"verts": (("pos", 1), ("norm", 1), ("uv", 1), ("edgescale", 0), ("weight", 2), ("weight_sdef", 2),
+			  ("addl_vec4s", 2)),
+	"materials": (("diffRGB", 1), ("specRGB", 1), ("ambRGB", 1), ("alpha", 0), ("specpower", 0), ("edgeRGB", 1),
+				  ("edgealpha", 0), ("edgesize", 0)),
+	# the tail is either a bone index or a vec3, the IK links are objects
+	"bones": (("pos", 1), ("tail", None), ("inherit_ratio", 0), ("fixedaxis", 1), ("localaxis_x", 1),
+			  ("localaxis_z", 1), ("ik_angle", 0), ("ik_links", None)),
+	"frames": (),
+	"rigidbodies": (("pos", 1), ("rot", 1), ("size", 1), ("phys_mass", 0), ("phys_move_damp", 0),
+					("phys_rot_damp", 0), ("phys_repel", 0), ("phys_friction", 0)),
+	"joints": (("pos", 1), ("rot", 1), ("movemin", 1), ("movemax", 1), ("movespring", 1), ("rotmin", 1),
+			   ("rotmax", 1), ("rotspring", 1)),
+	"softbodies": tuple((name, 0) for name in ("b_link_create_dist", "total_mass", "collision_margin", "vcf", "dp",
+												"dg", "lf", "pr", "vc", "df", "mt", "rch", "kch", "sch", "ah",
+												"srhr_cl", "skhr_cl", "sshr_cl", "sr_splt_cl", "sk_splt_cl",
+												"ss_splt_cl")),
+}
+
+# same thing for the objects that live inside other objects: IK links and morph items
+_NESTED_FLOAT_FIELDS: Dict[type, _FloatFields] = {
+	pmxstruct.PmxBoneIkLink: (("limit_min", 1), ("limit_max", 1)),
+	pmxstruct.PmxMorphItemGroup: (("value", 0),),
+	pmxstruct.PmxMorphItemFlip: (("value", 0),),
+	pmxstruct.PmxMorphItemVertex: (("move", 1),),
+	pmxstruct.PmxMorphItemUV: (("move", 1),),
+	pmxstruct.PmxMorphItemBone: (("move", 1), ("rot", 1)),
+	pmxstruct.PmxMorphItemImpulse: (("move", 1), ("rot", 1)),
+	pmxstruct.PmxMorphItemMaterial: (("diffRGB", 1), ("specRGB", 1), ("ambRGB", 1), ("alpha", 0), ("specpower", 0),
+									 ("edgeRGB", 1), ("edgealpha", 0), ("edgesize", 0), ("texRGBA", 1),
+									 ("sphRGBA", 1), ("toonRGBA", 1)),
+}
+
+# the order sections appear in the file, which is the order they are checked & reported
+_SECTION_ORDER = ("verts", "materials", "bones", "morphs", "frames", "rigidbodies", "joints", "softbodies")
+
+
+# ===== Report =====
+
+class SanitizeIssue(NamedTuple):
+	section: str    # "verts", "bones", "morphs", etc
+	index: int      # index of the vertex/bone/morph/etc within its section
+	field: str      # where inside that thing, like "pos[1]" or "items[12].move[0]"
+	value: float    # the original NaN or INF value
+
+
+class SanitizeReport:
+	"""
+	Every NaN or INF float found by sanitize_pmx(), in the order they were found.
+	Acts like a list of SanitizeIssue. An empty report is falsy.
+	"""
+	def __init__(self, mode="fix"):
+		"""
+		:param mode: the mode the pass was run with, "fix" means every issue in here was replaced in the model
+		"""
+		self.mode = mode
+		self.issues: List[SanitizeIssue] = []
+
+	def __len__(self) -> int:
+		return len(self.issues)
+
+	def __iter__(self) -> Iterator[SanitizeIssue]:
+		return iter(self.issues)
+
+	def __getitem__(self, idx):
+		return self.issues[idx]
+
+	def __repr__(self) -> str:
+		return "SanitizeReport(mode=%r, issues=%d)" % (self.mode, len(self.issues))
+
+	def counts(self) -> Dict[str, int]:
+		"""
+		:return: dict of section name -> how many bad floats were found in that section
+		"""
+		retme = {}
+		for issue in self.issues:
+			retme[issue.section] = retme.get(issue.section, 0) + 1
+		return retme
+
+	def print_summary(self, limit=20, start=0) -> None:
+		"""
+		Print what was found, if anything: one line per bad float, up to the limit, then a count of the rest.
+
+		:param limit: max number of issues to print individually
+		:param start: only print issues from this index onward, to print just what one section added
+		"""
+		issues = self.issues[start:]
+		if not issues:
+			return
+		for issue in issues[:limit]:
+			if self.mode == "fix":
+				action = "replaced with %s" % _replacement(issue.value)
+			else:
+				action = "left as-is"
+			MY_PRINT_FUNC("Warning: found %s in %s #%d %s, %s" % (
+				"NaN" if math.isnan(issue.value) else "INF", issue.section, issue.index, issue.field, action))
+		if len(issues) > limit:
+			MY_PRINT_FUNC("Warning: ...and %d more NaN/INF floats" % (len(issues) - limit))
+
+
+# ===== Public =====
+
+def sanitize_pmx(pmx: pmxstruct.Pmx, mode="fix", report: SanitizeReport = None) -> SanitizeReport:
+	"""
+	Find every NaN or INF float in a Pmx object (or ColumnarPmx, or PmxLazy) and, in "fix" mode, replace it in-place.
+	read_pmx() already does this, use this for models that were built or changed in memory.
+	Sections of a PmxLazy that were never decoded are skipped, read_pmx() sanitizes those as they get decoded.
+
+	:param pmx: Pmx object
+	:param mode: "fix", "report", or "off"
+	:param report: optional existing SanitizeReport to add to, otherwise a new one is made
+	:return: SanitizeReport of everything found
+	"""
+	if mode not in SANITIZE_MODES:
+		raise RuntimeError("unknown sanitize mode '%s', must be one of %s" % (mode, SANITIZE_MODES))
+	if report is None:
+		report = SanitizeReport(mode)
+	if mode == "off":
+		return report
+	is_loaded = getattr(pmx, "is_loaded", None)
+	for name in _SECTION_ORDER:
+		if is_loaded is None or is_loaded(name):
+			sanitize_section(name, getattr(pmx, name), mode, report)
+	return report
+
+
+def sanitize_section(name: str, things: Sequence, mode="fix", report: SanitizeReport = None) -> SanitizeReport:
+	"""
+	Same as sanitize_pmx() but for just one section.
+
+	:param name: section name, same as the attribute name: "verts", "bones", "morphs", etc
+	:param things: the contents of that section, a list or a columnar table
+	:param mode: "fix", "report", or "off"
+	:param report: optional existing SanitizeReport to add to, otherwise a new one is made
+	:return: SanitizeReport of everything found
+	"""
+	if report is None:
+		report = SanitizeReport(mode)
+	if mode == "off" or name == "faces":
+		return report
+	fix = (mode == "fix")
+	if name == "morphs":
+		_sanitize_morphs(things, fix, report)
+	elif isinstance(things, RecordTable):
+		_sanitize_table(name, 0, "", things, fix, report)
+	else:
+		start = len(report)
+		_sanitize_objects(name, 0, "", things, _SECTION_FLOAT_FIELDS[name], fix, report)
+		if name == "verts" and len(report) != start:
+			_fix_derived_weights(things, fix, report, start)
+	return report
+
+
+# ===== Helpers =====
+
+def _replacement(value: float) -> float:
+	if math.isnan(value):
+		return 0.0
+	return 999999.0 if value > 0 else -999999.0
+
+
+def _floats_finite(values: Iterable, depth: int) -> bool:
+	"""
+	Bulk check that every float in a field is finite, for one field gathered from every object of a section.
+	None is allowed, for the optional fields. Anything unusual, like a field that isn't nested the usual way, makes
+	it return False so the caller walks the values one at a time instead, which is always correct.
+
+	:param values: that field of every object
+	:param depth: how deeply the floats are nested, see _SECTION_FLOAT_FIELDS
+	:return: True if every float is finite
+	"""
+	if depth is None:
+		return False
+	# filter(None) drops the Nones, and also zeros & empty lists which can't be a problem anyway
+	values = filter(None, values)
+	try:
+		if depth == 0:
+			total = sum(values)
+		elif depth == 1:
+			total = sum(map(sum, values))
+		else:
+			total = sum(map(sum, chain.from_iterable(values)))
+	except TypeError:
+		return False
+	# the sum is only finite if every value is: NaN & INF both carry through, and float32 values can't overflow a double
+	return math.isfinite(total)
+
+
+def _walk(value, path: str, found: list, fix: bool):
+	"""
+	Look through one value for NaN & INF floats, however it is nested, and append (path, bad value) for each one.
+	If fix, lists are fixed in-place, and the fixed value is returned, otherwise the same value is returned.
+	"""
+	if isinstance(value, float):
+		if math.isfinite(value):
+			return value
+		found.append((path, value))
+		return _replacement(value) if fix else value
+	if isinstance(value, list):
+		for k, v in enumerate(value):
+			new = _walk(v, "%s[%d]" % (path, k), found, fix)
+			if new is not v:
+				value[k] = new
+		return value
+	if isinstance(value, tuple):
+		new = tuple(_walk(v, "%s[%d]" % (path, k), found, fix) for k, v in enumerate(value))
+		return new if fix else value
+	fields = _nested_fields(value)
+	if fields:
+		_walk_object(value, path + ".", fields, found, fix)
+	return value
+
+
+def _walk_object(obj, prefix: str, fields: _FloatFields, found: list, fix: bool) -> None:
+	for name, _ in fields:
+		v = getattr(obj, name)
+		new = _walk(v, prefix + name, found, fix)
+		if new is not v:
+			setattr(obj, name, new)
+
+
+def _nested_fields(obj) -> _FloatFields:
+	# look up by class, including subclasses like the columnar views
+	for cls in type(obj).__mro__:
+		fields = _NESTED_FLOAT_FIELDS.get(cls)
+		if fields is not None:
+			return fields
+	return ()
+
+
+def _sanitize_objects(section: str, index: int, prefix: str, things: Sequence, fields: _FloatFields, fix: bool,
+					  report: SanitizeReport) -> None:
+	"""
+	Check one field at a time across every object in the list, and only walk the objects one by one for a field that
+	fails the bulk check.
+
+	:param section: section name for the report
+	:param index: if prefix is given, every issue goes under this index instead of the index within "things"
+	:param prefix: if given, "things" is a list inside one object, like the items of one morph
+	:param things: list of objects
+	:param fields: the float fields of those objects
+	:param fix: replace what is found
+	:param report: where to add what is found
+	"""
+	for name, depth in fields:
+		if _floats_finite(map(attrgetter(name), things), depth):
+			continue
+		for d, thing in enumerate(things):
+			found = []
+			_walk_object(thing, "%s[%d]." % (prefix, d) if prefix else "", ((name, depth),), found, fix)
+			for where, value in found:
+				report.issues.append(SanitizeIssue(section, index if prefix else d, where, value))
+
+
+def _fix_derived_weights(verts: Sequence[pmxstruct.PmxVertex], fix: bool, report: SanitizeReport, start: int) -> None:
+	"""
+	BDEF2 and SDEF only store the weight of the 1st bone, the parser makes the 2nd weight by subtracting it from 1.0.
+	If the stored weight was bad, the made-up one is only bad because of it: it shouldn't be reported on its own, and
+	it should be made again from the replacement instead of also being replaced.
+	"""
+	derived = set()
+	for issue in report.issues[start:]:
+		if issue.field != "weight[0][1]":
+			continue
+		vert = verts[issue.index]
+		if vert.weighttype in (pmxstruct.WeightMode.BDEF2, pmxstruct.WeightMode.SDEF) and len(vert.weight) == 2:
+			derived.add(issue.index)
+			if fix:
+				vert.weight[1][1] = 1.0 - vert.weight[0][1]
+	report.issues[start:] = [issue for issue in report.issues[start:]
+							 if not (issue.field == "weight[1][1]" and issue.index in derived)]
+
+
+def _sanitize_table(section: str, index: int, prefix: str, table: RecordTable, fix: bool,
+					report: SanitizeReport) -> None:
+	"""
+	Check every float column of a columnar table, plus any records that were touched through a view.
+
+	:param section: section name for the report
+	:param index: if prefix is given, every issue goes under this index instead of the record index
+	:param prefix: if given, the table is inside one object, like the items of one morph
+	:param table: RecordTable
+	:param fix: replace what is found
+	:param report: where to add what is found
+	"""
+	for k, (name, tc, width) in enumerate(zip(table._names, table._typecodes, table._widths)):
+		if tc != "f" or width == 0:
+			continue
+		bad = _bad_positions(table._columns[k])
+		if not bad:
+			continue
+		if fix:
+			# the column might be a read-only view into the file, so make sure it is a real array before writing
+			table._own_columns()
+		col = table._columns[k]
+		for pos in bad:
+			value = float(col[pos])
+			rec, comp = divmod(pos, width)
+			field = "%s[%d]" % (name, comp) if width > 1 else name
+			if prefix:
+				report.issues.append(SanitizeIssue(section, index, "%s[%d].%s" % (prefix, rec, field), value))
+			else:
+				report.issues.append(SanitizeIssue(section, rec, field, value))
+			if fix:
+				col[pos] = _replacement(value)
+	# records that were touched through a view are used instead of their rows, so check those too
+	for rec, obj in table._records.items():
+		fields = _SECTION_FLOAT_FIELDS["verts"] if section == "verts" and not prefix else _nested_fields(obj)
+		found = []
+		_walk_object(obj, "%s[%d]." % (prefix, rec) if prefix else "", fields, found, fix)
+		for where, value in found:
+			report.issues.append(SanitizeIssue(section, index if prefix else rec, where, value))
+
+
+def _bad_positions(col) -> List[int]:
+	# flat positions of every NaN or INF in one column
+	if len(col) == 0:
+		return []
+	if np is not None:
+		arr = np.frombuffer(col, dtype=np.float32) if not isinstance(col, np.ndarray) else col
+		return np.flatnonzero(~np.isfinite(arr)).tolist()
+	if math.isfinite(sum(col)):
+		return []
+	return [d for d, v in enumerate(col) if not math.isfinite(v)]
+
+
+def _sanitize_morphs(morphs: Sequence[pmxstruct.PmxMorph], fix: bool, report: SanitizeReport) -> None:
+	for d, morph in enumerate(morphs):
+		items = morph.items
+		if isinstance(items, RecordTable):
+			_sanitize_table("morphs", d, "items", items, fix, report)
+		elif items:
+			_sanitize_objects("morphs", d, "items", items, _nested_fields(items[0]), fix, report)
@@ -0,0 +1,119 @@
+"""
+Cheap backups of a model, taken before a risky edit so that it can be undone.
+
+    snap = PmxSnapshot(pmx)
+    v = snap.edit("verts", 12)          # a private copy of vertex 12, which is now what pmx.verts[12] holds
+    v.pos[1] += 1.0
+    snap.edit("morphs", 3).name_en = "smile"
+    pmx.bones.append(new_bone)          # adding, removing, & reordering the things in a section is always fine
+    if something_went_wrong:
+        snap.restore()                  # pmx is back to how it was when the snapshot was taken
+
+Taking a snapshot doesn't clone anything. It keeps its own copy of each section list, which is only a list of
+references to the same objects the model uses, so the objects are shared between the two. edit() is what makes one
+object private to the model: the first time an object is asked for it is replaced in the model by a clone
+(copy-on-write). The cost is one clone per object that actually changes, instead of a clone of the whole model.
+The one rule is to only change members of an object in place if it came from edit() or was created after the
+snapshot was taken, anything else would change the snapshot too.
+
+The vertex & face tables of a ColumnarPmx are so compact that the snapshot simply copies their buffers when it is
+taken. A morph's MorphItemTable belongs to the morph, and follows the same rule as any other member.
+"""
+
+from . import pmx_struct as pmxstruct
+from .pmx_columnar import ColumnarPmx, RecordTable, clone_morph
+
+from typing import Dict
+
+
+__all__ = ['PmxSnapshot']
+
+
+# every section of a Pmx, except the header
+SECTIONS = ("verts", "faces", "materials", "bones", "morphs", "frames", "rigidbodies", "joints", "softbodies")
+
+
+def _copy_section(things):
+	# the list is copied but not the objects in it, tables are copied completely
+	if isinstance(things, RecordTable):
+		return things.clone()
+	return list(things)
+
+
+def _clone(obj):
+	if isinstance(obj, pmxstruct.PmxMorph):
+		# keep a MorphItemTable as a table
+		return clone_morph(obj)
+	if isinstance(obj, pmxstruct._BasePmx):
+		return obj.clone()
+	# a face
+	return obj[:]
+
+
+class PmxSnapshot:
+	"""
+	The state of one model at the time this was created, see the top of this file.
+	"""
+
+	def __init__(self, pmx: pmxstruct.Pmx):
+		"""
+		:param pmx: model to take a snapshot of, a PmxLazy loads every section
+		"""
+		self.pmx = pmx
+		self._header = pmx.header
+		self._sections = {name: _copy_section(getattr(pmx, name)) for name in SECTIONS}
+		# id -> object, for every object that edit() cloned. only the model has these, so they can be edited freely
+		self._private: Dict[int, object] = {}
+
+	def edit(self, section: str, idx: int = None):
+		"""
+		Get an object of the model that is safe to change in place. The first time an object is asked for, the model's
+		copy is replaced by a clone, after that the same clone is just returned again.
+
+		:param section: "header", or the name of a section of the Pmx like "verts" or "morphs"
+		:param idx: index within the section, not used for "header"
+		:return: the object, which is now the one the model holds
+		"""
+		if section == "header":
+			if self.pmx.header is self._header:
+				self.pmx.header = self._header.clone()
+			return self.pmx.header
+		if section not in self._sections:
+			raise RuntimeError("unknown section '%s', choose from: header, %s" % (section, ", ".join(SECTIONS)))
+		things = getattr(self.pmx, section)
+		obj = things[idx]
+		if isinstance(things, RecordTable) or id(obj) in self._private:
+			# a table never shares anything with the snapshot
+			return obj
+		obj = _clone(obj)
+		things[idx] = obj
+		self._private[id(obj)] = obj
+		return obj
+
+	def changed(self) -> int:
+		"""
+		:return: how many objects edit() has cloned since the snapshot was taken or last restored
+		"""
+		return len(self._private)
+
+	def restore(self) -> None:
+		"""
+		Put the model back the way it was when the snapshot was taken. The snapshot stays as it is, so it can be
+		restored again later, and the model shares its objects with it again so keep using edit().
+		"""
+		self.pmx.header = self._header
+		for name, saved in self._sections.items():
+			setattr(self.pmx, name, _copy_section(saved))
+		self._private.clear()
+
+	def to_pmx(self) -> pmxstruct.Pmx:
+		"""
+		Make a separate copy of the model as it was when the snapshot was taken. This clones everything.
+
+		:return: a ColumnarPmx if the model is one, otherwise a normal Pmx
+		"""
+		cls = ColumnarPmx if isinstance(self.pmx, ColumnarPmx) else pmxstruct.Pmx
+		saved = self._sections
+		return cls(header=self._header, verts=saved["verts"], faces=saved["faces"], mats=saved["materials"],
+				   bones=saved["bones"], morphs=saved["morphs"], frames=saved["frames"], rbodies=saved["rigidbodies"],
+				   joints=saved["joints"], sbodies=saved["softbodies"]).clone()
@@ -1,6 +1,6 @@
-from .core import MY_PRINT_FUNC, pause_and_quit
+from .core import MY_PRINT_FUNC, pause_and_quit, gc_paused
 
-from typing import Union, List, Set
+from typing import Union, List, Set, Sequence
 import traceback
 import copy
 import enum
@@ -11,7 +11,8 @@ import sys
 __all__ = ['JointType', 'MaterialFlags', 'MorphPanel', 'MorphType', 'Pmx', 'PmxBone', 'PmxBoneIkLink', 'PmxFrame',
 		   'PmxFrameItem', 'PmxHeader', 'PmxJoint', 'PmxMaterial', 'PmxMorph', 'PmxMorphItemBone', 'PmxMorphItemFlip',
 		   'PmxMorphItemGroup', 'PmxMorphItemImpulse', 'PmxMorphItemMaterial', 'PmxMorphItemUV', 'PmxMorphItemVertex',
-		   'PmxRigidBody', 'PmxSoftBody', 'PmxVertex', 'RigidBodyPhysMode', 'RigidBodyShape', 'SphMode', 'WeightMode']
+		   'PmxRigidBody', 'PmxSoftBody', 'PmxVertex', 'RigidBodyPhysMode', 'RigidBodyShape', 'SphMode', 'WeightMode',
+		   'clone_faces', 'clone_list']
 
 
 # ===== IMPORTANT NOTES =====
@@ -34,10 +35,21 @@ class _BasePmx(abc.ABC):
 	This lets them all get the __str__ method and forces them all to implement list() and makes isinstance(x, _BasePmx) possible
 	This also defines an "==" method so my structs can be compared
 	This also defines "idx_within" so if you forget the idx of a thing but still have its reference you can find its index again
+
+	Every subclass except Pmx lists its members in __slots__, so the objects have no per-instance __dict__. A big model
+	has millions of these, and that makes them much smaller and a bit faster to create. The downside is that new
+	attributes can't be added to them, only the ones each class defines.
 	"""
+	__slots__ = ()
 
 	def copy(self):
 		""" Return a separate copy of the object. """
+		return self.clone()
+
+	def clone(self):
+		""" Return a separate copy of the object, same as copy(). Each class overrides this with a version that knows
+		exactly which of its members are lists that need copying, which is many times faster than copy.deepcopy().
+		The default is just copy.deepcopy(). """
 		return copy.deepcopy(self)
 
 	@abc.abstractmethod
@@ -94,8 +106,12 @@ class _BasePmx(abc.ABC):
 	def __str__(self) -> str: return str(self.list())
 
 	def __eq__(self, other) -> bool:
+		if self is other: return True
 		if type(self) != type(other): return False
-		return self.list() == other.list()
+		# member by member, so the first difference ends it without building the whole list() of both
+		for name in self.__slots__:
+			if getattr(self, name) != getattr(other, name): return False
+		return True
 
 	def idx_within(self, L: List) -> Union[int, None]:
 		"""
@@ -118,6 +134,29 @@ def is_good_vector(length:int, thing) -> True:
 		   and all(isinstance(a, (int,float)) for a in thing) # and all(float("-inf") < a < float("inf") for a in thing)
 
 
+def clone_list(things: Sequence[_BasePmx]) -> list:
+	"""
+	Clone every object in a section or sub-list, e.g. "clone_list(pmx.bones)" or "clone_list(morph.items)".
+	:param things: list (or any sequence) of PMX objects
+	:return: new list of new objects
+	"""
+	return [t.clone() for t in things]
+
+
+def clone_faces(faces: Sequence[Sequence[int]]) -> List[List[int]]:
+	"""
+	Clone the faces section, or any other list of faces.
+	:param faces: list (or any sequence) of faces, each is a list of 3 vertex indices
+	:return: new list of new lists
+	"""
+	return [f[:] for f in faces]
+
+
+def _clone_vector(thing):
+	# for the optional vectors that can be None
+	return None if thing is None else thing[:]
+
+
 def is_good_flag(thing) -> True:
 	""" Used in the "validate" member of each class for code reuse... returns a bool so if an assertion fails, it
 	will point at the check for "is_good_vector" of a specific member of a specific object class, instead of pointing
@@ -126,6 +165,8 @@ def is_good_flag(thing) -> True:
 
 
 class _BasePmxMorphItem(_BasePmx):
+	__slots__ = ()
+
 	@abc.abstractmethod
 	def list(self) -> list: pass
 
@@ -266,6 +307,7 @@ class MaterialFlags(enum.Flag):
 
 
 class PmxHeader(_BasePmx):
+	__slots__ = ("ver", "name_jp", "name_en", "comment_jp", "comment_en")
 	# [ver, name_jp, name_en, comment_jp, comment_en]
 	def __init__(self,
 				 ver: float,
@@ -282,6 +324,9 @@ class PmxHeader(_BasePmx):
 	def list(self):
 		return [self.ver, self.name_jp, self.name_en, self.comment_jp, self.comment_en]
 
+	def clone(self) -> 'PmxHeader':
+		return PmxHeader(self.ver, self.name_jp, self.name_en, self.comment_jp, self.comment_en)
+
 	def _validate(self, parentlist=None):
 		""" This performs type-checking and input validation on the item, as a way to protect against bad code
 		assigning invalid values or incorrect datatypes into my structures. If it fails it will raise an Exception
@@ -296,6 +341,7 @@ class PmxHeader(_BasePmx):
 
 
 class PmxVertex(_BasePmx):
+	__slots__ = ("pos", "norm", "uv", "edgescale", "weighttype", "weight", "weight_sdef", "addl_vec4s")
 	# note: this block is the order of args in the old system, does not represent order of args in .list() member
 	# [posX, posY, posZ, normX, normY, normZ, u, v, addl_vec4s, weighttype, weights, edgescale]
 	def __init__(self,
@@ -327,6 +373,12 @@ class PmxVertex(_BasePmx):
 		return [self.pos, self.norm, self.uv, self.edgescale,
 				self.weighttype, self.weight, self.weight_sdef, self.addl_vec4s]
 
+	def clone(self) -> 'PmxVertex':
+		return PmxVertex(self.pos[:], self.norm[:], self.uv[:], self.edgescale, self.weighttype,
+						 [pair[:] for pair in self.weight],
+						 None if self.weight_sdef is None else [rc[:] for rc in self.weight_sdef],
+						 None if self.addl_vec4s is None else [vec4[:] for vec4 in self.addl_vec4s])
+
 	def _validate(self, parentlist=None):
 		""" This performs type-checking and input validation on the item, as a way to protect against bad code
 		assigning invalid values or incorrect datatypes into my structures. If it fails it will raise an Exception
@@ -376,6 +428,8 @@ class PmxVertex(_BasePmx):
 
 
 class PmxMaterial(_BasePmx):
+	__slots__ = ("name_jp", "name_en", "diffRGB", "specRGB", "ambRGB", "alpha", "specpower", "edgeRGB", "edgealpha",
+				 "edgesize", "tex_path", "toon_path", "sph_path", "sph_mode", "comment", "faces_ct", "matflags")
 	def __init__(self, name_jp: str, name_en: str, diffRGB: List[float], specRGB: List[float], ambRGB: List[float],
 				 alpha: float, specpower: float, edgeRGB: List[float], edgealpha: float, edgesize: float, tex_path: str,
 				 toon_path: str, sph_path: str, sph_mode: SphMode, comment: str, faces_ct: int,
@@ -407,6 +461,11 @@ class PmxMaterial(_BasePmx):
 				self.comment, self.faces_ct, self.matflags,
 				]
 
+	def clone(self) -> 'PmxMaterial':
+		return PmxMaterial(self.name_jp, self.name_en, self.diffRGB[:], self.specRGB[:], self.ambRGB[:], self.alpha,
+						   self.specpower, self.edgeRGB[:], self.edgealpha, self.edgesize, self.tex_path,
+						   self.toon_path, self.sph_path, self.sph_mode, self.comment, self.faces_ct, self.matflags)
+
 	def _validate(self, parentlist=None):
 		""" This performs type-checking and input validation on the item, as a way to protect against bad code
 		assigning invalid values or incorrect datatypes into my structures. If it fails it will raise an Exception
@@ -448,6 +507,7 @@ class PmxMaterial(_BasePmx):
 
 
 class PmxBoneIkLink(_BasePmx):
+	__slots__ = ("idx", "limit_min", "limit_max")
 	# NOTE: to represent "no limits", the min and max should be None or omitted
 	def __init__(self,
 				 idx: int,
@@ -464,6 +524,9 @@ class PmxBoneIkLink(_BasePmx):
 	def list(self) -> list:
 		return [self.idx, self.limit_min, self.limit_max]
 
+	def clone(self) -> 'PmxBoneIkLink':
+		return PmxBoneIkLink(self.idx, _clone_vector(self.limit_min), _clone_vector(self.limit_max))
+
 	def _validate(self, parentlist=None):
 		""" This performs type-checking and input validation on the item, as a way to protect against bad code
 		assigning invalid values or incorrect datatypes into my structures. If it fails it will raise an Exception
@@ -477,6 +540,11 @@ class PmxBoneIkLink(_BasePmx):
 
 
 class PmxBone(_BasePmx):
+	__slots__ = ("name_jp", "name_en", "pos", "parent_idx", "deform_layer", "deform_after_phys", "has_rotate",
+				 "has_translate", "has_visible", "has_enabled", "tail_usebonelink", "tail", "inherit_rot",
+				 "inherit_trans", "inherit_parent_idx", "inherit_ratio", "has_fixedaxis", "fixedaxis", "has_localaxis",
+				 "localaxis_x", "localaxis_z", "has_externalparent", "externalparent", "has_ik", "ik_target_idx",
+				 "ik_numloops", "ik_angle", "ik_links")
 	# note: this block is the order of args in the old system, does not represent order of args in .list() member
 	# thisbone = [name_jp, name_en, posX, posY, posZ, parent_idx, deform_layer, deform_after_phys,  # 0-7
 	# 			rotateable, translateable, visible, enabled,  # 8-11
@@ -560,6 +628,18 @@ class PmxBone(_BasePmx):
 				None if self.ik_links is None else [i.list() for i in self.ik_links],
 				]
 
+	def clone(self) -> 'PmxBone':
+		return PmxBone(self.name_jp, self.name_en, self.pos[:], self.parent_idx, self.deform_layer,
+					   self.deform_after_phys, self.has_rotate, self.has_translate, self.has_visible, self.has_enabled,
+					   self.has_ik, self.tail_usebonelink,
+					   # tail is either int or vec3
+					   self.tail[:] if isinstance(self.tail, (list,tuple)) else self.tail,
+					   self.inherit_rot, self.inherit_trans, self.has_fixedaxis, self.has_localaxis,
+					   self.has_externalparent, self.inherit_parent_idx, self.inherit_ratio,
+					   _clone_vector(self.fixedaxis), _clone_vector(self.localaxis_x), _clone_vector(self.localaxis_z),
+					   self.externalparent, self.ik_target_idx, self.ik_numloops, self.ik_angle,
+					   None if self.ik_links is None else [link.clone() for link in self.ik_links])
+
 	def _validate(self, parentlist=None):
 		""" This performs type-checking and input validation on the item, as a way to protect against bad code
 		assigning invalid values or incorrect datatypes into my structures. If it fails it will raise an Exception
@@ -635,11 +715,14 @@ class PmxBone(_BasePmx):
 
 
 class PmxMorphItemGroup(_BasePmxMorphItem):
+	__slots__ = ("morph_idx", "value")
 	def __init__(self, morph_idx: int, value: float):
 		self.morph_idx = morph_idx
 		self.value = value
 	def list(self) -> list:
 		return [self.morph_idx, self.value]
+	def clone(self) -> 'PmxMorphItemGroup':
+		return PmxMorphItemGroup(self.morph_idx, self.value)
 	def _validate(self, parentlist=None):
 		# morph_idx: must be int
 		assert isinstance(self.morph_idx, int)
@@ -648,11 +731,14 @@ class PmxMorphItemGroup(_BasePmxMorphItem):
 
 
 class PmxMorphItemVertex(_BasePmxMorphItem):
+	__slots__ = ("vert_idx", "move")
 	def __init__(self, vert_idx: int, move: List[float]):
 		self.vert_idx = vert_idx
 		self.move = move
 	def list(self) -> list:
 		return [self.vert_idx, self.move]
+	def clone(self) -> 'PmxMorphItemVertex':
+		return PmxMorphItemVertex(self.vert_idx, self.move[:])
 	def _validate(self, parentlist=None):
 		# vert_idx: must be int
 		assert isinstance(self.vert_idx, int)
@@ -661,12 +747,15 @@ class PmxMorphItemVertex(_BasePmxMorphItem):
 
 
 class PmxMorphItemBone(_BasePmxMorphItem):
+	__slots__ = ("bone_idx", "move", "rot")
 	def __init__(self, bone_idx: int, move: List[float], rot: List[float]):
 		self.bone_idx = bone_idx
 		self.move = move
 		self.rot = rot
 	def list(self) -> list:
 		return [self.bone_idx, self.move, self.rot]
+	def clone(self) -> 'PmxMorphItemBone':
+		return PmxMorphItemBone(self.bone_idx, self.move[:], self.rot[:])
 	def _validate(self, parentlist=None):
 		# bone_idx: must be int
 		assert isinstance(self.bone_idx, int)
@@ -677,11 +766,14 @@ class PmxMorphItemBone(_BasePmxMorphItem):
 
 
 class PmxMorphItemUV(_BasePmxMorphItem):
+	__slots__ = ("vert_idx", "move")
 	def __init__(self, vert_idx: int, move: List[float]):
 		self.vert_idx = vert_idx
 		self.move = move
 	def list(self) -> list:
 		return [self.vert_idx, self.move]
+	def clone(self) -> 'PmxMorphItemUV':
+		return PmxMorphItemUV(self.vert_idx, self.move[:])
 	def _validate(self, parentlist=None):
 		# vert_idx: must be int
 		assert isinstance(self.vert_idx, int)
@@ -692,6 +784,8 @@ class PmxMorphItemUV(_BasePmxMorphItem):
 
 
 class PmxMorphItemMaterial(_BasePmxMorphItem):
+	__slots__ = ("mat_idx", "is_add", "diffRGB", "specRGB", "ambRGB", "alpha", "specpower", "edgeRGB", "edgealpha",
+				 "edgesize", "texRGBA", "sphRGBA", "toonRGBA")
 	def __init__(self, mat_idx: int, is_add: int,
 				 diffRGB: List[float],
 				 specRGB: List[float],
@@ -731,6 +825,11 @@ class PmxMorphItemMaterial(_BasePmxMorphItem):
 				self.texRGBA, self.sphRGBA, self.toonRGBA,
 				]
 
+	def clone(self) -> 'PmxMorphItemMaterial':
+		return PmxMorphItemMaterial(self.mat_idx, self.is_add, self.diffRGB[:], self.specRGB[:], self.ambRGB[:],
+									self.alpha, self.specpower, self.edgeRGB[:], self.edgealpha, self.edgesize,
+									self.texRGBA[:], self.sphRGBA[:], self.toonRGBA[:])
+
 	def _validate(self, parentlist=None):
 		# mat_idx: must be int
 		assert isinstance(self.mat_idx, int)
@@ -761,11 +860,14 @@ class PmxMorphItemMaterial(_BasePmxMorphItem):
 
 
 class PmxMorphItemFlip(_BasePmxMorphItem):
+	__slots__ = ("morph_idx", "value")
 	def __init__(self, morph_idx: int, value: float):
 		self.morph_idx = morph_idx
 		self.value = value
 	def list(self) -> list:
 		return [self.morph_idx, self.value]
+	def clone(self) -> 'PmxMorphItemFlip':
+		return PmxMorphItemFlip(self.morph_idx, self.value)
 	def _validate(self, parentlist=None):
 		# morph_idx: must be int
 		assert isinstance(self.morph_idx, int)
@@ -774,6 +876,7 @@ class PmxMorphItemFlip(_BasePmxMorphItem):
 
 
 class PmxMorphItemImpulse(_BasePmxMorphItem):
+	__slots__ = ("rb_idx", "is_local", "move", "rot")
 	def __init__(self, rb_idx: int, is_local: bool, move: List[float], rot: List[float]):
 		self.rb_idx = rb_idx
 		self.is_local = is_local
@@ -781,6 +884,8 @@ class PmxMorphItemImpulse(_BasePmxMorphItem):
 		self.rot = rot
 	def list(self) -> list:
 		return [self.rb_idx, self.is_local, self.move, self.rot]
+	def clone(self) -> 'PmxMorphItemImpulse':
+		return PmxMorphItemImpulse(self.rb_idx, self.is_local, self.move[:], self.rot[:])
 	def _validate(self, parentlist=None):
 		# rb_idx: must be int
 		assert isinstance(self.rb_idx, int)
@@ -793,6 +898,7 @@ class PmxMorphItemImpulse(_BasePmxMorphItem):
 
 
 class PmxMorph(_BasePmx):
+	__slots__ = ("name_jp", "name_en", "panel", "morphtype", "items")
 	# thismorph = [name_jp, name_en, panel, morphtype, these_items]
 	def __init__(self,
 				 name_jp: str, name_en: str,
@@ -813,6 +919,9 @@ class PmxMorph(_BasePmx):
 				[i.list() for i in self.items],
 				]
 
+	def clone(self) -> 'PmxMorph':
+		return PmxMorph(self.name_jp, self.name_en, self.panel, self.morphtype, clone_list(self.items))
+
 	def _validate(self, parentlist=None):
 		""" This performs type-checking and input validation on the item, as a way to protect against bad code
 		assigning invalid values or incorrect datatypes into my structures. If it fails it will raise an Exception
@@ -847,6 +956,7 @@ class PmxMorph(_BasePmx):
 			assert a.validate(parentlist=self.items)
 
 class PmxFrameItem(_BasePmx):
+	__slots__ = ("is_morph", "idx")
 	def __init__(self, is_morph: bool, idx: int):
 		# is_morph: if true, this index references a morph. if false, this index references a bone.
 		self.is_morph = is_morph
@@ -854,6 +964,8 @@ class PmxFrameItem(_BasePmx):
 		self.idx = idx
 	def list(self) -> list:
 		return [self.is_morph, self.idx]
+	def clone(self) -> 'PmxFrameItem':
+		return PmxFrameItem(self.is_morph, self.idx)
 	def _validate(self, parentlist=None):
 		# is_morph: bool flag
 		assert is_good_flag(self.is_morph)
@@ -862,6 +974,7 @@ class PmxFrameItem(_BasePmx):
 
 
 class PmxFrame(_BasePmx):
+	__slots__ = ("name_jp", "name_en", "is_special", "items")
 	# thisframe = [name_jp, name_en, is_special, these_items]
 	def __init__(self,
 				 name_jp: str, name_en: str,
@@ -878,6 +991,8 @@ class PmxFrame(_BasePmx):
 
 	def list(self) -> list:
 		return [self.name_jp, self.name_en, self.is_special, [a.list() for a in self.items]]
+	def clone(self) -> 'PmxFrame':
+		return PmxFrame(self.name_jp, self.name_en, self.is_special, clone_list(self.items))
 	def _validate(self, parentlist=None):
 		""" This performs type-checking and input validation on the item, as a way to protect against bad code
 		assigning invalid values or incorrect datatypes into my structures. If it fails it will raise an Exception
@@ -895,6 +1010,8 @@ class PmxFrame(_BasePmx):
 
 
 class PmxRigidBody(_BasePmx):
+	__slots__ = ("name_jp", "name_en", "bone_idx", "pos", "rot", "size", "shape", "group", "nocollide_set",
+				 "phys_mode", "phys_mass", "phys_move_damp", "phys_rot_damp", "phys_repel", "phys_friction")
 	# note: this block is the order of args in the old system, does not represent order of args in .list() member
 	# thisbody = [name_jp, name_en, bone_idx, group, nocollide_mask, shape, sizeX, sizeY, sizeZ, posX, posY, posZ,
 	# 			rotX, rotY, rotZ, mass, move_damp, rot_damp, repel, friction, physmode]
@@ -930,6 +1047,11 @@ class PmxRigidBody(_BasePmx):
 				self.phys_mass, self.phys_move_damp, self.phys_rot_damp, self.phys_repel, self.phys_friction,
 				]
 
+	def clone(self) -> 'PmxRigidBody':
+		return PmxRigidBody(self.name_jp, self.name_en, self.bone_idx, self.pos[:], self.rot[:], self.size[:],
+							self.shape, self.group, set(self.nocollide_set), self.phys_mode, self.phys_mass,
+							self.phys_move_damp, self.phys_rot_damp, self.phys_repel, self.phys_friction)
+
 	def _validate(self, parentlist=None):
 		""" This performs type-checking and input validation on the item, as a way to protect against bad code
 		assigning invalid values or incorrect datatypes into my structures. If it fails it will raise an Exception
@@ -971,6 +1093,8 @@ class PmxRigidBody(_BasePmx):
 
 
 class PmxJoint(_BasePmx):
+	__slots__ = ("name_jp", "name_en", "jointtype", "rb1_idx", "rb2_idx", "pos", "rot", "movemin", "movemax",
+				 "movespring", "rotmin", "rotmax", "rotspring")
 	# note: this block is the order of args in the old system, does not represent order of args in .list() member
 	# thisjoint = [name_jp, name_en, jointtype, rb1_idx, rb2_idx, posX, posY, posZ,
 	# 			 rotX, rotY, rotZ, posminX, posminY, posminZ, posmaxX, posmaxY, posmaxZ,
@@ -1011,6 +1135,11 @@ class PmxJoint(_BasePmx):
 				self.rotmin, self.rotmax, self.rotspring,
 				]
 
+	def clone(self) -> 'PmxJoint':
+		return PmxJoint(self.name_jp, self.name_en, self.jointtype, self.rb1_idx, self.rb2_idx,
+						self.pos[:], self.rot[:], self.movemin[:], self.movemax[:], self.movespring[:],
+						self.rotmin[:], self.rotmax[:], self.rotspring[:])
+
 	def _validate(self, parentlist=None):
 		""" This performs type-checking and input validation on the item, as a way to protect against bad code
 		assigning invalid values or incorrect datatypes into my structures. If it fails it will raise an Exception
@@ -1042,6 +1171,11 @@ class PmxJoint(_BasePmx):
 
 
 class PmxSoftBody(_BasePmx):
+	__slots__ = ("name_jp", "name_en", "shape", "idx_mat", "group", "nocollide_mask", "flags", "b_link_create_dist",
+				 "num_clusters", "total_mass", "collision_margin", "aerodynamics_model", "vcf", "dp", "dg", "lf", "pr",
+				 "vc", "df", "mt", "rch", "kch", "sch", "ah", "srhr_cl", "skhr_cl", "sshr_cl", "sr_splt_cl",
+				 "sk_splt_cl", "ss_splt_cl", "v_it", "p_it", "d_it", "c_it", "mat_lst", "mat_ast", "mat_vst",
+				 "anchors_list", "vertex_pin_list")
 	# i don't plan to support v2.1 so I'm not gonna try to hard to understand the meaning of these data fields
 	# this is mostly to consume the data so there are no bytes left over when done parsing a file to trigger warnings
 	# note: this is also untested because i dont care about it lol
@@ -1112,6 +1246,11 @@ class PmxSoftBody(_BasePmx):
 		pass
 
 
+# every member of Pmx, in the order that == compares them
+_SECTIONS_SMALL_FIRST = ("header", "materials", "bones", "frames", "rigidbodies", "joints", "softbodies", "morphs",
+						 "faces", "verts")
+
+
 class Pmx(_BasePmx):
 	# [A, B, C, D, E, F, G, H, I, J, K]
 	def __init__(self,
@@ -1156,6 +1295,30 @@ class Pmx(_BasePmx):
 				[i.list() for i in self.softbodies],	#10
 				]
 
+	def __eq__(self, other) -> bool:
+		if self is other: return True
+		# any kind of Pmx is compared by content, a PmxLazy simply decodes each section as it is compared
+		if not isinstance(other, Pmx): return False
+		# section by section, small ones first, so the first difference ends it without building the whole list()
+		for name in _SECTIONS_SMALL_FIRST:
+			if getattr(self, name) != getattr(other, name): return False
+		return True
+
+	def clone(self) -> 'Pmx':
+		""" Return a separate copy of the whole model, section by section. Always gives a normal Pmx, a PmxLazy loads
+		every section first. """
+		with gc_paused():
+			return Pmx(header=self.header.clone(),
+					   verts=clone_list(self.verts),
+					   faces=clone_faces(self.faces),
+					   mats=clone_list(self.materials),
+					   bones=clone_list(self.bones),
+					   morphs=clone_list(self.morphs),
+					   frames=clone_list(self.frames),
+					   rbodies=clone_list(self.rigidbodies),
+					   joints=clone_list(self.joints),
+					   sbodies=clone_list(self.softbodies))
+
 	def _validate(self, parentlist=None):
 		# header: PmxHeader object
 		assert isinstance(self.header, PmxHeader)
@@ -1,7 +1,8 @@
 from .core import binary_search_isin, print_progress_oneline
 from . import pmx_struct as pmxstruct
+from .pmx_columnar import RecordTable
 
-from typing import List, TypeVar, Set, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, TypeVar, Set, Tuple
 from bisect import bisect_right
 
 INT_OR_INTLIST = TypeVar("INT_OR_INTLIST", int, List[int])
@@ -125,7 +126,270 @@ def bone_get_ancestors(bones: List[pmxstruct.PmxBone], idx: int) -> Set[int]:
 	return retme
 
 
-def insert_single_bone(pmx: pmxstruct.Pmx, newbone: pmxstruct.PmxBone, newindex: int):
+# the sections whose things can refer to other things, and the sections whose things can be referred to
+REFERRER_SECTIONS = ("verts", "faces", "bones", "morphs", "frames", "rigidbodies", "joints", "softbodies")
+TARGET_SECTIONS = ("verts", "bones", "morphs", "materials", "rigidbodies")
+
+# morph type -> (section its items refer to, name of the member holding the index)
+_MORPH_ITEM_TARGETS = {
+	pmxstruct.MorphType.GROUP:    ("morphs", "morph_idx"),
+	pmxstruct.MorphType.FLIP:     ("morphs", "morph_idx"),
+	pmxstruct.MorphType.VERTEX:   ("verts", "vert_idx"),
+	pmxstruct.MorphType.UV:       ("verts", "vert_idx"),
+	pmxstruct.MorphType.UV_EXT1:  ("verts", "vert_idx"),
+	pmxstruct.MorphType.UV_EXT2:  ("verts", "vert_idx"),
+	pmxstruct.MorphType.UV_EXT3:  ("verts", "vert_idx"),
+	pmxstruct.MorphType.UV_EXT4:  ("verts", "vert_idx"),
+	pmxstruct.MorphType.BONE:     ("bones", "bone_idx"),
+	pmxstruct.MorphType.MATERIAL: ("materials", "mat_idx"),
+	pmxstruct.MorphType.IMPULSE:  ("rigidbodies", "rb_idx"),
+}
+
+
+def _iter_things(things: Iterable) -> Iterator:
+	# a table is read through iter_records(), so that building the index doesn't leave a decoded record behind for
+	# every row of it
+	if isinstance(things, RecordTable):
+		return things.iter_records()
+	return iter(things)
+
+
+def thing_references(section: str, thing) -> Tuple[Tuple[str, int], ...]:
+	"""
+	Find everything that one thing of a model refers to by index. Every reference that bone_delete_and_remap(),
+	morph_delete_and_remap(), or vert_delete_and_remap() would remap is included. -1 means "nothing", so it is left out.
+
+	:param section: which section the thing is from, one of REFERRER_SECTIONS
+	:param thing: the vertex, face, bone, morph, etc
+	:return: tuple of (section, index) pairs, without duplicates
+	"""
+	if section == "verts":
+		# every weight pair, even with weight 0, since they all get remapped
+		refs = [("bones", int(pair[0])) for pair in thing.weight]
+	elif section == "faces":
+		refs = [("verts", v) for v in thing]
+	elif section == "bones":
+		refs = [("bones", thing.parent_idx)]
+		if thing.tail_usebonelink:
+			refs.append(("bones", thing.tail))
+		if thing.inherit_rot or thing.inherit_trans:
+			refs.append(("bones", thing.inherit_parent_idx))
+		if thing.has_ik:
+			refs.append(("bones", thing.ik_target_idx))
+			refs.extend(("bones", link.idx) for link in thing.ik_links)
+	elif section == "morphs":
+		target, member = _MORPH_ITEM_TARGETS[thing.morphtype]
+		refs = [(target, getattr(item, member)) for item in _iter_things(thing.items)]
+	elif section == "frames":
+		refs = [("morphs" if item.is_morph else "bones", item.idx) for item in thing.items]
+	elif section == "rigidbodies":
+		refs = [("bones", thing.bone_idx)]
+	elif section == "joints":
+		refs = [("rigidbodies", thing.rb1_idx), ("rigidbodies", thing.rb2_idx)]
+	elif section == "softbodies":
+		refs = [("materials", thing.idx_mat)]
+		for anchor in thing.anchors_list:
+			refs.append(("rigidbodies", anchor[0]))
+			refs.append(("verts", anchor[1]))
+		refs.extend(("verts", v) for v in thing.vertex_pin_list)
+	else:
+		raise RuntimeError("unknown section '%s', choose from: %s" % (section, ", ".join(REFERRER_SECTIONS)))
+	return tuple(ref for ref in dict.fromkeys(refs) if ref[1] >= 0)
+
+
+# the index stores each (section, index) pair as a single int, "index << 3 | section code", which takes far less memory
+# than a tuple per pair. there are at most 8 sections on either side, so 3 bits are enough
+_REFERRER_CODES = {name: code for code, name in enumerate(REFERRER_SECTIONS)}
+_TARGET_CODES = {name: code for code, name in enumerate(TARGET_SECTIONS)}
+
+
+def _pack_refs(refs: Iterable[Tuple[str, int]]) -> Tuple[int, ...]:
+	return tuple(idx << 3 | _TARGET_CODES[section] for section, idx in refs)
+
+
+class ReferenceIndex:
+	"""
+	Who refers to what, across a whole model: for every bone, vertex, morph, material, and rigid body, which vertices,
+	faces, bones, morphs, frames, rigid bodies, joints, and soft bodies refer to it. Built in one pass over the model,
+	after that "what uses bone 42" only costs as much as the answer.
+
+		refs = ReferenceIndex(pmx)
+		refs.referrers("bones", 42)                      # {"verts": [10, 11, ...], "bones": [43], "frames": [2]}
+		delete_multiple_bones(pmx, [42, 57], refs)       # only visits what refers to bones 42 & up, keeps refs up to date
+
+	The delete/insert functions in this file take the index as an optional last argument. With it, they only visit
+	the things that refer to what moves or gets deleted, instead of everything in the model, and then update the index.
+	Any other change to the model has to be reported to the index: update() after changing what one thing refers to,
+	refresh_from() after adding, removing, or reordering things in a section. Or simply rebuild() it.
+	The index takes about three quarters as much memory as the model itself, mostly for the faces & vertices.
+	"""
+
+	def __init__(self, pmx: pmxstruct.Pmx):
+		"""
+		:param pmx: the model to index, it is kept as "pmx" so the index can re-read things from it
+		"""
+		self.pmx = pmx
+		self.rebuild()
+
+	def rebuild(self) -> None:
+		"""
+		Index the whole model again from scratch.
+		"""
+		# referrer section -> what each thing in it refers to, packed by _pack_refs()
+		self._fwd: Dict[str, List[Tuple[int, ...]]] = {}
+		# packed target -> packed referrers of it
+		self._rev: Dict[int, Set[int]] = {}
+		# section -> how many things it had as of the last update
+		self._counts: Dict[str, int] = {}
+		for name in REFERRER_SECTIONS:
+			things = getattr(self.pmx, name)
+			fwd = self._fwd[name] = [_pack_refs(thing_references(name, thing)) for thing in _iter_things(things)]
+			for idx, refs in enumerate(fwd):
+				self._link(name, idx, refs)
+		for name in REFERRER_SECTIONS + TARGET_SECTIONS:
+			self._counts[name] = len(getattr(self.pmx, name))
+
+	def _link(self, section: str, idx: int, refs: Tuple[int, ...]) -> None:
+		rev = self._rev
+		owner = idx << 3 | _REFERRER_CODES[section]
+		for target in refs:
+			owners = rev.get(target)
+			if owners is None:
+				rev[target] = {owner}
+			else:
+				owners.add(owner)
+
+	def _unlink(self, section: str, idx: int) -> None:
+		rev = self._rev
+		owner = idx << 3 | _REFERRER_CODES[section]
+		for target in self._fwd[section][idx]:
+			owners = rev[target]
+			owners.discard(owner)
+			if not owners:
+				del rev[target]
+		self._fwd[section][idx] = ()
+
+	def _referrers_after(self, section: str, first: int) -> Dict[str, Set[int]]:
+		# everything that refers to any thing of this section at or after "first", as of the last update
+		retme: Dict[str, Set[int]] = {}
+		code = _TARGET_CODES.get(section)
+		if code is None:
+			return retme
+		rev = self._rev
+		for tidx in range(first, self._counts[section]):
+			owners = rev.get(tidx << 3 | code)
+			if owners is not None:
+				for owner in owners:
+					name = REFERRER_SECTIONS[owner & 7]
+					if name in retme:
+						retme[name].add(owner >> 3)
+					else:
+						retme[name] = {owner >> 3}
+		return retme
+
+	# ----- queries -----
+
+	def referrers(self, section: str, idx: int) -> Dict[str, List[int]]:
+		"""
+		:param section: section of the thing being referred to, one of TARGET_SECTIONS
+		:param idx: index of the thing within that section
+		:return: dict of referrer section -> sorted indices of the things in it that refer to this thing.
+		sections with nothing referring to it are left out
+		"""
+		if section not in _TARGET_CODES:
+			raise RuntimeError("unknown section '%s', choose from: %s" % (section, ", ".join(TARGET_SECTIONS)))
+		retme: Dict[str, List[int]] = {}
+		for owner in sorted(self._rev.get(idx << 3 | _TARGET_CODES[section], ())):
+			retme.setdefault(REFERRER_SECTIONS[owner & 7], []).append(owner >> 3)
+		return {name: sorted(owners) for name, owners in retme.items()}
+
+	def is_referenced(self, section: str, idx: int) -> bool:
+		"""
+		:param section: section of the thing, one of TARGET_SECTIONS
+		:param idx: index of the thing within that section
+		:return: True if anything at all refers to it
+		"""
+		return (idx << 3 | _TARGET_CODES[section]) in self._rev
+
+	def references(self, section: str, idx: int) -> List[Tuple[str, int]]:
+		"""
+		:param section: section of the thing, one of REFERRER_SECTIONS
+		:param idx: index of the thing within that section
+		:return: list of (section, index) of everything it refers to
+		"""
+		return [(TARGET_SECTIONS[target & 7], target >> 3) for target in self._fwd[section][idx]]
+
+	def unreferenced(self, section: str) -> List[int]:
+		"""
+		Faces belong to materials by their position in the face list, not by index, so they don't count here.
+
+		:param section: one of TARGET_SECTIONS
+		:return: sorted indices of the things in that section that nothing refers to
+		"""
+		code = _TARGET_CODES[section]
+		rev = self._rev
+		return [idx for idx in range(self._counts[section]) if (idx << 3 | code) not in rev]
+
+	# ----- keeping up with changes -----
+
+	def update(self, section: str, idx: int) -> None:
+		"""
+		Read what one thing refers to again, after it was changed.
+
+		:param section: one of REFERRER_SECTIONS
+		:param idx: index of the thing within that section
+		"""
+		self._unlink(section, idx)
+		refs = _pack_refs(thing_references(section, getattr(self.pmx, section)[idx]))
+		self._fwd[section][idx] = refs
+		self._link(section, idx, refs)
+
+	def refresh_from(self, section: str, first: int) -> None:
+		"""
+		Catch up after things were added to, removed from, or reordered within a section, starting at index "first",
+		and the things that referred to them were remapped to match. Everything that referred to anything at or after
+		"first" is read again, and so is every thing in the section itself from "first" on.
+
+		:param section: any section name, like "bones"
+		:param first: lowest index that was deleted, inserted, or moved
+		"""
+		stale = self._referrers_after(section, first)
+		for name, owners in stale.items():
+			for idx in owners:
+				self._unlink(name, idx)
+		count = len(getattr(self.pmx, section))
+		if section in self._fwd:
+			# the things of this section from "first" on have new indices, or are new, so they are read again too
+			fwd = self._fwd[section]
+			stale_own = stale.get(section, set())
+			for idx in range(first, len(fwd)):
+				if idx not in stale_own:
+					self._unlink(section, idx)
+			self._fwd[section] = fwd[:first] + [()] * (count - first)
+			stale[section] = {idx for idx in stale_own if idx < first}
+			stale[section].update(range(first, count))
+		self._counts[section] = count
+		for name, owners in stale.items():
+			things = getattr(self.pmx, name)
+			fwd = self._fwd[name]
+			for idx in owners:
+				fwd[idx] = _pack_refs(thing_references(name, things[idx]))
+				self._link(name, idx, fwd[idx])
+
+
+def _visit(things: list, section: str, visit: Optional[Dict[str, Set[int]]]) -> Iterator[Tuple[int, object]]:
+	# (index, thing) of every thing in a section, or only the ones listed in "visit" if there is one
+	if visit is None:
+		return enumerate(things)
+	return ((d, things[d]) for d in sorted(visit.get(section, ())))
+
+
+def _check_index(pmx: pmxstruct.Pmx, refs: Optional[ReferenceIndex]) -> None:
+	if refs is not None and refs.pmx is not pmx:
+		raise RuntimeError("the ReferenceIndex given belongs to a different model")
+
+
+def insert_single_bone(pmx: pmxstruct.Pmx, newbone: pmxstruct.PmxBone, newindex: int, refs: ReferenceIndex = None):
 	"""
 	Wrapper function to make inserting bones simpler.
 	(!) No existing bones should refer to this bone before it is inserted. (!) When constructing newbone, it should
@@ -135,32 +399,46 @@ def insert_single_bone(pmx: pmxstruct.Pmx, newbone: pmxstruct.PmxBone, newindex:
 	:param pmx: PMX object
 	:param newbone: PMX Bone object to be inserted
 	:param newindex: position to insert it
+	:param refs: optional ReferenceIndex of this model, only the things referring to the bones that move are visited
+	and the index is kept up to date
 	"""
+	_check_index(pmx, refs)
 
 	if newindex > len(pmx.bones) or newindex < 0:
 		raise ValueError("invalid index %d for inserting bone, current bonelist len= %d" % (newindex, len(pmx.bones)))
 
 	elif newindex == len(pmx.bones):
 		pmx.bones.append(newbone)
+		if refs is not None:
+			refs.refresh_from("bones", newindex)
 
 	else:
-		# insert the bone at the new location
-		pmx.bones.insert(newindex, newbone)
 		# create the shiftmap for inserting things
 		bone_shiftmap = ([newindex], [1])
+		visit = None
+		if refs is not None:
+			# everything that refers to the bones that are about to move, the bones among them move too
+			visit = refs._referrers_after("bones", newindex)
+			visit["bones"] = {newval_from_rangemap(b, bone_shiftmap) for b in visit.get("bones", ())}
+			visit["bones"].add(newindex)
+		# insert the bone at the new location
+		pmx.bones.insert(newindex, newbone)
 		# apply the shiftmap
 		# this also changes any references inside newbone to refer to the correct indices after the insertion
-		bone_delete_and_remap(pmx, [], bone_shiftmap)
+		_remap_bone_references(pmx, [], bone_shiftmap, visit)
+		if refs is not None:
+			refs.refresh_from("bones", newindex)
 
 	return
 
 
-def delete_multiple_bones(pmx: pmxstruct.Pmx, bone_dellist: List[int]):
+def delete_multiple_bones(pmx: pmxstruct.Pmx, bone_dellist: List[int], refs: ReferenceIndex = None):
 	"""
 	Wrapper function to make deleting bones simpler.
 
 	:param pmx: PMX object
 	:param bone_dellist: list of bone indices to delete
+	:param refs: optional ReferenceIndex of this model, see bone_delete_and_remap()
 	"""
 
 	# force it to be sorted, just to be safe
@@ -168,12 +446,13 @@ def delete_multiple_bones(pmx: pmxstruct.Pmx, bone_dellist: List[int]):
 	# build the rangemap to determine how index references will be modified from this deletion
 	bone_shiftmap = delme_list_to_rangemap(bone_dellist2)
 	# apply remapping scheme to all remaining bones
-	bone_delete_and_remap(pmx, bone_dellist2, bone_shiftmap)
+	bone_delete_and_remap(pmx, bone_dellist2, bone_shiftmap, refs)
 
 	return
 
 
-def bone_delete_and_remap(pmx: pmxstruct.Pmx, bone_dellist: List[int], bone_shiftmap: Tuple[List[int], List[int]]):
+def bone_delete_and_remap(pmx: pmxstruct.Pmx, bone_dellist: List[int], bone_shiftmap: Tuple[List[int], List[int]],
+						  refs: ReferenceIndex = None):
 	"""
 	Given a list of bones to delete, delete them, and update the indices for all references to all remaining bones.
 	PMX is modified in-place. Behavior is undefined if the dellist bones are still in use somewhere!
@@ -183,21 +462,43 @@ def bone_delete_and_remap(pmx: pmxstruct.Pmx, bone_dellist: List[int], bone_shif
 	:param pmx: PMX object
 	:param bone_dellist: list of ints to delete, MUST be in sorted order!
 	:param bone_shiftmap: created by delme_list_to_rangemap() before calling
+	:param refs: optional ReferenceIndex of this model. if given, only the things that refer to the bones that move
+	or get deleted are visited, instead of the whole model, and the index is kept up to date
 	"""
+	_check_index(pmx, refs)
+	first = bone_shiftmap[0][0] if bone_shiftmap[0] else None
+	visit = None
+	if refs is not None:
+		visit = {} if first is None else refs._referrers_after("bones", first)
+
+	_remap_bone_references(pmx, bone_dellist, bone_shiftmap, visit)
+
+	# acutally delete the bones
+	for f in reversed(bone_dellist):
+		pmx.bones.pop(f)
+
+	if refs is not None and first is not None:
+		refs.refresh_from("bones", first)
+	return
+
+
+def _remap_bone_references(pmx: pmxstruct.Pmx, bone_dellist: List[int], bone_shiftmap: Tuple[List[int], List[int]],
+						   visit: Optional[Dict[str, Set[int]]]) -> None:
+	# the remapping half of bone_delete_and_remap(), over the whole model or only the things listed in "visit"
 
 	print_progress_oneline(0 / 5)
 
 	# VERTICES:
 	# just remap the bones that have weight
 	# any references to bones being deleted will definitely have 0 weight, and therefore it doesn't matter what they reference afterwards
-	for d, vert in enumerate(pmx.verts):
+	for d, vert in _visit(pmx.verts, "verts", visit):
 		for pair in vert.weight:
 			pair[0] = newval_from_rangemap(int(pair[0]), bone_shiftmap)
 	# done with verts
 
 	print_progress_oneline(1 / 5)
 	# MORPHS:
-	for d, morph in enumerate(pmx.morphs):
+	for d, morph in _visit(pmx.morphs, "morphs", visit):
 		# only operate on bone morphs
 		if morph.morphtype != pmxstruct.MorphType.BONE: continue
 		# first, it is plausible that bone morphs could reference otherwise unused bones, so I should check for and delete those
@@ -215,7 +516,7 @@ def bone_delete_and_remap(pmx: pmxstruct.Pmx, bone_dellist: List[int], bone_shif
 
 	print_progress_oneline(2 / 5)
 	# DISPLAY FRAMES
-	for d, frame in enumerate(pmx.frames):
+	for d, frame in _visit(pmx.frames, "frames", visit):
 		i = 0
 		while i < len(frame.items):
 			item = frame.items[i]
@@ -233,7 +534,7 @@ def bone_delete_and_remap(pmx: pmxstruct.Pmx, bone_dellist: List[int], bone_shif
 
 	print_progress_oneline(3 / 5)
 	# RIGIDBODY
-	for d, body in enumerate(pmx.rigidbodies):
+	for d, body in _visit(pmx.rigidbodies, "rigidbodies", visit):
 		# if bone is being used by a rigidbody, set that reference to -1. otherwise, remap.
 		if binary_search_isin(body.bone_idx, bone_dellist):
 			body.bone_idx = -1
@@ -243,7 +544,7 @@ def bone_delete_and_remap(pmx: pmxstruct.Pmx, bone_dellist: List[int], bone_shif
 
 	print_progress_oneline(4 / 5)
 	# BONES: point-at target, true parent, external parent, partial append, ik stuff
-	for d, bone in enumerate(pmx.bones):
+	for d, bone in _visit(pmx.bones, "bones", visit):
 		# point-at link:
 		if bone.tail_usebonelink:
 			if binary_search_isin(bone.tail, bone_dellist):
@@ -272,15 +573,11 @@ def bone_delete_and_remap(pmx: pmxstruct.Pmx, bone_dellist: List[int], bone_shif
 			for link in bone.ik_links:
 				link.idx = newval_from_rangemap(link.idx, bone_shiftmap)
 	# done with bones
-
-	# acutally delete the bones
-	for f in reversed(bone_dellist):
-		pmx.bones.pop(f)
-
 	return
 
 
-def morph_delete_and_remap(pmx: pmxstruct.Pmx, morph_dellist: List[int], morph_shiftmap: Tuple[List[int], List[int]]) -> None:
+def morph_delete_and_remap(pmx: pmxstruct.Pmx, morph_dellist: List[int], morph_shiftmap: Tuple[List[int], List[int]],
+						   refs: ReferenceIndex = None) -> None:
 	"""
 	Delete morphs from the model, and correspondingly update dispframes and group-morphs.
 	No return, updates the PMX in-place.
@@ -288,14 +585,24 @@ def morph_delete_and_remap(pmx: pmxstruct.Pmx, morph_dellist: List[int], morph_s
 	:param pmx: PMX object
 	:param morph_dellist: list of ints to delete, MUST be in sorted order!
 	:param morph_shiftmap: created by delme_list_to_rangemap() before calling
+	:param refs: optional ReferenceIndex of this model. if given, only the things that refer to the morphs that move
+	or get deleted are visited, instead of every frame & morph, and the index is kept up to date
 	"""
+	_check_index(pmx, refs)
+	first = morph_shiftmap[0][0] if morph_shiftmap[0] else None
+	visit = None
+	if refs is not None:
+		visit = {} if first is None else refs._referrers_after("morphs", first)
+		# the group morphs among them are about to move too
+		visit["morphs"] = {newval_from_rangemap(m, morph_shiftmap) for m in visit.get("morphs", ())
+						   if not binary_search_isin(m, morph_dellist)}
 
 	# actually delete the morphs from the list
 	for f in reversed(morph_dellist):
 		pmx.morphs.pop(f)
 
 	# frames:
-	for d, frame in enumerate(pmx.frames):
+	for d, frame in _visit(pmx.frames, "frames", visit):
 		i = 0
 		while i < len(frame.items):
 			item = frame.items[i]
@@ -311,7 +618,7 @@ def morph_delete_and_remap(pmx: pmxstruct.Pmx, morph_dellist: List[int], morph_s
 					i += 1
 
 	# group/flip morphs:
-	for d, morph in enumerate(pmx.morphs):
+	for d, morph in _visit(pmx.morphs, "morphs", visit):
 		# group/flip = 0/9
 		if morph.morphtype not in (pmxstruct.MorphType.GROUP, pmxstruct.MorphType.FLIP): continue
 		i = 0
@@ -325,10 +632,12 @@ def morph_delete_and_remap(pmx: pmxstruct.Pmx, morph_dellist: List[int], morph_s
 				it.morph_idx = newval_from_rangemap(it.morph_idx, morph_shiftmap)
 				i += 1
 
+	if refs is not None and first is not None:
+		refs.refresh_from("morphs", first)
 	return
 
 
-def delete_faces(pmx: pmxstruct.Pmx, faces_to_remove: List[int]) -> None:
+def delete_faces(pmx: pmxstruct.Pmx, faces_to_remove: List[int], refs: ReferenceIndex = None) -> None:
 	"""
 	Delete faces from the model, and correspondingly update the material objects.
 	This does not check if it would cause a material to have 0 faces afterward.
@@ -336,7 +645,9 @@ def delete_faces(pmx: pmxstruct.Pmx, faces_to_remove: List[int]) -> None:
 
 	:param pmx: PMX object
 	:param faces_to_remove: list of ints to delete, MUST be in sorted order!
+	:param refs: optional ReferenceIndex of this model, to keep up to date
 	"""
+	_check_index(pmx, refs)
 
 	# the question simply becomes, "how many faces within range [start, end] are being deleted"
 	delface_idx = 0
@@ -366,10 +677,13 @@ def delete_faces(pmx: pmxstruct.Pmx, faces_to_remove: List[int]) -> None:
 	for f in reversed(faces_to_remove):
 		pmx.faces.pop(f)
 
+	if refs is not None and faces_to_remove:
+		refs.refresh_from("faces", faces_to_remove[0])
 	return
 
 
-def vert_delete_and_remap(pmx: pmxstruct.Pmx, vert_dellist: List[int], vert_shiftmap: Tuple[List[int], List[int]]) -> None:
+def vert_delete_and_remap(pmx: pmxstruct.Pmx, vert_dellist: List[int], vert_shiftmap: Tuple[List[int], List[int]],
+						  refs: ReferenceIndex = None) -> None:
 	"""
 	Delete vertices from the model, and correspondingly update everything that references them.
 	No return, updates the PMX in-place.
@@ -378,33 +692,41 @@ def vert_delete_and_remap(pmx: pmxstruct.Pmx, vert_dellist: List[int], vert_shif
 	:param pmx: PMX object
 	:param vert_dellist: list of ints to delete, MUST be in sorted order!
 	:param vert_shiftmap: created by delme_list_to_rangemap() before calling
+	:param refs: optional ReferenceIndex of this model. if given, only the faces, morphs, and softbodies that refer to
+	the vertices that move or get deleted are visited, and the index is kept up to date
 	"""
+	_check_index(pmx, refs)
+	first = vert_shiftmap[0][0] if vert_shiftmap[0] else None
+	visit = None
+	if refs is not None:
+		visit = {} if first is None else refs._referrers_after("verts", first)
+	faces_todo = len(pmx.faces) if visit is None else len(visit.get("faces", ()))
 
 	# need to update places that reference vertices: faces, morphs, softbody
 	# first get the total # of iterations I need to do, for progress purposes: #faces + sum of len of all UV and vert morphs
-	totalwork = len(pmx.faces) + sum([len(m.items) for m in pmx.morphs if (m.morphtype in (pmxstruct.MorphType.VERTEX,
-																						   pmxstruct.MorphType.UV,
-																						   pmxstruct.MorphType.UV_EXT1,
-																						   pmxstruct.MorphType.UV_EXT2,
-																						   pmxstruct.MorphType.UV_EXT3,
-																						   pmxstruct.MorphType.UV_EXT4))])
+	totalwork = faces_todo + sum([len(m.items) for d, m in _visit(pmx.morphs, "morphs", visit)
+								  if (m.morphtype in (pmxstruct.MorphType.VERTEX,
+													  pmxstruct.MorphType.UV,
+													  pmxstruct.MorphType.UV_EXT1,
+													  pmxstruct.MorphType.UV_EXT2,
+													  pmxstruct.MorphType.UV_EXT3,
+													  pmxstruct.MorphType.UV_EXT4))])
 
 	# faces:
-	d = 0
-
-	for d, face in enumerate(pmx.faces):
+	for n, (_, face) in enumerate(_visit(pmx.faces, "faces", visit)):
 		# vertices in a face are not guaranteed sorted, and sorting them is a Very Bad Idea
 		# therefore they must be remapped individually
 		face[0] = newval_from_rangemap(face[0], vert_shiftmap)
 		face[1] = newval_from_rangemap(face[1], vert_shiftmap)
 		face[2] = newval_from_rangemap(face[2], vert_shiftmap)
 		# display progress printouts
-		print_progress_oneline(d / totalwork)
+		print_progress_oneline(n / totalwork)
 
 	# morphs:
 	orphan_vertex_references = 0
+	d = faces_todo
 
-	for morph in pmx.morphs:
+	for _, morph in _visit(pmx.morphs, "morphs", visit):
 		# if not a vertex morph or UV morph, skip it
 		if morph.morphtype not in (pmxstruct.MorphType.VERTEX,
 								   pmxstruct.MorphType.UV,
@@ -442,7 +764,7 @@ def vert_delete_and_remap(pmx: pmxstruct.Pmx, vert_dellist: List[int], vert_shif
 		print_progress_oneline(d / totalwork)
 
 	# softbody: probably not relevant but eh
-	for soft in pmx.softbodies:
+	for _, soft in _visit(pmx.softbodies, "softbodies", visit):
 		# anchors
 		# first, delete any references to delme verts in the anchors
 		i = 0
@@ -489,4 +811,6 @@ def vert_delete_and_remap(pmx: pmxstruct.Pmx, vert_dellist: List[int], vert_shif
 	for f in vert_dellist:
 		pmx.verts.pop(f)
 
+	if refs is not None and first is not None:
+		refs.refresh_from("verts", first)
 	return
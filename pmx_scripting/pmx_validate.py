@@ -0,0 +1,344 @@
+"""
+Faster alternatives to Pmx.validate(), used by write_pmx(validate=...).
+
+"full" is the original object-by-object Pmx.validate().
+"fast" checks the big sections (vertices, faces, vertex/UV/bone morph items) in bulk instead of one object at a time:
+every position, weight, and index of a section is gathered into one flat list and type-checked with builtins like sum()
+and map() that run in C. Columnar tables can't hold the wrong types at all, so only the values are
+checked: every float must be finite, and every index must point at something that exists (this is stricter than
+"full", which never checks index ranges). If a bulk check fails, the objects of that section are validated one at a
+time to report exactly which one is bad.
+It also only checks what might have changed: sections of a PmxLazy that were never decoded come straight from the file,
+and in a columnar table only the records touched through a view are decoded and checked, the rest of the table only
+gets the value checks.
+"off" skips validation entirely.
+"""
+
+from .core import MY_PRINT_FUNC
+from . import pmx_struct as pmxstruct
+from .pmx_columnar import RecordTable, VertexTable, FaceTable, MorphItemTable
+
+from typing import List, Optional, Sequence
+from operator import attrgetter
+from itertools import chain, repeat
+import copy
+import math
+
+# numpy is optional, it only makes the checks on the columnar tables faster
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
+
+__all__ = ['VALIDATE_MODES', 'validate_pmx']
+
+VALIDATE_MODES = ("full", "fast", "off")
+
+# names of the sections that are lists of _BasePmx objects & small enough to just validate one by one
+_OBJECT_SECTIONS = (
+	("materials", pmxstruct.PmxMaterial),
+	("bones", pmxstruct.PmxBone),
+	("frames", pmxstruct.PmxFrame),
+	("rigidbodies", pmxstruct.PmxRigidBody),
+	("joints", pmxstruct.PmxJoint),
+	("softbodies", pmxstruct.PmxSoftBody),
+)
+
+_SEQUENCE = (list, tuple)
+
+
+# ===== Public =====
+
+def validate_pmx(pmx: pmxstruct.Pmx, mode="full") -> None:
+	"""
+	Check that a Pmx object (or ColumnarPmx, or PmxLazy) is properly structured & can be written.
+	If it fails, it prints a bunch & raises a RuntimeError, same as Pmx.validate().
+
+	:param pmx: Pmx object
+	:param mode: "full" for the normal Pmx.validate(), "fast" for the bulk checks, "off" to skip it
+	"""
+	if mode == "off":
+		return
+	if mode == "full":
+		pmx.validate()
+		return
+	if mode != "fast":
+		raise RuntimeError("unknown validate mode '%s', must be one of %s" % (mode, VALIDATE_MODES))
+
+	_check(isinstance(pmx.header, pmxstruct.PmxHeader), "header", "is not a PmxHeader")
+	pmx.header.validate()
+	nverts = _count(pmx, "verts")
+	nbones = _count(pmx, "bones")
+
+	if _needs_check(pmx, "verts"):
+		verts = pmx.verts
+		if isinstance(verts, VertexTable):
+			_check_vertex_table(verts, nbones)
+		else:
+			_check_vertex_list(verts, nbones)
+	if _needs_check(pmx, "faces"):
+		faces = pmx.faces
+		if isinstance(faces, FaceTable):
+			_check_index_column("faces", faces.verts, 0, nverts)
+		else:
+			_check_face_list(faces, nverts)
+	if _needs_check(pmx, "morphs"):
+		_check_morphs(pmx.morphs, nverts, nbones)
+	for name, cls in _OBJECT_SECTIONS:
+		if _needs_check(pmx, name):
+			_check_object_list(name, getattr(pmx, name), cls)
+	return
+
+
+# ===== Helpers =====
+
+def _check(ok: bool, section: str, what: str) -> None:
+	"""
+	If not ok, print what is wrong with which section and raise RuntimeError, the same way Pmx.validate() does.
+
+	:param ok: result of the check
+	:param section: name of the section being checked
+	:param what: description of what is wrong
+	"""
+	if ok:
+		return
+	MY_PRINT_FUNC('VALIDATE ERROR: section "%s" %s' % (section, what))
+	MY_PRINT_FUNC("This happens when the PMX/VMD object has incorrect data sizes/types.")
+	MY_PRINT_FUNC("Figure out why/how bad data got into this field, then stop it from happening in the future!")
+	raise RuntimeError("validation fail")
+
+
+def _needs_check(pmx: pmxstruct.Pmx, name: str) -> bool:
+	# a lazy section that was never decoded can't have been changed, it is exactly what was in the file
+	is_loaded = getattr(pmx, "is_loaded", None)
+	return is_loaded is None or is_loaded(name)
+
+
+def _count(pmx: pmxstruct.Pmx, name: str) -> int:
+	# how many things are in a section, without making a PmxLazy decode it
+	count = getattr(pmx, "count", None)
+	if count is not None:
+		return count(name)
+	return len(getattr(pmx, name))
+
+
+def _all_instance(things: Sequence, cls) -> bool:
+	return all(map(isinstance, things, repeat(cls)))
+
+
+def _numbers_ok(values: list) -> bool:
+	"""
+	True if every value is an int or float. sum() refuses to add anything that isn't a number, and runs in C.
+	"""
+	try:
+		sum(values)
+		return True
+	except TypeError:
+		return False
+
+
+def _ints_ok(values: list) -> bool:
+	if set(map(type, values)) <= {int, bool}:
+		return True
+	return _all_instance(values, int)
+
+
+def _flat_vectors(vecs: Sequence, width: int, ints=False) -> Optional[list]:
+	"""
+	Bulk version of is_good_vector(): every item must be a list/tuple with exactly this many numbers.
+	Returns all of their values in one flat list, or None if any of them is bad.
+	"""
+	if not _all_instance(vecs, _SEQUENCE):
+		return None
+	if not set(map(len, vecs)) <= {width}:
+		return None
+	flat = list(chain.from_iterable(vecs))
+	ok = _ints_ok(flat) if ints else _numbers_ok(flat)
+	return flat if ok else None
+
+
+def _in_range(values, low: int, high: int) -> bool:
+	# every value is low <= x < high, or there are no values
+	if len(values) == 0:
+		return True
+	if np is not None and not isinstance(values, list):
+		values = np.asarray(values)
+		return bool(values.min() >= low and values.max() < high)
+	return min(values) >= low and max(values) < high
+
+
+def _all_finite(values) -> bool:
+	if len(values) == 0:
+		return True
+	if np is not None:
+		return bool(np.isfinite(np.asarray(values)).all())
+	# the sum is only finite if every value is: NaN & INF both carry through, and float32 values can't overflow a double
+	return math.isfinite(sum(values))
+
+
+def _find_bad_object(section: str, things: Sequence) -> None:
+	# a bulk check failed, so validate them one at a time to print exactly which object is the problem
+	for thing in things:
+		thing.validate(parentlist=things)
+	# the bulk checks are a little stricter in some places, like faces having exactly 3 indices
+	_check(False, section, "has a bad value that the normal per-object validation doesn't catch")
+
+
+def _check_object_list(section: str, things: Sequence, cls) -> None:
+	_check(isinstance(things, _SEQUENCE), section, "is not a list")
+	for thing in things:
+		_check(isinstance(thing, cls), section, "contains something that isn't a %s" % cls.__name__)
+		thing.validate(parentlist=things)
+
+
+def _check_index_column(section: str, col, low: int, high: int) -> None:
+	_check(_in_range(col, low, high), section, "has an index outside the valid range %d to %d" % (low, high - 1))
+
+
+def _check_float_columns(section: str, cols: List) -> None:
+	for col in cols:
+		_check(_all_finite(col), section, "has a NaN or INF float")
+
+
+# ===== Vertices =====
+
+def _check_vertex_list(verts: Sequence[pmxstruct.PmxVertex], nbones: int) -> None:
+	_check(isinstance(verts, _SEQUENCE), "verts", "is not a list")
+	bones = _vertex_list_bones(verts)
+	if bones is None:
+		# something didn't pass the quick check, so do the normal check to find out what & where
+		_check_object_list("verts", verts, pmxstruct.PmxVertex)
+		bones = [pair[0] for vert in verts for pair in vert.weight]
+	# unused weight slots are sometimes filled with -1
+	_check_index_column("verts", bones, -1, nbones)
+
+
+def _vertex_list_bones(verts: Sequence[pmxstruct.PmxVertex]) -> Optional[list]:
+	"""
+	Quick check of every vertex in one pass, the same checks as PmxVertex._validate() but without the per-object
+	overhead. Only exact list/tuple types are accepted here, anything unusual makes it give up & return None so the
+	caller can fall back to the normal validate().
+
+	:param verts: list of PmxVertex
+	:return: list of every bone index used by the weights, or None
+	"""
+	seq = _SEQUENCE
+	weightmode = pmxstruct.WeightMode
+	sdefmode = pmxstruct.WeightMode.SDEF
+	vertclass = pmxstruct.PmxVertex
+	# gather every float & every bone index, then check all of them at once
+	floats = []
+	add_floats = floats.extend
+	add_float = floats.append
+	bones = []
+	add_bone = bones.append
+	for vert in verts:
+		if not isinstance(vert, vertclass):
+			return None
+		pos = vert.pos
+		norm = vert.norm
+		uv = vert.uv
+		weight = vert.weight
+		if type(pos) not in seq or len(pos) != 3 or type(norm) not in seq or len(norm) != 3 \
+				or type(uv) not in seq or len(uv) != 2 or type(weight) not in seq or not 1 <= len(weight) <= 4:
+			return None
+		add_floats(pos)
+		add_floats(norm)
+		add_floats(uv)
+		add_float(vert.edgescale)
+		for pair in weight:
+			if type(pair) not in seq or len(pair) != 2:
+				return None
+			add_bone(pair[0])
+			add_float(pair[1])
+		weighttype = vert.weighttype
+		if type(weighttype) is not weightmode:
+			return None
+		if weighttype is sdefmode:
+			sdef = vert.weight_sdef
+			if type(sdef) not in seq or len(sdef) != 3:
+				return None
+			for rc in sdef:
+				if type(rc) not in seq or len(rc) != 3:
+					return None
+				add_floats(rc)
+		addl = vert.addl_vec4s
+		if addl is not None:
+			if type(addl) not in seq:
+				return None
+			for vec4 in addl:
+				if type(vec4) not in seq or len(vec4) != 4:
+					return None
+				add_floats(vec4)
+	if not _numbers_ok(floats) or not _ints_ok(bones):
+		return None
+	return bones
+
+
+def _check_vertex_table(table: VertexTable, nbones: int) -> None:
+	# the touched records might not match the columns anymore, so they get the full check plus the index check
+	table._validate_records()
+	touched_bones = [pair[0] for vert in table._records.values() for pair in vert.weight]
+	_check_index_column("verts", touched_bones, -1, nbones)
+	modes = [m.value for m in pmxstruct.WeightMode]
+	_check(_in_range(table.weighttype, min(modes), max(modes) + 1), "verts", "has an invalid weighttype")
+	_check_index_column("verts", table.bones, -1, nbones)
+	_check_float_columns("verts", [table.pos, table.norm, table.uv, table.edgescale, table.weights, table.sdef,
+								   table.addl_vec4s])
+
+
+# ===== Faces =====
+
+def _check_face_list(faces: Sequence[Sequence[int]], nverts: int) -> None:
+	_check(isinstance(faces, _SEQUENCE), "faces", "is not a list")
+	flat = _flat_vectors(faces, 3, ints=True)
+	_check(flat is not None, "faces", "has a face that isn't a list of 3 ints")
+	_check_index_column("faces", flat, 0, nverts)
+
+
+# ===== Morphs =====
+
+def _check_morphs(morphs: Sequence[pmxstruct.PmxMorph], nverts: int, nbones: int) -> None:
+	_check(isinstance(morphs, _SEQUENCE), "morphs", "is not a list")
+	for morph in morphs:
+		_check(isinstance(morph, pmxstruct.PmxMorph), "morphs", "contains something that isn't a PmxMorph")
+		items = morph.items
+		if isinstance(items, MorphItemTable):
+			_check(items.morphtype == morph.morphtype, "morphs", "has an item table of the wrong morphtype")
+			items._validate_records()
+			_check_index_column("morphs", items.vert_idx, 0, nverts)
+			_check_float_columns("morphs", [items.move])
+		elif isinstance(items, RecordTable):
+			_check(False, "morphs", "has items in an unknown kind of table")
+		elif morph.morphtype == pmxstruct.MorphType.VERTEX:
+			_check_morph_item_list(morph, pmxstruct.PmxMorphItemVertex, "vert_idx", ["move"], 3, nverts)
+		elif morph.morphtype in (pmxstruct.MorphType.UV, pmxstruct.MorphType.UV_EXT1, pmxstruct.MorphType.UV_EXT2,
+								 pmxstruct.MorphType.UV_EXT3, pmxstruct.MorphType.UV_EXT4):
+			_check_morph_item_list(morph, pmxstruct.PmxMorphItemUV, "vert_idx", ["move"], 4, nverts)
+		elif morph.morphtype == pmxstruct.MorphType.BONE:
+			_check_morph_item_list(morph, pmxstruct.PmxMorphItemBone, "bone_idx", ["move", "rot"], 3, nbones)
+		else:
+			# everything else is small, just check it the normal way
+			morph.validate(parentlist=morphs)
+			continue
+		# the items were checked above, now check everything else about the morph the normal way
+		shell = copy.copy(morph)
+		shell.items = []
+		shell.validate()
+
+
+def _check_morph_item_list(morph: pmxstruct.PmxMorph, cls, idx_name: str, vec_names: List[str], width: int,
+						   idx_limit: int) -> None:
+	items = morph.items
+	_check(isinstance(items, _SEQUENCE), "morphs", "has items that aren't a list")
+	ok = _all_instance(items, cls)
+	idx = None
+	if ok:
+		idx = list(map(attrgetter(idx_name), items))
+		ok = _ints_ok(idx) and all(_flat_vectors(list(map(attrgetter(n), items)), width) is not None for n in vec_names)
+	if not ok:
+		# this also checks the item classes against the morphtype
+		morph.validate()
+		_check(False, "morphs", "has a bad item that the normal per-object validation doesn't catch")
+	_check_index_column("morphs", idx, 0, idx_limit)
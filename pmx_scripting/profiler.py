@@ -0,0 +1,229 @@
+"""
+Per-section timing for reading & writing PMX files.
+
+SectionProfiler is a ProgressCallback, so it plugs into the same "progress" argument as everything else:
+
+    prof = SectionProfiler()
+    pmx = read_pmx("model.pmx", progress=prof)
+    write_pmx("out.pmx", pmx, progress=prof)
+    prof.print_summary()
+    prof.write_json("profile.json")
+    prof.write_chrome_trace("trace.json")   # open in chrome://tracing or https://ui.perfetto.dev
+
+For every section of every file it records the wall time, the CPU time of the thread doing the work, how many bytes
+and how many things it covered, and optionally how much memory was allocated. The header, vertices, faces, textures,
+materials, bones, morphs, dispframes, rigidbodies, joints, and softbodies are all covered, both decoding & encoding.
+Validating, sanitizing, and the actual disk reads & writes happen between sections, so they don't count towards any
+section, but they do count towards the total time of each file.
+
+One profiler can be shared by readers & writers in different threads. But memory tracking uses tracemalloc, which
+counts every thread together, so only turn it on when profiling one thing at a time.
+"""
+
+from . import core
+from .progress import ProgressCallback
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from typing import Dict, List, NamedTuple, Optional
+
+
+__all__ = ['SectionProfile', 'SectionProfiler']
+
+
+class SectionProfile(NamedTuple):
+	file: str			# file path
+	phase: str			# "read" or "write"
+	section: str		# "header", "verts", "faces", ...
+	count: int			# how many things are in this section
+	nbytes: int			# size of this section in the file, after the count at the front, same for reading & writing
+	start: float		# seconds since the profiler was created
+	wall: float			# seconds
+	cpu: float			# seconds of CPU time used by the thread that did the work
+	alloc_bytes: Optional[int]	# memory allocated & still held at the end of the section, None if not tracked
+	peak_bytes: Optional[int]	# highest memory use during the section, above where it started, None if not tracked
+	thread: int			# threading.get_ident() of the thread that did the work
+
+	@property
+	def bytes_per_sec(self) -> float:
+		return self.nbytes / self.wall if self.wall > 0 else 0.0
+
+	@property
+	def items_per_sec(self) -> float:
+		return self.count / self.wall if self.wall > 0 else 0.0
+
+
+class SectionProfiler(ProgressCallback):
+	"""
+	Records how long each section of each file takes to read or write. See the top of this file.
+	"""
+
+	# the updates in the middle of a section aren't used, so make them as rare as possible
+	interval = float("inf")
+
+	def __init__(self, track_memory=False, forward: ProgressCallback = None):
+		"""
+		:param track_memory: if true, also measure memory allocated during each section with tracemalloc. this makes
+		everything several times slower, so the times are not comparable with runs that didn't track memory!
+		:param forward: another ProgressCallback to pass everything on to, like PRINT_PROGRESS, or None
+		"""
+		self.track_memory = track_memory
+		self.forward = forward
+		if forward is not None:
+			# forwarding is useless if the middle updates never happen
+			self.interval = forward.interval
+		self.sections: List[SectionProfile] = []
+		# file path & start time of each file, in the order they were started
+		self.files: List[Dict] = []
+		self._origin = time.perf_counter()
+		self._lock = threading.Lock()
+		# what each thread is doing right now, since different threads may report at the same time
+		self._local = threading.local()
+
+	# ===== ProgressCallback interface =====
+
+	def update(self, phase: str, section: str, done: int, total: int, nbytes: int, elapsed: float) -> None:
+		if self.forward is not None:
+			self.forward.update(phase, section, done, total, nbytes, elapsed)
+
+	def begin_file(self, phase: str, name: str) -> None:
+		now = time.perf_counter()
+		fileinfo = {"file": name, "phase": phase, "start": now - self._origin, "wall": 0.0}
+		with self._lock:
+			self.files.append(fileinfo)
+		self._local.file = fileinfo
+		if self.forward is not None:
+			self.forward.begin_file(phase, name)
+
+	def begin_section(self, phase: str, section: str, total: int, nbytes: int, elapsed: float) -> None:
+		if self.forward is not None:
+			self.forward.begin_section(phase, section, total, nbytes, elapsed)
+		if self.track_memory:
+			if not tracemalloc.is_tracing():
+				tracemalloc.start()
+			if hasattr(tracemalloc, "reset_peak"):
+				# python 3.9+, otherwise the peak is the highest since tracing started
+				tracemalloc.reset_peak()
+			self._local.mem = tracemalloc.get_traced_memory()[0]
+		self._local.nbytes = nbytes
+		# take the times last so the profiler's own work isn't counted
+		self._local.cpu = time.thread_time()
+		self._local.wall = time.perf_counter()
+
+	def end_section(self, phase: str, section: str, total: int, nbytes: int, elapsed: float) -> None:
+		# take the times first so the profiler's own work isn't counted
+		wall_end = time.perf_counter()
+		cpu_end = time.thread_time()
+		loc = self._local
+		alloc = peak = None
+		if self.track_memory:
+			current, highest = tracemalloc.get_traced_memory()
+			alloc = current - loc.mem
+			peak = highest - loc.mem
+		fileinfo = getattr(loc, "file", None)
+		filename = "" if fileinfo is None else fileinfo["file"]
+		record = SectionProfile(file=filename, phase=phase, section=section, count=total, nbytes=nbytes - loc.nbytes,
+								start=loc.wall - self._origin, wall=wall_end - loc.wall, cpu=cpu_end - loc.cpu,
+								alloc_bytes=alloc, peak_bytes=peak, thread=threading.get_ident())
+		with self._lock:
+			self.sections.append(record)
+		if fileinfo is not None:
+			# the whole file took at least until now, the last section to finish sets the final value
+			fileinfo["wall"] = wall_end - self._origin - fileinfo["start"]
+		if self.forward is not None:
+			self.forward.end_section(phase, section, total, nbytes, elapsed)
+
+	# ===== Results =====
+
+	def clear(self) -> None:
+		"""
+		Forget everything recorded so far.
+		"""
+		with self._lock:
+			self.sections = []
+			self.files = []
+
+	def totals(self) -> Dict[str, Dict[str, float]]:
+		"""
+		Add up each section across every file that was profiled.
+
+		:return: dict of "phase/section" -> dict of count, nbytes, wall, cpu, and how many times it was seen
+		"""
+		retme = {}
+		for r in self.sections:
+			t = retme.setdefault("%s/%s" % (r.phase, r.section), {"runs": 0, "count": 0, "nbytes": 0, "wall": 0.0, "cpu": 0.0})
+			t["runs"] += 1
+			t["count"] += r.count
+			t["nbytes"] += r.nbytes
+			t["wall"] += r.wall
+			t["cpu"] += r.cpu
+		return retme
+
+	def report(self) -> dict:
+		"""
+		:return: everything that was recorded as plain dicts & lists, ready for json.dump()
+		"""
+		sections = []
+		for r in self.sections:
+			d = r._asdict()
+			d["bytes_per_sec"] = r.bytes_per_sec
+			d["items_per_sec"] = r.items_per_sec
+			sections.append(d)
+		return {"files": [dict(f) for f in self.files], "sections": sections, "totals": self.totals()}
+
+	def to_json(self, indent=1) -> str:
+		return json.dumps(self.report(), indent=indent, ensure_ascii=False)
+
+	def write_json(self, path: str) -> None:
+		"""
+		:param path: where to save report() as a JSON file
+		"""
+		with open(path, "w", encoding="utf-8") as f:
+			f.write(self.to_json())
+
+	def chrome_trace(self) -> dict:
+		"""
+		:return: every file & section as "complete" events in the Chrome trace event format, ready for json.dump()
+		"""
+		pid = os.getpid()
+		events = []
+		for f in self.files:
+			events.append({"name": "%s %s" % (f["phase"], core.filepath_splitdir(f["file"])[1]), "cat": f["phase"],
+						   "ph": "X", "ts": f["start"] * 1e6, "dur": f["wall"] * 1e6, "pid": pid, "tid": 0,
+						   "args": {"file": f["file"]}})
+		for r in self.sections:
+			args = {"file": r.file, "count": r.count, "nbytes": r.nbytes, "cpu_ms": r.cpu * 1e3}
+			if r.alloc_bytes is not None:
+				args["alloc_bytes"] = r.alloc_bytes
+				args["peak_bytes"] = r.peak_bytes
+			events.append({"name": r.section, "cat": r.phase, "ph": "X", "ts": r.start * 1e6, "dur": r.wall * 1e6,
+						   "pid": pid, "tid": r.thread, "args": args})
+		return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+	def write_chrome_trace(self, path: str) -> None:
+		"""
+		:param path: where to save chrome_trace() as a JSON file, which chrome://tracing or Perfetto can open
+		"""
+		with open(path, "w", encoding="utf-8") as f:
+			json.dump(self.chrome_trace(), f, ensure_ascii=False)
+
+	def print_summary(self) -> None:
+		"""
+		Print a table of the totals for each section, slowest first.
+		"""
+		totals = self.totals()
+		if not totals:
+			core.MY_PRINT_FUNC("Profile: nothing was recorded")
+			return
+		# a lazy read reports each section it decodes as a separate run of the same file
+		core.MY_PRINT_FUNC("Profile of %d file(s):" % len({(f["phase"], f["file"]) for f in self.files}))
+		width = max(len(k) for k in totals)
+		core.MY_PRINT_FUNC("  %s  %9s  %9s  %10s  %9s  %10s" % ("section".ljust(width), "wall ms", "cpu ms", "count", "MB", "MB/s"))
+		for name, t in sorted(totals.items(), key=lambda kv: kv[1]["wall"], reverse=True):
+			mb = t["nbytes"] / (1 << 20)
+			rate = mb / t["wall"] if t["wall"] > 0 else 0.0
+			core.MY_PRINT_FUNC("  %s  %9.2f  %9.2f  %10d  %9.3f  %10.1f" % (name.ljust(width), t["wall"] * 1e3, t["cpu"] * 1e3,
+																		  t["count"], mb, rate))
@@ -0,0 +1,154 @@
+"""
+Progress reporting for reading & writing PMX files.
+
+read_pmx() and write_pmx() take a "progress" object, any subclass of ProgressCallback that overrides update(). It
+hears about every section of the file as it is started and finished, plus updates in the middle of the big sections,
+but never more often than its "interval" in seconds, so the parsing loops don't slow down just to report progress.
+The default is PRINT_PROGRESS, which prints one line that keeps overwriting itself. Pass progress=None to turn it off
+completely, then the loops only pay for one "is None" check every few hundred things.
+
+A GUI or batch runner can use its own callback, like a progress bar, and the profiler in profiler.py is one too.
+The same callback object can be given to readers & writers in different threads, then update() may be called from
+several threads at the same time; everything that tracks the progress of one file lives in a separate ProgressTracker
+that belongs to that reader or writer.
+"""
+
+from . import core
+
+import threading
+import time
+
+
+__all__ = ['ProgressCallback', 'PrintProgress', 'ProgressTracker', 'PRINT_PROGRESS']
+
+
+class ProgressCallback:
+	"""
+	Base class for anything that wants to hear about the progress of reading or writing a file, override update().
+	"""
+
+	# minimum number of seconds between two updates in the middle of a section
+	interval = 0.1
+
+	def update(self, phase: str, section: str, done: int, total: int, nbytes: int, elapsed: float) -> None:
+		"""
+		Called when a section starts (done=0), every so often while it is going, and exactly once when it is finished
+		(done=total). An empty section has nothing to start, so it only gets the one update when it is finished.
+
+		:param phase: "read" or "write"
+		:param section: which section of the file, like "verts", "faces", "bones"
+		:param done: how many things of this section are done so far
+		:param total: how many things are in this section
+		:param nbytes: how many bytes of the file have been read or written so far
+		:param elapsed: seconds since the file was started
+		"""
+		pass
+
+	def begin_file(self, phase: str, name: str) -> None:
+		"""
+		Called once when a reader/writer starts on a file, before any of its sections.
+
+		:param phase: "read" or "write"
+		:param name: the file path
+		"""
+		pass
+
+	def begin_section(self, phase: str, section: str, total: int, nbytes: int, elapsed: float) -> None:
+		"""
+		Called when a section starts. By default this is just the first update(), unless the section is empty: then the
+		start is also the end, and end_section() reports it.
+		"""
+		if total:
+			self.update(phase, section, 0, total, nbytes, elapsed)
+
+	def end_section(self, phase: str, section: str, total: int, nbytes: int, elapsed: float) -> None:
+		"""
+		Called when a section is finished. By default this is just the last update().
+		"""
+		self.update(phase, section, total, total, nbytes, elapsed)
+
+
+class PrintProgress(ProgressCallback):
+	"""
+	Print the progress of each section on one line that keeps overwriting itself, like print_progress_oneline().
+	"""
+
+	def __init__(self):
+		# so that lines from different threads don't get mixed together
+		self._lock = threading.Lock()
+
+	def update(self, phase: str, section: str, done: int, total: int, nbytes: int, elapsed: float) -> None:
+		fraction = done / total if total else 1.0
+		with self._lock:
+			core.MY_PRINT_FUNC("...%s %s: %04.1f%%" % ("reading" if phase == "read" else "writing", section, 100 * fraction),
+							   is_progress=True)
+
+
+PRINT_PROGRESS = PrintProgress()
+
+
+class ProgressTracker:
+	"""
+	Tracks the progress of one read or write and passes it on to a ProgressCallback, throttled by time.
+	Each PmxReader/PmxWriter makes one of these per file, so it is never shared between threads.
+	"""
+
+	def __init__(self, callback: ProgressCallback, phase: str, name: str = ""):
+		"""
+		:param callback: what to report to
+		:param phase: "read" or "write"
+		:param name: the file path, passed to callback.begin_file()
+		"""
+		self.callback = callback
+		self.phase = phase
+		self.interval = getattr(callback, "interval", ProgressCallback.interval)
+		self.start_time = time.perf_counter()
+		self.section = ""
+		self.total = 0
+		# when reading, the byte counts given are positions in the file. when writing, they are sizes within the section
+		# being encoded, so the sizes of all the finished sections are added on top.
+		self.base_bytes = 0
+		self._next_time = 0.0
+		callback.begin_file(phase, name)
+
+	def begin(self, section: str, total: int, nbytes: int) -> None:
+		"""
+		Start reporting a new section.
+
+		:param section: name of the section
+		:param total: how many things are in it
+		:param nbytes: bytes done so far, see base_bytes
+		"""
+		self.section = section
+		self.total = total
+		now = time.perf_counter()
+		self._next_time = now + self.interval
+		self.callback.begin_section(self.phase, section, total, self.base_bytes + nbytes, now - self.start_time)
+
+	def tick(self, done: int, nbytes: int) -> None:
+		"""
+		Report progress in the middle of the section, unless the last report was too recent.
+		Loops don't need to call this every time, every few hundred things is plenty. Once everything is done, only end()
+		reports it, so the section never gets two final reports.
+
+		:param done: how many things of this section are done so far
+		:param nbytes: bytes done so far, see base_bytes
+		"""
+		if done >= self.total:
+			return
+		now = time.perf_counter()
+		if now >= self._next_time:
+			self._next_time = now + self.interval
+			self.callback.update(self.phase, self.section, done, self.total, self.base_bytes + nbytes,
+								 now - self.start_time)
+
+	def end(self, nbytes: int) -> None:
+		"""
+		Report that the section is finished.
+
+		:param nbytes: bytes done so far, see base_bytes
+		"""
+		self.callback.end_section(self.phase, self.section, self.total, self.base_bytes + nbytes,
+								  time.perf_counter() - self.start_time)
+		if self.phase == "write":
+			self.base_bytes += nbytes
@@ -0,0 +1,227 @@
+import sys
+import os
+# always, not just when run directly: on Windows the worker processes import this file under a different name
+sys.path.append( os.path.dirname( os.path.dirname( os.path.abspath(__file__) ) ) )
+sys.path.append( os.path.dirname( os.path.abspath(__file__) ) )
+
+import argparse
+import contextlib
+import glob
+import importlib
+import io
+import time
+import traceback
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, NamedTuple, Optional
+
+from pmx_scripting import core
+from pmx_scripting import pipeline
+from pmx_scripting.io import ZIP_PREFIX
+
+helptext = '''> batch:
+Run one or more of the tool scripts over many PMX models at once, without any prompts.
+The tools are run in the order given, each one on the result of the previous one. If any of them changed the model,
+it is written next to the input with the suffixes of every tool that changed it, same as running them one at a time.
+Compressed models like "model.pmx.xz" are read & written compressed. Every model inside a .zip archive is read
+straight from the archive, and the results are written next to the archive.
+Only the tools that don't ask any questions can be used here, see BATCH_TOOLS.
+
+Example:  python tools/batch.py models/ "extra/*.pmx" -t weight_cleanup -t prune_unused_vertices -j 8
+'''
+
+
+# tool script name -> (name of the (pmx) -> (pmx, is_changed) function inside it, output suffix)
+# these have to match the "core.RUN_WITH_TRACEBACK(main, ...)" line at the bottom of each script
+BATCH_TOOLS = {
+	"alphamorph_correct":       ("alphamorph_correct", "_alphamorph"),
+	"bonedeform_fix":           ("bonedeform_fix", "_bonedeform"),
+	"dispframe_fix":            ("dispframe_fix", "_dispframe"),
+	"link_bones":               ("link_bone", "_linked"),
+	"morph_winnow":             ("morph_winnow", "_winnow"),
+	"parse_group_morph":        ("parse_morph", "_morph_parsed"),
+	"prune_invalid_faces":      ("prune_invalid_faces", "_faceprune"),
+	"prune_unused_bones":       ("prune_unused_bones", "_boneprune"),
+	"prune_unused_vertices":    ("prune_unused_vertices", "_vertprune"),
+	"translate_to_english":     ("translate_to_english", "_translate"),
+	"uniquify_names":           ("uniquify_names", "_unique"),
+	"weight_cleanup":           ("weight_cleanup", "_weightfix"),
+}
+
+
+class BatchResult(NamedTuple):
+	input_path: str
+	output_path: Optional[str]  # None if nothing changed or it failed
+	changed_by: List[str]       # names of the tools that changed the model
+	read_time: float
+	tool_time: float
+	write_time: float
+	log: str                    # everything the tools printed
+	error: Optional[str]        # formatted traceback if it failed
+
+	@property
+	def total_time(self) -> float:
+		return self.read_time + self.tool_time + self.write_time
+
+
+# a PMX file can also be compressed, see pmx_scripting.io
+PMX_ENDINGS = (".pmx", ".pmx.gz", ".pmx.xz", ".pmx.lzma", ".pmx.bz2", ".pmx.zst")
+
+
+def _is_pmx_name(name: str) -> bool:
+	return name.lower().endswith(PMX_ENDINGS)
+
+
+def _archive_members(archive_path: str) -> List[str]:
+	# "zip://" paths of every PMX inside a zip archive
+	try:
+		with zipfile.ZipFile(archive_path, "r") as zf:
+			names = zf.namelist()
+	except (OSError, zipfile.BadZipFile) as e:
+		core.MY_PRINT_FUNC("WARNING: unable to open archive '%s': %s" % (archive_path, e))
+		return []
+	return ["%s%s!/%s" % (ZIP_PREFIX, archive_path, name) for name in names if _is_pmx_name(name)]
+
+
+def collect_input_files(patterns: List[str], recursive=False) -> List[str]:
+	"""
+	Turn a list of file paths, glob patterns, and directories into a sorted list of unique PMX file paths.
+	Any .zip archive found is replaced by the "zip://" paths of every PMX inside it.
+
+	:param patterns: list of paths/globs/directories
+	:param recursive: if true, also search the subdirectories of any directory given
+	:return: list of absolute PMX file paths
+	"""
+	found = set()
+	for pattern in patterns:
+		pattern = core.remove_quotes(pattern)
+		if os.path.isdir(pattern):
+			if recursive:
+				matches = glob.glob(os.path.join(glob.escape(pattern), "**", "*"), recursive=True)
+			else:
+				matches = glob.glob(os.path.join(glob.escape(pattern), "*"))
+		else:
+			matches = glob.glob(pattern, recursive=recursive)
+			if not matches:
+				core.MY_PRINT_FUNC("WARNING: '%s' did not match any files" % pattern)
+		for m in matches:
+			if not os.path.isfile(m):
+				continue
+			if _is_pmx_name(m):
+				found.add(os.path.abspath(m))
+			elif m.lower().endswith(".zip"):
+				found.update(_archive_members(os.path.abspath(m)))
+	return sorted(found)
+
+
+def run_tools_on_file(input_filename: str, toolnames: List[str]) -> BatchResult:
+	"""
+	Read one PMX, run each tool function on it in order, and write it out if anything changed. See pipeline.run().
+	This runs in the worker processes, so it never raises: any failure is returned in the result instead.
+	Everything printed along the way is captured instead of shown, so output from different files doesn't get mixed.
+
+	:param input_filename: PMX file path
+	:param toolnames: list of keys of BATCH_TOOLS
+	:return: BatchResult
+	"""
+	logbuf = io.StringIO()
+	with contextlib.redirect_stdout(logbuf):
+		try:
+			stages = []
+			for name in toolnames:
+				funcname, suffix = BATCH_TOOLS[name]
+				stages.append((getattr(importlib.import_module(name), funcname), suffix))
+			# nobody would see the progress lines in the log anyway
+			res = pipeline.run(input_filename, stages, progress=None)
+		except Exception:
+			return BatchResult(input_filename, None, [], 0.0, 0.0, 0.0, logbuf.getvalue(), traceback.format_exc())
+	# report the tool script names, not the function names inside them. if they only said they changed something, none
+	changed_by = [name for name, stage in zip(toolnames, res.stages) if stage.changed] if res.changed else []
+	tool_time = sum(stage.seconds for stage in res.stages)
+	return BatchResult(input_filename, res.output_path, changed_by, res.read_time, tool_time, res.write_time,
+					   logbuf.getvalue(), None)
+
+
+def run_batch(input_files: List[str], toolnames: List[str], workers: int = None, verbose=False) -> List[BatchResult]:
+	"""
+	Run the chain of tools over every input file, spread across a pool of worker processes.
+	Prints one line per file as they finish, and a summary of any failures at the end.
+
+	:param input_files: list of PMX file paths, see collect_input_files()
+	:param toolnames: list of keys of BATCH_TOOLS, run in this order
+	:param workers: number of worker processes, default is one per CPU. if 1, run everything in this process instead.
+	:param verbose: if true, also print everything the tools printed for each file
+	:return: list of BatchResult, in the same order as input_files
+	"""
+	for name in toolnames:
+		if name not in BATCH_TOOLS:
+			raise RuntimeError("unknown or interactive tool '%s', choose from: %s" % (name, ", ".join(BATCH_TOOLS)))
+	if workers is None:
+		workers = os.cpu_count() or 1
+	workers = max(1, min(workers, len(input_files)))
+	core.MY_PRINT_FUNC("Running %s on %d files with %d workers" % (" > ".join(toolnames), len(input_files), workers))
+
+	results = {}
+	start = time.perf_counter()
+
+	def report(r: BatchResult):
+		results[r.input_path] = r
+		if r.error is not None:            status = "FAILED"
+		elif r.output_path is None:        status = "no changes"
+		else:                              status = "-> " + os.path.basename(r.output_path)
+		core.MY_PRINT_FUNC("[%d/%d] %6.2fs (read %.2fs, tools %.2fs, write %.2fs)  %s  %s" % (
+			len(results), len(input_files), r.total_time, r.read_time, r.tool_time, r.write_time,
+			os.path.basename(r.input_path), status))
+		if verbose and r.log:
+			core.MY_PRINT_FUNC(r.log.rstrip())
+
+	if workers == 1:
+		for f in input_files:
+			report(run_tools_on_file(f, toolnames))
+	else:
+		with ProcessPoolExecutor(max_workers=workers) as ex:
+			futures = {ex.submit(run_tools_on_file, f, toolnames): f for f in input_files}
+			for fut in as_completed(futures):
+				try:
+					report(fut.result())
+				except Exception:
+					# the worker itself died, or the result couldn't be sent back
+					report(BatchResult(futures[fut], None, [], 0.0, 0.0, 0.0, "", traceback.format_exc()))
+
+	elapsed = time.perf_counter() - start
+	ordered = [results[f] for f in input_files]
+	failed = [r for r in ordered if r.error is not None]
+	written = [r for r in ordered if r.output_path is not None]
+	core.MY_PRINT_FUNC("")
+	core.MY_PRINT_FUNC("Finished %d files in %.2fs: %d written, %d unchanged, %d failed" % (
+		len(ordered), elapsed, len(written), len(ordered) - len(written) - len(failed), len(failed)))
+	if failed:
+		core.MY_PRINT_FUNC("")
+		core.MY_PRINT_FUNC("===== Failures =====")
+		for r in failed:
+			core.MY_PRINT_FUNC(r.input_path)
+			core.MY_PRINT_FUNC(r.error.rstrip())
+			core.MY_PRINT_FUNC("")
+	return ordered
+
+
+def main(argv: List[str] = None) -> int:
+	parser = argparse.ArgumentParser(description=helptext, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("inputs", nargs="+", help="PMX files, glob patterns, or directories")
+	parser.add_argument("-t", "--tool", dest="tools", action="append", required=True, choices=list(BATCH_TOOLS),
+						help="tool to run, can be given more than once to chain them in that order")
+	parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes (default: one per CPU)")
+	parser.add_argument("-r", "--recursive", action="store_true", help="also search subdirectories of any directory given")
+	parser.add_argument("-v", "--verbose", action="store_true", help="print everything the tools print for each file")
+	args = parser.parse_args(argv)
+
+	input_files = collect_input_files(args.inputs, args.recursive)
+	if not input_files:
+		core.MY_PRINT_FUNC("No PMX files found")
+		return 1
+	results = run_batch(input_files, args.tools, args.workers, args.verbose)
+	return 1 if any(r.error is not None for r in results) else 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -19,7 +19,8 @@ def showprompt(suffix:str):
 	core.MY_PRINT_FUNC("Please enter the path to the PMX model:")
 
 	input_filename = core.prompt_user_filename("PMX File", ".pmx")
-	pmx = read_pmx(input_filename, moreinfo=True)
+	# lazy: sections the tool never touches are never decoded
+	pmx = read_pmx(input_filename, moreinfo=True, lazy=True)
 
 	return pmx, input_filename
 
@@ -74,7 +75,7 @@ def showprompt2(suffix:str, is_sauce:bool):
 		core.MY_PRINT_FUNC("Please enter the path to the Target PMX model: ")
 
 	input_filename = core.prompt_user_filename("PMX File", ".pmx")
-	pmx = read_pmx(input_filename, moreinfo=False)
+	pmx = read_pmx(input_filename, moreinfo=False, lazy=True)
 
 	return pmx, input_filename
 
@@ -7,7 +7,6 @@ from pmx_scripting import core
 from pmx_scripting import pmx_struct as pmxstruct
 
 from common import main2
-import copy
 
 helptext = '''> copy_group_morph:
 Copy Group Morphs from one model to another, based on the name of the morphs.
@@ -49,7 +48,7 @@ def parse_morph(target_pmx: pmxstruct.Pmx, source_pmx: pmxstruct.Pmx):
 		if len(mp.items) == 0:
 			continue
 
-		dup_mp = copy.deepcopy(mp)
+		dup_mp = mp.clone()
 		success = True
 
 		for item in dup_mp.items:
@@ -7,7 +7,6 @@ from pmx_scripting import core
 from pmx_scripting import pmx_struct as pmxstruct
 
 from common import main, EPSILON
-import copy
 
 helptext = '''> parse_group_morph:
 Convert Group Morphs into normal Morphs,
@@ -52,8 +51,8 @@ def parse_morph(pmx: pmxstruct.Pmx):
 			if abs(ratio) < EPSILON:
 				continue
 
-			# Deep Copy to avoid stacking repeated calculation on the same morph
-			child_weights = copy.deepcopy(child_morph.items)
+			# Copy to avoid stacking repeated calculation on the same morph
+			child_weights = pmxstruct.clone_list(child_morph.items)
 
 			# Apply the Impact set in the group morph
 			for ci in child_weights:
@@ -6,7 +6,6 @@ if __name__ == '__main__':
 from pmx_scripting import core
 from pmx_scripting import pmx_struct as pmxstruct
 from pmx_scripting.pmx_utils import delete_faces
-import copy
 
 from common import main
 
@@ -45,7 +44,7 @@ def prune_invalid_faces(pmx: pmxstruct.Pmx, moreinfo=False):
 	# ABC === BCA === CAB
 
 	# create a copy list and rotate all teh copies so that the lowest index is always first (do not modify vertex order of original!)
-	facescopy = copy.deepcopy(pmx.faces)
+	facescopy = pmxstruct.clone_faces(pmx.faces)
 	donothing = lambda x: x							# if i==0, don't change it
 	headtotail = lambda x: x.append(x.pop(0))		# if i==1, pop the head & move it to the tail
 	tailtohead = lambda x: x.insert(0, x.pop(2))	# if i==2, pop the tail & move it to the head